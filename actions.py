@@ -0,0 +1,400 @@
+"""
+Key Actions for Mango Stream Deck
+Every action type - built in or from a plugin - is an ActionType in one
+registry: the config fields it edits, how those compile into a plain tuple
+plan, and the executor a key press dispatches to by table lookup. Plugins are
+listed without importing them and imported the first time a key needs one
+"""
+
+import importlib.util
+import os
+import subprocess
+import time
+from string import Template
+
+from input_injection import InjectionUnavailable
+
+# Folder scanned for plugin modules, one action type per file
+PLUGIN_FOLDER = "plugins"
+
+# Entry point group installed packages register action types under
+ENTRY_POINT_GROUP = "mango_stream_deck.actions"
+
+DEFAULT_SCRIPT_TIMEOUT = 30.0  # Seconds
+DEFAULT_COMMAND_TIMEOUT = 60.0  # Seconds
+DEFAULT_HTTP_TIMEOUT = 10.0  # Seconds
+DEFAULT_HTTP_RETRIES = 1
+DEFAULT_MACRO_SPEED = 1.0
+
+HTTP_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+
+
+class ActionType:
+    """
+    An action a key can run.
+
+    fields: ((config field, label, default), ...) edited in the customize
+    dialog; the first one is the target the batch editor sets.
+    compile(config) -> plan tuple starting with the action name. Plans only
+    hold strings, numbers and tuples so they can be cached on disk; the
+    default is the name followed by the value of every field.
+    execute(app, key_id, plan) runs a press on the Tk thread - or on the
+    global hotkey thread when threaded is set, for executors that only touch
+    the window through app.set_status and app.warn. sends_input marks
+    executors that press keys in the focused window; a global hotkey waits
+    for its own keys to be let go before running them.
+    build_panel(dialog, parent) -> {"frame": ..., "load": ...} is an optional
+    settings panel; without one the dialog shows an entry per field.
+    """
+
+    def __init__(self, name, execute, fields=(), compile=None, build_panel=None, threaded=False, sends_input=False):
+        self.name = name
+        self.execute = execute
+        self.fields = tuple(fields)
+        self.compile = compile or self.compile_fields
+        self.build_panel = build_panel
+        self.threaded = threaded
+        self.sends_input = sends_input
+
+    def compile_fields(self, config):
+        return (self.name,) + tuple(config.get(field) or default for field, _, default in self.fields)
+
+
+def parse_hotkey(hotkey):
+    """'Ctrl + Shift + S' -> ('ctrl', 'shift', 's')"""
+    return tuple(k.strip().lower() for k in hotkey.split("+") if k.strip())
+
+
+def key_name(app, key_id):
+    return app.button_configs.get(key_id, {}).get("text", f"Button {key_id}")
+
+
+# ----------------------------------------------------------------------
+# Built-in actions
+# ----------------------------------------------------------------------
+
+def run_open(app, key_id, plan):
+    app_path = plan[1]
+    if app_path and os.path.exists(app_path):
+        subprocess.Popen([app_path], shell=True)
+        app.set_status(f"Launched: {key_name(app, key_id)}")
+        print(f"Launched application: {app_path}")
+    else:
+        app.set_status(f"{key_name(app, key_id)} clicked!")
+
+
+def run_website(app, key_id, plan):
+    url = plan[1]
+    if url:
+        import webbrowser
+        webbrowser.open(url)
+        app.set_status(f"Opened: {url}")
+        print(f"Opened URL: {url}")
+    else:
+        app.set_status("No URL configured")
+
+
+def run_hotkey(app, key_id, plan):
+    hotkey, keys = plan[1], plan[2]
+    if not keys:
+        app.set_status("No hotkey configured")
+        return
+    try:
+        app.input_focus.hand_off()
+        app.injector.hotkey(keys)
+        app.set_status(f"Pressed: {hotkey}")
+        print(f"Pressed hotkey: {hotkey}")
+    except InjectionUnavailable as e:
+        app.warn("Input Backend Unavailable", str(e))
+        app.set_status("Hotkeys unavailable")
+    except Exception as e:
+        app.set_status(f"Hotkey error: {e}")
+
+
+def run_text(app, key_id, plan):
+    text = plan[1]
+    if not text:
+        app.set_status("No text configured")
+        return
+    try:
+        app.input_focus.hand_off()
+        app.injector.type_text(text)
+        app.set_status(f"Typed: {text[:30]}...")
+        print(f"Typed text: {text}")
+    except InjectionUnavailable as e:
+        app.warn("Input Backend Unavailable", str(e))
+        app.set_status("Text typing unavailable")
+    except Exception as e:
+        app.set_status(f"Type error: {e}")
+
+
+def run_script(app, key_id, plan):
+    code, path, timeout = plan[1], plan[2], plan[3]
+    if not code.strip() and not path:
+        app.set_status("No script configured")
+        return
+    app.script_pool.run(key_id, code, path, timeout)
+    app.set_status(f"Running: {key_name(app, key_id)}")
+
+
+def run_command(app, key_id, plan):
+    command, cwd, timeout = plan[1], plan[2], plan[3]
+    if not command.strip():
+        app.set_status("No command configured")
+        return
+    app.command_runner.run(key_id, command, cwd, timeout)
+    app.set_status(f"Running: {command[:40]}")
+
+
+def template_values(app, key_id):
+    """$names an HTTP key's URL, headers and body may use"""
+    config = app.button_configs.get(key_id, {})
+    now = time.time()
+    return {
+        "key": key_id,
+        "title": config.get("text", f"Button {key_id}"),
+        "counter": config.get("live_counter", 0),
+        "time": time.strftime("%H:%M:%S", time.localtime(now)),
+        "date": time.strftime("%Y-%m-%d", time.localtime(now)),
+        "timestamp": int(now),
+    }
+
+
+def run_http(app, key_id, plan):
+    method, url, headers, body, timeout, retries = plan[1:]
+    if not url:
+        app.set_status("No URL configured")
+        return
+    values = template_values(app, key_id)
+    url = Template(url).safe_substitute(values)
+    headers = tuple((name, Template(value).safe_substitute(values)) for name, value in headers)
+    body = Template(body).safe_substitute(values) if body else ""
+    app.http_pool.request(key_id, method, url, headers, body, timeout, retries)
+    app.set_status(f"{method} {url}")
+
+
+def run_macro(app, key_id, plan):
+    path, speed, max_gap = plan[1], plan[2], plan[3]
+    player = app.macro_player
+    if player.playing and player.key == key_id:
+        # A second press stops the macro
+        player.stop()
+        app.set_status(f"Stopped: {key_name(app, key_id)}")
+        return
+    if not path or not os.path.exists(path):
+        app.set_status("No macro recorded")
+        return
+    try:
+        backend = app.injector.get()
+    except InjectionUnavailable as e:
+        app.warn("Input Backend Unavailable", str(e))
+        app.set_status("Macros unavailable")
+        return
+    app.input_focus.hand_off()
+    player.play(key_id, path, backend, speed, max_gap)
+    app.set_status(f"Playing: {key_name(app, key_id)}")
+
+
+def run_multi_action(app, key_id, plan):
+    app.set_status("Multi Action - Coming soon!")
+
+
+def compile_website(config):
+    url = config.get("url", "")
+    return ("Website", url if url != "https://" else "")
+
+
+def compile_hotkey(config):
+    hotkey = config.get("hotkey", "")
+    return ("Hotkey", hotkey, parse_hotkey(hotkey))
+
+
+def parse_timeout(value, default):
+    try:
+        return max(0.1, float(value or default))
+    except (TypeError, ValueError):
+        return default
+
+
+def compile_script(config):
+    timeout = parse_timeout(config.get("script_timeout"), DEFAULT_SCRIPT_TIMEOUT)
+    return ("Script", config.get("script_code") or "", config.get("script_path") or "", timeout)
+
+
+def compile_command(config):
+    timeout = parse_timeout(config.get("command_timeout"), DEFAULT_COMMAND_TIMEOUT)
+    return ("Command", config.get("command") or "", config.get("command_cwd") or "", timeout)
+
+
+def compile_macro(config):
+    try:
+        speed = min(100.0, max(0.01, float(config.get("macro_speed") or DEFAULT_MACRO_SPEED)))
+    except (TypeError, ValueError):
+        speed = DEFAULT_MACRO_SPEED
+    try:
+        max_gap = max(0.0, float(config.get("macro_max_gap") or 0))
+    except (TypeError, ValueError):
+        max_gap = 0.0
+    return ("Macro", config.get("macro_path") or "", speed, max_gap)
+
+
+def compile_http(config):
+    from http_pool import parse_headers  # http.client loads only once an HTTP key is used
+    method = config.get("http_method") or "GET"
+    try:
+        retries = max(0, int(config.get("http_retries", DEFAULT_HTTP_RETRIES)))
+    except (TypeError, ValueError):
+        retries = DEFAULT_HTTP_RETRIES
+    return (
+        "HTTP",
+        method if method in HTTP_METHODS else "GET",
+        (config.get("http_url") or "").strip(),
+        parse_headers(config.get("http_headers")),
+        config.get("http_body") or "",
+        parse_timeout(config.get("http_timeout"), DEFAULT_HTTP_TIMEOUT),
+        retries
+    )
+
+
+BUILTIN_ACTIONS = [
+    ActionType("Open", run_open, [("app_path", "Application", "")], threaded=True),
+    ActionType("Website", run_website, [("url", "URL", "")], compile=compile_website, threaded=True),
+    ActionType("Hotkey", run_hotkey, [("hotkey", "Hotkey", "")], compile=compile_hotkey, threaded=True,
+               sends_input=True),
+    ActionType("Text", run_text, [("type_text", "Text", "")], threaded=True, sends_input=True),
+    ActionType("Script", run_script, [("script_path", "Script File", ""), ("script_code", "Python Code", ""),
+                                      ("script_timeout", "Timeout (s)", DEFAULT_SCRIPT_TIMEOUT)],
+               compile=compile_script, threaded=True),
+    ActionType("Command", run_command, [("command", "Command", ""), ("command_cwd", "Working Folder", ""),
+                                        ("command_timeout", "Timeout (s)", DEFAULT_COMMAND_TIMEOUT)],
+               compile=compile_command, threaded=True),
+    ActionType("HTTP", run_http, [("http_url", "URL", ""), ("http_method", "Method", "GET"),
+                                  ("http_headers", "Headers", ""), ("http_body", "Body", ""),
+                                  ("http_timeout", "Timeout (s)", DEFAULT_HTTP_TIMEOUT),
+                                  ("http_retries", "Retries", DEFAULT_HTTP_RETRIES)],
+               compile=compile_http, threaded=True),
+    ActionType("Macro", run_macro, [("macro_path", "Macro File", ""), ("macro_speed", "Speed", DEFAULT_MACRO_SPEED),
+                                    ("macro_max_gap", "Longest Pause (s)", 0)],
+               compile=compile_macro, threaded=True, sends_input=True),
+    ActionType("Multi Action", run_multi_action, threaded=True),
+]
+
+
+# ----------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------
+
+class ActionRegistry:
+    """
+    Action types by name.
+
+    Built-ins are registered up front. Plugins are only listed - by file name
+    in the plugins folder ("Home_Assistant.py" is "Home Assistant") and by
+    entry point name - the first time the list is needed, and a plugin module
+    is imported by get() when a key using it is first compiled or edited. A
+    plugin module defines ACTION = ActionType(...); an entry point refers to
+    that object directly ("package.module:ACTION").
+    """
+
+    def __init__(self, folder=PLUGIN_FOLDER, group=ENTRY_POINT_GROUP):
+        self.folder = folder
+        self.group = group
+        self.types = {}  # Name -> loaded ActionType
+        self.builtin = []
+        self._sources = None  # Name -> loader of a plugin, once discovered
+        self._failed = set()
+
+    def register(self, action, builtin=False):
+        self.types[action.name] = action
+        if builtin:
+            self.builtin.append(action.name)
+
+    def names(self):
+        """Built-in action names followed by every discovered plugin"""
+        self.discover()
+        return self.builtin + sorted(name for name in self._sources if name not in self.builtin)
+
+    def is_loaded(self, name):
+        return name in self.types
+
+    def get(self, name):
+        """The ActionType called name, importing its plugin on first use; None if unavailable"""
+        action = self.types.get(name)
+        if action is None and name not in self._failed:
+            action = self._load(name)
+        return action
+
+    def discover(self):
+        """List plugins by name without importing any of them"""
+        if self._sources is not None:
+            return
+        self._sources = {}
+        try:
+            for entry in os.scandir(self.folder):
+                stem, ext = os.path.splitext(entry.name)
+                if ext == ".py" and not stem.startswith("_"):
+                    self._sources[stem.replace("_", " ")] = lambda path=entry.path: self._import_file(path)
+        except OSError:
+            pass  # No plugins folder
+
+        try:
+            from importlib.metadata import entry_points
+            found = entry_points()
+            found = found.select(group=self.group) if hasattr(found, "select") else found.get(self.group, ())
+            for entry_point in found:
+                self._sources.setdefault(entry_point.name, entry_point.load)
+        except Exception as e:
+            print(f"Error listing action plugins: {e}")
+
+    def _load(self, name):
+        self.discover()
+        loader = self._sources.get(name)
+        if loader is None:
+            self._failed.add(name)
+            return None
+        try:
+            action = loader()
+            if not isinstance(action, ActionType):
+                raise TypeError("plugin does not define an ActionType")
+        except Exception as e:
+            print(f"Error loading action plugin {name}: {e}")
+            self._failed.add(name)
+            return None
+        # Keys store the listed name, whatever the plugin calls itself
+        action.name = name
+        self.register(action)
+        return action
+
+    @staticmethod
+    def _import_file(path):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(f"mango_plugins.{stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.ACTION
+
+
+registry = ActionRegistry()
+for _action in BUILTIN_ACTIONS:
+    registry.register(_action, builtin=True)
+
+
+def compile_action(config):
+    """
+    Resolve a key's action settings into a plan: (action type, arguments...).
+
+    Plans only hold strings and tuples so they can be cached on disk.
+    """
+    action_type = config.get("action_type", "Open")
+    action = registry.get(action_type)
+    if action is None:
+        return (action_type,)
+    return action.compile(config)
+
+
+def action_target(action_type):
+    """(config field, label) of an action's main setting, or None"""
+    action = registry.get(action_type)
+    if action is None or not action.fields:
+        return None
+    return action.fields[0][:2]
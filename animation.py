@@ -0,0 +1,192 @@
+"""
+Animated Icons for Mango Stream Deck
+Frames are decoded once, pre-composited at key size, held in a memory-budgeted
+cache and advanced for every animated key by one shared clock
+"""
+
+import time
+from collections import OrderedDict
+
+from PIL import Image, ImageSequence
+
+from key_faces import KEY_WIDTH, KEY_HEIGHT, cover_crop, apply_opacity
+
+# Browsers treat very short GIF delays as "as fast as possible" - clamp like them
+MIN_FRAME_MS = 20
+DEFAULT_FRAME_MS = 100
+
+
+def is_animated(path):
+    """True if the image file has more than one frame"""
+    try:
+        with Image.open(path) as img:
+            return getattr(img, "is_animated", False) and img.n_frames > 1
+    except (OSError, ValueError):
+        return False
+
+
+class AnimatedFace:
+    """Pre-composited frames of one animated icon at one opacity"""
+
+    __slots__ = ("frames", "durations", "images", "nbytes")
+
+    def __init__(self, frames, durations, wrap=None):
+        self.frames = frames
+        self.durations = durations
+        # Display objects (e.g. CTkImage) created once per frame
+        self.images = [wrap(frame) for frame in frames] if wrap else frames
+        # PIL pixels plus the equally sized display copy
+        per_frame = KEY_WIDTH * KEY_HEIGHT * 4
+        self.nbytes = per_frame * len(frames) * (2 if wrap else 1)
+
+
+def decode_frames(path, opacity=100, max_bytes=None):
+    """Decode every frame of path at key size, dropping frames to stay under max_bytes"""
+    frames = []
+    durations = []
+    with Image.open(path) as img:
+        for frame in ImageSequence.Iterator(img):
+            duration = frame.info.get("duration") or DEFAULT_FRAME_MS
+            face = cover_crop(frame.convert('RGBA'), KEY_WIDTH, KEY_HEIGHT)
+            frames.append(apply_opacity(face, opacity))
+            durations.append(max(MIN_FRAME_MS, int(duration)))
+
+    if max_bytes:
+        per_frame = KEY_WIDTH * KEY_HEIGHT * 4
+        # Halve the frame rate until the animation fits, keeping total duration
+        while len(frames) > 1 and len(frames) * per_frame > max_bytes:
+            frames = frames[::2]
+            durations = [sum(durations[i:i + 2]) for i in range(0, len(durations), 2)]
+    return frames, durations
+
+
+class FrameCache:
+    """LRU cache of animated faces bounded by total decoded bytes"""
+
+    def __init__(self, budget_bytes=64 * 1024 * 1024, wrap=None):
+        self.budget_bytes = budget_bytes
+        self.wrap = wrap
+        self._entries = OrderedDict()  # (path, opacity) -> AnimatedFace
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, opacity=100):
+        key = (path, opacity)
+        face = self._entries.get(key)
+        if face is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return face
+
+        self.misses += 1
+        # A single animation may use at most a quarter of the budget
+        factor = 2 if self.wrap else 1
+        frames, durations = decode_frames(path, opacity, max_bytes=self.budget_bytes // (4 * factor))
+        face = AnimatedFace(frames, durations, self.wrap)
+        self._entries[key] = face
+        self.nbytes += face.nbytes
+        self.trim()
+        return face
+
+    def discard(self, path):
+        """Drop every cached opacity of path"""
+        for key in [key for key in self._entries if key[0] == path]:
+            self.nbytes -= self._entries.pop(key).nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def trim(self):
+        """Evict least recently used animations until the cache fits its budget"""
+        while self.nbytes > self.budget_bytes and len(self._entries) > 1:
+            _, face = self._entries.popitem(last=False)
+            self.nbytes -= face.nbytes
+
+
+class AnimationClock:
+    """
+    Advances every animated key from a single timer.
+
+    Each tick moves the keys whose frame is due and hands all new frames to
+    the apply callback in one batch, then sleeps until the next frame is due.
+    """
+
+    def __init__(self, schedule, cancel, apply, max_fps=30):
+        # schedule(delay_ms, callback) / cancel(handle) - normally root.after / root.after_cancel
+        self._schedule = schedule
+        self._cancel = cancel
+        self._apply = apply
+        self.max_fps = max_fps
+        self.keys = {}  # key -> [face, frame index, next due]
+        self._handle = None
+        self._paused = False
+        self.ticks = 0
+
+    def add(self, key, face):
+        """Start animating key with an AnimatedFace; returns the first frame's image"""
+        self.keys[key] = [face, 0, time.monotonic() + face.durations[0] / 1000]
+        self._restart()
+        return face.images[0]
+
+    def remove(self, key):
+        if self.keys.pop(key, None) is not None and not self.keys:
+            self._stop_timer()
+
+    def clear(self):
+        self.keys.clear()
+        self._stop_timer()
+
+    def pause(self):
+        """Stop advancing frames, e.g. while the window is hidden in the tray"""
+        self._paused = True
+        self._stop_timer()
+
+    def resume(self):
+        self._paused = False
+        now = time.monotonic()
+        for state in self.keys.values():
+            state[2] = now + state[0].durations[state[1]] / 1000
+        self._restart()
+
+    def _restart(self):
+        self._stop_timer()
+        self._schedule_next()
+
+    def _stop_timer(self):
+        if self._handle is not None:
+            try:
+                self._cancel(self._handle)
+            except Exception:
+                pass
+            self._handle = None
+
+    def _schedule_next(self):
+        if self._paused or not self.keys:
+            return
+        next_due = min(state[2] for state in self.keys.values())
+        delay = max(1.0 / self.max_fps, next_due - time.monotonic())
+        self._handle = self._schedule(int(delay * 1000), self.tick)
+
+    def tick(self):
+        self._handle = None
+        if self._paused:
+            return
+        self.ticks += 1
+        # Frames due within half a tick are shown now, so keys share ticks
+        horizon = time.monotonic() + 0.5 / self.max_fps
+        changed = {}
+        for key, state in self.keys.items():
+            if state[2] <= horizon:
+                face, index, due = state
+                # Skip frames that were missed so animations keep real time
+                while due <= horizon:
+                    index = (index + 1) % len(face.frames)
+                    due += face.durations[index] / 1000
+                state[1] = index
+                state[2] = due
+                changed[key] = face.images[index]
+        if changed:
+            self._apply(changed)
+        self._schedule_next()
@@ -0,0 +1,114 @@
+"""
+Asset Registry for Mango Stream Deck
+Loads each bundled asset (logos, app icon) once per process and caches size variants
+"""
+
+import os
+import sys
+import threading
+
+from PIL import Image
+
+
+def resource_path(relative_path):
+    """Absolute path to a bundled file, inside a PyInstaller bundle or next to the sources"""
+    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, relative_path)
+
+
+class AssetRegistry:
+    """Process-wide cache of decoded bundled images and their resized variants"""
+
+    LOGO = "logos/mango_256_transparent.png"
+    LOGO_32 = "logos/mango_32_transparent.png"
+    APP_ICON = "icon.ico"
+
+    def __init__(self):
+        self._images = {}  # name -> decoded full-size image
+        self._variants = {}  # (name, size) -> resized image
+        self._ctk_images = {}  # (name, size) -> CTkImage shared by every dialog
+        self._lock = threading.Lock()  # The tray thread loads assets too
+
+    def path(self, name):
+        return resource_path(name)
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    def image(self, name):
+        """Decoded full-size image, or None if the asset is missing"""
+        with self._lock:
+            if name not in self._images:
+                img = None
+                try:
+                    img = Image.open(self.path(name))
+                    img.load()
+                except (OSError, ValueError) as e:
+                    print(f"Could not load asset {name}: {e}")
+                    img = None
+                self._images[name] = img
+            return self._images[name]
+
+    def sized(self, name, size):
+        """Image resized to size with LANCZOS, computed once per size"""
+        key = (name, size)
+        variant = self._variants.get(key)
+        if variant is None:
+            img = self.image(name)
+            if img is None:
+                return None
+            variant = img if img.size == size else img.resize(size, Image.Resampling.LANCZOS)
+            self._variants[key] = variant
+        return variant
+
+    def ctk_image(self, name, size):
+        """CTkImage of the asset at size, shared between widgets"""
+        key = (name, size)
+        ctk_img = self._ctk_images.get(key)
+        if ctk_img is None:
+            img = self.sized(name, size)
+            if img is None:
+                return None
+            import customtkinter as ctk
+            ctk_img = ctk.CTkImage(light_image=img, size=size)
+            self._ctk_images[key] = ctk_img
+        return ctk_img
+
+    def logo(self, size):
+        """Mango logo as a square CTkImage"""
+        return self.ctk_image(self.LOGO, (size, size))
+
+    def tray_image(self):
+        """Image for the system tray icon"""
+        # Use the .ico file first (best for Windows)
+        for name, size in ((self.APP_ICON, None), (self.LOGO_32, None), (self.LOGO, (32, 32))):
+            if self.exists(name):
+                img = self.image(name) if size is None else self.sized(name, size)
+                if img is not None:
+                    return img
+        # Create a simple colored icon if no logo found
+        return Image.new('RGB', (32, 32), color='#FF9800')
+
+    def set_window_icon(self, window):
+        """Apply the app icon to a Tk window, if available"""
+        try:
+            if self.exists(self.APP_ICON):
+                window.iconbitmap(self.path(self.APP_ICON))
+        except Exception as e:
+            print(f"Could not load icon: {e}")
+
+    def nbytes(self):
+        """Approximate decoded bytes held by the registry"""
+        images = [img for img in self._images.values() if img is not None]
+        images += list(self._variants.values())
+        seen = set()
+        total = 0
+        for img in images:
+            if id(img) not in seen:
+                seen.add(id(img))
+                total += img.width * img.height * len(img.getbands())
+        return total
+
+
+# Shared instance used across the app
+assets = AssetRegistry()
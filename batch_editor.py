@@ -0,0 +1,345 @@
+"""
+Batch Editor for Mango Stream Deck
+Applies the same appearance, icon or action fields to every selected key in
+one transaction - one render pass and one config write
+"""
+
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import customtkinter as ctk
+import os
+
+from actions import action_target, registry
+from themes import THEME_PALETTES
+
+
+class BatchEditor:
+    """Reusable dialog that edits all selected keys at once"""
+
+    def __init__(self, app):
+        self.app = app
+        self.key_ids = []
+        self.image_path = None  # Icon chosen for the batch (None clears icons)
+        self.apply_vars = {}  # Section -> BooleanVar, checked sections are applied
+
+        self.dialog = tk.Toplevel(app.root)
+        self.dialog.withdraw()
+        self.dialog.geometry("560x620")
+        self.dialog.transient(app.root)
+        self.dialog.resizable(False, False)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.hide)
+
+        scrollable_frame = ctk.CTkScrollableFrame(self.dialog, width=520, height=570)
+        scrollable_frame.pack(fill="both", expand=True, padx=15, pady=15)
+        self.main_container = ctk.CTkFrame(scrollable_frame, fg_color="transparent")
+        self.main_container.pack(fill="both", expand=True)
+
+        self.title_label = ctk.CTkLabel(self.main_container, text="", font=("Arial", 20, "bold"))
+        self.title_label.pack(anchor="w", pady=(0, 5))
+        ctk.CTkLabel(
+            self.main_container,
+            text="Only checked sections are changed on the selected keys",
+            font=("Arial", 10),
+            text_color="gray"
+        ).pack(anchor="w", pady=(0, 10))
+
+        self._build_text_appearance()
+        self._build_color()
+        self._build_icon()
+        self._build_action()
+        self._build_buttons()
+
+    def _section(self, name, title):
+        """Section frame whose caption is the checkbox that enables it"""
+        frame = ctk.CTkFrame(self.main_container)
+        frame.pack(fill="x", pady=(0, 15))
+
+        self.apply_vars[name] = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            frame,
+            text=title,
+            variable=self.apply_vars[name],
+            font=("Arial", 11, "bold")
+        ).pack(anchor="w", padx=15, pady=(10, 5))
+
+        content = ctk.CTkFrame(frame, fg_color="transparent")
+        content.pack(fill="x", padx=15, pady=(0, 15))
+        return content
+
+    def _enable_on_edit(self, name, *variables):
+        """Editing a field checks its section"""
+        for var in variables:
+            var.trace('w', lambda *args, n=name: self.apply_vars[n].set(True))
+
+    # ------------------------------------------------------------------
+    # Building (runs once)
+    # ------------------------------------------------------------------
+
+    def _build_text_appearance(self):
+        content = self._section("text", "TEXT APPEARANCE")
+
+        ctk.CTkLabel(content, text="Size:", width=50).pack(side="left", padx=(0, 5))
+        self.text_size_var = tk.StringVar(value="12")
+        ctk.CTkEntry(content, textvariable=self.text_size_var, width=50).pack(side="left", padx=(0, 15))
+
+        ctk.CTkLabel(content, text="Color:", width=50).pack(side="left", padx=(0, 5))
+        self.text_color_var = tk.StringVar(value="white")
+        ctk.CTkEntry(content, textvariable=self.text_color_var, width=80).pack(side="left", padx=(0, 10))
+        for color in ["white", "black", "#FFEB3B", "#00BCD4", "#FF5722"]:
+            ctk.CTkButton(
+                content,
+                text="",
+                width=22,
+                height=22,
+                fg_color=color,
+                hover_color=color,
+                command=lambda c=color: self.text_color_var.set(c)
+            ).pack(side="left", padx=1)
+
+        self._enable_on_edit("text", self.text_size_var, self.text_color_var)
+
+    def _build_color(self):
+        content = self._section("color", "COLOR")
+
+        color_row = ctk.CTkFrame(content, fg_color="transparent")
+        color_row.pack(fill="x")
+        self.color_var = tk.StringVar(value="#2196F3")
+        ctk.CTkEntry(color_row, textvariable=self.color_var, width=100).pack(side="left", padx=(0, 10))
+        for color in ["#2196F3", "#4CAF50", "#F44336", "#FF9800", "#9C27B0", "#607D8B"]:
+            ctk.CTkButton(
+                color_row,
+                text="",
+                width=25,
+                height=25,
+                fg_color=color,
+                hover_color=color,
+                command=lambda c=color: self.color_var.set(c)
+            ).pack(side="left", padx=2)
+
+        opacity_row = ctk.CTkFrame(content, fg_color="transparent")
+        opacity_row.pack(fill="x", pady=(10, 0))
+        ctk.CTkLabel(opacity_row, text="Opacity:", width=60).pack(side="left")
+        self.color_opacity_var = tk.IntVar(value=100)
+        ctk.CTkSlider(
+            opacity_row,
+            from_=0,
+            to=100,
+            variable=self.color_opacity_var,
+            width=200,
+            number_of_steps=100
+        ).pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.color_opacity_label = ctk.CTkLabel(opacity_row, text="100%", width=40)
+        self.color_opacity_label.pack(side="left")
+        self.color_opacity_var.trace(
+            'w', lambda *args: self.color_opacity_label.configure(text=f"{self.color_opacity_var.get()}%")
+        )
+
+        self._enable_on_edit("color", self.color_var, self.color_opacity_var)
+
+    def _build_icon(self):
+        content = self._section("icon", "ICON")
+
+        icon_row = ctk.CTkFrame(content, fg_color="transparent")
+        icon_row.pack(fill="x")
+        self.icon_info = ctk.CTkLabel(icon_row, text="No icon (clears icons)", anchor="w")
+        self.icon_info.pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(
+            icon_row,
+            text="Clear",
+            command=lambda: self.set_icon(None),
+            width=70,
+            fg_color="#555555",
+            hover_color="#666666"
+        ).pack(side="right", padx=(5, 0))
+        self.browse_btn = ctk.CTkButton(icon_row, text="Browse...", command=self.select_image, width=90)
+        self.browse_btn.pack(side="right")
+
+        opacity_row = ctk.CTkFrame(content, fg_color="transparent")
+        opacity_row.pack(fill="x", pady=(10, 0))
+        ctk.CTkLabel(opacity_row, text="Opacity:", width=60).pack(side="left")
+        self.image_opacity_var = tk.IntVar(value=100)
+        ctk.CTkSlider(
+            opacity_row,
+            from_=0,
+            to=100,
+            variable=self.image_opacity_var,
+            width=200,
+            number_of_steps=100
+        ).pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.image_opacity_label = ctk.CTkLabel(opacity_row, text="100%", width=40)
+        self.image_opacity_label.pack(side="left")
+        self.image_opacity_var.trace(
+            'w', lambda *args: self.image_opacity_label.configure(text=f"{self.image_opacity_var.get()}%")
+        )
+
+        self._enable_on_edit("icon", self.image_opacity_var)
+
+    def _build_action(self):
+        content = self._section("action", "ACTION")
+
+        self.action_type_var = tk.StringVar(value="Open")
+        ctk.CTkOptionMenu(
+            content,
+            values=registry.names(),
+            variable=self.action_type_var,
+            width=150
+        ).pack(anchor="w")
+
+        value_row = ctk.CTkFrame(content, fg_color="transparent")
+        value_row.pack(fill="x", pady=(10, 0))
+        self.action_value_label = ctk.CTkLabel(value_row, text="", width=90, anchor="w")
+        self.action_value_label.pack(side="left")
+        self.action_value_var = tk.StringVar()
+        self.action_value_entry = ctk.CTkEntry(value_row, textvariable=self.action_value_var)
+        self.action_value_entry.pack(side="left", fill="x", expand=True)
+
+        self.action_type_var.trace('w', self.update_action_field)
+        self._enable_on_edit("action", self.action_type_var, self.action_value_var)
+        self.update_action_field()
+
+    def _build_buttons(self):
+        button_container = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        button_container.pack(anchor="e", pady=(10, 0))
+
+        ctk.CTkButton(
+            button_container,
+            text="Cancel",
+            command=self.hide,
+            width=100,
+            height=35,
+            fg_color="#555555",
+            hover_color="#666666"
+        ).pack(side="left", padx=5)
+
+        self.apply_btn = ctk.CTkButton(
+            button_container,
+            text="Apply",
+            command=self.apply,
+            width=140,
+            height=35,
+            fg_color="#4CAF50",
+            hover_color="#45a049"
+        )
+        self.apply_btn.pack(side="left", padx=5)
+
+    # ------------------------------------------------------------------
+    # Opening
+    # ------------------------------------------------------------------
+
+    def open(self, key_ids):
+        """Show the editor for a set of keys; every section starts unchecked"""
+        self.key_ids = sorted(key_ids)
+        for var in self.apply_vars.values():
+            var.set(False)
+
+        count = len(self.key_ids)
+        self.dialog.title(f"Edit {count} Keys")
+        self.title_label.configure(text=f"Edit {count} keys")
+        self.apply_btn.configure(text=f"Apply to {count} keys")
+
+        self.dialog.configure(bg=THEME_PALETTES[self.app.current_theme]["dialog_bg"])
+        self.dialog.deiconify()
+        self.dialog.lift()
+        self.dialog.grab_set()
+        self.dialog.focus_set()
+
+    def hide(self):
+        self.dialog.grab_release()
+        self.dialog.withdraw()
+
+    # ------------------------------------------------------------------
+    # Field callbacks
+    # ------------------------------------------------------------------
+
+    def update_action_field(self, *args):
+        target = action_target(self.action_type_var.get())
+        if target is None:
+            self.action_value_label.configure(text="")
+            self.action_value_entry.configure(state="disabled")
+        else:
+            self.action_value_label.configure(text=f"{target[1]}:")
+            self.action_value_entry.configure(state="normal")
+
+    def set_icon(self, image_path):
+        self.image_path = image_path
+        self.icon_info.configure(text=os.path.basename(image_path) if image_path else "No icon (clears icons)")
+        self.apply_vars["icon"].set(True)
+
+    def select_image(self):
+        filename = filedialog.askopenfilename(
+            title="Select Icon",
+            filetypes=[
+                ("Image files", "*.png *.jpg *.jpeg *.gif *.bmp *.webp"),
+                ("All files", "*.*")
+            ]
+        )
+        if filename:
+            # Normalized once on the ingest worker, then shared by every selected key
+            in_icons_folder = os.path.dirname(os.path.abspath(filename)) == os.path.abspath(self.app.icons_folder)
+            job = self.app.icon_ingestor.submit(filename, self.app.icons_folder, only_if_needed=in_icons_folder)
+            self.browse_btn.configure(state="disabled")
+            self.apply_btn.configure(state="disabled")
+            self.poll_ingest(job)
+
+    def poll_ingest(self, job):
+        if not job.done.is_set():
+            self.icon_info.configure(text=f"{job.stage}...")
+            self.dialog.after(30, lambda: self.poll_ingest(job))
+            return
+
+        self.browse_btn.configure(state="normal")
+        self.apply_btn.configure(state="normal")
+        if job.error is not None:
+            messagebox.showerror("Error", f"Failed to import icon: {job.error}")
+            self.set_icon(self.image_path)
+            return
+        self.set_icon(job.result)
+
+    # ------------------------------------------------------------------
+    # Applying
+    # ------------------------------------------------------------------
+
+    def collect_changes(self):
+        """Config fields of the checked sections, or None if a value is invalid"""
+        checked = {name for name, var in self.apply_vars.items() if var.get()}
+        changes = {}
+
+        if "text" in checked:
+            try:
+                size = int(self.text_size_var.get())
+            except ValueError:
+                size = 0
+            if not 6 <= size <= 72:
+                messagebox.showerror("Invalid Text Size", "Text size must be between 6 and 72", parent=self.dialog)
+                return None
+            changes["text_size"] = size
+            changes["text_color"] = self.text_color_var.get()
+
+        if "color" in checked:
+            color = self.color_var.get()
+            if not (color.startswith("#") and len(color) == 7):
+                messagebox.showerror("Invalid Color", "Color must look like #2196F3", parent=self.dialog)
+                return None
+            changes["color"] = color
+            changes["color_opacity"] = self.color_opacity_var.get()
+
+        if "icon" in checked:
+            changes["image_path"] = self.image_path
+            changes["image_opacity"] = self.image_opacity_var.get()
+
+        if "action" in checked:
+            action_type = self.action_type_var.get()
+            changes["action_type"] = action_type
+            target = action_target(action_type)
+            if target is not None:
+                changes[target[0]] = self.action_value_var.get()
+
+        return changes
+
+    def apply(self):
+        changes = self.collect_changes()
+        if changes is None:
+            return
+        if changes:
+            self.app.apply_batch(self.key_ids, changes)
+        self.hide()
@@ -0,0 +1,944 @@
+"""
+Benchmark Suite for Mango Stream Deck
+Measures the hot paths of the deck without needing a display
+
+Usage:
+  python benchmark.py              run every benchmark
+  python benchmark.py live_tiles   run selected benchmarks
+"""
+
+import heapq
+import sys
+import time
+
+from PIL import Image
+
+from key_faces import KEY_WIDTH, KEY_HEIGHT, draw_overlay_text
+
+
+class TimerLoop:
+    """Minimal stand-in for Tk's after/after_cancel event loop"""
+
+    def __init__(self):
+        self._timers = []
+        self._cancelled = set()
+        self._next_id = 0
+        self.callbacks = 0
+
+    def after(self, delay_ms, callback):
+        self._next_id += 1
+        heapq.heappush(self._timers, (time.monotonic() + delay_ms / 1000, self._next_id, callback))
+        return self._next_id
+
+    def after_cancel(self, handle):
+        self._cancelled.add(handle)
+
+    def run(self, duration):
+        """Run timers for duration seconds, sleeping between deadlines like Tk does"""
+        end = time.monotonic() + duration
+        while self._timers:
+            deadline, handle, callback = self._timers[0]
+            if deadline > end:
+                break
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            heapq.heappop(self._timers)
+            if handle in self._cancelled:
+                self._cancelled.discard(handle)
+                continue
+            self.callbacks += 1
+            callback()
+        remaining = end - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+def report(name, rows):
+    """Print benchmark results as aligned name/value rows"""
+    print(f"\n== {name} ==")
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"  {label:<{width}}  {value}")
+
+
+def bench_live_tiles(duration=5.0, tiles=64):
+    """CPU cost of refreshing 64 live tiles through the shared scheduler"""
+    from live_tiles import LiveTileScheduler
+
+    loop = TimerLoop()
+    base = Image.new('RGBA', (KEY_WIDTH, KEY_HEIGHT), (33, 150, 243, 255))
+    rendered = {"keys": 0}
+
+    def render(changed):
+        # Same composition the deck does for each changed tile
+        for key, value in changed.items():
+            draw_overlay_text(base, value, size=22)
+        rendered["keys"] += len(changed)
+
+    scheduler = LiveTileScheduler(loop.after, loop.after_cancel, render, max_fps=10)
+    sources = ["Clock"] * 32 + ["CPU"] * 16 + ["Memory"] * 8 + ["Counter"] * 8
+    for key, source in enumerate(sources[:tiles], start=1):
+        scheduler.set_tile(key, {"live_source": source})
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    loop.run(duration)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    report("live_tiles", [
+        ("tiles", tiles),
+        ("duration", f"{wall:.2f} s"),
+        ("timer callbacks", loop.callbacks),
+        ("frames rendered", scheduler.frames),
+        ("key renders", rendered["keys"]),
+        ("CPU time", f"{cpu * 1000:.1f} ms"),
+        ("CPU usage", f"{100 * cpu / wall:.2f} %"),
+    ])
+
+
+def create_app(name):
+    """Build a hidden deck window, or return None when no display is available"""
+    try:
+        import customtkinter as ctk
+        root = ctk.CTk()
+    except Exception as e:  # TclError without a display
+        print(f"\n== {name} ==\n  skipped: {e}")
+        return None
+    from main import StreamDeckApp
+    root.withdraw()
+    return StreamDeckApp(root)
+
+
+def bench_customize_dialog(opens=20):
+    """Open-to-interactive latency of the reusable customize dialog"""
+    from perf import metrics
+
+    app = create_app("customize_dialog")
+    if app is None:
+        return
+    try:
+        for i in range(opens):
+            app.customize_button(i % len(app.buttons) + 1)
+            app.customize_dialog.hide()
+        samples = list(metrics.samples["customize_open"])
+        build = metrics.last("customize_build")
+    finally:
+        app.quit_app()
+
+    warm = samples[1:]
+    report("customize_dialog", [
+        ("opens", opens),
+        ("one-time build", f"{build * 1000:.1f} ms"),
+        ("first open", f"{samples[0] * 1000:.1f} ms"),
+        ("warm open (mean)", f"{sum(warm) / len(warm) * 1000:.1f} ms"),
+        ("warm open (max)", f"{max(warm) * 1000:.1f} ms"),
+        ("frame budget", "16.7 ms"),
+    ])
+
+
+def bench_icon_ingest(runs=5):
+    """Key face decode cost and disk size before and after icon ingest"""
+    import os
+    import tempfile
+    from icon_ingest import ingest_icon
+    from key_faces import cover_crop
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "photo.jpg")
+        photo = Image.effect_mandelbrot((6000, 4000), (-2.0, -1.2, 1.0, 1.2), 100).convert('RGB')
+        photo.save(source, quality=92)
+
+        def face_time(path):
+            start = time.perf_counter()
+            for _ in range(runs):
+                with Image.open(path) as img:
+                    cover_crop(img, KEY_WIDTH, KEY_HEIGHT)
+            return (time.perf_counter() - start) / runs
+
+        start = time.perf_counter()
+        stored = ingest_icon(source, folder)
+        ingest = time.perf_counter() - start
+
+        report("icon_ingest", [
+            ("source", "6000x4000 JPEG"),
+            ("ingest (worker thread)", f"{ingest * 1000:.1f} ms"),
+            ("key face from original", f"{face_time(source) * 1000:.1f} ms"),
+            ("key face from ingested", f"{face_time(stored) * 1000:.1f} ms"),
+            ("original size", f"{os.path.getsize(source) / 1024:.0f} KiB"),
+            ("ingested size", f"{os.path.getsize(stored) / 1024:.1f} KiB"),
+        ])
+
+
+def bench_animation(duration=5.0, keys=16):
+    """CPU and frame memory for 16 animated keys on the shared animation clock"""
+    import os
+    import tempfile
+    from PIL import ImageDraw
+    from animation import AnimationClock, FrameCache
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Four distinct 24-frame GIFs, each shown on four keys
+        paths = []
+        for n in range(4):
+            frames = []
+            for i in range(24):
+                frame = Image.new('RGB', (300, 200), (40 * n, 90, 160))
+                ImageDraw.Draw(frame).ellipse((i * 10, 50, i * 10 + 80, 130), fill="#FFEB3B")
+                frames.append(frame)
+            path = os.path.join(folder, f"anim_{n}.gif")
+            frames[0].save(path, save_all=True, append_images=frames[1:], duration=40, loop=0)
+            paths.append(path)
+
+        loop = TimerLoop()
+        applied = {"frames": 0}
+
+        def apply(changed):
+            applied["frames"] += len(changed)
+
+        cache = FrameCache()
+        clock = AnimationClock(loop.after, loop.after_cancel, apply)
+
+        start = time.perf_counter()
+        faces = [cache.get(paths[key % len(paths)]) for key in range(keys)]
+        decode = time.perf_counter() - start
+        for key, face in enumerate(faces):
+            clock.add(key, face)
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        loop.run(duration)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+    report("animation", [
+        ("animated keys", keys),
+        ("decode (4 GIFs x 24 frames)", f"{decode * 1000:.1f} ms"),
+        ("cache hits / misses", f"{cache.hits} / {cache.misses}"),
+        ("frame cache memory", f"{cache.nbytes / (1024 * 1024):.1f} MiB"),
+        ("clock ticks", f"{clock.ticks} ({clock.ticks / wall:.1f}/s)"),
+        ("key frames applied", applied["frames"]),
+        ("CPU usage", f"{100 * cpu / wall:.2f} %"),
+    ])
+
+
+def bench_profile_archive(icons=200, icon_kib=512):
+    """Peak Python memory and time to export and import a profile with many large icons"""
+    import os
+    import tempfile
+    import tracemalloc
+    import profile_archive
+
+    with tempfile.TemporaryDirectory() as folder:
+        source_icons = os.path.join(folder, "icons")
+        os.makedirs(source_icons)
+        buttons = {}
+        for index in range(icons):
+            # Every other key shares its icon content with the previous one
+            path = os.path.join(source_icons, f"icon_{index}.bin")
+            seed = index - index % 2
+            with open(path, 'wb') as f:
+                f.write(seed.to_bytes(4, "big") * (icon_kib * 256))
+            buttons[str(index + 1)] = {"text": f"Key {index + 1}", "image_path": path}
+        archive_path = os.path.join(folder, "profile" + profile_archive.ARCHIVE_EXTENSION)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        stored = profile_archive.export_profile({"buttons": buttons}, archive_path)
+        export_time = time.perf_counter() - start
+        export_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+
+        target = os.path.join(folder, "target")
+        os.makedirs(target)
+        start = time.perf_counter()
+        profile_archive.import_profile(archive_path, os.path.join(target, "button_config.json"),
+                                       os.path.join(target, "icons"))
+        import_time = time.perf_counter() - start
+        import_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        report("profile_archive", [
+            ("icons referenced", f"{icons} x {icon_kib} KiB"),
+            ("icons stored (dedup)", stored),
+            ("archive size", f"{os.path.getsize(archive_path) / 1024 / 1024:.1f} MiB"),
+            ("export", f"{export_time * 1000:.0f} ms, peak {export_peak / 1024:.0f} KiB"),
+            ("import", f"{import_time * 1000:.0f} ms, peak {import_peak / 1024:.0f} KiB"),
+        ])
+
+
+def bench_warm_start(keys=32, runs=5):
+    """Startup config load and key face preparation, cold versus from the warm start snapshot"""
+    import json
+    import os
+    import tempfile
+    from PIL import Image
+    import warm_start
+    from actions import compile_action
+    from key_faces import KEY_WIDTH, KEY_HEIGHT, cover_crop, apply_opacity
+
+    with tempfile.TemporaryDirectory() as folder:
+        config_path = os.path.join(folder, "button_config.json")
+        journal_path = os.path.join(folder, "button_config.layout.jsonl")
+        snapshot_path = os.path.join(folder, "warm_start.bin")
+        buttons = {}
+        for index in range(keys):
+            path = os.path.join(folder, f"icon_{index}.png")
+            Image.new("RGB", (1024, 1024), (index * 7 % 256, 90, 160)).save(path)
+            buttons[index + 1] = {"text": f"Key {index + 1}", "image_path": path, "image_opacity": 80,
+                                  "action_type": "Hotkey", "hotkey": "Ctrl + Shift + S"}
+        with open(config_path, 'w') as f:
+            json.dump({"grid_cols": 8, "grid_rows": 4, "buttons": buttons}, f, indent=2)
+
+        def cold():
+            with open(config_path) as f:
+                loaded = json.load(f)
+            configs = {int(k): v for k, v in loaded["buttons"].items()}
+            faces = {}
+            for key_id, config in configs.items():
+                base_key = f"{config['image_path']}_{config['image_opacity']}"
+                img = apply_opacity(cover_crop(Image.open(config["image_path"]), KEY_WIDTH, KEY_HEIGHT),
+                                    config["image_opacity"])
+                faces[key_id] = (base_key, config["image_path"], img)
+            return loaded, {key_id: compile_action(c) for key_id, c in configs.items()}, faces
+
+        def warm():
+            snapshot = warm_start.load(snapshot_path, "bench", config_path, journal_path)
+            for key_id, config in snapshot.config["buttons"].items():
+                face = snapshot.face(int(key_id), f"{config['image_path']}_{config['image_opacity']}",
+                                     config["image_path"])
+                assert face is not None
+            snapshot.close()
+
+        cold_times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            loaded, plans, faces = cold()
+            cold_times.append(time.perf_counter() - start)
+        warm_start.write(snapshot_path, "bench", config_path, journal_path, loaded, plans, faces)
+
+        warm_times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            warm()
+            warm_times.append(time.perf_counter() - start)
+
+        cold_ms = sorted(cold_times)[runs // 2] * 1000
+        warm_ms = sorted(warm_times)[runs // 2] * 1000
+        report("warm_start", [
+            ("keys", f"{keys} with 1024x1024 icons"),
+            ("snapshot size", f"{os.path.getsize(snapshot_path) / 1024:.0f} KiB"),
+            ("cold load (median)", f"{cold_ms:.1f} ms"),
+            ("warm load (median)", f"{warm_ms:.1f} ms"),
+            ("speedup", f"{cold_ms / warm_ms:.1f}x"),
+        ])
+
+
+def bench_grid_renderer(rows=32, cols=32, scroll_steps=20):
+    """Build, scroll and window resize time of a 32x32 deck, canvas renderer against a widget per key"""
+    from layout import DeckLayout
+
+    app = create_app("grid_renderer")
+    if app is None:
+        return
+    saved = (app.grid_rows, app.grid_cols, app.grid_renderer, app.layout.to_dict())
+    rows_out = [("deck", f"{cols}x{rows} keys")]
+    try:
+        # The canvas needs a mapped window to know its viewport
+        app.root.deiconify()
+        app.root.geometry("1000x700")
+        app.root.update()
+        for renderer in ("canvas", "widgets"):
+            app.grid_rows, app.grid_cols, app.grid_renderer = rows, cols, renderer
+            start = time.perf_counter()
+            app.create_button_grid()
+            app.root.update()
+            build = time.perf_counter() - start
+            rows_out.append((f"{renderer}: build", f"{build * 1000:.0f} ms"))
+
+            if app.canvas_deck is not None:
+                rows_out.append((f"{renderer}: keys drawn", f"{len(app.canvas_deck.drawn)} of {rows * cols}"))
+                steps = []
+                for step in range(scroll_steps):
+                    start = time.perf_counter()
+                    app.canvas_deck.scroll_units(1 if step < scroll_steps // 2 else -1)
+                    app.root.update()
+                    steps.append(time.perf_counter() - start)
+                rows_out.append((f"{renderer}: scroll one row", f"mean {sum(steps) / len(steps) * 1000:.1f} ms, "
+                                                                f"max {max(steps) * 1000:.1f} ms"))
+
+            start = time.perf_counter()
+            app.root.geometry("1200x800")
+            app.root.update()
+            app.root.geometry("1000x700")
+            app.root.update()
+            rows_out.append((f"{renderer}: window resize x2", f"{(time.perf_counter() - start) * 1000:.0f} ms"))
+    finally:
+        app.grid_rows, app.grid_cols, app.grid_renderer, layout = saved
+        app.layout = DeckLayout.from_dict(layout, app.grid_rows, app.grid_cols)
+        app.create_button_grid()
+        app.quit_app()
+
+    rows_out.append(("frame budget", "16.7 ms"))
+    report("grid_renderer", rows_out)
+
+
+def bench_command_index(keys=10000, runs=50):
+    """Command palette search latency over a deck with 10k configured keys"""
+    import random
+    from actions import action_target
+    from command_index import CommandIndex
+
+    random.seed(7)
+    words = ("chrome firefox spotify slack zoom obs scene mute camera mic deploy build test git push "
+             "pull terminal code editor browser mail calendar notes music volume brightness").split()
+    configs = {}
+    for key_id in range(1, keys + 1):
+        configs[key_id] = {
+            "text": f"{' '.join(random.sample(words, 2))} {key_id}",
+            "action_type": "Open" if key_id % 2 else "Website",
+            "app_path": f"C:/Apps/{random.choice(words)}/{random.choice(words)}.exe",
+            "url": f"https://{random.choice(words)}.example.com",
+        }
+
+    def lookup(key_id):
+        # What StreamDeckApp.command_fields returns for a key
+        config = configs.get(key_id)
+        if config is None:
+            return None
+        target = action_target(config["action_type"])[0]
+        return {"text": config["text"], target: config[target]}
+
+    index = CommandIndex(lookup)
+
+    index.reset(configs)
+    start = time.perf_counter()
+    index.refresh()
+    build = time.perf_counter() - start
+
+    rows = [("keys", keys), ("full index build", f"{build * 1000:.0f} ms")]
+    for query in ("c", "chr", "chrome", "mute cam", "slack.example", "spotfy"):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        rows.append((f"search {query!r}", f"median {samples[runs // 2] * 1000:.3f} ms, max {samples[-1] * 1000:.3f} ms"))
+
+    # One edited key is re-indexed on the next search
+    configs[1]["text"] = "renamed key"
+    index.invalidate(1)
+    start = time.perf_counter()
+    index.search("renamed")
+    rows.append(("search after one edit", f"{(time.perf_counter() - start) * 1000:.3f} ms"))
+    report("command_index", rows)
+
+
+def bench_scheduler(schedules=5000, duration=5.0):
+    """Timer drift, wake-ups and CPU of 5000 recurring schedules on the scheduler thread"""
+    from perf import metrics
+    from scheduler import ActionScheduler
+
+    batches = []
+    scheduler = ActionScheduler(batches.append)
+    start = time.perf_counter()
+    for key_id in range(schedules):
+        # Spread over 1-10 s periods, plus a chain of keys running after key 0
+        scheduler.set_schedule(key_id, {"schedule_type": "Every", "schedule_value": str(1 + key_id % 10)})
+    for key_id in range(schedules, schedules + 100):
+        scheduler.set_schedule(key_id, {"schedule_type": "After", "schedule_value": "0", "schedule_delay": "0.5"})
+    setup = time.perf_counter() - start
+
+    metrics.samples.pop("schedule_drift", None)
+    cpu_start = time.process_time()
+    time.sleep(1.5)
+    scheduler.key_fired(0)
+    time.sleep(duration - 1.5)
+    cpu = time.process_time() - cpu_start
+    scheduler.stop()
+
+    drift = sorted(metrics.recent("schedule_drift", metrics.history))
+    report("scheduler", [
+        ("schedules", schedules + 100),
+        ("register all", f"{setup * 1000:.1f} ms"),
+        ("runs", sum(len(batch) for batch in batches)),
+        ("wake-ups", len(batches)),
+        ("drift (last 100)", f"median {drift[len(drift) // 2] * 1000:.2f} ms, max {drift[-1] * 1000:.2f} ms"),
+        ("missed runs", scheduler.missed),
+        ("CPU", f"{cpu / duration * 100:.2f}% of one core"),
+    ])
+
+
+def bench_action_registry(counts=(0, 100, 1000), presses=100000):
+    """Startup, listing and first-press cost of the action registry with 0 to 1000 plugins installed"""
+    import os
+    import tempfile
+    from actions import ActionRegistry, BUILTIN_ACTIONS
+
+    rows = []
+    with tempfile.TemporaryDirectory() as folder:
+        written = 0
+        for count in counts:
+            for index in range(written, count):
+                with open(os.path.join(folder, f"Plugin_{index}.py"), "w") as f:
+                    f.write("from actions import ActionType\n"
+                            f"ACTION = ActionType('Plugin {index}', lambda app, key_id, plan: None, "
+                            "[('plugin_value', 'Value', '')])\n")
+            written = count
+
+            start = time.perf_counter()
+            registry = ActionRegistry(folder=folder)
+            for action in BUILTIN_ACTIONS:
+                registry.register(action, builtin=True)
+            startup = time.perf_counter() - start
+
+            start = time.perf_counter()
+            registry.names()
+            listing = time.perf_counter() - start
+
+            start = time.perf_counter()
+            registry.get("Plugin 0" if count else "Open")
+            first = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(presses):
+                registry.get("Open")
+            lookup = (time.perf_counter() - start) / presses
+
+            rows.append((f"{count} plugins", f"startup {startup * 1e6:.0f} us, list {listing * 1000:.2f} ms, "
+                                             f"first press {first * 1000:.2f} ms, dispatch {lookup * 1e9:.0f} ns"))
+    report("action_registry", rows)
+
+
+def bench_script_pool(runs=20):
+    """Press-to-finish latency of a small script on a warm worker against a fresh interpreter"""
+    import subprocess
+    import threading
+    from script_pool import ScriptPool
+
+    code = "import json, datetime\nprint(json.dumps({'now': datetime.datetime.now().isoformat()}))"
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, "-c", code], capture_output=True)
+    cold = (time.perf_counter() - start) / runs
+
+    finished = threading.Event()
+    pool = ScriptPool(lambda key, stream, line: None, lambda key, error, seconds: finished.set())
+    start = time.perf_counter()
+    pool.run("warm-up", code)
+    finished.wait(60)
+    warm_up = time.perf_counter() - start
+
+    samples = []
+    for _ in range(runs):
+        finished.clear()
+        start = time.perf_counter()
+        pool.run("bench", code)
+        finished.wait(10)
+        samples.append(time.perf_counter() - start)
+    pool.stop()
+    samples.sort()
+
+    report("script_pool", [
+        ("fresh interpreter", f"{cold * 1000:.1f} ms per run"),
+        ("pool start + first run", f"{warm_up * 1000:.0f} ms (once, in the background)"),
+        ("warm worker", f"median {samples[runs // 2] * 1000:.2f} ms, max {samples[-1] * 1000:.2f} ms"),
+    ])
+
+
+def bench_command_runner(commands=40, lines=2000):
+    """Caller blocking time and throughput of the async command runner against sequential subprocess.run"""
+    import subprocess
+    import threading
+    from command_runner import CommandRunner
+
+    command = f"{sys.executable} -c \"for i in range({lines}): print('line', i)\""
+
+    start = time.perf_counter()
+    for _ in range(commands):
+        subprocess.run(command, shell=True, capture_output=True)
+    sequential = time.perf_counter() - start
+
+    finished = threading.Semaphore(0)
+    updates = []
+    runner = CommandRunner(lambda key, stream, line: updates.append(line),
+                           lambda key, exit_code, seconds, error: finished.release())
+    runner.start()
+    blocking = []
+    start = time.perf_counter()
+    for key in range(commands):
+        call = time.perf_counter()
+        runner.run(key, command)
+        blocking.append(time.perf_counter() - call)
+    for _ in range(commands):
+        finished.acquire()
+    pooled = time.perf_counter() - start
+    runner.stop()
+
+    report("command_runner", [
+        ("commands", f"{commands} x {lines} output lines"),
+        ("sequential subprocess.run", f"{sequential * 1000:.0f} ms"),
+        (f"runner, {runner.max_concurrent} at once", f"{pooled * 1000:.0f} ms"),
+        ("caller blocked per press", f"max {max(blocking) * 1e6:.0f} us"),
+        ("output updates passed on", f"{len(updates)} of {commands * lines} lines"),
+    ])
+
+
+def bench_http_pool(requests=200):
+    """Request latency to a local stand-in server, a new connection per press against the keep-alive pool"""
+    import threading
+    import urllib.request
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from http_pool import HttpPool
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+        # Answer in one segment like real servers do, not headers and body apart
+        disable_nagle_algorithm = True
+        wbufsize = 64 * 1024
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/hook"
+    payload = '{"scene": "live"}'
+
+    def measure(send):
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            send()
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        return f"median {samples[requests // 2] * 1000:.2f} ms, p95 {samples[int(requests * 0.95)] * 1000:.2f} ms"
+
+    def fresh():
+        request = urllib.request.Request(url, data=payload.encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+    pool = HttpPool(lambda *args: None)
+    headers = (("Content-Type", "application/json"),)
+    rows = [
+        ("new connection each", measure(fresh)),
+        ("keep-alive pool", measure(lambda: pool.fetch("POST", url, headers, payload))),
+        ("connections opened", f"{pool.connections_opened} for {requests} requests"),
+    ]
+    pool.close()
+    server.shutdown()
+
+    # A server closing idle keep-alive connections sooner than the pool drops them
+    received = []
+
+    class ShortIdleHandler(Handler):
+        timeout = 0.3  # Seconds the server keeps an idle connection
+
+        def do_POST(self):
+            received.append(self.path)
+            super().do_POST()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ShortIdleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/hook"
+    pool = HttpPool(lambda *args: None)
+    for label, body in (("empty POST", ""), ("POST with body", payload)):
+        received.clear()
+        try:
+            pool.fetch("POST", url, headers, body)
+            time.sleep(ShortIdleHandler.timeout + 0.2)
+            pool.fetch("POST", url, headers, body)
+            result = f"sent {len(received)} of 2 after the server closed the idle connection"
+        except Exception as e:
+            result = f"FAILED: {type(e).__name__}: {e} ({len(received)} of 2 reached the server)"
+        rows.append((f"stale {label}", result))
+    pool.close()
+    server.shutdown()
+    report("http_pool", rows)
+
+
+def bench_input_injection(presses=200):
+    """First-press and warm press-to-keystroke latency of each input backend (Shift is pressed)"""
+    from input_injection import Injector, InjectionUnavailable
+
+    rows = []
+    for name in ("fake", "pyautogui", "xtest", "uinput"):
+        injector = Injector(name)
+        start = time.perf_counter()
+        try:
+            injector.hotkey(("shift",))
+        except InjectionUnavailable as e:
+            rows.append((name, f"unavailable: {str(e).splitlines()[0]}"))
+            continue
+        cold = time.perf_counter() - start
+
+        samples = []
+        for _ in range(presses):
+            start = time.perf_counter()
+            injector.hotkey(("shift",))
+            done = time.perf_counter()
+            if name == "fake":
+                # The recorded key down is the keystroke
+                done = injector.backend.events[-2][0]
+            samples.append(done - start)
+        injector.close()
+        samples.sort()
+        rows.append((name, f"first press {cold * 1000:.1f} ms unwarmed, then median "
+                           f"{samples[presses // 2] * 1e6:.0f} us, max {samples[-1] * 1e6:.0f} us"))
+    report("input_injection", rows)
+
+
+def bench_first_keystroke(presses=20):
+    """Text key click to first keystroke: the old fixed 100 ms sleep on an unwarmed backend against the focus hand-off on a prewarmed one"""
+    import contextlib
+    import io
+    import actions
+    from input_focus import InputFocus, FakeFocus
+    from input_injection import Injector
+
+    class App:
+        button_configs = {}
+
+        def set_status(self, text):
+            pass
+
+    def first_key(injector):
+        return injector.backend.events[0][0]
+
+    plan = actions.compile_action({"action_type": "Text", "type_text": "hello"})
+
+    # Before: sleep while the deck still holds focus, then import and set up the backend on the press
+    old = []
+    for _ in range(presses):
+        injector = Injector("fake")
+        start = time.perf_counter()
+        time.sleep(0.1)
+        injector.type_text(plan[1])
+        old.append(first_key(injector) - start)
+
+    # Now: backend prepared ahead of time, focus handed back to the previous window first
+    new = []
+    handoff = []
+    for _ in range(presses):
+        app = App()
+        app.injector = Injector("fake")
+        app.injector.get()
+        app.input_focus = InputFocus("previous-window", backend=FakeFocus())
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            actions.run_text(app, 1, plan)
+        new.append(first_key(app.injector) - start)
+        handoff.append(app.input_focus.backend.activated[0][0] - start)
+    old.sort()
+    new.sort()
+    handoff.sort()
+
+    report("first_keystroke", [
+        ("fixed 100 ms sleep", f"median {old[presses // 2] * 1000:.2f} ms"),
+        ("focus hand-off", f"median {new[presses // 2] * 1000:.3f} ms "
+                           f"(previous window focused after {handoff[presses // 2] * 1e6:.0f} us)"),
+    ])
+
+
+def bench_macro(events=200000, replay_events=2000, interval=0.001):
+    """Macro file size and recording cost, and replay timing: absolute deadlines against sleeping each gap"""
+    import os
+    import tempfile
+    import tracemalloc
+    from input_injection import FakeBackend
+    from macro import (EVENT, KEY_DOWN, KEY_UP, MOUSE_MOVE, FakeRecorder, MacroPlayer, MacroRecording,
+                       iter_events)
+
+    def feed(recording, count, step):
+        recorder = recording.backend
+        for i in range(count):
+            t = i * step
+            if i % 10 == 0:
+                recorder.feed(t, KEY_DOWN, "a")
+            elif i % 10 == 1:
+                recorder.feed(t, KEY_UP, "a")
+            else:
+                recorder.feed(t, MOUSE_MOVE, 0, i % 1920, i % 1080)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "long.mmacro")
+
+        def record():
+            recording = MacroRecording(path, FakeRecorder())
+            recording.start()
+            feed(recording, events, 0.008)
+            recording.stop()
+
+        start = time.perf_counter()
+        record()
+        record_time = time.perf_counter() - start
+        tracemalloc.start()
+        record()
+        _, record_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        as_list = [(i * 8000, MOUSE_MOVE, 0, i % 1920, i % 1080) for i in range(events)]
+        _, list_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del as_list
+
+        tracemalloc.start()
+        streamed = sum(1 for _ in iter_events(path))
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        size = os.path.getsize(path)
+        rows = [
+            ("recorded", f"{streamed} events, {size / 1024:.0f} KB on disk ({EVENT.size} bytes each), "
+                         f"{record_time / events * 1e6:.2f} us per event"),
+            ("memory", f"recording peak {record_peak / 1024:.0f} KB, streaming replay peak {stream_peak / 1024:.0f} KB, "
+                       f"same events as tuples {list_peak / 1024 / 1024:.1f} MB"),
+        ]
+
+        path = os.path.join(folder, "short.mmacro")
+        recording = MacroRecording(path, FakeRecorder())
+        recording.start()
+        feed(recording, replay_events, interval)
+        recording.stop()
+
+        backend = FakeBackend()
+        start = time.perf_counter()
+        MacroPlayer.replay(path, backend)
+        elapsed = time.perf_counter() - start
+        expected = (replay_events - 1) * interval
+        errors = sorted(abs(t - start - i * interval) for i, (t, *_) in enumerate(backend.events))
+        rows.append(("absolute deadlines", f"median error {errors[len(errors) // 2] * 1e6:.0f} us, "
+                                           f"max {errors[-1] * 1000:.2f} ms, end {(elapsed - expected) * 1000:+.1f} ms"))
+
+        # What sleeping each recorded gap in turn does over the same macro
+        start = time.perf_counter()
+        for delta, *_ in iter_events(path):
+            time.sleep(delta / 1_000_000)
+        naive = time.perf_counter() - start
+        rows.append(("sleep per gap", f"end {(naive - expected) * 1000:+.1f} ms after {replay_events} events"))
+
+        start = time.perf_counter()
+        MacroPlayer.replay(path, FakeBackend(), speed=4.0)
+        rows.append(("speed 4x", f"{(time.perf_counter() - start) * 1000:.0f} ms for a {expected * 1000:.0f} ms macro"))
+    report("macro", rows)
+
+
+def bench_global_hotkeys(presses=200):
+    """Chord to first injected keystroke through the listener thread, and the chord table at deck scale"""
+    import contextlib
+    import io
+    import threading
+    import actions
+    from global_hotkeys import CHORD_KEYS, GlobalHotkeys, FakeHotkeys, build_table, format_chord, parse_chord
+    from input_focus import InputFocus, FakeFocus
+    from input_injection import Injector
+
+    class App:
+        def set_status(self, text):
+            pass
+
+    app = App()
+    app.button_configs = {1: {"action_type": "Hotkey", "hotkey": "ctrl+c", "global_hotkey": "Ctrl+Alt+1"}}
+    app.injector = Injector("fake")
+    app.injector.get()
+    app.input_focus = InputFocus("previous-window", backend=FakeFocus())
+    plan = actions.compile_action(app.button_configs[1])
+    fired = threading.Event()
+    latencies = []
+
+    def dispatch(key_id, chord, received):
+        # What StreamDeckApp.trigger_global does for a threaded action that sends input
+        hotkeys.wait_released(chord)
+        actions.registry.get(plan[0]).execute(app, key_id, plan)
+        latencies.append(time.perf_counter() - received)
+        fired.set()
+
+    backend = FakeHotkeys()
+    hotkeys = GlobalHotkeys(dispatch, backend=backend)
+    hotkeys.load(app.button_configs)
+    chord = parse_chord("Ctrl+Alt+1")
+    rows = []
+    # Keys let go before the chord reaches the app, and the usual way - a moment after
+    for label, hold in (("chord to keystroke", 0.0), ("release to keystroke", 0.05)):
+        delays = []
+        latencies.clear()
+        runs = presses if not hold else presses // 10
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(runs):
+                fired.clear()
+                app.injector.backend.events.clear()
+                start = time.perf_counter()
+                backend.press(chord, hold)
+                fired.wait(1.0)
+                delays.append(app.injector.backend.events[0][0] - max(start, backend.released_at))
+        delays.sort()
+        latencies.sort()
+        rows.append((label, f"median {delays[runs // 2] * 1e6:.0f} us, max {delays[-1] * 1000:.2f} ms "
+                                 f"(chord to action done: median {latencies[runs // 2] * 1000:.2f} ms, "
+                                 f"{hold * 1000:.0f} ms hold)"))
+    hotkeys.stop()
+
+    # Every chord there is - each modifier combination with each key
+    configs = {}
+    for mods in range(1, 16):
+        for key in sorted(CHORD_KEYS):
+            configs[len(configs)] = {"global_hotkey": format_chord((mods, key))}
+    start = time.perf_counter()
+    table, problems = build_table(configs)
+    built = time.perf_counter() - start
+    chords = list(table)
+    start = time.perf_counter()
+    for chord in chords:
+        table.get(chord)
+    lookup = (time.perf_counter() - start) / len(chords)
+    rows.append(("chord table", f"all {len(table)} chords ({len(problems)} rejected) built in {built * 1000:.1f} ms, "
+                                f"{lookup * 1e9:.0f} ns per lookup"))
+    report("global_hotkeys", rows)
+
+
+BENCHMARKS = {
+    "live_tiles": bench_live_tiles,
+    "customize_dialog": bench_customize_dialog,
+    "icon_ingest": bench_icon_ingest,
+    "animation": bench_animation,
+    "profile_archive": bench_profile_archive,
+    "warm_start": bench_warm_start,
+    "grid_renderer": bench_grid_renderer,
+    "command_index": bench_command_index,
+    "scheduler": bench_scheduler,
+    "action_registry": bench_action_registry,
+    "script_pool": bench_script_pool,
+    "command_runner": bench_command_runner,
+    "http_pool": bench_http_pool,
+    "input_injection": bench_input_injection,
+    "first_keystroke": bench_first_keystroke,
+    "macro": bench_macro,
+    "global_hotkeys": bench_global_hotkeys,
+}
+
+
+def main(names):
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            continue
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,418 @@
+"""
+Canvas Deck Renderer for Mango Stream Deck
+Draws every key as items on a single scrollable tk.Canvas instead of one
+CTkButton per key, for decks larger than the widget grid handles well. Only
+keys inside the scrolled viewport have canvas items and rendered images; the
+rest of the deck is plain Python state.
+"""
+
+import math
+import time
+import tkinter as tk
+import customtkinter as ctk
+
+from key_faces import KEY_WIDTH, KEY_HEIGHT
+from perf import metrics
+
+# Same spacing as padx/pady of the widget grid
+KEY_PADDING = 5
+CELL_WIDTH = KEY_WIDTH + 2 * KEY_PADDING
+CELL_HEIGHT = KEY_HEIGHT + 2 * KEY_PADDING
+
+# Rows/columns drawn beyond the viewport, so small scrolls show keys that are ready
+OVERSCAN = 1
+
+# Pointer distance (px) from the canvas edge that scrolls during a drag, and seconds per step
+AUTOSCROLL_MARGIN = 24
+AUTOSCROLL_INTERVAL = 0.08
+
+# Pressed keys shift down-right like a pushed button
+PRESS_OFFSET = 1
+
+DEFAULT_OPTIONS = {
+    "text": "",
+    "image": None,
+    "fg_color": "#2196F3",
+    "hover_color": "#1976D2",
+    "text_color": "white",
+    "font": ("Arial", 12, "bold"),
+    "corner_radius": 15,
+    "border_width": 0,
+    "border_color": None,
+}
+
+
+def rounded_rect_points(x0, y0, x1, y1, radius):
+    """Polygon points that draw a rounded rectangle with smooth=True"""
+    radius = max(0, min(radius, (x1 - x0) / 2, (y1 - y0) / 2))
+    return [
+        x0 + radius, y0, x1 - radius, y0, x1, y0, x1, y0 + radius,
+        x1, y1 - radius, x1, y1, x1 - radius, y1, x0 + radius, y1,
+        x0, y1, x0, y1 - radius, x0, y0 + radius, x0, y0,
+    ]
+
+
+class CanvasKey:
+    """
+    State of one key on a CanvasDeck.
+
+    Offers the part of the CTkButton interface the app uses on key widgets
+    (configure, cget, grid, grid_remove, winfo_manager, destroy), so the rest
+    of the app drives both renderers the same way.
+    """
+
+    __slots__ = ("deck", "key_id", "options", "cell")
+
+    def __init__(self, deck, key_id, **options):
+        self.deck = deck
+        self.key_id = key_id
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update(options)
+        self.cell = None  # (row, col) while on the grid
+
+    def configure(self, **options):
+        # Size options of the widget renderer do not apply - cells are fixed
+        options.pop("width", None)
+        options.pop("height", None)
+        self.options.update(options)
+        self.deck.invalidate(self.key_id)
+
+    def cget(self, name):
+        return self.options.get(name)
+
+    def grid(self, row, column, **grid_options):
+        """Place the key on a cell (padding and sticky of the widget grid are ignored)"""
+        self.deck.place(self, row, column)
+
+    def grid_remove(self):
+        self.deck.unplace(self)
+
+    def winfo_manager(self):
+        return "grid" if self.cell is not None else ""
+
+    def destroy(self):
+        self.deck.unplace(self)
+        self.deck.keys.pop(self.key_id, None)
+
+
+class CanvasDeck:
+    """
+    Scrollable canvas that draws the keys in view.
+
+    Scrolling or resizing draws keys entering the viewport and deletes the
+    items of keys leaving it; the app is told through key_entered_view and
+    key_left_view so it renders and releases key images on the same schedule.
+    Pointer events are hit-tested to cells and passed to the app's
+    KeyDragController, so clicks, drags and selection work as on the widget grid.
+    """
+
+    def __init__(self, master, app, bg):
+        self.app = app
+        self.bg = bg  # Frame color behind the keys, a (light, dark) pair
+        self.canvas = tk.Canvas(master, highlightthickness=0, bd=0)
+        self.v_scroll = ctk.CTkScrollbar(master, orientation="vertical", command=self.yview)
+        self.h_scroll = ctk.CTkScrollbar(master, orientation="horizontal", command=self.xview)
+        self.canvas.configure(yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        self.h_scroll.grid(row=1, column=0, sticky="ew")
+
+        self.keys = {}  # Key ID -> CanvasKey
+        self.cells = {}  # (row, col) -> CanvasKey placed there
+        self.drawn = {}  # Key ID -> canvas item IDs, for keys in the viewport
+        self.photos = {}  # Key ID -> PhotoImage on the canvas (Tk only keeps a name)
+        self.rows = 0
+        self.cols = 0
+        self.scale = 1.0
+        self.appearance = "dark"
+        self._dirty = set()  # Drawn keys whose options changed
+        self._refresh = None  # Pending after_idle refresh
+        self._hover = None
+        self._pressed = None
+        self._autoscrolled = 0.0
+        self.update_appearance()
+
+        self.canvas.bind("<Configure>", lambda e: self.refresh())
+        self.canvas.bind("<Motion>", self.on_hover)
+        self.canvas.bind("<Leave>", lambda e: self.set_hover(None))
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Button-3>", self.on_right_click)
+        # Windows/macOS report wheel deltas, X11 sends buttons 4 and 5
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll_units(-1 if e.delta > 0 else 1))
+        self.canvas.bind("<Shift-MouseWheel>", lambda e: self.scroll_units(-1 if e.delta > 0 else 1, horizontal=True))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_units(-1))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_units(1))
+        self.canvas.bind("<Shift-Button-4>", lambda e: self.scroll_units(-1, horizontal=True))
+        self.canvas.bind("<Shift-Button-5>", lambda e: self.scroll_units(1, horizontal=True))
+
+    def create_key(self, key_id, **options):
+        key = CanvasKey(self, key_id, **options)
+        self.keys[key_id] = key
+        return key
+
+    def place(self, key, row, col):
+        if key.cell == (row, col):
+            return
+        if key.cell is not None and self.cells.get(key.cell) is key:
+            del self.cells[key.cell]
+        key.cell = (row, col)
+        self.cells[key.cell] = key
+        if key.key_id in self.drawn:
+            # Moved within the deck - redraw at the new cell, or drop it if now out of view
+            self._dirty.add(key.key_id)
+        self.schedule_refresh()
+
+    def unplace(self, key):
+        if key.cell is not None and self.cells.get(key.cell) is key:
+            del self.cells[key.cell]
+        key.cell = None
+        if key.key_id in self.drawn:
+            self._undraw(key.key_id)
+            self.app.key_left_view(key.key_id)
+
+    def invalidate(self, key_id):
+        """Redraw a key at idle if it is in view - keys out of view are drawn when scrolled in"""
+        if key_id in self.drawn:
+            self._dirty.add(key_id)
+            self.schedule_refresh()
+
+    def in_view(self, key_id):
+        return key_id in self.drawn
+
+    def resize(self, rows, cols):
+        """Set the deck size in cells"""
+        self.rows = rows
+        self.cols = cols
+        self.canvas.configure(
+            scrollregion=(0, 0, cols * self.cell_width, rows * self.cell_height),
+            xscrollincrement=self.cell_width,
+            yscrollincrement=self.cell_height
+        )
+        self.schedule_refresh()
+
+    @property
+    def cell_width(self):
+        return round(CELL_WIDTH * self.scale)
+
+    @property
+    def cell_height(self):
+        return round(CELL_HEIGHT * self.scale)
+
+    def cell_at_canvas(self, x, y):
+        """(row, col) of a canvas coordinate - may lie outside the deck"""
+        return math.floor(y / self.cell_height), math.floor(x / self.cell_width)
+
+    def cell_at(self, x_root, y_root, clamp=False):
+        """Grid cell under a screen position, or None outside the deck (nearest cell with clamp)"""
+        x = self.canvas.canvasx(x_root - self.canvas.winfo_rootx())
+        y = self.canvas.canvasy(y_root - self.canvas.winfo_rooty())
+        row, col = self.cell_at_canvas(x, y)
+        if clamp:
+            return min(max(row, 0), self.rows - 1), min(max(col, 0), self.cols - 1)
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        return row, col
+
+    def key_at_event(self, event):
+        """Key under the pointer, or None over the padding between keys"""
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        row, col = self.cell_at_canvas(x, y)
+        key = self.cells.get((row, col))
+        if key is None:
+            return None
+        x0, y0, x1, y1 = self.key_bounds(row, col)
+        if not (x0 <= x <= x1 and y0 <= y <= y1):
+            return None
+        return key.key_id
+
+    def key_bounds(self, row, col):
+        pad = KEY_PADDING * self.scale
+        x0 = col * self.cell_width + pad
+        y0 = row * self.cell_height + pad
+        return x0, y0, x0 + KEY_WIDTH * self.scale, y0 + KEY_HEIGHT * self.scale
+
+    def visible_cells(self):
+        """(first row, last row, first col, last col) in view, including the overscan"""
+        x = self.canvas.canvasx(0)
+        y = self.canvas.canvasy(0)
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        first_row = max(0, math.floor(y / self.cell_height) - OVERSCAN)
+        last_row = min(self.rows - 1, math.floor((y + height) / self.cell_height) + OVERSCAN)
+        first_col = max(0, math.floor(x / self.cell_width) - OVERSCAN)
+        last_col = min(self.cols - 1, math.floor((x + width) / self.cell_width) + OVERSCAN)
+        return first_row, last_row, first_col, last_col
+
+    def schedule_refresh(self):
+        if self._refresh is None:
+            self._refresh = self.canvas.after_idle(self.refresh)
+
+    def refresh(self):
+        """Bring the canvas items in line with the viewport and changed keys"""
+        if self._refresh is not None:
+            self.canvas.after_cancel(self._refresh)
+            self._refresh = None
+        with metrics.timed("canvas_refresh"):
+            self._sync_viewport()
+
+    def _sync_viewport(self):
+        first_row, last_row, first_col, last_col = self.visible_cells()
+        in_view = set()
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                key = self.cells.get((row, col))
+                if key is not None:
+                    in_view.add(key.key_id)
+
+        for key_id in [key_id for key_id in self.drawn if key_id not in in_view]:
+            self._undraw(key_id)
+            self.app.key_left_view(key_id)
+
+        for key_id in in_view:
+            if key_id not in self.drawn:
+                # In view before its image is rendered, so the app's render is not skipped
+                self.drawn[key_id] = ()
+                self.app.key_entered_view(key_id)
+                self._dirty.add(key_id)
+
+        dirty = self._dirty
+        self._dirty = set()
+        for key_id in dirty:
+            if key_id in self.drawn:
+                self._draw(key_id)
+
+    def redraw(self):
+        """Redraw every key in view, e.g. after a theme change"""
+        self.update_appearance()
+        self._dirty.update(self.drawn)
+        self.refresh()
+
+    def update_appearance(self):
+        self.appearance = ctk.get_appearance_mode().lower()
+        self.scale = ctk.ScalingTracker.get_widget_scaling(self.canvas)
+        self.canvas.configure(bg=self.color(self.bg))
+
+    def color(self, value):
+        """Resolve a CTk color (name or (light, dark) pair) for the current appearance"""
+        if isinstance(value, (tuple, list)):
+            return value[1] if self.appearance == "dark" else value[0]
+        return value
+
+    def _undraw(self, key_id):
+        self.canvas.delete(*self.drawn.pop(key_id, ()))
+        self.photos.pop(key_id, None)
+        self._dirty.discard(key_id)
+
+    def _draw(self, key_id):
+        key = self.keys.get(key_id)
+        if key is None or key.cell is None:
+            return
+        self.canvas.delete(*self.drawn.get(key_id, ()))
+        options = key.options
+        x0, y0, x1, y1 = self.key_bounds(*key.cell)
+        if key_id == self._pressed:
+            x0, y0, x1, y1 = x0 + PRESS_OFFSET, y0 + PRESS_OFFSET, x1 + PRESS_OFFSET, y1 + PRESS_OFFSET
+
+        fill = options["hover_color"] if key_id == self._hover else options["fg_color"]
+        fill = self.color(fill)
+        if fill == "transparent":
+            fill = self.color(self.bg)
+        border_width = options["border_width"] or 0
+        items = [self.canvas.create_polygon(
+            rounded_rect_points(x0, y0, x1, y1, options["corner_radius"] * self.scale),
+            smooth=True,
+            fill=fill,
+            outline=self.color(options["border_color"]) if border_width else "",
+            width=border_width * self.scale
+        )]
+
+        image = options["image"]
+        if image is not None:
+            if isinstance(image, ctk.CTkImage):
+                image = image.create_scaled_photo_image(self.scale, self.appearance)
+            self.photos[key_id] = image
+            items.append(self.canvas.create_image((x0 + x1) / 2, (y0 + y1) / 2, image=image))
+        else:
+            self.photos.pop(key_id, None)
+
+        if options["text"]:
+            # Over an icon the title sits at the bottom edge, like the compound="top" buttons
+            text_y = y1 - 12 * self.scale if image is not None else (y0 + y1) / 2
+            items.append(self.canvas.create_text(
+                (x0 + x1) / 2, text_y,
+                text=options["text"],
+                fill=self.color(options["text_color"]),
+                font=options["font"],
+                width=(x1 - x0) - 8 * self.scale
+            ))
+        self.drawn[key_id] = tuple(items)
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def xview(self, *args):
+        self.canvas.xview(*args)
+        self.refresh()
+
+    def scroll_units(self, units, horizontal=False):
+        if horizontal:
+            self.canvas.xview_scroll(units, "units")
+        else:
+            self.canvas.yview_scroll(units, "units")
+        self.refresh()
+
+    def set_hover(self, key_id):
+        if key_id == self._hover:
+            return
+        previous, self._hover = self._hover, key_id
+        for changed in (previous, key_id):
+            if changed is not None:
+                self.invalidate(changed)
+
+    def set_pressed(self, key_id):
+        previous, self._pressed = self._pressed, key_id
+        for changed in (previous, key_id):
+            if changed is not None:
+                self.invalidate(changed)
+
+    def on_hover(self, event):
+        self.set_hover(self.key_at_event(event))
+
+    def on_press(self, event):
+        key_id = self.key_at_event(event)
+        self.set_pressed(key_id)
+        self.app.key_drag.on_press(event, key_id)
+
+    def on_drag(self, event):
+        if self._pressed is not None:
+            self.set_pressed(None)  # A drag is not a press
+        self.autoscroll(event)
+        self.app.key_drag.on_motion(event)
+
+    def autoscroll(self, event):
+        """Keep a drag or marquee going past the edge of the viewport, one cell per step"""
+        now = time.monotonic()
+        if now - self._autoscrolled < AUTOSCROLL_INTERVAL:
+            return
+        rows = -1 if event.y < AUTOSCROLL_MARGIN else 1 if event.y > self.canvas.winfo_height() - AUTOSCROLL_MARGIN else 0
+        cols = -1 if event.x < AUTOSCROLL_MARGIN else 1 if event.x > self.canvas.winfo_width() - AUTOSCROLL_MARGIN else 0
+        if rows or cols:
+            self._autoscrolled = now
+            if rows:
+                self.canvas.yview_scroll(rows, "units")
+            if cols:
+                self.canvas.xview_scroll(cols, "units")
+            self.refresh()
+
+    def on_release(self, event):
+        self.set_pressed(None)
+        self.app.key_drag.on_release(event)
+
+    def on_right_click(self, event):
+        key_id = self.key_at_event(event)
+        if key_id is not None:
+            self.app.customize_button(key_id)
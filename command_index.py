@@ -0,0 +1,309 @@
+"""
+Command Index for Mango Stream Deck
+Trigram index over key titles, action targets and palette commands. Entries
+are re-indexed lazily, only when they changed, so searching a very large deck
+costs a few set intersections per keystroke
+"""
+
+import heapq
+import math
+from collections import Counter
+from itertools import combinations
+
+# How much a match counts in an entry's title, and in any other field (a key's action target)
+TITLE_FIELD = "text"
+TITLE_WEIGHT = 4
+TARGET_WEIGHT = 2
+
+MAX_RESULTS = 12
+
+# Share of a word's trigrams a fuzzy match must contain
+FUZZY_THRESHOLD = 0.5
+
+# Set intersections a fuzzy token may cost before its trigram hits are counted one by one instead
+MAX_INTERSECTIONS = 16
+
+# Ranks of palette commands start here, after every key
+COMMAND_RANK = 1 << 60
+
+
+def normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+def text_trigrams(text):
+    grams = set()
+    for word in text.split():
+        grams |= word_trigrams(word)
+    return grams
+
+
+def word_trigrams(word):
+    """Trigrams of a word, plus the padded ones its 1 and 2 letter prefixes map to"""
+    grams = {"  " + word[0]}
+    if len(word) > 1:
+        grams.add(" " + word[:2])
+    for i in range(len(word) - 2):
+        grams.add(word[i:i + 3])
+    return grams
+
+
+def prefix_trigrams(token):
+    """Padded trigrams a word starting with token has"""
+    if len(token) == 1:
+        return {"  " + token}
+    return {"  " + token[0], " " + token[:2]}
+
+
+def query_trigrams(token):
+    """Trigrams a document must contain to match a query token"""
+    if len(token) == 1:
+        return {"  " + token}
+    if len(token) == 2:
+        return {" " + token}
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class IndexedEntry:
+    __slots__ = ("fields", "grams", "title_grams")
+
+    def __init__(self, fields, title):
+        self.fields = fields  # ((normalized text, weight), ...)
+        self.grams = set()
+        for text, _ in fields:
+            self.grams |= text_trigrams(text)
+        self.title_grams = text_trigrams(title)
+
+    def score(self, tokens):
+        """Weight of the best field each token appears in, 0 if one is missing"""
+        total = 0
+        for token in tokens:
+            best = 0
+            word_start = " " + token
+            for text, weight in self.fields:
+                if token not in text:
+                    continue
+                # Word starts rank above matches inside a word - any occurrence counts, not just the first
+                if text.startswith(token) or word_start in text:
+                    weight += 1
+                best = max(best, weight)
+            if not best:
+                return 0
+            total += best
+        return total
+
+
+class CommandIndex:
+    """
+    Search index over palette entries (key IDs and command names).
+
+    lookup(entry_id) returns {field: text} for an entry, or None once it is
+    gone. Entries marked with invalidate() are re-read on the next search.
+    """
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+        self.entries = {}  # Entry ID -> IndexedEntry
+        self.postings = {}  # Trigram -> set of entry IDs
+        self.title_postings = {}  # Same, for trigrams in titles only
+        # Equal scores rank keys by number, then commands in the order first indexed
+        self.ranks = {}  # Entry ID -> rank
+        self.by_rank = {}  # Rank -> entry ID
+        self.command_ranks = {}  # Command name -> rank, kept across re-indexing
+        self._stale = set()
+
+    def __len__(self):
+        self.refresh()
+        return len(self.entries)
+
+    def invalidate(self, entry_id):
+        self._stale.add(entry_id)
+
+    def reset(self, entry_ids):
+        """Index exactly entry_ids from scratch on the next search"""
+        self.entries.clear()
+        self.postings.clear()
+        self.title_postings.clear()
+        self.ranks.clear()
+        self.by_rank.clear()
+        self._stale = set(entry_ids)
+
+    def refresh(self):
+        """Re-index the entries that changed since the last search"""
+        stale = self._stale
+        self._stale = set()
+        # Commands get their ranks in name order, however the set iterates
+        for entry_id in sorted(stale, key=lambda entry_id: (isinstance(entry_id, str), entry_id)):
+            self._remove(entry_id)
+            fields = self.lookup(entry_id)
+            if fields:
+                self._add(entry_id, fields)
+
+    def _add(self, entry_id, fields):
+        entry = IndexedEntry(
+            tuple((normalize(text), TITLE_WEIGHT if name == TITLE_FIELD else TARGET_WEIGHT)
+                  for name, text in fields.items() if text),
+            normalize(fields.get(TITLE_FIELD) or "")
+        )
+        self.entries[entry_id] = entry
+        if isinstance(entry_id, str):
+            rank = self.command_ranks.setdefault(entry_id, COMMAND_RANK + len(self.command_ranks))
+        else:
+            rank = entry_id
+        self.ranks[entry_id] = rank
+        self.by_rank[rank] = entry_id
+        for postings, grams in ((self.postings, entry.grams), (self.title_postings, entry.title_grams)):
+            for gram in grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = set()
+                posting.add(entry_id)
+
+    def _remove(self, entry_id):
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        del self.by_rank[self.ranks.pop(entry_id)]
+        for postings, grams in ((self.postings, entry.grams), (self.title_postings, entry.title_grams)):
+            for gram in grams:
+                posting = postings[gram]
+                posting.discard(entry_id)
+                if not posting:
+                    del postings[gram]
+
+    def _candidates(self, postings, tokens, prefix=False):
+        """
+        Entries holding every trigram of every token (may be a posting set
+        itself - do not modify). With prefix, also a word start of each token.
+        """
+        candidates = None
+        for token in tokens:
+            grams = query_trigrams(token) | prefix_trigrams(token) if prefix else query_trigrams(token)
+            token_postings = [postings.get(gram) for gram in grams]
+            if not all(token_postings):
+                return set()
+            # Smallest first keeps the intersection cheap
+            token_postings.sort(key=len)
+            matches = token_postings[0]
+            if len(token_postings) > 1:
+                matches = matches.intersection(*token_postings[1:])
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return set()
+        return candidates
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Best matching entry IDs, strongest first"""
+        self.refresh()
+        tokens = normalize(query).split()
+        if not tokens:
+            return []
+
+        results = []
+        tiers = self._tiers(tokens)
+        for bound in self._bounds(len(tokens)):
+            # Results outscoring everything in this tier - ties go by rank, so they must score above it
+            if sum(1 for score, _ in results if -score > bound) >= limit:
+                break
+            tier = next(tiers)
+            placed = 0
+            # In rank order the first entries reaching the bound win every tie, so the rest need no score
+            ranks = list(map(self.ranks.__getitem__, tier))
+            heapq.heapify(ranks)
+            while ranks and placed < limit:
+                rank = heapq.heappop(ranks)
+                # Trigrams can all occur without the token itself - the score checks the text
+                score = self.entries[self.by_rank[rank]].score(tokens)
+                if score:
+                    results.append((-score, rank))
+                    if score >= bound:
+                        placed += 1
+        if not results:
+            return self._fuzzy(tokens, limit)
+        results.sort()
+        return [self.by_rank[rank] for _, rank in results[:limit]]
+
+    @staticmethod
+    def _bounds(token_count):
+        """Best score an entry of each of _tiers() can reach"""
+        title_weight, other_weight = TITLE_WEIGHT, TARGET_WEIGHT
+        best = (title_weight + 1) * token_count
+        return (
+            best,
+            best - (title_weight + 1) + max(title_weight, other_weight + 1),
+            best - (title_weight + 1) + other_weight + 1,
+            best - (title_weight + 1) + other_weight,
+        )
+
+    def _tiers(self, tokens):
+        """
+        Candidates split by the best score they can reach: every token
+        starting a title word, every token in the title, every token
+        starting a word somewhere, and the rest. Built as they are needed -
+        the first tiers usually fill the results without the full candidates.
+        """
+        starts = self._candidates(self.title_postings, tokens, prefix=True)
+        yield starts
+        titled = self._candidates(self.title_postings, tokens)  # Titles are searched fields too - a subset
+        yield titled - starts
+        rest = self._candidates(self.postings, tokens) - titled
+        word_starts = self._candidates(self.postings, tokens, prefix=True)
+        yield rest & word_starts
+        yield rest - word_starts
+
+    def _fuzzy_levels(self, token):
+        """
+        [(share, entries), ...] of the entries holding at least FUZZY_THRESHOLD
+        of token's trigrams, by the share they hold, largest first.
+        """
+        grams = query_trigrams(token)
+        if len(grams) < 2:
+            return []  # Too short to tell a typo from a different word
+        needed = math.ceil(FUZZY_THRESHOLD * len(grams))
+        present = sorted(filter(None, map(self.postings.get, grams)), key=len)
+        if len(present) < needed:
+            return []
+        sizes = range(len(present), needed - 1, -1)
+        if sum(math.comb(len(present), size) for size in sizes) > MAX_INTERSECTIONS:
+            hits = Counter()
+            for posting in present:
+                hits.update(posting)
+            by_count = {}
+            for entry_id, count in hits.items():
+                if count >= needed:
+                    by_count.setdefault(count, set()).add(entry_id)
+            return [(count / len(grams), by_count[count]) for count in sorted(by_count, reverse=True)]
+        # Few trigrams - set intersections find each level without visiting entries one by one
+        levels, seen = [], set()
+        for size in sizes:
+            level = set()
+            for group in combinations(present, size):
+                level |= group[0].intersection(*group[1:])
+            level -= seen
+            if level:
+                levels.append((size / len(grams), level))
+                seen |= level
+        return levels
+
+    def _fuzzy(self, tokens, limit):
+        """Entries sharing most trigrams with every token, for typos when nothing matches exactly"""
+        token_levels = [self._fuzzy_levels(token) for token in tokens]
+        if not all(token_levels):
+            return []
+        levels = token_levels[0]
+        if len(token_levels) > 1:
+            # Shares add up over the tokens, for the entries matching all of them
+            common = set.intersection(*(set().union(*(entries for _, entries in token)) for token in token_levels))
+            by_share = {}
+            for entry_id in common:
+                share = sum(next(share for share, entries in token if entry_id in entries) for token in token_levels)
+                by_share.setdefault(share, set()).add(entry_id)
+            levels = [(share, by_share[share]) for share in sorted(by_share, reverse=True)]
+        results = []
+        for _, entries in levels:
+            # Equal shares are taken in rank order, not set order
+            ranks = sorted(map(self.ranks.__getitem__, entries))[:limit - len(results)]
+            results.extend(map(self.by_rank.__getitem__, ranks))
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,146 @@
+"""
+Command Palette for Mango Stream Deck
+Keyboard-driven search over every key and a few app commands; Enter fires the
+highlighted key through the same dispatch as a click
+"""
+
+import time
+import tkinter as tk
+import customtkinter as ctk
+
+from actions import action_target
+from command_index import MAX_RESULTS
+from perf import metrics
+from themes import THEME_PALETTES
+
+# App commands listed next to the keys - entry ID -> (label, action taking the app)
+PALETTE_COMMANDS = {
+    "command:settings": ("Open Settings", lambda app: app.open_settings()),
+    "command:theme": ("Toggle Theme", lambda app: app.toggle_theme()),
+    "command:export": ("Export Profile...", lambda app: app.export_profile(app.root)),
+    "command:undo": ("Undo", lambda app: app.undo()),
+    "command:redo": ("Redo", lambda app: app.redo()),
+    "command:help": ("Help", lambda app: app.show_instructions()),
+}
+
+HIGHLIGHT_COLOR = "#1976D2"
+
+
+class CommandPalette:
+    """Reusable search popup - built once, shown with Ctrl+K"""
+
+    def __init__(self, app):
+        self.app = app
+        self.results = []  # Entry IDs shown, best first
+        self.highlighted = 0
+
+        self.dialog = tk.Toplevel(app.root)
+        self.dialog.withdraw()
+        self.dialog.title("Command Palette")
+        self.dialog.geometry("560x460")
+        self.dialog.transient(app.root)
+        self.dialog.resizable(False, False)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.hide)
+
+        frame = ctk.CTkFrame(self.dialog)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.query_var = tk.StringVar()
+        self.entry = ctk.CTkEntry(frame, textvariable=self.query_var, height=40, font=("Arial", 16))
+        self.entry.pack(fill="x", padx=10, pady=(10, 5))
+        self.entry.bind("<Down>", lambda e: self.move(1))
+        self.entry.bind("<Up>", lambda e: self.move(-1))
+        self.entry.bind("<Return>", lambda e: self.fire(self.highlighted))
+        self.entry.bind("<Escape>", lambda e: self.hide())
+        self.query_var.trace('w', self.update_results)
+
+        self.hint_label = ctk.CTkLabel(frame, text="", font=("Arial", 10), text_color="gray")
+        self.hint_label.pack(anchor="w", padx=12)
+
+        # A fixed set of rows, relabeled on every keystroke
+        self.rows = []
+        for index in range(MAX_RESULTS):
+            row = ctk.CTkButton(
+                frame,
+                text="",
+                anchor="w",
+                height=26,
+                fg_color="transparent",
+                hover_color="gray25",
+                text_color=("gray10", "gray90"),
+                command=lambda i=index: self.fire(i)
+            )
+            self.rows.append(row)
+
+    def open(self):
+        self.query_var.set("")
+        self.dialog.configure(bg=THEME_PALETTES[self.app.current_theme]["dialog_bg"])
+        self.dialog.deiconify()
+        self.dialog.lift()
+        self.entry.focus_set()
+
+    def hide(self):
+        self.dialog.withdraw()
+
+    def describe(self, entry_id):
+        """Row text of a result"""
+        if entry_id in PALETTE_COMMANDS:
+            return f"⚙  {PALETTE_COMMANDS[entry_id][0]}"
+        config = self.app.button_configs.get(entry_id, {})
+        text = config.get("text", f"Button {entry_id}")
+        action_type = config.get("action_type", "Open")
+        # The action's main setting is shown next to the title
+        target = action_target(action_type)
+        target = config.get(target[0]) if target is not None else None
+        text += f"   ·   {action_type}: {target}" if target else f"   ·   {action_type}"
+        position = self.app.layout.position_of(entry_id)
+        if position is not None and self.app.layout.in_grid(*position):
+            text += f"   ·   row {position[0] + 1}, col {position[1] + 1}"
+        else:
+            text += "   ·   off grid"
+        return text.replace("\n", " ")
+
+    def update_results(self, *args):
+        query = self.query_var.get()
+        start = time.perf_counter()
+        self.results = self.app.command_index.search(query)
+        elapsed = time.perf_counter() - start
+        metrics.record("palette_search", elapsed)
+
+        self.highlighted = 0
+        for index, row in enumerate(self.rows):
+            if index < len(self.results):
+                row.configure(text=self.describe(self.results[index]))
+                if not row.winfo_manager():
+                    row.pack(fill="x", padx=10, pady=1)
+            elif row.winfo_manager():
+                row.pack_forget()
+        self.show_highlight()
+
+        if not query.strip():
+            self.hint_label.configure(text=f"Search {len(self.app.button_configs)} keys and app commands")
+        elif not self.results:
+            self.hint_label.configure(text="No matches")
+        else:
+            self.hint_label.configure(text=f"{len(self.results)} matches in {elapsed * 1000:.2f} ms - ↑↓ to pick, Enter to run")
+
+    def show_highlight(self):
+        for index, row in enumerate(self.rows[:len(self.results)]):
+            row.configure(fg_color=HIGHLIGHT_COLOR if index == self.highlighted else "transparent")
+
+    def move(self, step):
+        if self.results:
+            self.highlighted = (self.highlighted + step) % len(self.results)
+            self.show_highlight()
+        return "break"
+
+    def fire(self, index):
+        """Run a result - keys go through the same dispatch as a click"""
+        if index >= len(self.results):
+            return
+        entry_id = self.results[index]
+        self.hide()
+        if entry_id in PALETTE_COMMANDS:
+            PALETTE_COMMANDS[entry_id][1](self.app)
+        else:
+            self.app.button_clicked(entry_id)
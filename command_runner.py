@@ -0,0 +1,171 @@
+"""
+Command Runner for Mango Stream Deck
+Shell commands run by Command keys are managed by one asyncio loop on its own
+thread: a bounded number run at once, their output is read line by line into
+a buffer per key, the newest line is passed on at most every 50 ms, and a
+command is killed with its children when it overruns its timeout
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from perf import metrics
+
+DEFAULT_CONCURRENCY = 4  # Commands running at once; later presses wait for a slot
+DEFAULT_TIMEOUT = 60.0  # Seconds
+BUFFER_LINES = 200  # Output lines kept per key
+OUTPUT_INTERVAL = 0.05  # Seconds between output updates for one key
+LINE_LIMIT = 1024 * 1024  # Longest output line read in one piece
+
+
+class CommandRunner:
+    """
+    Runs shell commands off the Tk thread.
+
+    on_output(key, stream, line) gets the newest line of a running command
+    and on_done(key, exit_code, seconds, error) its result; both are called
+    on the runner thread. exit_code is None when the command could not start
+    or was killed, with error saying why. The loop thread starts with the
+    first command.
+    """
+
+    def __init__(self, on_output, on_done, max_concurrent=DEFAULT_CONCURRENCY, buffer_lines=BUFFER_LINES):
+        self.on_output = on_output
+        self.on_done = on_done
+        self.max_concurrent = max_concurrent
+        self.buffer_lines = buffer_lines
+        self.loop = None
+        self.buffers = {}  # Key -> deque of (stream, line)
+        self.exit_codes = {}  # Key -> exit code of its last finished command
+        self.running = 0
+        self.waiting = 0
+        self._lock = threading.Lock()  # Guards buffers and counts shared with the Tk thread
+        self._latest = {}  # Key -> newest (stream, line) not passed on yet
+        self._processes = set()
+        self._slots = None
+
+    def start(self):
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self._serve, name="command-runner", daemon=True).start()
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.loop.run_forever()
+
+    def run(self, key, command, cwd=None, timeout=DEFAULT_TIMEOUT):
+        """Queue a command for key; it starts as soon as a slot is free"""
+        self.start()
+        with self._lock:
+            self.waiting += 1
+        asyncio.run_coroutine_threadsafe(self._run(key, command, cwd, timeout, time.perf_counter()), self.loop)
+
+    def output(self, key):
+        """Buffered (stream, line) output of key's last command, oldest first"""
+        with self._lock:
+            return list(self.buffers.get(key, ()))
+
+    def stop(self):
+        """Kill running commands and stop the loop"""
+        if self.loop is None:
+            return
+
+        def shutdown():
+            for process in list(self._processes):
+                self._kill(process)
+            self.loop.stop()
+
+        self.loop.call_soon_threadsafe(shutdown)
+
+    async def _run(self, key, command, cwd, timeout, queued):
+        async with self._slots:
+            with self._lock:
+                self.waiting -= 1
+            self.running += 1
+            start = time.perf_counter()
+            metrics.record("command_wait", start - queued)
+            try:
+                exit_code, error = await self._execute(key, command, cwd, timeout)
+            finally:
+                self.running -= 1
+        elapsed = time.perf_counter() - start
+        self._flush(key)
+        metrics.record("command_run", elapsed)
+        if exit_code is None:
+            metrics.count("command_failed")
+        elif exit_code != 0:
+            metrics.count("command_exit_nonzero")
+        self.exit_codes[key] = exit_code
+        self.on_done(key, exit_code, elapsed, error)
+
+    async def _execute(self, key, command, cwd, timeout):
+        with self._lock:
+            self.buffers[key] = deque(maxlen=self.buffer_lines)
+        try:
+            process = await asyncio.create_subprocess_shell(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd or None,
+                limit=LINE_LIMIT,
+                # Own process group, so a timeout also kills what the shell started
+                start_new_session=sys.platform != "win32",
+            )
+        except OSError as e:
+            return None, str(e)
+
+        self._processes.add(process)
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self._read(key, process.stdout, "stdout"),
+                    self._read(key, process.stderr, "stderr"),
+                    process.wait()
+                ),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            self._kill(process)
+            await process.wait()
+            return None, f"timed out after {timeout:g} s"
+        finally:
+            self._processes.discard(process)
+        return process.returncode, None
+
+    async def _read(self, key, reader, stream):
+        buffer = self.buffers[key]
+        async for raw in reader:
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            with self._lock:
+                buffer.append((stream, line))
+            # Fast output is passed on as its newest line, a few times a second
+            if key not in self._latest:
+                self.loop.call_later(OUTPUT_INTERVAL, self._flush, key)
+            self._latest[key] = (stream, line)
+
+    def _flush(self, key):
+        latest = self._latest.pop(key, None)
+        if latest is not None:
+            self.on_output(key, *latest)
+
+    @staticmethod
+    def _kill(process):
+        if process.returncode is not None:
+            return
+        try:
+            if sys.platform == "win32":
+                subprocess.Popen(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                                 creationflags=subprocess.CREATE_NO_WINDOW)
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except (OSError, ProcessLookupError):
+            pass
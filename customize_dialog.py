@@ -0,0 +1,1486 @@
+"""
+Customize Dialog for Mango Stream Deck
+A single Stream Deck style key editor that is built once, kept hidden,
+and rebound to the selected key's configuration on every open
+"""
+
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import customtkinter as ctk
+from PIL import Image
+import os
+import time
+
+from actions import (
+    DEFAULT_COMMAND_TIMEOUT, DEFAULT_HTTP_RETRIES, DEFAULT_HTTP_TIMEOUT, DEFAULT_MACRO_SPEED,
+    DEFAULT_SCRIPT_TIMEOUT, HTTP_METHODS, registry
+)
+from assets import assets
+from key_faces import apply_opacity
+from image_memory import image_nbytes
+from live_tiles import LIVE_SOURCES, DEFAULT_INTERVALS
+from macro import (
+    MACRO_EXTENSION, MacroRecording, RecordingUnavailable, new_macro_path, read_header as read_macro_header,
+    recorder_backend
+)
+from global_hotkeys import build_table as build_chord_table, format_chord, parse_chord
+from perf import metrics
+from scheduler import SCHEDULE_TYPES, SCHEDULE_VALUE_HINTS, parse_schedule
+from themes import key_palette
+
+
+# Values used for any setting a key has not configured yet
+DEFAULT_KEY_CONFIG = {
+    "image_path": None,
+    "app_path": None,
+    "color": "#2196F3",  # Default blue color
+    "text_size": 12,  # Default text size
+    "text_color": "white",  # Default text color
+    "color_opacity": 100,  # Default color opacity (0-100)
+    "image_opacity": 100  # Default image opacity (0-100)
+}
+
+# Settings panels of the built-in actions; plugins bring their own or get an entry per field
+BUILTIN_PANELS = {
+    "Open": "_build_open_panel",
+    "Website": "_build_website_panel",
+    "Hotkey": "_build_hotkey_panel",
+    "Text": "_build_text_panel",
+    "Script": "_build_script_panel",
+    "Command": "_build_command_panel",
+    "HTTP": "_build_http_panel",
+    "Macro": "_build_macro_panel",
+    "Multi Action": "_build_multi_action_panel",
+}
+
+# Config field edited by the live value entry for each live source
+LIVE_VALUE_FIELDS = {
+    "Clock": ("Format:", "live_format", "%H:%M:%S"),
+    "Command": ("Command:", "live_command", ""),
+    "File": ("File:", "live_file", ""),
+}
+
+
+class CustomizeDialog:
+    """Reusable key customization dialog"""
+
+    def __init__(self, app):
+        self.app = app
+        self.button_number = None
+        self.config = {}
+        self.preview_base = None  # Preview-sized icon, reused by opacity changes
+        self.action_panels = {}  # Action type -> cached settings panel
+        self.current_panel = None
+        self.recording = {"value": False, "keys": set()}
+        self.macro_recording = None  # MacroRecording while a macro is being recorded
+
+        self.dialog = tk.Toplevel(app.root)
+        self.dialog.withdraw()
+        self.dialog.geometry("600x700")
+        self.dialog.transient(app.root)
+        self.dialog.resizable(False, False)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.hide)
+
+        # Set dialog icon
+        assets.set_window_icon(self.dialog)
+
+        # Create scrollable frame
+        scrollable_frame = ctk.CTkScrollableFrame(self.dialog, width=560, height=650)
+        scrollable_frame.pack(fill="both", expand=True, padx=15, pady=15)
+
+        # Main container inside scrollable frame
+        self.main_container = ctk.CTkFrame(scrollable_frame, fg_color="transparent")
+        self.main_container.pack(fill="both", expand=True)
+
+        self._build_header()
+        self._build_preview()
+        self._build_title()
+        self._build_text_appearance()
+        self._build_color()
+        self._build_icon()
+        self._build_live()
+        self._build_schedule()
+        self._build_global_hotkey()
+        self._build_action()
+        self._build_buttons()
+
+    def _section(self, title):
+        """Create a section frame with a gray caption"""
+        frame = ctk.CTkFrame(self.main_container)
+        frame.pack(fill="x", pady=(0, 15))
+
+        ctk.CTkLabel(
+            frame,
+            text=title,
+            font=("Arial", 11, "bold"),
+            text_color="gray"
+        ).pack(anchor="w", padx=15, pady=(10, 5))
+        return frame
+
+    # ------------------------------------------------------------------
+    # Building (runs once)
+    # ------------------------------------------------------------------
+
+    def _build_header(self):
+        header_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        header_frame.pack(fill="x", pady=(0, 15))
+
+        # Logo at top of customize dialog
+        logo_photo = assets.logo(50)
+        if logo_photo is not None:
+            ctk.CTkLabel(header_frame, image=logo_photo, text="").pack(pady=(0, 5))
+
+        self.key_label = ctk.CTkLabel(
+            header_frame,
+            text="",
+            font=("Arial", 20, "bold")
+        )
+        self.key_label.pack(anchor="w")
+
+    def _build_preview(self):
+        preview_frame = self._section("PREVIEW")
+
+        # Button preview
+        preview_btn_frame = ctk.CTkFrame(preview_frame, fg_color="transparent")
+        preview_btn_frame.pack(pady=(0, 15), padx=15)
+
+        self.preview_btn = ctk.CTkButton(
+            preview_btn_frame,
+            text="",
+            width=120,
+            height=80,
+            state="disabled"
+        )
+        self.preview_btn.pack()
+
+    def _build_title(self):
+        title_frame = self._section("TITLE")
+
+        self.name_var = tk.StringVar()
+        ctk.CTkEntry(
+            title_frame,
+            textvariable=self.name_var,
+            placeholder_text="Enter button title...",
+            height=35,
+            font=("Arial", 12)
+        ).pack(fill="x", padx=15, pady=(0, 15))
+
+        self.name_var.trace('w', self.update_preview)
+
+    def _build_text_appearance(self):
+        text_appearance_frame = self._section("TEXT APPEARANCE")
+
+        text_app_content = ctk.CTkFrame(text_appearance_frame, fg_color="transparent")
+        text_app_content.pack(fill="x", padx=15, pady=(0, 15))
+
+        # Text size
+        ctk.CTkLabel(text_app_content, text="Size:", width=50).pack(side="left", padx=(0, 5))
+        self.text_size_var = tk.StringVar()
+        ctk.CTkEntry(
+            text_app_content,
+            textvariable=self.text_size_var,
+            width=50
+        ).pack(side="left", padx=(0, 15))
+
+        self.text_size_var.trace('w', self.update_text_size)
+
+        # Text color
+        ctk.CTkLabel(text_app_content, text="Color:", width=50).pack(side="left", padx=(0, 5))
+
+        # Text color preview
+        self.text_color_preview = ctk.CTkButton(
+            text_app_content,
+            text="",
+            width=30,
+            height=25,
+            state="disabled"
+        )
+        self.text_color_preview.pack(side="left", padx=(0, 5))
+
+        self.text_color_var = tk.StringVar()
+        ctk.CTkEntry(
+            text_app_content,
+            textvariable=self.text_color_var,
+            width=80
+        ).pack(side="left", padx=(0, 10))
+
+        self.text_color_var.trace('w', self.update_text_color)
+
+        # Preset text colors
+        preset_text_colors = ["white", "black", "#FFEB3B", "#00BCD4", "#FF5722"]
+        for color in preset_text_colors:
+            ctk.CTkButton(
+                text_app_content,
+                text="",
+                width=22,
+                height=22,
+                fg_color=color,
+                hover_color=color,
+                command=lambda c=color: self.text_color_var.set(c)
+            ).pack(side="left", padx=1)
+
+    def _build_color(self):
+        color_frame = self._section("COLOR")
+
+        color_content = ctk.CTkFrame(color_frame, fg_color="transparent")
+        color_content.pack(fill="x", padx=15, pady=(0, 15))
+
+        # Color preview box
+        self.color_preview = ctk.CTkButton(
+            color_content,
+            text="",
+            width=40,
+            height=30,
+            state="disabled"
+        )
+        self.color_preview.pack(side="left", padx=(0, 10))
+
+        self.color_var = tk.StringVar()
+        ctk.CTkEntry(
+            color_content,
+            textvariable=self.color_var,
+            placeholder_text="#2196F3",
+            width=100
+        ).pack(side="left", padx=(0, 10))
+
+        self.color_var.trace('w', self.update_color)
+
+        # Preset colors
+        preset_colors = ["#2196F3", "#4CAF50", "#F44336", "#FF9800", "#9C27B0", "#607D8B"]
+        for color in preset_colors:
+            ctk.CTkButton(
+                color_content,
+                text="",
+                width=25,
+                height=25,
+                fg_color=color,
+                hover_color=color,
+                command=lambda c=color: self.color_var.set(c)
+            ).pack(side="left", padx=2)
+
+        # Color opacity
+        opacity_row = ctk.CTkFrame(color_frame, fg_color="transparent")
+        opacity_row.pack(fill="x", padx=15, pady=(5, 15))
+
+        ctk.CTkLabel(opacity_row, text="Opacity:", width=60).pack(side="left")
+
+        self.color_opacity_var = tk.IntVar(value=100)
+        ctk.CTkSlider(
+            opacity_row,
+            from_=0,
+            to=100,
+            variable=self.color_opacity_var,
+            width=200,
+            number_of_steps=100
+        ).pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        self.color_opacity_label = ctk.CTkLabel(opacity_row, text="100%", width=40)
+        self.color_opacity_label.pack(side="left")
+
+        self.color_opacity_var.trace('w', self.update_color_opacity)
+
+    def _build_icon(self):
+        icon_frame = self._section("ICON")
+
+        # Icon display and buttons
+        icon_content = ctk.CTkFrame(icon_frame, fg_color="transparent")
+        icon_content.pack(fill="x", padx=15, pady=(0, 15))
+
+        # Icon preview box (same size as color preview)
+        self.icon_preview = ctk.CTkLabel(
+            icon_content,
+            text="",
+            width=40,
+            height=30,
+            fg_color="gray30",
+            corner_radius=5
+        )
+        self.icon_preview.pack(side="left", padx=(0, 10))
+
+        self.icon_info = ctk.CTkLabel(
+            icon_content,
+            text="No icon selected",
+            font=("Arial", 10),
+            wraplength=250,
+            anchor="w"
+        )
+        self.icon_info.pack(side="left", fill="x", expand=True)
+
+        icon_btn_frame = ctk.CTkFrame(icon_content, fg_color="transparent")
+        icon_btn_frame.pack(side="right")
+
+        self.browse_btn = ctk.CTkButton(
+            icon_btn_frame,
+            text="Browse...",
+            command=self.select_image,
+            width=80,
+            height=28,
+            fg_color="#555555",
+            hover_color="#666666"
+        )
+        self.browse_btn.pack(side="left", padx=2)
+
+        ctk.CTkButton(
+            icon_btn_frame,
+            text="Clear",
+            command=self.remove_image,
+            width=60,
+            height=28,
+            fg_color="#555555",
+            hover_color="#666666"
+        ).pack(side="left", padx=2)
+
+        # Import progress, shown while an icon is being normalized
+        self.ingest_progress = ctk.CTkProgressBar(icon_frame, height=6)
+
+        # Image opacity
+        image_opacity_row = ctk.CTkFrame(icon_frame, fg_color="transparent")
+        image_opacity_row.pack(fill="x", padx=15, pady=(5, 15))
+        self.image_opacity_row = image_opacity_row
+
+        ctk.CTkLabel(image_opacity_row, text="Opacity:", width=60).pack(side="left")
+
+        self.image_opacity_var = tk.IntVar(value=100)
+        ctk.CTkSlider(
+            image_opacity_row,
+            from_=0,
+            to=100,
+            variable=self.image_opacity_var,
+            width=200,
+            number_of_steps=100
+        ).pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        self.image_opacity_label = ctk.CTkLabel(image_opacity_row, text="100%", width=40)
+        self.image_opacity_label.pack(side="left")
+
+        self.image_opacity_var.trace('w', self.update_image_opacity)
+
+    def _build_live(self):
+        live_frame = self._section("LIVE DATA")
+
+        live_source_row = ctk.CTkFrame(live_frame, fg_color="transparent")
+        live_source_row.pack(fill="x", padx=15, pady=(0, 10))
+
+        ctk.CTkLabel(live_source_row, text="Show:", width=60).pack(side="left")
+
+        self.live_source_var = tk.StringVar(value="None")
+        ctk.CTkOptionMenu(
+            live_source_row,
+            values=LIVE_SOURCES,
+            variable=self.live_source_var,
+            width=140,
+            fg_color="#3a3a3a",
+            button_color="#4a4a4a",
+            button_hover_color="#5a5a5a"
+        ).pack(side="left", padx=(0, 15))
+
+        ctk.CTkLabel(live_source_row, text="Every (s):", width=70).pack(side="left")
+        self.live_interval_var = tk.StringVar()
+        ctk.CTkEntry(
+            live_source_row,
+            textvariable=self.live_interval_var,
+            placeholder_text="auto",
+            width=60
+        ).pack(side="left")
+
+        self.live_value_row = ctk.CTkFrame(live_frame, fg_color="transparent")
+        self.live_value_row.pack(fill="x", padx=15, pady=(0, 15))
+
+        self.live_value_label = ctk.CTkLabel(self.live_value_row, text="", width=60, anchor="w")
+        self.live_value_label.pack(side="left")
+        self.live_value_var = tk.StringVar()
+        ctk.CTkEntry(self.live_value_row, textvariable=self.live_value_var, height=30).pack(side="left", fill="x", expand=True)
+
+        self.live_source_var.trace('w', self.update_live_source)
+        self.live_value_var.trace('w', self.update_live_value)
+        self.live_interval_var.trace('w', self.update_live_interval)
+
+    def _build_schedule(self):
+        schedule_frame = self._section("SCHEDULE")
+
+        schedule_type_row = ctk.CTkFrame(schedule_frame, fg_color="transparent")
+        schedule_type_row.pack(fill="x", padx=15, pady=(0, 10))
+
+        ctk.CTkLabel(schedule_type_row, text="Run:", width=60).pack(side="left")
+
+        self.schedule_type_var = tk.StringVar(value="None")
+        ctk.CTkOptionMenu(
+            schedule_type_row,
+            values=SCHEDULE_TYPES,
+            variable=self.schedule_type_var,
+            width=140,
+            fg_color="#3a3a3a",
+            button_color="#4a4a4a",
+            button_hover_color="#5a5a5a"
+        ).pack(side="left", padx=(0, 15))
+
+        self.schedule_delay_label = ctk.CTkLabel(schedule_type_row, text="Delay (s):", width=70)
+        self.schedule_delay_var = tk.StringVar()
+        self.schedule_delay_entry = ctk.CTkEntry(
+            schedule_type_row,
+            textvariable=self.schedule_delay_var,
+            placeholder_text="0",
+            width=60
+        )
+
+        self.schedule_value_row = ctk.CTkFrame(schedule_frame, fg_color="transparent")
+        self.schedule_value_row.pack(fill="x", padx=15, pady=(0, 15))
+
+        self.schedule_value_label = ctk.CTkLabel(self.schedule_value_row, text="", width=60, anchor="w")
+        self.schedule_value_label.pack(side="left")
+        self.schedule_value_var = tk.StringVar()
+        self.schedule_value_entry = ctk.CTkEntry(self.schedule_value_row, textvariable=self.schedule_value_var, height=30)
+        self.schedule_value_entry.pack(side="left", fill="x", expand=True)
+
+        self.schedule_type_var.trace('w', self.update_schedule_type)
+        self.schedule_value_var.trace('w', self.update_schedule_value)
+        self.schedule_delay_var.trace('w', self.update_schedule_delay)
+
+    def _build_global_hotkey(self):
+        global_frame = self._section("GLOBAL HOTKEY")
+
+        global_row = ctk.CTkFrame(global_frame, fg_color="transparent")
+        global_row.pack(fill="x", padx=15, pady=(0, 15))
+
+        ctk.CTkLabel(global_row, text="Chord:", width=60, anchor="w").pack(side="left")
+        self.global_hotkey_var = tk.StringVar()
+        ctk.CTkEntry(
+            global_row,
+            textvariable=self.global_hotkey_var,
+            placeholder_text="e.g. Ctrl+Alt+1 - fires the key from any app, also from the tray",
+            height=30
+        ).pack(side="left", fill="x", expand=True)
+
+        self.global_hotkey_var.trace('w', self.update_global_hotkey)
+
+    def _build_action(self):
+        # Action Section - Elgato Stream Deck Style
+        action_frame = self._section("ACTION")
+
+        # Action type selector
+        action_type_frame = ctk.CTkFrame(action_frame, fg_color="transparent")
+        action_type_frame.pack(fill="x", padx=15, pady=(0, 10))
+
+        self.action_type_var = tk.StringVar(value="Open")
+        ctk.CTkOptionMenu(
+            action_type_frame,
+            values=registry.names(),
+            variable=self.action_type_var,
+            width=200,
+            height=32,
+            fg_color="#3a3a3a",
+            button_color="#4a4a4a",
+            button_hover_color="#5a5a5a"
+        ).pack(anchor="w")
+
+        # Container for action-specific settings
+        self.action_settings_container = ctk.CTkFrame(action_frame, fg_color="transparent")
+        self.action_settings_container.pack(fill="x", padx=15, pady=(0, 15))
+
+        self.action_type_var.trace('w', self.update_action_settings)
+
+    def _build_buttons(self):
+        bottom_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        bottom_frame.pack(fill="x", pady=(10, 0))
+
+        button_container = ctk.CTkFrame(bottom_frame, fg_color="transparent")
+        button_container.pack(side="right")
+
+        ctk.CTkButton(
+            button_container,
+            text="Cancel",
+            command=self.hide,
+            width=100,
+            height=35,
+            fg_color="#555555",
+            hover_color="#666666"
+        ).pack(side="left", padx=5)
+
+        ctk.CTkButton(
+            button_container,
+            text="Save",
+            command=self.save_changes,
+            width=100,
+            height=35,
+            fg_color="#4CAF50",
+            hover_color="#45a049"
+        ).pack(side="left", padx=5)
+
+        ctk.CTkButton(
+            button_container,
+            text="OK",
+            command=self.save_and_close,
+            width=100,
+            height=35,
+            fg_color="#0066FF",
+            hover_color="#0052CC"
+        ).pack(side="left", padx=5)
+
+    # ------------------------------------------------------------------
+    # Opening / rebinding
+    # ------------------------------------------------------------------
+
+    def open(self, button_number):
+        """Rebind the dialog to a key and show it"""
+        start = time.perf_counter()
+
+        self.bind_key(button_number)
+
+        # Configure dark theme for dialog
+        self.dialog.configure(bg="#2b2b2b" if self.app.current_theme == "dark" else "#f0f0f0")
+        self.dialog.deiconify()
+        self.dialog.lift()
+        self.dialog.grab_set()
+        self.dialog.focus_set()
+
+        # Interactive once pending geometry and redraws are flushed
+        self.dialog.update_idletasks()
+        metrics.record("customize_open", time.perf_counter() - start)
+
+    def bind_key(self, button_number):
+        """Load a key's configuration into the existing widgets"""
+        self.stop_recording()
+        self.button_number = button_number
+
+        # Get current config - make a copy to work with
+        config = dict(DEFAULT_KEY_CONFIG, text=f"Button {button_number}")
+        config.update(self.app.button_configs.get(button_number, {}))
+        self.config = config
+
+        # If button doesn't exist in configs, add default
+        if button_number not in self.app.button_configs:
+            self.app.button_configs[button_number] = config.copy()
+
+        self.dialog.title(f"Configure Key {button_number}")
+        self.key_label.configure(text=f"Key {button_number}")
+
+        self.preview_btn.configure(
+            text=config["text"],
+            corner_radius=self.app.corner_radius,
+            fg_color=key_palette(config["color"], config["color_opacity"]),
+            text_color=config["text_color"],
+            font=("Arial", config["text_size"], "bold"),
+            image=None
+        )
+
+        # Setting the variables runs the same traces as user edits
+        self.name_var.set(config["text"])
+        self.text_size_var.set(str(config["text_size"]))
+        self.text_color_var.set(config["text_color"])
+        self.color_var.set(config["color"])
+        self.color_opacity_var.set(config["color_opacity"])
+
+        self.load_icon(config["image_path"])
+        self.image_opacity_var.set(config["image_opacity"])
+
+        self.live_interval_var.set(str(config.get("live_interval", "")))
+        self.live_source_var.set(config.get("live_source", "None"))
+
+        self.schedule_delay_var.set(str(config.get("schedule_delay", "")))
+        self.schedule_type_var.set(config.get("schedule_type", "None"))
+        self.global_hotkey_var.set(config.get("global_hotkey", ""))
+
+        self.action_type_var.set(config.get("action_type", "Open"))
+
+    def hide(self):
+        """Hide the dialog, keeping it for the next key"""
+        self.stop_recording()
+        self.stop_macro_recording()
+        self.dialog.grab_release()
+        self.dialog.withdraw()
+        self.release_previews()
+
+    def release_previews(self):
+        """Drop the preview images - the next open() renders them again"""
+        self.preview_base = None
+        self.preview_btn.configure(image=None)
+        self.icon_preview.configure(image=None)
+
+    def preview_nbytes(self):
+        """Approximate bytes held by the preview images"""
+        # Base image plus the opacity-applied copy shown on the preview key
+        return image_nbytes(self.preview_base, display_copy=False) + image_nbytes(self.preview_base)
+
+    # ------------------------------------------------------------------
+    # Field callbacks
+    # ------------------------------------------------------------------
+
+    def update_preview(self, *args):
+        self.preview_btn.configure(text=self.name_var.get())
+
+    def update_text_size(self, *args):
+        try:
+            size = int(self.text_size_var.get())
+            if 6 <= size <= 72:
+                self.config["text_size"] = size
+                self.preview_btn.configure(font=("Arial", size, "bold"))
+        except:
+            pass
+
+    def update_text_color(self, *args):
+        try:
+            color = self.text_color_var.get()
+            if (color.startswith("#") and len(color) == 7) or color.lower() in ["white", "black", "gray"]:
+                self.text_color_preview.configure(fg_color=color, hover_color=color)
+                self.preview_btn.configure(text_color=color)
+                self.config["text_color"] = color
+        except:
+            pass
+
+    def update_color(self, *args):
+        try:
+            new_color = self.color_var.get()
+            if new_color.startswith("#") and len(new_color) == 7:
+                self.color_preview.configure(fg_color=new_color, hover_color=new_color)
+                self.config["color"] = new_color
+                if not self.preview_base:
+                    self.preview_btn.configure(
+                        fg_color=key_palette(new_color, self.config.get("color_opacity", 100))
+                    )
+        except:
+            pass
+
+    def update_color_opacity(self, *args):
+        opacity = self.color_opacity_var.get()
+        self.color_opacity_label.configure(text=f"{opacity}%")
+        self.config["color_opacity"] = opacity
+
+        # Update preview with opacity effect
+        if not self.preview_base:
+            self.preview_btn.configure(fg_color=key_palette(self.config["color"], opacity))
+
+    def load_icon(self, image_path):
+        """Show an icon in the thumbnail, info label and preview"""
+        self.preview_base = None
+        if image_path and os.path.exists(image_path):
+            try:
+                img = Image.open(image_path)
+                img.draft('RGB', (100, 66))
+                thumb = img.copy()
+                thumb.thumbnail((36, 26), Image.Resampling.LANCZOS)
+                icon_thumb = ctk.CTkImage(light_image=thumb, size=thumb.size)
+                self.icon_preview.configure(image=icon_thumb, text="")
+                self.preview_base = img.resize((100, 66), Image.Resampling.LANCZOS)
+            except Exception as e:
+                print(f"Error loading icon preview: {e}")
+            self.icon_info.configure(text=os.path.basename(image_path))
+        else:
+            self.icon_info.configure(text="No icon selected")
+            self.icon_preview.configure(image=None, text="", fg_color="gray30")
+        self.update_image_opacity()
+
+    def select_image(self):
+        filename = filedialog.askopenfilename(
+            title="Select Icon",
+            filetypes=[
+                ("Image files", "*.png *.jpg *.jpeg *.gif *.bmp *.webp"),
+                ("All files", "*.*")
+            ]
+        )
+        if filename:
+            # Normalize into the icons folder on the ingest worker
+            in_icons_folder = os.path.dirname(os.path.abspath(filename)) == os.path.abspath(self.app.icons_folder)
+            job = self.app.icon_ingestor.submit(filename, self.app.icons_folder, only_if_needed=in_icons_folder)
+
+            self.browse_btn.configure(state="disabled")
+            self.ingest_progress.set(0)
+            self.ingest_progress.pack(fill="x", padx=15, pady=(0, 5), before=self.image_opacity_row)
+            self.poll_ingest(job, self.button_number)
+
+    def poll_ingest(self, job, button_number):
+        """Show ingest progress until the worker finishes"""
+        self.ingest_progress.set(job.progress)
+        if not job.done.is_set():
+            self.icon_info.configure(text=f"{job.stage}...")
+            self.dialog.after(30, lambda: self.poll_ingest(job, button_number))
+            return
+
+        self.ingest_progress.pack_forget()
+        self.browse_btn.configure(state="normal")
+
+        # Dialog was rebound to another key while importing
+        if button_number != self.button_number:
+            return
+
+        if job.error is not None:
+            messagebox.showerror("Error", f"Failed to import icon: {job.error}")
+            self.load_icon(self.config.get("image_path"))
+            return
+
+        # Update config with new path (old icon deletion happens on Save)
+        self.config["image_path"] = job.result
+        self.load_icon(job.result)
+
+    def remove_image(self):
+        # Just clear the config, don't delete the file yet (deletion happens on Save)
+        self.config["image_path"] = None
+        self.load_icon(None)
+
+    def update_image_opacity(self, *args):
+        opacity = self.image_opacity_var.get()
+        self.image_opacity_label.configure(text=f"{opacity}%")
+        self.config["image_opacity"] = opacity
+        if self.preview_base is not None:
+            # Apply opacity to the cached preview instead of reloading from disk
+            img = apply_opacity(self.preview_base.copy(), opacity)
+            preview_img = ctk.CTkImage(light_image=img, size=(100, 66))
+            self.preview_btn.configure(image=preview_img, fg_color="transparent")
+        else:
+            self.preview_btn.configure(
+                image=None,
+                fg_color=key_palette(self.config["color"], self.config.get("color_opacity", 100))
+            )
+
+    def update_live_source(self, *args):
+        source = self.live_source_var.get()
+        self.config["live_source"] = source
+        field = LIVE_VALUE_FIELDS.get(source)
+        if field:
+            self.live_value_label.configure(text=field[0])
+            self.live_value_var.set(self.config.get(field[1]) or field[2])
+            self.live_value_row.pack(fill="x", padx=15, pady=(0, 15))
+        else:
+            self.live_value_row.pack_forget()
+        if source in DEFAULT_INTERVALS and not self.config.get("live_interval"):
+            self.live_interval_var.set(f"{DEFAULT_INTERVALS[source]:g}")
+
+    def update_live_value(self, *args):
+        field = LIVE_VALUE_FIELDS.get(self.live_source_var.get())
+        if field:
+            self.config[field[1]] = self.live_value_var.get()
+
+    def update_live_interval(self, *args):
+        try:
+            interval = float(self.live_interval_var.get())
+            if interval > 0:
+                self.config["live_interval"] = interval
+        except ValueError:
+            self.config.pop("live_interval", None)
+
+    def update_schedule_type(self, *args):
+        kind = self.schedule_type_var.get()
+        self.config["schedule_type"] = kind
+        hint = SCHEDULE_VALUE_HINTS.get(kind)
+        if hint:
+            self.schedule_value_label.configure(text=hint[0])
+            self.schedule_value_entry.configure(placeholder_text=hint[1])
+            self.schedule_value_var.set(self.config.get("schedule_value", ""))
+            self.schedule_value_row.pack(fill="x", padx=15, pady=(0, 15))
+        else:
+            self.schedule_value_row.pack_forget()
+        if kind == "After":
+            self.schedule_delay_label.pack(side="left")
+            self.schedule_delay_entry.pack(side="left")
+        else:
+            self.schedule_delay_label.pack_forget()
+            self.schedule_delay_entry.pack_forget()
+
+    def update_schedule_value(self, *args):
+        if self.schedule_type_var.get() in SCHEDULE_VALUE_HINTS:
+            self.config["schedule_value"] = self.schedule_value_var.get().strip()
+
+    def update_schedule_delay(self, *args):
+        try:
+            self.config["schedule_delay"] = max(0.0, float(self.schedule_delay_var.get()))
+        except ValueError:
+            self.config.pop("schedule_delay", None)
+
+    def update_global_hotkey(self, *args):
+        chord = self.global_hotkey_var.get().strip()
+        if chord:
+            self.config["global_hotkey"] = chord
+        else:
+            self.config.pop("global_hotkey", None)
+
+    # ------------------------------------------------------------------
+    # Action panels (built on first use, then cached)
+    # ------------------------------------------------------------------
+
+    def update_action_settings(self, *args):
+        selected_type = self.action_type_var.get()
+        self.config["action_type"] = selected_type
+
+        panel = self.action_panels.get(selected_type)
+        if panel is None:
+            panel = self.action_panels[selected_type] = self._build_action_panel(selected_type)
+
+        if self.current_panel is not panel:
+            if self.current_panel is not None:
+                self.current_panel["frame"].pack_forget()
+            panel["frame"].pack(fill="x")
+            self.current_panel = panel
+        panel["load"]()
+
+    def _build_action_panel(self, action_type):
+        """Settings panel of an action type - imports its plugin the first time it is picked"""
+        if action_type in BUILTIN_PANELS:
+            return getattr(self, BUILTIN_PANELS[action_type])()
+        action = registry.get(action_type)
+        if action is not None and action.build_panel is not None:
+            return action.build_panel(self, self.action_settings_container)
+        return self._build_fields_panel(action_type, action)
+
+    def _build_fields_panel(self, action_type, action):
+        """An entry per declared field, for plugins without a panel of their own"""
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        if action is None:
+            ctk.CTkLabel(
+                frame,
+                text=f"The plugin providing \"{action_type}\" could not be loaded",
+                font=("Arial", 10),
+                text_color="gray"
+            ).pack(anchor="w", pady=(0, 5))
+            return {"frame": frame, "load": lambda: None}
+
+        field_vars = []
+        for field, label, default in action.fields:
+            box = self._panel_box(frame, label)
+            var = tk.StringVar()
+            ctk.CTkEntry(box, textvariable=var, height=32).pack(fill="x", padx=10, pady=(0, 8))
+            var.trace('w', lambda *args, field=field, var=var: self.config.__setitem__(field, var.get()))
+            field_vars.append((var, field, default))
+
+        def load():
+            for var, field, default in field_vars:
+                var.set(str(self.config.get(field, default)))
+
+        return {"frame": frame, "load": load}
+
+    def _panel_box(self, parent, caption):
+        """Rounded caption box used by the action panels"""
+        box = ctk.CTkFrame(parent, fg_color="#2b2b2b", corner_radius=8)
+        box.pack(fill="x", pady=(0, 10))
+
+        ctk.CTkLabel(
+            box,
+            text=caption,
+            font=("Arial", 10),
+            text_color="gray"
+        ).pack(anchor="w", padx=10, pady=(8, 2))
+        return box
+
+    def _build_open_panel(self):
+        # Open Application settings
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        app_label_frame = self._panel_box(frame, "Application")
+
+        app_path_display = ctk.CTkLabel(
+            app_label_frame,
+            text="No application selected",
+            font=("Arial", 11),
+            anchor="w"
+        )
+        app_path_display.pack(anchor="w", padx=10, pady=(0, 8))
+
+        # Browse and clear buttons
+        btn_row = ctk.CTkFrame(frame, fg_color="transparent")
+        btn_row.pack(fill="x")
+
+        def load():
+            app_path = self.config.get("app_path")
+            app_path_display.configure(text=app_path.split("\\")[-1] if app_path else "No application selected")
+
+        def select_app():
+            filename = filedialog.askopenfilename(
+                title="Select Application",
+                filetypes=[
+                    ("Executable files", "*.exe"),
+                    ("All files", "*.*")
+                ]
+            )
+            if filename:
+                self.config["app_path"] = filename
+                load()
+
+        def clear_app():
+            self.config["app_path"] = None
+            load()
+
+        ctk.CTkButton(
+            btn_row,
+            text="Browse...",
+            command=select_app,
+            width=100,
+            height=32,
+            fg_color="#3a3a3a",
+            hover_color="#4a4a4a"
+        ).pack(side="left", padx=(0, 5))
+
+        ctk.CTkButton(
+            btn_row,
+            text="Clear",
+            command=clear_app,
+            width=80,
+            height=32,
+            fg_color="#3a3a3a",
+            hover_color="#4a4a4a"
+        ).pack(side="left")
+
+        return {"frame": frame, "load": load}
+
+    def _build_website_panel(self):
+        # Website URL settings
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        url_label_frame = self._panel_box(frame, "URL")
+
+        url_var = tk.StringVar()
+        ctk.CTkEntry(
+            url_label_frame,
+            textvariable=url_var,
+            placeholder_text="https://example.com",
+            height=32
+        ).pack(fill="x", padx=10, pady=(0, 8))
+
+        def load():
+            url_var.set(self.config.get("url", "https://"))
+
+        def update_url(*args):
+            self.config["url"] = url_var.get()
+
+        url_var.trace('w', update_url)
+        return {"frame": frame, "load": load}
+
+    def _build_hotkey_panel(self):
+        # Hotkey settings
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        hotkey_label_frame = self._panel_box(frame, "Hotkey Combination")
+
+        # Entry and Record button container
+        hotkey_input_frame = ctk.CTkFrame(hotkey_label_frame, fg_color="transparent")
+        hotkey_input_frame.pack(fill="x", padx=10, pady=(0, 8))
+
+        self.hotkey_var = tk.StringVar()
+        self.hotkey_entry = ctk.CTkEntry(
+            hotkey_input_frame,
+            textvariable=self.hotkey_var,
+            placeholder_text="Press 'Record' to capture keys",
+            height=32
+        )
+        self.hotkey_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        self.record_btn = ctk.CTkButton(
+            hotkey_input_frame,
+            text="🎙️ Record",
+            command=self.start_recording,
+            width=100,
+            height=32,
+            fg_color="#3a3a3a",
+            hover_color="#4a4a4a"
+        )
+        self.record_btn.pack(side="left")
+
+        def load():
+            self.hotkey_var.set(self.config.get("hotkey", ""))
+
+        def update_hotkey(*args):
+            if not self.recording["value"]:
+                self.config["hotkey"] = self.hotkey_var.get()
+
+        self.hotkey_var.trace('w', update_hotkey)
+
+        ctk.CTkLabel(
+            frame,
+            text="💡 Click Record and press your key combination",
+            font=("Arial", 9),
+            text_color="gray"
+        ).pack(anchor="w", pady=(0, 5))
+
+        return {"frame": frame, "load": load}
+
+    def on_key_press(self, event):
+        if not self.recording["value"]:
+            return
+
+        # Map key names
+        key = event.keysym
+
+        # Normalize modifier keys
+        if key in ["Control_L", "Control_R"]:
+            key = "Ctrl"
+        elif key in ["Alt_L", "Alt_R"]:
+            key = "Alt"
+        elif key in ["Shift_L", "Shift_R"]:
+            key = "Shift"
+        elif key in ["Win_L", "Win_R", "Super_L", "Super_R"]:
+            key = "Win"
+
+        # Add key to set
+        self.recording["keys"].add(key)
+
+        # Update display
+        keys_list = sorted(self.recording["keys"], key=lambda x: (
+            0 if x == "Ctrl" else
+            1 if x == "Alt" else
+            2 if x == "Shift" else
+            3 if x == "Win" else 4
+        ))
+        self.hotkey_var.set("+".join(keys_list))
+
+    def on_key_release(self, event):
+        if not self.recording["value"]:
+            return
+
+        # Stop recording after all keys released
+        # Small delay to ensure we captured the combo
+        self.dialog.after(100, self.stop_recording)
+
+    def start_recording(self):
+        self.recording["value"] = True
+        self.recording["keys"].clear()
+        self.record_btn.configure(text="⏺️ Recording...", fg_color="#E53935")
+        self.hotkey_entry.configure(placeholder_text="Press key combination now...")
+        self.hotkey_var.set("")
+
+        # Bind keyboard events to dialog
+        self.dialog.bind("<KeyPress>", self.on_key_press)
+        self.dialog.bind("<KeyRelease>", self.on_key_release)
+        self.dialog.focus_set()
+
+    def stop_recording(self):
+        if not self.recording["value"]:
+            return
+        self.recording["value"] = False
+        self.record_btn.configure(text="🎙️ Record", fg_color="#3a3a3a")
+        self.hotkey_entry.configure(placeholder_text="Press 'Record' to capture keys")
+
+        # Unbind events
+        self.dialog.unbind("<KeyPress>")
+        self.dialog.unbind("<KeyRelease>")
+
+        # Update config
+        self.config["hotkey"] = self.hotkey_var.get()
+
+    def _build_text_panel(self):
+        # Text typing settings
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        text_label_frame = self._panel_box(frame, "Text to Type")
+
+        text_var = tk.StringVar()
+        ctk.CTkEntry(
+            text_label_frame,
+            textvariable=text_var,
+            placeholder_text="Enter text to type...",
+            height=32
+        ).pack(fill="x", padx=10, pady=(0, 8))
+
+        def load():
+            text_var.set(self.config.get("type_text", ""))
+
+        def update_text(*args):
+            self.config["type_text"] = text_var.get()
+
+        text_var.trace('w', update_text)
+        return {"frame": frame, "load": load}
+
+    def _build_script_panel(self):
+        # Python script settings - a file, or code typed in here
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        file_label_frame = self._panel_box(frame, "Script File")
+
+        path_display = ctk.CTkLabel(file_label_frame, text="", font=("Arial", 11), anchor="w")
+        path_display.pack(anchor="w", padx=10, pady=(0, 8))
+
+        btn_row = ctk.CTkFrame(frame, fg_color="transparent")
+        btn_row.pack(fill="x", pady=(0, 10))
+
+        code_label_frame = self._panel_box(frame, "Python Code (used when no file is selected)")
+        code_box = ctk.CTkTextbox(code_label_frame, height=120, font=("Courier", 11))
+        code_box.pack(fill="x", padx=10, pady=(0, 8))
+
+        timeout_row = ctk.CTkFrame(frame, fg_color="transparent")
+        timeout_row.pack(fill="x")
+        ctk.CTkLabel(timeout_row, text="Timeout (s):", width=90, anchor="w").pack(side="left")
+        timeout_var = tk.StringVar()
+        ctk.CTkEntry(timeout_row, textvariable=timeout_var, width=70).pack(side="left")
+
+        def load():
+            script_path = self.config.get("script_path")
+            path_display.configure(text=os.path.basename(script_path) if script_path else "No file selected")
+            code_box.delete("1.0", "end")
+            code_box.insert("1.0", self.config.get("script_code") or "")
+            timeout_var.set(str(self.config.get("script_timeout", DEFAULT_SCRIPT_TIMEOUT)))
+
+        def select_script():
+            filename = filedialog.askopenfilename(
+                title="Select Script",
+                filetypes=[
+                    ("Python files", "*.py"),
+                    ("All files", "*.*")
+                ]
+            )
+            if filename:
+                self.config["script_path"] = filename
+                path_display.configure(text=os.path.basename(filename))
+
+        def clear_script():
+            self.config["script_path"] = None
+            path_display.configure(text="No file selected")
+
+        def update_code(event=None):
+            self.config["script_code"] = code_box.get("1.0", "end-1c")
+
+        def update_timeout(*args):
+            try:
+                self.config["script_timeout"] = max(0.1, float(timeout_var.get()))
+            except ValueError:
+                self.config.pop("script_timeout", None)
+
+        for text, command in (("Browse...", select_script), ("Clear", clear_script)):
+            ctk.CTkButton(
+                btn_row,
+                text=text,
+                command=command,
+                width=100 if text == "Browse..." else 80,
+                height=32,
+                fg_color="#3a3a3a",
+                hover_color="#4a4a4a"
+            ).pack(side="left", padx=(0, 5))
+
+        code_box.bind("<KeyRelease>", update_code)
+        code_box.bind("<FocusOut>", update_code)
+        timeout_var.trace('w', update_timeout)
+        return {"frame": frame, "load": load}
+
+    def _build_command_panel(self):
+        # Shell command settings, with the output of the key's last run
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        command_label_frame = self._panel_box(frame, "Command")
+
+        command_var = tk.StringVar()
+        ctk.CTkEntry(
+            command_label_frame,
+            textvariable=command_var,
+            placeholder_text="e.g. git -C ~/project pull",
+            height=32
+        ).pack(fill="x", padx=10, pady=(0, 8))
+
+        options_row = ctk.CTkFrame(frame, fg_color="transparent")
+        options_row.pack(fill="x", pady=(0, 10))
+        ctk.CTkLabel(options_row, text="Folder:", width=50, anchor="w").pack(side="left")
+        cwd_var = tk.StringVar()
+        ctk.CTkEntry(options_row, textvariable=cwd_var, placeholder_text="current folder").pack(
+            side="left", fill="x", expand=True, padx=(0, 10))
+        ctk.CTkLabel(options_row, text="Timeout (s):", width=80).pack(side="left")
+        timeout_var = tk.StringVar()
+        ctk.CTkEntry(options_row, textvariable=timeout_var, width=60).pack(side="left")
+
+        output_label_frame = self._panel_box(frame, "Last Output")
+        output_box = ctk.CTkTextbox(output_label_frame, height=100, font=("Courier", 10))
+        output_box.pack(fill="x", padx=10, pady=(0, 8))
+
+        def load():
+            command_var.set(self.config.get("command") or "")
+            cwd_var.set(self.config.get("command_cwd") or "")
+            timeout_var.set(str(self.config.get("command_timeout", DEFAULT_COMMAND_TIMEOUT)))
+            lines = self.app.command_runner.output(self.button_number)
+            exit_code = self.app.command_runner.exit_codes.get(self.button_number, "n/a")
+            output_box.configure(state="normal")
+            output_box.delete("1.0", "end")
+            if lines:
+                output_box.insert("1.0", "\n".join(line for _, line in lines) + f"\n[exit code {exit_code}]")
+            else:
+                output_box.insert("1.0", "Not run yet")
+            output_box.configure(state="disabled")
+
+        def update_command(*args):
+            self.config["command"] = command_var.get()
+
+        def update_cwd(*args):
+            self.config["command_cwd"] = cwd_var.get().strip()
+
+        def update_timeout(*args):
+            try:
+                self.config["command_timeout"] = max(0.1, float(timeout_var.get()))
+            except ValueError:
+                self.config.pop("command_timeout", None)
+
+        command_var.trace('w', update_command)
+        cwd_var.trace('w', update_cwd)
+        timeout_var.trace('w', update_timeout)
+        return {"frame": frame, "load": load}
+
+    def _build_http_panel(self):
+        # HTTP request settings - $title, $key, $counter, $time, $date and $timestamp are filled in on press
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        request_label_frame = self._panel_box(frame, "Request")
+
+        request_row = ctk.CTkFrame(request_label_frame, fg_color="transparent")
+        request_row.pack(fill="x", padx=10, pady=(0, 8))
+        method_var = tk.StringVar(value="GET")
+        ctk.CTkOptionMenu(
+            request_row,
+            values=HTTP_METHODS,
+            variable=method_var,
+            width=90,
+            fg_color="#3a3a3a",
+            button_color="#4a4a4a",
+            button_hover_color="#5a5a5a"
+        ).pack(side="left", padx=(0, 5))
+        url_var = tk.StringVar()
+        ctk.CTkEntry(
+            request_row,
+            textvariable=url_var,
+            placeholder_text="http://192.168.1.20/api/scene",
+            height=32
+        ).pack(side="left", fill="x", expand=True)
+
+        headers_label_frame = self._panel_box(frame, "Headers (one 'Name: value' per line)")
+        headers_box = ctk.CTkTextbox(headers_label_frame, height=60, font=("Courier", 10))
+        headers_box.pack(fill="x", padx=10, pady=(0, 8))
+
+        body_label_frame = self._panel_box(frame, "Body ($title, $key, $counter, $time, $date, $timestamp)")
+        body_box = ctk.CTkTextbox(body_label_frame, height=80, font=("Courier", 10))
+        body_box.pack(fill="x", padx=10, pady=(0, 8))
+
+        options_row = ctk.CTkFrame(frame, fg_color="transparent")
+        options_row.pack(fill="x")
+        ctk.CTkLabel(options_row, text="Timeout (s):", width=80, anchor="w").pack(side="left")
+        timeout_var = tk.StringVar()
+        ctk.CTkEntry(options_row, textvariable=timeout_var, width=60).pack(side="left", padx=(0, 15))
+        ctk.CTkLabel(options_row, text="Retries:", width=60).pack(side="left")
+        retries_var = tk.StringVar()
+        ctk.CTkEntry(options_row, textvariable=retries_var, width=50).pack(side="left")
+
+        def load():
+            method_var.set(self.config.get("http_method") or "GET")
+            url_var.set(self.config.get("http_url") or "")
+            for box, field in ((headers_box, "http_headers"), (body_box, "http_body")):
+                box.delete("1.0", "end")
+                box.insert("1.0", self.config.get(field) or "")
+            timeout_var.set(str(self.config.get("http_timeout", DEFAULT_HTTP_TIMEOUT)))
+            retries_var.set(str(self.config.get("http_retries", DEFAULT_HTTP_RETRIES)))
+
+        def update_boxes(event=None):
+            self.config["http_headers"] = headers_box.get("1.0", "end-1c")
+            self.config["http_body"] = body_box.get("1.0", "end-1c")
+
+        def update_timeout(*args):
+            try:
+                self.config["http_timeout"] = max(0.1, float(timeout_var.get()))
+            except ValueError:
+                self.config.pop("http_timeout", None)
+
+        def update_retries(*args):
+            try:
+                self.config["http_retries"] = max(0, int(retries_var.get()))
+            except ValueError:
+                self.config.pop("http_retries", None)
+
+        method_var.trace('w', lambda *args: self.config.__setitem__("http_method", method_var.get()))
+        url_var.trace('w', lambda *args: self.config.__setitem__("http_url", url_var.get()))
+        for box in (headers_box, body_box):
+            box.bind("<KeyRelease>", update_boxes)
+            box.bind("<FocusOut>", update_boxes)
+        timeout_var.trace('w', update_timeout)
+        retries_var.trace('w', update_retries)
+        return {"frame": frame, "load": load}
+
+    def _build_macro_panel(self):
+        # Recorded keyboard and mouse macro, with its replay speed
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        macro_label_frame = self._panel_box(frame, "Macro")
+
+        self.macro_info = ctk.CTkLabel(macro_label_frame, text="", font=("Arial", 11), anchor="w")
+        self.macro_info.pack(anchor="w", padx=10, pady=(0, 8))
+
+        btn_row = ctk.CTkFrame(frame, fg_color="transparent")
+        btn_row.pack(fill="x", pady=(0, 5))
+        self.macro_record_btn = ctk.CTkButton(
+            btn_row,
+            text="🎙️ Record",
+            command=self.toggle_macro_recording,
+            width=100,
+            height=32,
+            fg_color="#3a3a3a",
+            hover_color="#4a4a4a"
+        )
+        self.macro_record_btn.pack(side="left", padx=(0, 5))
+
+        ctk.CTkLabel(
+            frame,
+            text="Records every key and mouse event until Stop is pressed; press the key again to stop playback",
+            font=("Arial", 9),
+            text_color="gray"
+        ).pack(anchor="w", pady=(0, 8))
+
+        options_row = ctk.CTkFrame(frame, fg_color="transparent")
+        options_row.pack(fill="x")
+        ctk.CTkLabel(options_row, text="Speed:", width=50, anchor="w").pack(side="left")
+        speed_var = tk.StringVar()
+        ctk.CTkEntry(options_row, textvariable=speed_var, width=60).pack(side="left", padx=(0, 15))
+        ctk.CTkLabel(options_row, text="Longest Pause (s):", width=110).pack(side="left")
+        gap_var = tk.StringVar()
+        ctk.CTkEntry(options_row, textvariable=gap_var, width=60, placeholder_text="as recorded").pack(side="left")
+
+        def load():
+            self.show_macro_info()
+            speed_var.set(str(self.config.get("macro_speed", DEFAULT_MACRO_SPEED)))
+            gap_var.set(str(self.config.get("macro_max_gap") or ""))
+
+        def select_macro():
+            filename = filedialog.askopenfilename(
+                title="Select Macro",
+                filetypes=[("Macros", f"*{MACRO_EXTENSION}"), ("All files", "*.*")]
+            )
+            if filename:
+                self.config["macro_path"] = filename
+                self.show_macro_info()
+
+        def update_speed(*args):
+            try:
+                self.config["macro_speed"] = min(100.0, max(0.01, float(speed_var.get())))
+            except ValueError:
+                self.config.pop("macro_speed", None)
+
+        def update_gap(*args):
+            try:
+                self.config["macro_max_gap"] = max(0.0, float(gap_var.get()))
+            except ValueError:
+                self.config.pop("macro_max_gap", None)
+
+        ctk.CTkButton(
+            btn_row,
+            text="Browse...",
+            command=select_macro,
+            width=100,
+            height=32,
+            fg_color="#3a3a3a",
+            hover_color="#4a4a4a"
+        ).pack(side="left", padx=(0, 5))
+
+        speed_var.trace('w', update_speed)
+        gap_var.trace('w', update_gap)
+        return {"frame": frame, "load": load}
+
+    def show_macro_info(self):
+        path = self.config.get("macro_path")
+        if not path:
+            self.macro_info.configure(text="Nothing recorded yet")
+            return
+        try:
+            events, duration = read_macro_header(path)
+            size = os.path.getsize(path)
+        except (OSError, ValueError) as e:
+            self.macro_info.configure(text=f"{os.path.basename(path)} - cannot be read: {e}")
+            return
+        self.macro_info.configure(
+            text=f"{os.path.basename(path)} - {events} events, {duration:.1f} s, {size / 1024:.1f} KB"
+        )
+
+    def toggle_macro_recording(self):
+        if self.macro_recording is not None:
+            self.stop_macro_recording()
+            return
+        try:
+            backend = recorder_backend()
+        except RecordingUnavailable as e:
+            messagebox.showwarning("Macro Recording Unavailable", str(e), parent=self.dialog)
+            return
+        path = new_macro_path(self.button_number)
+        self.macro_recording = MacroRecording(path, backend)
+        try:
+            self.macro_recording.start()
+        except Exception as e:
+            self.macro_recording = None
+            messagebox.showerror("Macro Recording", f"Could not start recording: {e}", parent=self.dialog)
+            return
+        self.config["macro_path"] = path
+        self.macro_record_btn.configure(text="⏹️ Stop", fg_color="#E53935")
+        self.macro_info.configure(text="⏺️ Recording... use any window, then press Stop")
+
+    def stop_macro_recording(self):
+        if self.macro_recording is None:
+            return
+        recording, self.macro_recording = self.macro_recording, None
+        try:
+            recording.stop()
+        except Exception as e:
+            print(f"Error finishing macro recording: {e}")
+        self.macro_record_btn.configure(text="🎙️ Record", fg_color="#3a3a3a")
+        self.show_macro_info()
+        if recording.dropped:
+            self.app.status_label.configure(text=f"Macro recorded; {recording.dropped} unsupported key press(es) left out")
+
+    def _build_multi_action_panel(self):
+        # Multi action placeholder
+        frame = ctk.CTkFrame(self.action_settings_container, fg_color="transparent")
+        multi_label_frame = ctk.CTkFrame(frame, fg_color="#2b2b2b", corner_radius=8)
+        multi_label_frame.pack(fill="x", pady=(0, 10))
+
+        ctk.CTkLabel(
+            multi_label_frame,
+            text="⚡ Multi Action",
+            font=("Arial", 11, "bold")
+        ).pack(anchor="w", padx=10, pady=(8, 2))
+
+        ctk.CTkLabel(
+            multi_label_frame,
+            text="Execute multiple actions in sequence",
+            font=("Arial", 9),
+            text_color="gray"
+        ).pack(anchor="w", padx=10, pady=(0, 8))
+
+        ctk.CTkLabel(
+            frame,
+            text="Coming soon: Add multiple actions to execute",
+            font=("Arial", 9),
+            text_color="gray"
+        ).pack(anchor="w", pady=(0, 5))
+
+        return {"frame": frame, "load": lambda: None}
+
+    # ------------------------------------------------------------------
+    # Saving
+    # ------------------------------------------------------------------
+
+    def save_changes(self):
+        app = self.app
+        button_number = self.button_number
+        config = self.config
+
+        old_path = app.button_configs.get(button_number, {}).get("image_path")
+
+        # Update config with all current values
+        config["text"] = self.name_var.get()
+        # config already has image_path and app_path updated from their respective functions
+
+        try:
+            parse_schedule(config, button_number, app.button_configs)
+        except ValueError as e:
+            messagebox.showerror("Invalid Schedule", f"Key {button_number} cannot be scheduled: {e}")
+            return False
+
+        try:
+            chord = parse_chord(config.get("global_hotkey", ""))
+        except ValueError as e:
+            messagebox.showerror("Invalid Global Hotkey", f"Key {button_number} cannot use this hotkey: {e}")
+            return False
+        if chord is not None:
+            others, _ = build_chord_table({k: v for k, v in app.button_configs.items() if k != button_number})
+            other = others.get(chord)
+            if other is not None:
+                other_name = app.button_configs[other].get("text") or f"key {other}"
+                messagebox.showerror("Invalid Global Hotkey", f"{format_chord(chord)} already fires {other_name}.")
+                return False
+
+        # Save to button_configs
+        app.button_configs[button_number] = config.copy()
+
+        # If icon was removed or changed, delete the old one unless another key uses it
+        if old_path != config.get("image_path"):
+            app.delete_unused_icons([old_path])
+
+        # Update button display
+        app.update_button_display(button_number)
+
+        # Save to file
+        app.save_config()
+        app.record_history(f"Edit key {button_number}")
+
+        # Show confirmation
+        app.status_label.configure(text=f"Button {button_number} saved!")
+        return True
+
+    def save_and_close(self):
+        if self.save_changes():
+            self.hide()
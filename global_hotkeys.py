@@ -0,0 +1,464 @@
+"""
+Global Hotkeys for Mango Stream Deck
+Keys can have a chord like Ctrl+Alt+1 that fires them from any application,
+also while the deck is hidden in the tray. A listener thread takes the
+chords from the system - X11 key grabs on Linux, RegisterHotKey on Windows -
+looks them up in one dict and hands the key to the app without going
+through the Tk loop
+"""
+
+import os
+import queue
+import select
+import sys
+import threading
+import time
+
+from input_injection import WINDOWS_KEY_NAMES, X_KEY_NAMES
+
+# Modifier names -> bits of a chord
+MODIFIERS = {"ctrl": 1, "shift": 2, "alt": 4, "win": 8}
+MODIFIER_ALIASES = {"control": "ctrl", "option": "alt", "super": "win", "cmd": "win", "command": "win"}
+
+# Other spellings -> the key names used in chords
+KEY_ALIASES = {
+    "space": " ", "return": "enter", "escape": "esc", "del": "delete", "pgup": "pageup", "pgdn": "pagedown",
+    "prtsc": "printscreen", "apps": "menu",
+}
+
+# Keys a chord can end in
+CHORD_KEYS = set(WINDOWS_KEY_NAMES.values()) - {"shift", "shiftright", "ctrl", "ctrlright", "alt", "altright", "win"}
+
+# How often, and how long at most, a key that types waits for the keys of its chord to come up
+RELEASE_POLL = 0.001
+RELEASE_TIMEOUT = 2.0
+
+# Keys that may be a chord without modifiers - nothing is typed with them
+BARE_KEYS = {f"f{n}" for n in range(1, 25)} | {
+    "volumeup", "volumedown", "volumemute", "playpause", "nexttrack", "prevtrack", "pause", "scrolllock",
+}
+
+
+def parse_chord(text):
+    """
+    'Ctrl + Alt + K' -> (modifier bits, key name); None for an empty chord.
+
+    Raises ValueError with a readable message for a chord that cannot be used.
+    """
+    mods, key = 0, None
+    for part in text.split("+"):
+        name = part.strip().lower()
+        if not name:
+            continue
+        name = MODIFIER_ALIASES.get(name, name)
+        if name in MODIFIERS:
+            mods |= MODIFIERS[name]
+            continue
+        name = KEY_ALIASES.get(name, name)
+        if name not in CHORD_KEYS:
+            raise ValueError(f"unknown key: {part.strip()}")
+        if key is not None:
+            raise ValueError("a chord has one key besides its modifiers")
+        key = name
+    if key is None:
+        if mods:
+            raise ValueError("a chord needs a key besides its modifiers")
+        return None
+    if not mods and key not in BARE_KEYS:
+        raise ValueError(f"{format_chord((0, key))} needs Ctrl, Alt, Shift or Win - it would be taken from typing")
+    return mods, key
+
+
+def format_chord(chord):
+    """(modifier bits, key name) -> 'Ctrl+Alt+K'"""
+    mods, key = chord
+    names = [name.capitalize() for name, bit in MODIFIERS.items() if mods & bit]
+    names.append("Space" if key == " " else key.upper() if len(key) == 1 else key.capitalize())
+    return "+".join(names)
+
+
+def build_table(button_configs):
+    """
+    Chord -> key ID for every key with a global hotkey, and (key ID, message)
+    for the ones left out. The first key claiming a chord keeps it.
+    """
+    table, problems = {}, []
+    for key_id in sorted(button_configs):
+        text = button_configs[key_id].get("global_hotkey")
+        if not text:
+            continue
+        try:
+            chord = parse_chord(text)
+        except ValueError as e:
+            problems.append((key_id, str(e)))
+            continue
+        if chord is None:
+            continue
+        if chord in table:
+            problems.append((key_id, f"{format_chord(chord)} is already used by key {table[chord]}"))
+            continue
+        table[chord] = key_id
+    return table, problems
+
+
+class HotkeysUnavailable(Exception):
+    """Global hotkeys cannot work here; the message says why"""
+
+
+class HotkeyBackend:
+    """
+    Takes chords from the system on a listener thread of its own.
+
+    start(on_chord, on_unavailable) starts the thread; on_chord(chord,
+    received) gets each press with the perf_counter time it arrived, and
+    on_unavailable(chord, reason) each chord the system would not give us.
+    bind(chords) replaces the chords listened for, from any thread.
+    held(chord) tells whether a key of the chord is still down; it is called
+    on the listener thread.
+    """
+
+    def start(self, on_chord, on_unavailable):
+        raise HotkeysUnavailable("global hotkeys need Windows or Linux with an X11 display")
+
+    def bind(self, chords):
+        pass
+
+    def held(self, chord):
+        return False
+
+    def stop(self):
+        pass
+
+
+class X11Hotkeys(HotkeyBackend):
+    """
+    Passive key grabs on the root window. Each chord is grabbed with every
+    combination of Caps Lock and Num Lock, which X counts as modifiers too.
+    All X requests happen on the listener thread; bind() queues the chords
+    and wakes it through a pipe.
+    """
+
+    def start(self, on_chord, on_unavailable):
+        try:
+            from Xlib import X, XK, display, error
+        except ImportError:
+            raise HotkeysUnavailable(
+                "python-xlib module required for global hotkeys.\nInstall with: pip install python-xlib"
+            ) from None
+        self.X, self.XK, self.error = X, XK, error
+        try:
+            self.display = display.Display()
+        except Exception as e:
+            raise HotkeysUnavailable(f"could not connect to the X display: {e}") from None
+        XK.load_keysym_group("xf86")
+        self.on_chord, self.on_unavailable = on_chord, on_unavailable
+        self.root = self.display.screen().root
+        self.modifier_masks = {"ctrl": X.ControlMask, "shift": X.ShiftMask, "alt": X.Mod1Mask, "win": X.Mod4Mask}
+        self.chord_mask = X.ControlMask | X.ShiftMask | X.Mod1Mask | X.Mod4Mask
+        numlock = self._numlock_mask()
+        self.lock_masks = [0, X.LockMask] + ([numlock, numlock | X.LockMask] if numlock else [])
+        self.grabs = {}  # (X modifier mask, keycode) -> chord
+        self.chord_keycodes = {}  # Chord -> keycode of its key
+        # Keycodes that set each modifier, for telling when a chord is let go
+        mapping = self.display.get_modifier_mapping()
+        self.modifier_keycodes = {
+            name: [keycode for keycode in mapping[mask.bit_length() - 1] if keycode]
+            for name, mask in self.modifier_masks.items()
+        }
+        self.released = None  # (keycode, time) of the last key release, to spot auto-repeat
+        self.commands = queue.Queue()
+        self.wake_read, self.wake_write = os.pipe()
+        self.thread = threading.Thread(target=self._run, name="global-hotkeys", daemon=True)
+        self.thread.start()
+
+    def _numlock_mask(self):
+        keycode = self.display.keysym_to_keycode(self.XK.string_to_keysym("Num_Lock"))
+        for index, keycodes in enumerate(self.display.get_modifier_mapping()):
+            if keycode and keycode in keycodes:
+                return 1 << index
+        return 0
+
+    def bind(self, chords):
+        self.commands.put(list(chords))
+        os.write(self.wake_write, b"b")
+
+    def stop(self):
+        self.commands.put(None)
+        os.write(self.wake_write, b"s")
+        self.thread.join(1.0)
+        os.close(self.wake_read)
+        os.close(self.wake_write)
+
+    def _run(self):
+        display = self.display
+        try:
+            while True:
+                while display.pending_events():
+                    self._event(display.next_event())
+                readable, _, _ = select.select([display.fileno(), self.wake_read], [], [])
+                if self.wake_read in readable:
+                    os.read(self.wake_read, 64)
+                    while not self.commands.empty():
+                        chords = self.commands.get()
+                        if chords is None:
+                            return
+                        self._grab(chords)
+        except Exception as e:
+            print(f"Global hotkeys stopped: {e}")
+        finally:
+            display.close()
+
+    def held(self, chord):
+        # The grab holds the keyboard until the chord's key is up - keys sent before then would come back to us
+        keycodes = [self.chord_keycodes.get(chord, 0)]
+        for name, bit in MODIFIERS.items():
+            if chord[0] & bit:
+                keycodes += self.modifier_keycodes[name]
+        keymap = self.display.query_keymap()
+        return any(keycode and keymap[keycode >> 3] & (1 << (keycode & 7)) for keycode in keycodes)
+
+    def _event(self, event):
+        received = time.perf_counter()
+        X = self.X
+        if event.type == X.KeyRelease:
+            self.released = (event.detail, event.time)
+        elif event.type == X.KeyPress:
+            # A held key repeats as release and press pairs sharing one timestamp
+            if self.released == (event.detail, event.time):
+                return
+            chord = self.grabs.get((event.state & self.chord_mask, event.detail))
+            if chord is not None:
+                self.on_chord(chord, received)
+
+    def _keycode(self, key):
+        if len(key) == 1:
+            keysym = ord(key)  # Latin-1 keysyms are the character codes
+        else:
+            keysym = self.XK.string_to_keysym(X_KEY_NAMES.get(key, key.upper()))
+        return self.display.keysym_to_keycode(keysym) if keysym else 0
+
+    def _grab(self, chords):
+        X, root = self.X, self.root
+        for mask, keycode in self.grabs:
+            for lock in self.lock_masks:
+                root.ungrab_key(keycode, mask | lock)
+        self.grabs = {}
+        self.chord_keycodes = {}
+        for chord in chords:
+            keycode = self._keycode(chord[1])
+            if not keycode:
+                self.on_unavailable(chord, "the keyboard layout has no such key")
+                continue
+            mask = 0
+            for name, bit in MODIFIERS.items():
+                if chord[0] & bit:
+                    mask |= self.modifier_masks[name]
+            catch = self.error.CatchError(self.error.BadAccess)
+            for lock in self.lock_masks:
+                root.grab_key(keycode, mask | lock, False, X.GrabModeAsync, X.GrabModeAsync, onerror=catch)
+            self.display.sync()
+            if catch.get_error():
+                for lock in self.lock_masks:
+                    root.ungrab_key(keycode, mask | lock)
+                self.on_unavailable(chord, "another application has it")
+                continue
+            self.grabs[(mask, keycode)] = chord
+            self.chord_keycodes[chord] = keycode
+        self.display.flush()
+
+
+class WindowsHotkeys(HotkeyBackend):
+    """RegisterHotKey on a thread running its own message loop; bind() posts it the new chords"""
+
+    WM_HOTKEY = 0x0312
+    WM_QUIT = 0x0012
+    WM_APP = 0x8000
+    PM_NOREMOVE = 0x0000
+    MOD_NOREPEAT = 0x4000  # Holding a chord fires it once
+    MODIFIER_FLAGS = {"ctrl": 0x0002, "shift": 0x0004, "alt": 0x0001, "win": 0x0008}
+    MODIFIER_KEYS = {"ctrl": (0x11,), "shift": (0x10,), "alt": (0x12,), "win": (0x5B, 0x5C)}
+    VIRTUAL_KEYS = {name: code for code, name in WINDOWS_KEY_NAMES.items()}
+
+    def start(self, on_chord, on_unavailable):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes, self.wintypes = ctypes, wintypes
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        self.on_chord, self.on_unavailable = on_chord, on_unavailable
+        self.commands = queue.Queue()
+        self.thread_id = None
+        started = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(started,), name="global-hotkeys", daemon=True)
+        self.thread.start()
+        started.wait(1.0)
+
+    def bind(self, chords):
+        self.commands.put(list(chords))
+        self.user32.PostThreadMessageW(self.thread_id, self.WM_APP, 0, 0)
+
+    def held(self, chord):
+        codes = [self.VIRTUAL_KEYS[chord[1]]]
+        for name, bit in MODIFIERS.items():
+            if chord[0] & bit:
+                codes += self.MODIFIER_KEYS[name]
+        return any(self.user32.GetAsyncKeyState(code) & 0x8000 for code in codes)
+
+    def stop(self):
+        if self.thread_id is not None:
+            self.user32.PostThreadMessageW(self.thread_id, self.WM_QUIT, 0, 0)
+            self.thread.join(1.0)
+            self.thread_id = None
+
+    def _run(self, started):
+        ctypes, wintypes = self.ctypes, self.wintypes
+        message = wintypes.MSG()
+        # The thread's message queue has to exist before bind() posts to it
+        self.user32.PeekMessageW(ctypes.byref(message), None, 0, 0, self.PM_NOREMOVE)
+        self.thread_id = self.kernel32.GetCurrentThreadId()
+        started.set()
+        chords = {}  # Hotkey ID -> chord
+        while self.user32.GetMessageW(ctypes.byref(message), None, 0, 0) > 0:
+            if message.message == self.WM_HOTKEY:
+                chord = chords.get(message.wParam)
+                if chord is not None:
+                    self.on_chord(chord, time.perf_counter())
+            elif message.message == self.WM_APP:
+                while not self.commands.empty():
+                    chords = self._register(chords, self.commands.get())
+        for hotkey_id in chords:
+            self.user32.UnregisterHotKey(None, hotkey_id)
+
+    def _register(self, registered, chords):
+        for hotkey_id in registered:
+            self.user32.UnregisterHotKey(None, hotkey_id)
+        registered = {}
+        for hotkey_id, chord in enumerate(chords, 1):
+            flags = self.MOD_NOREPEAT
+            for name, bit in MODIFIERS.items():
+                if chord[0] & bit:
+                    flags |= self.MODIFIER_FLAGS[name]
+            if self.user32.RegisterHotKey(None, hotkey_id, flags, self.VIRTUAL_KEYS[chord[1]]):
+                registered[hotkey_id] = chord
+            else:
+                self.on_unavailable(chord, "another application has it")
+        return registered
+
+
+class FakeHotkeys(HotkeyBackend):
+    """Chords come from press() instead of the keyboard, on a listener thread like the real ones - for benchmarks"""
+
+    def start(self, on_chord, on_unavailable):
+        self.on_chord = on_chord
+        self.bound = frozenset()
+        self.released_at = 0.0  # perf_counter time the last chord is let go
+        self.presses = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="global-hotkeys", daemon=True)
+        self.thread.start()
+
+    def bind(self, chords):
+        self.bound = frozenset(chords)
+
+    def press(self, chord, hold=0.0):
+        """Press a chord - (modifier bits, key name) or text like 'Ctrl+Alt+K' - and let go hold seconds later"""
+        if isinstance(chord, str):
+            chord = parse_chord(chord)
+        received = time.perf_counter()
+        self.released_at = received + hold
+        self.presses.put((chord, received))
+
+    def held(self, chord):
+        return time.perf_counter() < self.released_at
+
+    def stop(self):
+        self.presses.put((None, 0))
+        self.thread.join(1.0)
+
+    def _run(self):
+        while True:
+            chord, received = self.presses.get()
+            if chord is None:
+                return
+            if chord in self.bound:
+                self.on_chord(chord, received)
+
+
+def platform_backend():
+    if sys.platform == "win32":
+        return WindowsHotkeys()
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        return X11Hotkeys()
+    return HotkeyBackend()
+
+
+class GlobalHotkeys:
+    """
+    Chords that fire keys from anywhere.
+
+    dispatch(key_id, chord, received) is called on the listener thread with
+    the perf_counter time the chord arrived. load() takes the chords from the
+    key configs; the listener starts with the first chord and is never
+    started when no key has one.
+    """
+
+    def __init__(self, dispatch, backend=None):
+        self.dispatch = dispatch
+        self.backend = backend
+        self.table = {}  # Chord -> key ID, replaced whole so the listener reads it without a lock
+        self.unavailable = None  # Why global hotkeys cannot work here, once that is known
+        self._started = False
+
+    def load(self, button_configs):
+        """Listen for the global hotkeys of button_configs instead of the current ones"""
+        table, problems = build_table(button_configs)
+        for key_id, message in problems:
+            print(f"Ignoring global hotkey of key {key_id}: {message}")
+        if table == self.table:
+            return
+        self.table = table
+        if self.unavailable is not None or not (table or self._started):
+            return
+        if not self._started:
+            if self.backend is None:
+                self.backend = platform_backend()
+            try:
+                self.backend.start(self._chord, self._chord_unavailable)
+            except Exception as e:
+                self.unavailable = str(e)
+                print(f"Global hotkeys unavailable: {e}")
+                return
+            self._started = True
+        self.backend.bind(table)
+
+    def _chord(self, chord, received):
+        key_id = self.table.get(chord)
+        if key_id is not None:
+            self.dispatch(key_id, chord, received)
+
+    def wait_released(self, chord):
+        """
+        Listener thread - wait until the chord's keys are up, so keys sent
+        next do not arrive as Ctrl+Alt+whatever. Returns the seconds waited;
+        gives up after RELEASE_TIMEOUT.
+        """
+        start = time.perf_counter()
+        try:
+            while self.backend.held(chord):
+                if time.perf_counter() - start >= RELEASE_TIMEOUT:
+                    print(f"Global hotkey {format_chord(chord)} still held - sending its keys anyway")
+                    break
+                time.sleep(RELEASE_POLL)
+        except Exception as e:
+            print(f"Could not read the keyboard state: {e}")
+        return time.perf_counter() - start
+
+    def _chord_unavailable(self, chord, reason):
+        print(f"Global hotkey {format_chord(chord)} of key {self.table.get(chord)} unavailable: {reason}")
+
+    def stop(self):
+        if self._started:
+            self._started = False
+            try:
+                self.backend.stop()
+            except Exception as e:
+                print(f"Error stopping global hotkeys: {e}")
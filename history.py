@@ -0,0 +1,119 @@
+"""
+Undo History for Mango Stream Deck
+Bounded undo/redo over immutable snapshots of the deck configuration;
+consecutive snapshots share every key config that did not change
+"""
+
+from collections import deque
+from types import MappingProxyType
+
+DEFAULT_HISTORY_LIMIT = 100
+
+
+class Snapshot:
+    """Read-only deck state: settings, layout and one frozen config per key"""
+
+    __slots__ = ("settings", "layout", "buttons")
+
+    def __init__(self, settings, layout, buttons):
+        self.settings = settings  # MappingProxyType of grid size, radius, theme...
+        self.layout = layout  # MappingProxyType of DeckLayout.to_dict()
+        self.buttons = buttons  # MappingProxyType of key ID -> MappingProxyType config
+
+    def button_config(self, key_id):
+        """Mutable copy of one key's config for the app to work on"""
+        return dict(self.buttons[key_id])
+
+    def changed_keys(self, other):
+        """Key IDs whose config differs between two snapshots (by identity - shared configs are equal)"""
+        keys = set(self.buttons) | set(other.buttons)
+        return {key_id for key_id in keys if self.buttons.get(key_id) is not other.buttons.get(key_id)}
+
+
+def _freeze(value, previous):
+    """Frozen copy of a dict, or previous itself if nothing changed"""
+    if previous is not None and previous == value:
+        return previous
+    return MappingProxyType(dict(value))
+
+
+class ConfigHistory:
+    """
+    Undo and redo stacks of Snapshots.
+
+    commit() compares the live config with the current snapshot key by key,
+    so each step only allocates the configs that actually changed.
+    """
+
+    def __init__(self, limit=DEFAULT_HISTORY_LIMIT):
+        self.current = None
+        self._undo = deque(maxlen=limit)  # (label, snapshot before the edit)
+        self._redo = []  # (label, snapshot after the edit)
+
+    def snapshot(self, settings, layout, buttons):
+        previous = self.current
+        frozen = {}
+        for key_id, config in buttons.items():
+            frozen[key_id] = _freeze(config, previous.buttons.get(key_id) if previous else None)
+        frozen_buttons = MappingProxyType(frozen)
+        if previous is not None and frozen.keys() == previous.buttons.keys() and all(
+            frozen[key_id] is previous.buttons[key_id] for key_id in frozen
+        ):
+            frozen_buttons = previous.buttons
+        return Snapshot(
+            _freeze(settings, previous.settings if previous else None),
+            _freeze(layout, previous.layout if previous else None),
+            frozen_buttons
+        )
+
+    def reset(self, settings, layout, buttons):
+        """Start a new history at the given state"""
+        self.current = None
+        self.current = self.snapshot(settings, layout, buttons)
+        self._undo.clear()
+        self._redo.clear()
+
+    def commit(self, label, settings, layout, buttons):
+        """Record an edit; returns False if nothing changed"""
+        snapshot = self.snapshot(settings, layout, buttons)
+        previous = self.current
+        if previous is not None and (
+            snapshot.settings is previous.settings
+            and snapshot.layout is previous.layout
+            and snapshot.buttons is previous.buttons
+        ):
+            return False
+        if previous is not None:
+            self._undo.append((label, previous))
+        self._redo.clear()
+        self.current = snapshot
+        return True
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self):
+        """Step back; returns (label, snapshot to restore) or None"""
+        if not self._undo:
+            return None
+        label, snapshot = self._undo.pop()
+        self._redo.append((label, self.current))
+        self.current = snapshot
+        return label, snapshot
+
+    def redo(self):
+        """Step forward again; returns (label, snapshot to restore) or None"""
+        if not self._redo:
+            return None
+        label, snapshot = self._redo.pop()
+        self._undo.append((label, self.current))
+        self.current = snapshot
+        return label, snapshot
+
+    def distinct_configs(self):
+        """Number of distinct key config objects held across all snapshots"""
+        snapshots = [self.current] + [s for _, s in self._undo] + [s for _, s in self._redo]
+        return len({id(config) for s in snapshots if s is not None for config in s.buttons.values()})
@@ -0,0 +1,170 @@
+"""
+HTTP Pool for Mango Stream Deck
+Requests sent by HTTP keys reuse keep-alive connections held per host, so a
+repeated press to the same lighting bridge or CI server skips the TCP and TLS
+handshakes. Requests run on a few worker threads with per-request timeouts
+and retries for dropped connections, timeouts and 502/503/504 answers
+"""
+
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from perf import metrics
+
+DEFAULT_WORKERS = 4  # Requests in flight at once
+DEFAULT_TIMEOUT = 10.0  # Seconds
+DEFAULT_RETRIES = 1
+MAX_IDLE_PER_HOST = 4
+IDLE_SECONDS = 50  # Idle connections older than this are closed instead of reused
+RETRY_BACKOFF = 0.2  # Seconds before the first retry, doubled for each one after
+RETRY_STATUSES = {502, 503, 504}
+BODY_PREVIEW = 200  # Characters of the response kept for the status bar
+
+# Methods safe to send twice. Others are only retried when the request never left
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+# Errors worth another try on a fresh connection
+RETRY_ERRORS = (OSError, http.client.HTTPException)
+
+# Errors meaning the server closed an idle connection before it was reused - when
+# they come before any response, the request never reached the server
+STALE_ERRORS = (ConnectionError, http.client.BadStatusLine)
+
+
+def parse_headers(text):
+    """'Name: value' lines -> ((name, value), ...)"""
+    headers = []
+    for line in (text or "").splitlines():
+        name, sep, value = line.partition(":")
+        if sep and name.strip():
+            headers.append((name.strip(), value.strip()))
+    return tuple(headers)
+
+
+class HttpPool:
+    """
+    Keep-alive HTTP client for HTTP keys.
+
+    on_done(key, status, reason, body, seconds, error) is called on a worker
+    thread; status is None and error says why when no response arrived.
+    """
+
+    def __init__(self, on_done, workers=DEFAULT_WORKERS, max_idle_per_host=MAX_IDLE_PER_HOST):
+        self.on_done = on_done
+        self.workers = workers
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}  # (scheme, host, port) -> [(connection, last used), ...]
+        self._lock = threading.Lock()
+        self._executor = None
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+    def request(self, key, method, url, headers=(), body="", timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        """Send a request in the background"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="http")
+        self._executor.submit(self._send, key, method, url, headers, body, timeout, retries)
+
+    def close(self):
+        """Close idle connections and stop accepting requests"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                connection.close()
+
+    def _send(self, key, method, url, headers, body, timeout, retries):
+        start = time.perf_counter()
+        try:
+            status, reason, data = self.fetch(method, url, headers, body, timeout, retries)
+            error = None
+        except Exception as e:
+            status = reason = data = None
+            error = str(e) or type(e).__name__
+            metrics.count("http_failed")
+        elapsed = time.perf_counter() - start
+        metrics.record("http_request", elapsed)
+        self.on_done(key, status, reason, data, elapsed, error)
+
+    def fetch(self, method, url, headers=(), body="", timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        """Send one request on a pooled connection -> (status, reason, body preview)"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"not an http(s) URL: {url}")
+        origin = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        payload = body.encode() if body else None
+        idempotent = method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        stale = False
+        while True:
+            connection, reused = self._acquire(origin, timeout, fresh=stale)
+            sent = answered = False
+            try:
+                if connection.sock is None:
+                    connection.connect()
+                connection.request(method, path, body=payload, headers=dict(headers))
+                sent = True
+                response = connection.getresponse()
+                answered = True
+                data = response.read()
+            except RETRY_ERRORS as e:
+                connection.close()
+                if reused and not answered and isinstance(e, STALE_ERRORS):
+                    # The server dropped an idle connection and never saw the request - not a real
+                    # failure, so even a POST goes once more, on a fresh connection
+                    stale = True
+                    continue
+                if sent and not idempotent:
+                    # The server may have acted on it already - a webhook must not run twice
+                    raise
+                if attempt >= retries:
+                    raise
+            else:
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._release(origin, connection)
+                if response.status not in RETRY_STATUSES or attempt >= retries or not idempotent:
+                    return response.status, response.reason, data[:BODY_PREVIEW].decode(errors="replace")
+            metrics.count("http_retry")
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+            attempt += 1
+
+    def _acquire(self, origin, timeout, fresh=False):
+        """(connection, reused) - the most recently used idle connection to origin, or a new one if fresh"""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(origin)
+            while idle and not fresh:
+                connection, last_used = idle.pop()
+                if now - last_used < IDLE_SECONDS:
+                    connection.timeout = timeout
+                    if connection.sock is not None:
+                        connection.sock.settimeout(timeout)
+                    self.connections_reused += 1
+                    metrics.count("http_reused")
+                    return connection, True
+                connection.close()
+        scheme, host, port = origin
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        self.connections_opened += 1
+        metrics.count("http_connect")
+        return connection_class(host, port, timeout=timeout), False
+
+    def _release(self, origin, connection):
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append((connection, time.monotonic()))
+                return
+        connection.close()
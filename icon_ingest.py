@@ -0,0 +1,213 @@
+"""
+Icon Ingest for Mango Stream Deck
+Normalizes imported images on a worker thread: draft-mode decode, downscale to
+the largest size a key can show, strip metadata and store as compact WebP
+"""
+
+import io
+import os
+import queue
+import threading
+
+from PIL import Image, ImageOps, ImageSequence
+
+from key_faces import KEY_WIDTH, KEY_HEIGHT
+from icon_trash import name_taken
+
+# Keys are drawn at 150x100 and scaled up to 2x on HiDPI displays
+INGEST_WIDTH = KEY_WIDTH * 2
+INGEST_HEIGHT = KEY_HEIGHT * 2
+
+# Canonical stored format
+INGEST_FORMAT = "WEBP"
+INGEST_EXTENSION = ".webp"
+INGEST_QUALITY = 90
+
+
+def target_size(width, height):
+    """Smallest size that still covers the largest key face, never upscaling"""
+    scale = max(INGEST_WIDTH / width, INGEST_HEIGHT / height)
+    if scale >= 1:
+        return width, height
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def normalize_image(img):
+    """Return a metadata-free, downscaled RGB/RGBA copy of an opened image"""
+    # Let JPEG decode at a reduced scale instead of full resolution
+    img.draft('RGB', target_size(*img.size))
+    img = ImageOps.exif_transpose(img)
+
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+    img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    size = target_size(*img.size)
+    if size != img.size:
+        img = img.resize(size, Image.Resampling.LANCZOS)
+    return img
+
+
+def normalize_animation(img):
+    """Return downscaled RGBA frames and their durations (ms) of an animated image"""
+    frames = []
+    durations = []
+    size = target_size(*img.size)
+    for frame in ImageSequence.Iterator(img):
+        durations.append(frame.info.get("duration") or 100)
+        frame = frame.convert('RGBA')
+        if size != frame.size:
+            frame = frame.resize(size, Image.Resampling.LANCZOS)
+        frames.append(frame)
+    return frames, durations
+
+
+def encode_animation(frames, durations):
+    """Encode animation frames as an animated image in the canonical format"""
+    buffer = io.BytesIO()
+    frames[0].save(
+        buffer,
+        format=INGEST_FORMAT,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=0,
+        quality=INGEST_QUALITY,
+        method=4
+    )
+    return buffer.getvalue()
+
+
+def encode_image(img):
+    """Encode a normalized image in the canonical format (no EXIF/ICC/XMP)"""
+    buffer = io.BytesIO()
+    img.save(buffer, format=INGEST_FORMAT, quality=INGEST_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def unique_destination(dest_folder, stem, data):
+    """Pick a free file name for data, reusing an identical existing file"""
+    counter = 1
+    new_filename = f"{stem}{INGEST_EXTENSION}"
+    dest_path = os.path.join(dest_folder, new_filename)
+    # Names of trashed icons stay reserved so undo can bring them back
+    while name_taken(dest_folder, new_filename):
+        try:
+            # Same content already stored - reuse it instead of duplicating
+            if os.path.getsize(dest_path) == len(data):
+                with open(dest_path, 'rb') as f:
+                    if f.read() == data:
+                        return dest_path, False
+        except OSError:
+            pass
+        new_filename = f"{stem}_{counter}{INGEST_EXTENSION}"
+        dest_path = os.path.join(dest_folder, new_filename)
+        counter += 1
+    return dest_path, True
+
+
+def ingest_icon(source, dest_folder, progress=None):
+    """
+    Normalize source into dest_folder and return the stored path.
+
+    progress(fraction, stage) is called as the work advances.
+    """
+    report = progress or (lambda fraction, stage: None)
+
+    report(0.1, "Decoding")
+    with Image.open(source) as img:
+        if getattr(img, "is_animated", False) and img.n_frames > 1:
+            # GIF / APNG / animated WebP keep every frame
+            animation = normalize_animation(img)
+        else:
+            animation = None
+            img = normalize_image(img)
+
+    report(0.6, "Compressing")
+    data = encode_animation(*animation) if animation else encode_image(img)
+
+    report(0.9, "Saving")
+    stem = os.path.splitext(os.path.basename(source))[0]
+    dest_path, is_new = unique_destination(dest_folder, stem, data)
+    if is_new:
+        # Write then rename so a half-written icon is never picked up
+        temp_path = dest_path + ".part"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, dest_path)
+
+    report(1.0, "Done")
+    return dest_path
+
+
+def needs_ingest(path):
+    """True if a stored icon is larger than a key needs or not in the canonical format"""
+    try:
+        with Image.open(path) as img:
+            if img.format != INGEST_FORMAT:
+                return True
+            return target_size(*img.size) != img.size
+    except (OSError, ValueError):
+        return False
+
+
+class IngestJob:
+    """Progress and outcome of one ingest, polled from the UI thread"""
+
+    def __init__(self, source, dest_folder, only_if_needed=False):
+        self.source = source
+        self.dest_folder = dest_folder
+        self.only_if_needed = only_if_needed
+        self.progress = 0.0
+        self.stage = "Queued"
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def _report(self, fraction, stage):
+        self.progress = fraction
+        self.stage = stage
+
+
+class IconIngestor:
+    """Single background worker that runs ingest jobs in order"""
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, source, dest_folder, only_if_needed=False):
+        """
+        Queue source for ingest into dest_folder.
+
+        With only_if_needed, icons that are already normalized are left alone
+        and the job's result is the source path itself.
+        """
+        job = IngestJob(source, dest_folder, only_if_needed)
+        with self._lock:
+            self._jobs.put(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return job
+
+    def _run(self):
+        while True:
+            try:
+                job = self._jobs.get(timeout=5)
+            except queue.Empty:
+                with self._lock:
+                    if self._jobs.empty():
+                        # Idle - the next submit starts a new worker
+                        self._thread = None
+                        return
+                continue
+            try:
+                if job.only_if_needed and not needs_ingest(job.source):
+                    job.result = job.source
+                else:
+                    job.result = ingest_icon(job.source, job.dest_folder, job._report)
+            except Exception as e:
+                job.error = e
+            finally:
+                job.done.set()
@@ -0,0 +1,72 @@
+"""
+Icon Trash for Mango Stream Deck
+Icons that no key uses anymore are moved to icons/.trash instead of being
+deleted, so undo can bring them back; old trash is purged at startup
+"""
+
+import os
+import time
+
+TRASH_DIR = ".trash"
+
+# Trashed icons older than this are deleted for good
+TRASH_MAX_AGE_DAYS = 30
+
+
+def name_taken(icons_folder, filename):
+    """True if filename is used by a stored or a trashed icon"""
+    return (os.path.exists(os.path.join(icons_folder, filename))
+            or os.path.exists(os.path.join(icons_folder, TRASH_DIR, filename)))
+
+
+class IconTrash:
+    """Recoverable storage for icons removed by edits, resets and icon optimization"""
+
+    def __init__(self, icons_folder):
+        self.icons_folder = icons_folder
+        self.folder = os.path.join(icons_folder, TRASH_DIR)
+
+    def trash_path(self, path):
+        return os.path.join(self.folder, os.path.basename(path))
+
+    def discard(self, path):
+        """Move an icon to the trash; returns True if it was moved"""
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            os.replace(path, self.trash_path(path))
+            # Age in the trash counts from now
+            os.utime(self.trash_path(path))
+            return True
+        except OSError as e:
+            print(f"Error moving icon to trash: {e}")
+            return False
+
+    def restore(self, path):
+        """Bring a trashed icon back to path if it is missing; returns True if it exists afterwards"""
+        if not path or os.path.exists(path):
+            return bool(path)
+        trashed = self.trash_path(path)
+        if not os.path.exists(trashed):
+            return False
+        try:
+            os.replace(trashed, path)
+            return True
+        except OSError as e:
+            print(f"Error restoring icon from trash: {e}")
+            return False
+
+    def purge(self, max_age_days=TRASH_MAX_AGE_DAYS):
+        """Delete trashed icons older than max_age_days; returns how many were deleted"""
+        if not os.path.isdir(self.folder):
+            return 0
+        cutoff = time.time() - max_age_days * 24 * 3600
+        deleted = 0
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    deleted += 1
+            except OSError as e:
+                print(f"Error purging trashed icon: {e}")
+        return deleted
@@ -0,0 +1,120 @@
+"""
+Image Memory Tracking for Mango Stream Deck
+Per-key accounting of rendered image bytes, a configurable budget and
+process memory helpers used by the memory report
+"""
+
+import ctypes
+import sys
+
+# Default budget for rendered key images
+DEFAULT_BUDGET_MB = 128
+
+
+def image_nbytes(img, display_copy=True):
+    """Approximate bytes held for a PIL image (plus its Tk PhotoImage copy)"""
+    if img is None:
+        return 0
+    nbytes = img.width * img.height * len(img.getbands())
+    if display_copy:
+        # Tk keeps its own 32-bit copy of the pixels
+        nbytes += img.width * img.height * 4
+    return nbytes
+
+
+class ImageMemory:
+    """Bytes held per subsystem and key, checked against a budget"""
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._usage = {}  # subsystem -> {key: bytes}
+
+    def track(self, subsystem, key, nbytes):
+        self._usage.setdefault(subsystem, {})[key] = nbytes
+
+    def release(self, subsystem, key=None):
+        """Forget one key of a subsystem, or the whole subsystem"""
+        if key is None:
+            self._usage.pop(subsystem, None)
+        else:
+            self._usage.get(subsystem, {}).pop(key, None)
+
+    def release_key(self, key):
+        """Forget a key in every subsystem"""
+        for usage in self._usage.values():
+            usage.pop(key, None)
+
+    def keys(self, subsystem):
+        return list(self._usage.get(subsystem, {}))
+
+    def subsystem_bytes(self, subsystem):
+        return sum(self._usage.get(subsystem, {}).values())
+
+    def by_subsystem(self):
+        return {name: sum(usage.values()) for name, usage in self._usage.items()}
+
+    def total(self):
+        return sum(self.by_subsystem().values())
+
+    def over_budget(self, extra=0):
+        return self.total() + extra > self.budget_bytes
+
+
+def process_rss():
+    """Resident set size of this process in bytes, or None if unavailable"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm") as f:
+                pages = int(f.read().split()[1])
+            import os
+            return pages * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == "win32":
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", ctypes.c_ulong),
+                ("PageFaultCount", ctypes.c_ulong),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    return None
+
+
+def trim_process_memory():
+    """Hand freed heap pages back to the OS so idle RSS actually drops"""
+    try:
+        if sys.platform == "win32":
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.EmptyWorkingSet(handle)
+        elif sys.platform.startswith("linux"):
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def format_bytes(nbytes):
+    if nbytes is None:
+        return "n/a"
+    for unit in ("B", "KiB", "MiB"):
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GiB"
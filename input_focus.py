@@ -0,0 +1,304 @@
+"""
+Input Focus for Mango Stream Deck
+Clicking the deck makes it the focused window, so keystrokes a Hotkey or
+Text key sends would land in the deck itself. Either the deck window never
+takes focus, like a hardware Stream Deck, or the window that was focused
+before the click gets focus back by window ID right before injection - no
+fixed delay either way
+"""
+
+import os
+import sys
+import threading
+import time
+
+from perf import metrics
+
+# normal: the deck takes focus like any window and keystrokes go wherever focus is
+# no-activate: clicking the deck never takes focus away from the window being worked in
+# previous-window: the window focused before the deck gets focus back before keystrokes are sent
+FOCUS_MODES = ["previous-window", "no-activate", "normal"]
+DEFAULT_FOCUS_MODE = "previous-window"
+
+
+class FocusBackend:
+    """Platform window focus operations; the base class supports nothing"""
+
+    def start(self, root):
+        pass
+
+    def deck_active(self):
+        return False
+
+    def previous_window(self):
+        return None
+
+    def activate(self, window):
+        return False
+
+    def set_no_activate(self, root, enabled):
+        return False
+
+    def close(self):
+        pass
+
+
+class X11Focus(FocusBackend):
+    """
+    Follows _NET_ACTIVE_WINDOW on a thread of its own to know the last
+    window outside the deck. Windows are the deck's when they were created
+    by Tk's X connection, which shows in the client bits of the window ID.
+    """
+
+    def start(self, root):
+        from Xlib import X, Xutil, display
+        from Xlib.protocol import event
+        self.X, self.Xutil, self.event = X, Xutil, event
+        self.display = display.Display()  # Tk thread requests
+        self.watch_display = display.Display()  # Watch thread
+        mask = self.display.display.info.resource_id_mask
+        self.id_mask = ~mask
+        self.deck_client = root.winfo_id() & self.id_mask
+        self.wrapper = int(root.wm_frame(), 16)
+        self.net_active = self.display.intern_atom("_NET_ACTIVE_WINDOW")
+        self.previous = None
+        self.active_is_deck = False
+        self._closed = False
+        threading.Thread(target=self._watch, name="focus-watch", daemon=True).start()
+
+    def _watch(self):
+        display, X = self.watch_display, self.X
+        root = display.screen().root
+        try:
+            root.change_attributes(event_mask=X.PropertyChangeMask)
+            self._active_changed(root)
+            while not self._closed:
+                event = display.next_event()
+                if event.type == X.PropertyNotify and event.atom == self.net_active:
+                    self._active_changed(root)
+        except Exception as e:
+            if not self._closed:
+                print(f"Focus watch stopped: {e}")
+
+    def _active_changed(self, root):
+        prop = root.get_full_property(self.net_active, self.X.AnyPropertyType)
+        window = prop.value[0] if prop is not None and len(prop.value) else 0
+        if not window:
+            return
+        self.active_is_deck = window & self.id_mask == self.deck_client
+        if not self.active_is_deck:
+            self.previous = window
+
+    def deck_active(self):
+        return self.active_is_deck
+
+    def previous_window(self):
+        return self.previous
+
+    def activate(self, window):
+        X = self.X
+        target = self.display.create_resource_object("window", window)
+        root = self.display.screen().root
+        # Ask the window manager to raise it, but move keyboard focus now instead of waiting for it
+        message = self.event.ClientMessage(
+            window=target, client_type=self.net_active, data=(32, [2, X.CurrentTime, 0, 0, 0])
+        )
+        root.send_event(message, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
+        target.set_input_focus(X.RevertToParent, X.CurrentTime)
+        self.display.sync()
+        self.active_is_deck = False
+        return True
+
+    def set_no_activate(self, root, enabled):
+        # Tk's toplevel wrapper carries the WM hints. Input hint off and no
+        # WM_TAKE_FOCUS: the window manager never gives the deck keyboard focus
+        window = self.display.create_resource_object("window", self.wrapper)
+        current = window.get_wm_hints()
+        hints = dict(current._data) if current is not None else {}
+        hints["flags"] = hints.get("flags", 0) | self.Xutil.InputHint
+        hints["input"] = 0 if enabled else 1
+        window.set_wm_hints(hints)
+        protocols = [self.display.intern_atom("WM_DELETE_WINDOW")]
+        if not enabled:
+            protocols.append(self.display.intern_atom("WM_TAKE_FOCUS"))
+        window.set_wm_protocols(protocols)
+        self.display.sync()
+        return True
+
+    def close(self):
+        self._closed = True
+        self.display.close()
+        self.watch_display.close()
+
+
+class WindowsFocus(FocusBackend):
+    """Foreground window changes of other processes arrive through a WinEvent hook on the Tk thread"""
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    GWL_EXSTYLE = -20
+    WS_EX_NOACTIVATE = 0x08000000
+    WS_EX_APPWINDOW = 0x00040000  # Keeps a no-activate window on the taskbar
+
+    def start(self, root):
+        import ctypes
+        from ctypes import wintypes
+        self.user32 = ctypes.windll.user32
+        self.user32.GetForegroundWindow.restype = wintypes.HWND
+        self.user32.GetParent.restype = wintypes.HWND
+        self.user32.GetParent.argtypes = [wintypes.HWND]
+        self.user32.GetWindowLongPtrW.restype = ctypes.c_ssize_t
+        self.user32.GetWindowLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int]
+        self.user32.SetWindowLongPtrW.restype = ctypes.c_ssize_t
+        self.user32.SetWindowLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int, ctypes.c_ssize_t]
+        self.user32.SetForegroundWindow.argtypes = [wintypes.HWND]
+        self.user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+        self.ctypes, self.wintypes = ctypes, wintypes
+        self.hwnd = self.user32.GetParent(root.winfo_id())
+        self.previous = None
+
+        hook_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG,
+                                       wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self._callback = hook_type(self._foreground_changed)  # Kept alive as long as the hook
+        self.user32.SetWinEventHook.restype = wintypes.HANDLE
+        self._hook = self.user32.SetWinEventHook(
+            self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND, None, self._callback, 0, 0,
+            self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        )
+
+    def _foreground_changed(self, hook, event, hwnd, object_id, child_id, thread, time_ms):
+        if hwnd:
+            self.previous = hwnd
+
+    def deck_active(self):
+        hwnd = self.user32.GetForegroundWindow()
+        if not hwnd:
+            return False
+        pid = self.wintypes.DWORD()
+        self.user32.GetWindowThreadProcessId(hwnd, self.ctypes.byref(pid))
+        return pid.value == os.getpid()
+
+    def previous_window(self):
+        return self.previous
+
+    def activate(self, window):
+        # Allowed without tricks - the deck process owns the foreground while it is active
+        return bool(self.user32.SetForegroundWindow(window))
+
+    def set_no_activate(self, root, enabled):
+        style = self.user32.GetWindowLongPtrW(self.hwnd, self.GWL_EXSTYLE)
+        flags = self.WS_EX_NOACTIVATE | self.WS_EX_APPWINDOW
+        style = style | flags if enabled else style & ~flags
+        self.user32.SetWindowLongPtrW(self.hwnd, self.GWL_EXSTYLE, style)
+        return True
+
+    def close(self):
+        if self._hook:
+            self.user32.UnhookWinEvent(self._hook)
+            self._hook = None
+
+
+class FakeFocus(FocusBackend):
+    """Pretends the deck holds focus with a previous window to return to; records activations"""
+
+    def __init__(self, previous=1):
+        self.previous = previous
+        self.active_is_deck = True
+        self.activated = []  # (perf_counter time, window)
+
+    def deck_active(self):
+        return self.active_is_deck
+
+    def previous_window(self):
+        return self.previous
+
+    def activate(self, window):
+        self.activated.append((time.perf_counter(), window))
+        self.active_is_deck = False
+        return True
+
+
+def platform_backend():
+    if sys.platform == "win32":
+        return WindowsFocus()
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        return X11Focus()
+    return FocusBackend()
+
+
+class InputFocus:
+    """
+    Where injected keystrokes go, per the focus mode setting.
+
+    attach() is called once the deck window exists; hand_off() runs right
+    before a Hotkey or Text key sends its keystrokes. Platforms without
+    support behave as normal.
+    """
+
+    def __init__(self, mode=DEFAULT_FOCUS_MODE, backend=None):
+        self.mode = mode if mode in FOCUS_MODES else DEFAULT_FOCUS_MODE
+        self.backend = backend
+        self.root = None
+
+    def attach(self, root):
+        self.root = root
+        if self.backend is None:
+            self.backend = platform_backend()
+        try:
+            root.update_idletasks()  # The window needs its native handle
+            self.backend.start(root)
+        except Exception as e:
+            print(f"Window focus tracking unavailable: {e}")
+            self.backend = FocusBackend()
+        self._apply_mode()
+
+    def set_mode(self, mode):
+        if mode not in FOCUS_MODES:
+            mode = DEFAULT_FOCUS_MODE
+        if mode == self.mode:
+            return
+        was_no_activate = self.mode == "no-activate"
+        self.mode = mode
+        if self.root is not None and (was_no_activate or mode == "no-activate"):
+            self._apply_mode()
+
+    def window_shown(self):
+        """Tk writes its own WM hints when a withdrawn window is mapped again - put no-activate back"""
+        if self.root is not None and self.mode == "no-activate":
+            self.root.update_idletasks()
+            self._apply_mode()
+
+    @property
+    def takes_focus(self):
+        """False while the deck window should never be focused"""
+        return self.mode != "no-activate"
+
+    def _apply_mode(self):
+        try:
+            self.backend.set_no_activate(self.root, self.mode == "no-activate")
+        except Exception as e:
+            print(f"Could not change the deck's focus behavior: {e}")
+
+    def hand_off(self):
+        """Give focus back to the previous window if the deck holds it; True if focus moved"""
+        if self.mode != "previous-window" or self.backend is None:
+            return False
+        start = time.perf_counter()
+        try:
+            window = self.backend.previous_window()
+            if window is None or not self.backend.deck_active():
+                return False
+            moved = self.backend.activate(window)
+        except Exception as e:
+            print(f"Could not focus the previous window: {e}")
+            return False
+        metrics.record("input_focus", time.perf_counter() - start)
+        return moved
+
+    def close(self):
+        if self.backend is not None:
+            try:
+                self.backend.close()
+            except Exception as e:
+                print(f"Error closing focus tracking: {e}")
@@ -0,0 +1,504 @@
+"""
+Input Injection for Mango Stream Deck
+Hotkey and Text keys send keystrokes through a backend chosen in settings:
+pyautogui, X11 XTest, Linux uinput or a recording fake for benchmarks. The
+chosen backend is imported and connected on a background thread shortly
+after launch, so the first press does not pay for the imports and display
+setup
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+
+from perf import metrics
+
+# Backends offered in settings; auto picks the fastest one that works here
+INPUT_BACKENDS = ["auto", "pyautogui", "xtest", "uinput"]
+
+MOUSE_BUTTON_NAMES = {1: "left", 2: "middle", 3: "right"}
+
+TYPE_INTERVAL = 0.05  # Seconds between typed characters - some apps drop faster input
+
+# Key names as written in hotkeys -> X keysym names
+X_KEY_NAMES = {
+    "ctrl": "Control_L", "control": "Control_L", "ctrlleft": "Control_L", "ctrlright": "Control_R",
+    "shift": "Shift_L", "shiftleft": "Shift_L", "shiftright": "Shift_R",
+    "alt": "Alt_L", "altleft": "Alt_L", "altright": "Alt_R", "option": "Alt_L",
+    "win": "Super_L", "super": "Super_L", "cmd": "Super_L", "command": "Super_L", "winleft": "Super_L",
+    "enter": "Return", "return": "Return", "esc": "Escape", "escape": "Escape",
+    "tab": "Tab", "space": "space", "backspace": "BackSpace", "delete": "Delete", "del": "Delete",
+    "insert": "Insert", "home": "Home", "end": "End",
+    "pageup": "Prior", "pgup": "Prior", "pagedown": "Next", "pgdn": "Next",
+    "up": "Up", "down": "Down", "left": "Left", "right": "Right",
+    "capslock": "Caps_Lock", "numlock": "Num_Lock", "scrolllock": "Scroll_Lock",
+    "printscreen": "Print", "prtsc": "Print", "pause": "Pause", "menu": "Menu", "apps": "Menu",
+    "volumeup": "XF86_AudioRaiseVolume", "volumedown": "XF86_AudioLowerVolume", "volumemute": "XF86_AudioMute",
+    "playpause": "XF86_AudioPlay", "nexttrack": "XF86_AudioNext", "prevtrack": "XF86_AudioPrev",
+}
+
+# Key names -> Linux input event codes (US layout)
+LINUX_KEY_CODES = {
+    "esc": 1, "escape": 1, "backspace": 14, "tab": 15, "enter": 28, "return": 28,
+    "ctrl": 29, "control": 29, "ctrlleft": 29, "ctrlright": 97,
+    "shift": 42, "shiftleft": 42, "shiftright": 54,
+    "alt": 56, "altleft": 56, "altright": 100, "option": 56,
+    "win": 125, "super": 125, "cmd": 125, "command": 125, "winleft": 125,
+    "space": 57, "capslock": 58, "numlock": 69, "scrolllock": 70,
+    "home": 102, "up": 103, "pageup": 104, "pgup": 104, "left": 105, "right": 106,
+    "end": 107, "down": 108, "pagedown": 109, "pgdn": 109, "insert": 110, "delete": 111, "del": 111,
+    "printscreen": 99, "prtsc": 99, "pause": 119, "menu": 127, "apps": 127,
+    "volumemute": 113, "volumedown": 114, "volumeup": 115,
+    "nexttrack": 163, "playpause": 164, "prevtrack": 165,
+}
+LINUX_KEY_CODES.update({f"f{n}": 58 + n for n in range(1, 11)})
+LINUX_KEY_CODES.update({"f11": 87, "f12": 88})
+LINUX_KEY_CODES.update({f"f{n}": 170 + n for n in range(13, 25)})
+
+# Characters -> (Linux key code, needs shift) on a US layout
+LINUX_CHARS = {"\n": (28, False), "\t": (15, False), " ": (57, False)}
+for _row, _shifted, _first in (("1234567890-=", "!@#$%^&*()_+", 2), ("qwertyuiop[]", "QWERTYUIOP{}", 16),
+                               ("asdfghjkl;'`", 'ASDFGHJKL:"~', 30), ("\\zxcvbnm,./", "|ZXCVBNM<>?", 43)):
+    for _offset, (_plain, _shift) in enumerate(zip(_row, _shifted)):
+        LINUX_CHARS[_plain] = (_first + _offset, False)
+        LINUX_CHARS[_shift] = (_first + _offset, True)
+
+
+# Windows virtual key codes -> key names
+WINDOWS_KEY_NAMES = {
+    0x08: "backspace", 0x09: "tab", 0x0D: "enter", 0x13: "pause", 0x14: "capslock", 0x1B: "esc",
+    0x20: " ", 0x21: "pageup", 0x22: "pagedown", 0x23: "end", 0x24: "home",
+    0x25: "left", 0x26: "up", 0x27: "right", 0x28: "down", 0x2C: "printscreen", 0x2D: "insert", 0x2E: "delete",
+    0x5B: "win", 0x5D: "menu", 0x90: "numlock", 0x91: "scrolllock",
+    0xA0: "shift", 0xA1: "shiftright", 0xA2: "ctrl", 0xA3: "ctrlright", 0xA4: "alt", 0xA5: "altright",
+    0xAD: "volumemute", 0xAE: "volumedown", 0xAF: "volumeup", 0xB0: "nexttrack", 0xB1: "prevtrack", 0xB3: "playpause",
+    0xBA: ";", 0xBB: "=", 0xBC: ",", 0xBD: "-", 0xBE: ".", 0xBF: "/", 0xC0: "`",
+    0xDB: "[", 0xDC: "\\", 0xDD: "]", 0xDE: "'",
+}
+WINDOWS_KEY_NAMES.update({code: chr(code).lower() for code in range(0x41, 0x5B)})
+WINDOWS_KEY_NAMES.update({code: chr(code) for code in range(0x30, 0x3A)})
+WINDOWS_KEY_NAMES.update({0x70 + n: f"f{n + 1}" for n in range(24)})
+
+
+class InjectionUnavailable(Exception):
+    """A backend cannot run here; the message tells the user what to do about it"""
+
+
+class InputBackend:
+    """
+    Sends keystrokes to whatever window has focus.
+
+    prepare() does the slow setup - imports, display connection, device
+    creation - and raises InjectionUnavailable when the backend cannot work
+    here. Key names are the lower case ones hotkeys are written with; mouse
+    buttons are 1 (left), 2 (middle) and 3 (right), positions are screen
+    pixels.
+    """
+
+    name = ""
+
+    def prepare(self):
+        pass
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def hotkey(self, keys):
+        """Press keys in order, then release them in reverse"""
+        for key in keys:
+            self.key_down(key)
+        for key in reversed(keys):
+            self.key_up(key)
+        self.flush()
+
+    def type_text(self, text, interval=TYPE_INTERVAL):
+        raise NotImplementedError
+
+    def mouse_move(self, x, y):
+        raise ValueError(f"the {self.name} input backend cannot control the mouse")
+
+    def mouse_button(self, button, down):
+        raise ValueError(f"the {self.name} input backend cannot control the mouse")
+
+    def scroll(self, clicks):
+        """Scroll the wheel; positive clicks scroll up"""
+        raise ValueError(f"the {self.name} input backend cannot control the mouse")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PyAutoGuiBackend(InputBackend):
+    """pyautogui - works on Windows, macOS and X11"""
+
+    name = "pyautogui"
+
+    def prepare(self):
+        try:
+            import pyautogui
+        except ImportError:
+            raise InjectionUnavailable(
+                "PyAutoGUI module required for hotkeys and text typing.\nInstall with: pip install pyautogui"
+            ) from None
+        except Exception as e:
+            # pyautogui connects to the display on import
+            raise InjectionUnavailable(f"PyAutoGUI could not start: {e}") from None
+        # The deck paces its own input - no pause after every call
+        pyautogui.PAUSE = 0
+        self.pyautogui = pyautogui
+
+    def key_down(self, key):
+        self.pyautogui.keyDown(key)
+
+    def key_up(self, key):
+        self.pyautogui.keyUp(key)
+
+    def type_text(self, text, interval=TYPE_INTERVAL):
+        self.pyautogui.write(text, interval=interval)
+
+    def mouse_move(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def mouse_button(self, button, down):
+        name = MOUSE_BUTTON_NAMES[button]
+        if down:
+            self.pyautogui.mouseDown(button=name)
+        else:
+            self.pyautogui.mouseUp(button=name)
+
+    def scroll(self, clicks):
+        self.pyautogui.scroll(clicks)
+
+
+class XTestBackend(InputBackend):
+    """X11 XTest extension over python-xlib - one request per key event, no pyautogui layer"""
+
+    name = "xtest"
+
+    def prepare(self):
+        if sys.platform.startswith("win") or sys.platform == "darwin" or not os.environ.get("DISPLAY"):
+            raise InjectionUnavailable("The xtest input backend needs an X11 display.")
+        try:
+            from Xlib import X, XK, display
+            from Xlib.ext import xtest
+        except ImportError:
+            raise InjectionUnavailable(
+                "python-xlib module required for the xtest input backend.\nInstall with: pip install python-xlib"
+            ) from None
+        try:
+            self.display = display.Display()
+        except Exception as e:
+            raise InjectionUnavailable(f"Could not connect to the X display: {e}") from None
+        if not self.display.query_extension("XTEST"):
+            self.display.close()
+            raise InjectionUnavailable("The X server does not support the XTEST extension.")
+        XK.load_keysym_group("xf86")  # Media keys
+        self.X, self.XK, self.xtest = X, XK, xtest
+        self.keycodes = {}  # Keysym -> (keycode, needs shift)
+        self.spare = self._find_spare_keycode()
+        self.shift = self._keycode(XK.string_to_keysym("Shift_L"))[0]
+
+    def _find_spare_keycode(self):
+        """A keycode with nothing mapped, borrowed for characters the layout lacks"""
+        first = self.display.display.info.min_keycode
+        count = self.display.display.info.max_keycode - first + 1
+        for offset, keysyms in enumerate(self.display.get_keyboard_mapping(first, count)):
+            if not any(keysyms):
+                return first + offset
+        return None
+
+    def _keycode(self, keysym):
+        cached = self.keycodes.get(keysym)
+        if cached is not None:
+            return cached
+        for keycode, index in self.display.keysym_to_keycodes(keysym):
+            if index < 2:
+                cached = self.keycodes[keysym] = (keycode, index == 1)
+                return cached
+        if self.spare is None or not keysym:
+            raise ValueError(f"no key for keysym {keysym:#x}")
+        # Map the character onto the spare keycode; it stays there until another one needs it
+        self.display.change_keyboard_mapping(self.spare, [(keysym, keysym)])
+        self.display.sync()
+        self.keycodes = {k: v for k, v in self.keycodes.items() if v[0] != self.spare}
+        self.keycodes[keysym] = (self.spare, False)
+        return self.keycodes[keysym]
+
+    def _key_keysym(self, key):
+        name = X_KEY_NAMES.get(key, key)
+        if len(name) == 1:
+            return self._char_keysym(name)
+        keysym = self.XK.string_to_keysym(name) or self.XK.string_to_keysym(name.capitalize())
+        if not keysym:
+            raise ValueError(f"unknown key: {key}")
+        return keysym
+
+    def _char_keysym(self, char):
+        if char == "\n":
+            return self.XK.string_to_keysym("Return")
+        if char == "\t":
+            return self.XK.string_to_keysym("Tab")
+        code = ord(char)
+        # Latin-1 keysyms equal the code point; the rest use the Unicode keysym range
+        return code if 0x20 <= code <= 0x7e or 0xa0 <= code <= 0xff else 0x01000000 | code
+
+    def _fake(self, event, keycode):
+        self.xtest.fake_input(self.display, event, keycode)
+
+    def key_down(self, key):
+        self._fake(self.X.KeyPress, self._keycode(self._key_keysym(key))[0])
+
+    def key_up(self, key):
+        self._fake(self.X.KeyRelease, self._keycode(self._key_keysym(key))[0])
+
+    def type_text(self, text, interval=TYPE_INTERVAL):
+        for char in text:
+            keycode, shifted = self._keycode(self._char_keysym(char))
+            if shifted:
+                self._fake(self.X.KeyPress, self.shift)
+            self._fake(self.X.KeyPress, keycode)
+            self._fake(self.X.KeyRelease, keycode)
+            if shifted:
+                self._fake(self.X.KeyRelease, self.shift)
+            self.display.sync()
+            if interval:
+                time.sleep(interval)
+
+    def mouse_move(self, x, y):
+        self.xtest.fake_input(self.display, self.X.MotionNotify, x=x, y=y)
+
+    def mouse_button(self, button, down):
+        self._fake(self.X.ButtonPress if down else self.X.ButtonRelease, button)
+
+    def scroll(self, clicks):
+        # X reports each wheel step as a click of button 4 (up) or 5 (down)
+        button = 4 if clicks > 0 else 5
+        for _ in range(abs(clicks)):
+            self._fake(self.X.ButtonPress, button)
+            self._fake(self.X.ButtonRelease, button)
+
+    def flush(self):
+        self.display.sync()
+
+    def close(self):
+        self.display.close()
+
+
+# linux/uinput.h
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+EV_SYN, EV_KEY = 0, 1
+BUS_VIRTUAL = 0x06
+UINPUT_SETTLE = 0.2  # Seconds for the desktop to pick up a new device before it is used
+
+
+class UinputBackend(InputBackend):
+    """
+    Virtual keyboard through /dev/uinput - works under Wayland and on the
+    console, needs write access to the device. Characters are typed with a
+    US layout.
+    """
+
+    name = "uinput"
+    path = "/dev/uinput"
+
+    def prepare(self):
+        if not sys.platform.startswith("linux"):
+            raise InjectionUnavailable("The uinput input backend only works on Linux.")
+        import fcntl
+        try:
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            raise InjectionUnavailable(
+                f"Could not open {self.path}: {e.strerror}.\n"
+                "Add your user to the group owning it, or pick another input backend."
+            ) from None
+        try:
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_KEY)
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_SYN)
+            for code in range(1, 256):
+                fcntl.ioctl(self.fd, UI_SET_KEYBIT, code)
+            # struct uinput_user_dev: name, input_id, ff_effects_max, absmax/absmin/absfuzz/absflat
+            device = struct.pack("80sHHHHi256i", b"Mango Stream Deck", BUS_VIRTUAL, 0x4d53, 0x4453, 1, 0,
+                                 *([0] * 256))
+            os.write(self.fd, device)
+            fcntl.ioctl(self.fd, UI_DEV_CREATE)
+        except OSError as e:
+            os.close(self.fd)
+            raise InjectionUnavailable(f"Could not create a uinput keyboard: {e}") from None
+        self.fcntl = fcntl
+        time.sleep(UINPUT_SETTLE)
+
+    def _emit(self, code, value):
+        # struct input_event: timeval, type, code, value; the kernel fills in the time
+        os.write(self.fd, struct.pack("llHHi", 0, 0, EV_KEY, code, value) + struct.pack("llHHi", 0, 0, EV_SYN, 0, 0))
+
+    def _code(self, key):
+        code = LINUX_KEY_CODES.get(key)
+        if code is None:
+            code, _ = LINUX_CHARS.get(key, (None, False))
+        if code is None:
+            raise ValueError(f"unknown key: {key}")
+        return code
+
+    def key_down(self, key):
+        self._emit(self._code(key), 1)
+
+    def key_up(self, key):
+        self._emit(self._code(key), 0)
+
+    def type_text(self, text, interval=TYPE_INTERVAL):
+        shift = LINUX_KEY_CODES["shift"]
+        for char in text:
+            if char not in LINUX_CHARS:
+                raise ValueError(f"the uinput backend cannot type {char!r}")
+            code, shifted = LINUX_CHARS[char]
+            if shifted:
+                self._emit(shift, 1)
+            self._emit(code, 1)
+            self._emit(code, 0)
+            if shifted:
+                self._emit(shift, 0)
+            if interval:
+                time.sleep(interval)
+
+    def close(self):
+        try:
+            self.fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+        finally:
+            os.close(self.fd)
+
+
+class FakeBackend(InputBackend):
+    """Records (perf_counter time, "down"/"up"/"type", key or text) instead of sending anything"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.events = []
+
+    def key_down(self, key):
+        self.events.append((time.perf_counter(), "down", key))
+
+    def key_up(self, key):
+        self.events.append((time.perf_counter(), "up", key))
+
+    def type_text(self, text, interval=TYPE_INTERVAL):
+        self.events.append((time.perf_counter(), "type", text))
+
+    def mouse_move(self, x, y):
+        self.events.append((time.perf_counter(), "move", (x, y)))
+
+    def mouse_button(self, button, down):
+        self.events.append((time.perf_counter(), "press" if down else "release", button))
+
+    def scroll(self, clicks):
+        self.events.append((time.perf_counter(), "scroll", clicks))
+
+
+BACKEND_CLASSES = {
+    "pyautogui": PyAutoGuiBackend,
+    "xtest": XTestBackend,
+    "uinput": UinputBackend,
+    "fake": FakeBackend,
+}
+
+
+def auto_candidates():
+    """Backends auto tries, fastest first"""
+    if sys.platform.startswith("linux"):
+        if os.environ.get("DISPLAY"):
+            return ["xtest", "pyautogui", "uinput"]
+        return ["uinput", "pyautogui"]
+    return ["pyautogui"]
+
+
+class Injector:
+    """
+    The app's input backend.
+
+    prewarm() prepares it on a background thread; a press that arrives
+    first waits for that instead of starting a second setup. A backend that
+    failed is not retried until the setting changes.
+    """
+
+    def __init__(self, name="auto"):
+        self.name = name
+        self.backend = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def set_backend(self, name):
+        if name not in INPUT_BACKENDS and name not in BACKEND_CLASSES:
+            name = "auto"
+        if name == self.name:
+            return
+        with self._lock:
+            self._close()
+            self.name = name
+            self.error = None
+
+    def prewarm(self):
+        threading.Thread(target=self._prewarm, name="input-prewarm", daemon=True).start()
+
+    def _prewarm(self):
+        try:
+            self.get()
+        except InjectionUnavailable as e:
+            print(f"Input backend unavailable: {e}")
+
+    def get(self):
+        """The prepared backend; raises InjectionUnavailable if none works"""
+        with self._lock:
+            if self.backend is None and self.error is None:
+                start = time.perf_counter()
+                self.backend, self.error = self._prepare()
+                metrics.record("input_prepare", time.perf_counter() - start)
+            if self.backend is None:
+                raise self.error
+            return self.backend
+
+    def _prepare(self):
+        """(backend, None) or (None, InjectionUnavailable) - lock held"""
+        names = auto_candidates() if self.name == "auto" else [self.name]
+        error = None
+        for name in names:
+            backend = BACKEND_CLASSES[name]()
+            try:
+                backend.prepare()
+                return backend, None
+            except InjectionUnavailable as e:
+                # auto reports the first choice's problem if nothing works
+                error = error or e
+        return None, error
+
+    def hotkey(self, keys):
+        backend = self.get()
+        start = time.perf_counter()
+        backend.hotkey(keys)
+        metrics.record("input_hotkey", time.perf_counter() - start)
+
+    def type_text(self, text, interval=TYPE_INTERVAL):
+        self.get().type_text(text, interval)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self.backend is not None:
+            try:
+                self.backend.close()
+            except Exception as e:
+                print(f"Error closing input backend: {e}")
+            self.backend = None
@@ -0,0 +1,165 @@
+"""
+Key Drag and Drop for Mango Stream Deck
+Press, drag and release handling for deck keys: a plain press fires the key,
+dragging it onto another cell moves or swaps keys by updating only the layout,
+and shift/ctrl-clicks or a marquee drag select keys for batch editing
+"""
+
+import tkinter as tk
+import customtkinter as ctk
+
+from key_faces import KEY_WIDTH, KEY_HEIGHT
+
+# Pointer travel (px) before a press becomes a drag
+DRAG_THRESHOLD = 6
+
+DROP_BORDER_COLOR = "#FF9800"
+
+# Tk event.state bits
+SHIFT_MASK = 0x0001
+CONTROL_MASK = 0x0004
+
+
+class KeyDragController:
+    """Turns press/motion/release on key widgets into clicks, selections or layout moves"""
+
+    def __init__(self, app):
+        self.app = app
+        self.ghost = None  # Borderless window following the pointer, built on first drag
+        self.ghost_label = None
+        self._press = None  # (key ID or None for the background, x_root, y_root) of the current press
+        self._modifiers = 0
+        self._dragging = False
+        self._marquee = None  # (start cell, selection before the marquee) while selecting
+        self._target = None  # Key highlighted as drop target
+
+    def bind(self, widget, key_id):
+        """Bind the drag events on a key's child widget (replacing earlier bindings)"""
+        # Plain Tk bind on the children - CTk's own bind() would add duplicates on every rebind
+        tk.Misc.bind(widget, "<ButtonPress-1>", lambda e, n=key_id: self.on_press(e, n))
+        tk.Misc.bind(widget, "<B1-Motion>", self.on_motion)
+        tk.Misc.bind(widget, "<ButtonRelease-1>", self.on_release)
+
+    def bind_background(self, frame):
+        """A drag starting between keys draws a selection marquee"""
+        frame.bind("<ButtonPress-1>", lambda e: self.on_press(e, None))
+        frame.bind("<B1-Motion>", self.on_motion)
+        frame.bind("<ButtonRelease-1>", self.on_release)
+
+    def on_press(self, event, key_id):
+        self._press = (key_id, event.x_root, event.y_root)
+        self._modifiers = event.state & (SHIFT_MASK | CONTROL_MASK)
+        self._dragging = False
+
+    def on_motion(self, event):
+        if self._press is None:
+            return
+        key_id, x, y = self._press
+        if not self._dragging:
+            if abs(event.x_root - x) < DRAG_THRESHOLD and abs(event.y_root - y) < DRAG_THRESHOLD:
+                return
+            self._dragging = True
+            if key_id is None or self._modifiers:
+                # Marquee - modifiers add to the current selection
+                base = set(self.app.selection) if self._modifiers else set()
+                self._marquee = (self.cell_at(x, y, clamp=True), base)
+            else:
+                self.show_ghost(key_id)
+
+        if self._marquee is not None:
+            start, base = self._marquee
+            end = self.cell_at(event.x_root, event.y_root, clamp=True)
+            self.app.set_selection(base | set(self.app.layout.keys_in_rect(start, end)))
+            return
+
+        self.ghost.geometry(f"+{event.x_root - KEY_WIDTH // 2}+{event.y_root - KEY_HEIGHT // 2}")
+        cell = self.cell_at(event.x_root, event.y_root)
+        target = self.app.layout.key_at(*cell) if cell else None
+        self.highlight(target if target != key_id else None)
+
+    def on_release(self, event):
+        if self._press is None:
+            return
+        key_id = self._press[0]
+        dragging = self._dragging
+        marquee = self._marquee
+        self._press = None
+        self._dragging = False
+        self._marquee = None
+
+        if marquee is not None:
+            return
+        if not dragging:
+            if key_id is None:
+                if not self._modifiers:
+                    self.app.set_selection(set())
+            elif self._modifiers & CONTROL_MASK:
+                self.app.toggle_selection(key_id)
+            elif self._modifiers & SHIFT_MASK:
+                self.app.extend_selection(key_id)
+            else:
+                self.app.set_selection(set())
+                self.app.button_clicked(key_id)
+            return
+
+        self.highlight(None)
+        self.ghost.withdraw()
+        cell = self.cell_at(event.x_root, event.y_root)
+        if cell is not None:
+            self.app.move_key(key_id, *cell)
+
+    def cell_at(self, x_root, y_root, clamp=False):
+        """Grid cell under a screen position, or None outside the deck (nearest cell with clamp)"""
+        if self.app.canvas_deck is not None:
+            return self.app.canvas_deck.cell_at(x_root, y_root, clamp)
+        frame = self.app.button_frame
+        layout = self.app.layout
+        col, row = frame.grid_location(x_root - frame.winfo_rootx(), y_root - frame.winfo_rooty())
+        if clamp:
+            return min(max(row, 0), layout.rows - 1), min(max(col, 0), layout.cols - 1)
+        if not layout.in_grid(row, col):
+            return None
+        return row, col
+
+    def show_ghost(self, key_id):
+        """Show the dragged key's current face under the pointer"""
+        if self.ghost is None:
+            self.ghost = tk.Toplevel(self.app.root)
+            self.ghost.overrideredirect(True)
+            self.ghost.attributes("-topmost", True)
+            try:
+                self.ghost.attributes("-alpha", 0.75)
+            except tk.TclError:
+                pass  # No compositing - an opaque ghost still works
+            self.ghost_label = ctk.CTkLabel(
+                self.ghost,
+                width=KEY_WIDTH,
+                height=KEY_HEIGHT,
+                text_color="white",
+                compound="top",
+                corner_radius=0
+            )
+            self.ghost_label.pack()
+
+        # Reuse the face already rendered for the key - nothing is decoded for a drag
+        config = self.app.button_configs.get(key_id, {})
+        btn = self.app.buttons[key_id]
+        self.ghost_label.configure(
+            image=self.app.button_images.get(key_id),
+            text=config.get("text", btn.cget("text")),
+            font=("Arial", config.get("text_size", 12), "bold"),
+            fg_color=btn.cget("fg_color")
+        )
+        self.ghost.deiconify()
+        self.ghost.lift()
+
+    def highlight(self, key_id):
+        """Outline the key a drop would land on"""
+        if key_id == self._target:
+            return
+        previous = self._target
+        self._target = key_id
+        if previous is not None:
+            self.app.refresh_key_border(previous)
+        if key_id is not None:
+            self.app.buttons[key_id].configure(border_width=3, border_color=DROP_BORDER_COLOR)
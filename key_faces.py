@@ -0,0 +1,90 @@
+"""
+Key Face Rendering for Mango Stream Deck
+Pillow helpers shared by the button grid, live tiles and benchmarks
+"""
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Fixed key size used by the button grid
+KEY_WIDTH = 150
+KEY_HEIGHT = 100
+
+
+def cover_crop(img, width=KEY_WIDTH, height=KEY_HEIGHT):
+    """Resize an image to fill width x height and center crop the overflow"""
+    img_ratio = img.width / img.height
+    btn_ratio = width / height
+
+    if img_ratio > btn_ratio:
+        # Image is wider, fit to height and crop width
+        new_height = height
+        new_width = int(new_height * img_ratio)
+    else:
+        # Image is taller, fit to width and crop height
+        new_width = width
+        new_height = int(new_width / img_ratio)
+
+    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    left = (new_width - width) // 2
+    top = (new_height - height) // 2
+    return img.crop((left, top, left + width, top + height))
+
+
+def apply_opacity(img, opacity):
+    """Scale the alpha channel of an image by opacity (0-100)"""
+    if opacity >= 100:
+        return img
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    alpha = img.split()[3]
+    alpha = alpha.point(lambda p: int(p * opacity / 100))
+    img.putalpha(alpha)
+    return img
+
+
+_font_cache = {}
+
+
+def get_font(size):
+    """Return a cached Pillow font of the given pixel size"""
+    font = _font_cache.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype("arialbd.ttf", size)
+        except OSError:
+            try:
+                font = ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+            except OSError:
+                font = ImageFont.load_default(size=size)
+        _font_cache[size] = font
+    return font
+
+
+def draw_overlay_text(base, text, color="white", size=22):
+    """Draw text centered on a copy of base (or a transparent key if base is None)"""
+    if base is None:
+        face = Image.new('RGBA', (KEY_WIDTH, KEY_HEIGHT), (0, 0, 0, 0))
+    else:
+        face = base.convert('RGBA') if base.mode != 'RGBA' else base.copy()
+
+    draw = ImageDraw.Draw(face)
+    font = get_font(size)
+    # Shrink long values until they fit on the key
+    while size > 8:
+        left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font, align="center")
+        if right - left <= face.width - 8 and bottom - top <= face.height - 8:
+            break
+        size -= 2
+        font = get_font(size)
+    else:
+        left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font, align="center")
+
+    x = (face.width - (right - left)) // 2 - left
+    y = (face.height - (bottom - top)) // 2 - top
+    try:
+        draw.multiline_text((x, y), text, fill=color, font=font, align="center")
+    except ValueError:
+        # Unknown color name - fall back to white
+        draw.multiline_text((x, y), text, fill="white", font=font, align="center")
+    return face
@@ -0,0 +1,192 @@
+"""
+Deck Layout for Mango Stream Deck
+Keys have stable IDs; a separate position map says where each key sits, so
+resizing or rearranging the grid moves keys instead of renumbering configs
+"""
+
+import json
+import os
+
+
+class DeckLayout:
+    """
+    Maps grid cells to key IDs.
+
+    Keys keep their cell when the grid shrinks - they are hidden, not
+    renumbered, and come back when the grid grows again. Empty cells inside
+    the grid get fresh IDs.
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self._keys = {}  # (row, col) -> key ID
+        self._positions = {}  # key ID -> (row, col)
+        self._next_id = 1
+
+    @classmethod
+    def from_numbering(cls, key_ids, rows, cols):
+        """Layout of configs saved before key IDs existed (numbered row * cols + col + 1)"""
+        layout = cls(rows, cols)
+        for key_id in sorted(set(key_ids) | set(range(1, rows * cols + 1))):
+            layout.place(key_id, (key_id - 1) // cols, (key_id - 1) % cols)
+        return layout
+
+    @classmethod
+    def from_dict(cls, data, rows, cols):
+        layout = cls(rows, cols)
+        for key_id, (row, col) in sorted(data.get("positions", {}).items(), key=lambda item: int(item[0])):
+            layout.place(int(key_id), row, col)
+        layout._next_id = max(layout._next_id, data.get("next_id", 1))
+        layout.fill()
+        return layout
+
+    def to_dict(self):
+        return {
+            "positions": {str(key_id): list(position) for key_id, position in sorted(self._positions.items())},
+            "next_id": self._next_id
+        }
+
+    def __contains__(self, key_id):
+        return key_id in self._positions
+
+    def new_id(self):
+        key_id = self._next_id
+        self._next_id += 1
+        return key_id
+
+    def reserve_ids(self, key_ids):
+        """Make sure fresh IDs never collide with existing ones"""
+        for key_id in key_ids:
+            self._next_id = max(self._next_id, key_id + 1)
+
+    def place(self, key_id, row, col):
+        """Put key_id at a cell; a key already there is left without a cell"""
+        self.remove(key_id)
+        previous = self._keys.get((row, col))
+        if previous is not None:
+            del self._positions[previous]
+        self._keys[(row, col)] = key_id
+        self._positions[key_id] = (row, col)
+        self.reserve_ids([key_id])
+
+    def remove(self, key_id):
+        position = self._positions.pop(key_id, None)
+        if position is not None:
+            del self._keys[position]
+
+    def key_at(self, row, col):
+        return self._keys.get((row, col))
+
+    def position_of(self, key_id):
+        return self._positions.get(key_id)
+
+    def in_grid(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def is_visible(self, key_id):
+        position = self._positions.get(key_id)
+        return position is not None and self.in_grid(*position)
+
+    def visible_keys(self):
+        """Key IDs on the grid in row-major order"""
+        return [self._keys[(row, col)] for row in range(self.rows) for col in range(self.cols)
+                if (row, col) in self._keys]
+
+    def keys_in_rect(self, corner_a, corner_b):
+        """Key IDs in the rectangle of cells spanned by two corner cells"""
+        (row_a, col_a), (row_b, col_b) = corner_a, corner_b
+        return [self._keys[(row, col)]
+                for row in range(min(row_a, row_b), max(row_a, row_b) + 1)
+                for col in range(min(col_a, col_b), max(col_a, col_b) + 1)
+                if (row, col) in self._keys]
+
+    def items(self):
+        """(key ID, (row, col)) for every key, on the grid or not"""
+        return list(self._positions.items())
+
+    def fill(self):
+        """Give every empty cell of the grid a fresh key ID; returns the new IDs"""
+        created = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                if (row, col) not in self._keys:
+                    key_id = self.new_id()
+                    self._keys[(row, col)] = key_id
+                    self._positions[key_id] = (row, col)
+                    created.append(key_id)
+        return created
+
+    def resize(self, rows, cols):
+        """Change the grid size; returns (keys shown, keys hidden) by the change"""
+        before = set(self.visible_keys())
+        self.rows = rows
+        self.cols = cols
+        self.fill()
+        after = set(self.visible_keys())
+        return after - before, before - after
+
+    def move(self, key_id, row, col):
+        """Move key_id to a cell, swapping with the key there; returns the keys that moved"""
+        source = self._positions[key_id]
+        if source == (row, col):
+            return []
+        other = self._keys.get((row, col))
+        self._keys[(row, col)] = key_id
+        self._positions[key_id] = (row, col)
+        if other is None:
+            del self._keys[source]
+            return [key_id]
+        self._keys[source] = other
+        self._positions[other] = source
+        return [key_id, other]
+
+    def swap(self, key_a, key_b):
+        """Exchange the cells of two keys"""
+        return self.move(key_a, *self._positions[key_b])
+
+
+class LayoutJournal:
+    """
+    Append-only log of key moves next to the config file.
+
+    A drop appends the new cells of the moved keys instead of rewriting the
+    whole config; the next full save folds the log back in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, layout, key_ids):
+        """Record the current cells of key_ids"""
+        entry = {str(key_id): list(layout.position_of(key_id)) for key_id in key_ids}
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Error writing layout journal: {e}")
+
+    def replay(self, layout):
+        """Apply logged moves to a layout loaded from the config"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # Torn last write
+                    for key_id, (row, col) in entry.items():
+                        layout.place(int(key_id), row, col)
+        except OSError as e:
+            print(f"Error reading layout journal: {e}")
+        layout.fill()
+
+    def clear(self):
+        """Forget logged moves once a full config save contains them"""
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            print(f"Error clearing layout journal: {e}")
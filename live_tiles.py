@@ -0,0 +1,325 @@
+"""
+Live Tiles for Mango Stream Deck
+One shared, frame-capped scheduler that refreshes keys showing live values
+(clock, CPU, memory, counter, command output, file contents)
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # Optional - fall back to OS specific sampling
+    psutil = None
+
+
+# Live sources offered in the customize dialog
+LIVE_SOURCES = ["None", "Clock", "CPU", "Memory", "Counter", "Command", "File"]
+
+# Default refresh interval per source (seconds)
+DEFAULT_INTERVALS = {
+    "Clock": 1.0,
+    "CPU": 2.0,
+    "Memory": 5.0,
+    "Counter": 0.5,
+    "Command": 10.0,
+    "File": 2.0,
+}
+
+
+class SystemSampler:
+    """Samples CPU and memory usage at most once per scheduler frame"""
+
+    def __init__(self):
+        self._cpu_last = None
+        self._cpu_value = None
+        self._cpu_stamp = 0.0
+        self._mem_value = None
+        self._mem_stamp = 0.0
+
+    def cpu_percent(self, now):
+        """CPU usage since the previous sample, cached for the current frame"""
+        if self._cpu_value is not None and now - self._cpu_stamp < 0.5:
+            return self._cpu_value
+        self._cpu_stamp = now
+        if psutil is not None:
+            self._cpu_value = psutil.cpu_percent(interval=None)
+            return self._cpu_value
+
+        times = self._read_cpu_times()
+        if times is None:
+            self._cpu_value = None
+            return None
+        if self._cpu_last is None:
+            self._cpu_last = times
+            self._cpu_value = 0.0
+            return 0.0
+        idle = times[0] - self._cpu_last[0]
+        total = times[1] - self._cpu_last[1]
+        self._cpu_last = times
+        self._cpu_value = 100.0 * (1 - idle / total) if total > 0 else 0.0
+        return self._cpu_value
+
+    def memory_percent(self, now):
+        """Physical memory in use, cached for the current frame"""
+        if self._mem_value is not None and now - self._mem_stamp < 0.5:
+            return self._mem_value
+        self._mem_stamp = now
+        if psutil is not None:
+            self._mem_value = psutil.virtual_memory().percent
+        else:
+            self._mem_value = self._read_memory_percent()
+        return self._mem_value
+
+    @staticmethod
+    def _read_cpu_times():
+        """Return (idle, total) CPU ticks or None if unavailable"""
+        if sys.platform.startswith("linux"):
+            try:
+                with open("/proc/stat") as f:
+                    fields = [int(v) for v in f.readline().split()[1:]]
+                return fields[3] + fields[4], sum(fields)
+            except (OSError, ValueError, IndexError):
+                return None
+        if sys.platform == "win32":
+            import ctypes
+            idle, kernel, user = (ctypes.c_ulonglong(), ctypes.c_ulonglong(), ctypes.c_ulonglong())
+            if ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user)):
+                # Kernel time already includes idle time
+                return idle.value, kernel.value + user.value
+        return None
+
+    @staticmethod
+    def _read_memory_percent():
+        if sys.platform.startswith("linux"):
+            try:
+                info = {}
+                with open("/proc/meminfo") as f:
+                    for line in f:
+                        name, value = line.split(":", 1)
+                        info[name] = int(value.split()[0])
+                return 100.0 * (1 - info["MemAvailable"] / info["MemTotal"])
+            except (OSError, ValueError, KeyError):
+                return None
+        if sys.platform == "win32":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return float(status.dwMemoryLoad)
+        return None
+
+
+class LiveTile:
+    """Refresh state for a single live key"""
+
+    __slots__ = ("key", "source", "interval", "config", "next_due", "value", "pending", "file_stamp")
+
+    def __init__(self, key, config):
+        self.key = key
+        self.source = config.get("live_source", "None")
+        try:
+            interval = float(config.get("live_interval") or DEFAULT_INTERVALS.get(self.source, 1.0))
+        except (TypeError, ValueError):
+            interval = DEFAULT_INTERVALS.get(self.source, 1.0)
+        self.interval = max(0.1, interval)
+        self.config = config
+        self.next_due = 0.0
+        self.value = None
+        self.pending = False
+        self.file_stamp = None
+
+
+class LiveTileScheduler:
+    """
+    Drives every live key from a single timer.
+
+    Each frame evaluates only the tiles that are due, keeps the ones whose value
+    actually changed, and hands them to the render callback in one batch. The
+    timer sleeps until the next tile is due and never runs faster than max_fps.
+    """
+
+    def __init__(self, schedule, cancel, render, max_fps=10):
+        # schedule(delay_ms, callback) / cancel(handle) - normally root.after / root.after_cancel
+        self._schedule = schedule
+        self._cancel = cancel
+        self._render = render
+        self.max_fps = max_fps
+        self.tiles = {}
+        self.sampler = SystemSampler()
+        self._handle = None
+        self._paused = False
+        self._results = {}  # Values produced by worker threads
+        self._results_lock = threading.Lock()
+        self.frames = 0
+
+    def set_tile(self, key, config):
+        """Register, update or remove the live tile for a key"""
+        if not config or config.get("live_source", "None") in (None, "", "None"):
+            self.remove_tile(key)
+            return
+        self.tiles[key] = LiveTile(key, config)
+        self.wake()
+
+    def remove_tile(self, key):
+        self.tiles.pop(key, None)
+
+    def clear(self):
+        self.tiles.clear()
+        self._stop_timer()
+
+    def bump(self, key):
+        """Mark a tile as due immediately (e.g. after a counter press)"""
+        tile = self.tiles.get(key)
+        if tile is not None:
+            tile.next_due = 0.0
+            self.wake()
+
+    def pause(self):
+        """Stop refreshing, e.g. while the window is hidden in the tray"""
+        self._paused = True
+        self._stop_timer()
+
+    def resume(self):
+        self._paused = False
+        for tile in self.tiles.values():
+            tile.next_due = 0.0
+            # Force a redraw, renders may have been released while hidden
+            tile.value = None
+        self.wake()
+
+    def wake(self):
+        """Run a frame as soon as the frame cap allows"""
+        if self._paused or not self.tiles:
+            return
+        self._stop_timer()
+        self._handle = self._schedule(int(1000 / self.max_fps), self.tick)
+
+    def _stop_timer(self):
+        if self._handle is not None:
+            try:
+                self._cancel(self._handle)
+            except Exception:
+                pass
+            self._handle = None
+
+    def tick(self):
+        """Evaluate due tiles, render the changed ones in one batch, schedule the next frame"""
+        self._handle = None
+        if self._paused:
+            return
+
+        now = time.monotonic()
+        changed = {}
+
+        with self._results_lock:
+            results, self._results = self._results, {}
+        for key, value in results.items():
+            tile = self.tiles.get(key)
+            if tile is None:
+                continue
+            tile.pending = False
+            if value != tile.value:
+                tile.value = value
+                changed[key] = value
+
+        next_due = None
+        pending = False
+        for tile in self.tiles.values():
+            if tile.next_due <= now and not tile.pending:
+                tile.next_due = now + tile.interval
+                value = self._evaluate(tile, now)
+                if value is not None and value != tile.value:
+                    tile.value = value
+                    changed[tile.key] = value
+            if next_due is None or tile.next_due < next_due:
+                next_due = tile.next_due
+            pending = pending or tile.pending
+
+        if changed:
+            self.frames += 1
+            self._render(changed)
+
+        if next_due is not None:
+            min_delay = 1.0 / self.max_fps
+            if pending:
+                # Pick up command output promptly while a worker is running
+                next_due = min(next_due, now + 0.25)
+            delay = max(min_delay, next_due - time.monotonic())
+            self._handle = self._schedule(int(delay * 1000), self.tick)
+
+    def _evaluate(self, tile, now):
+        """Return the tile's current display value, or None if it is produced asynchronously"""
+        source = tile.source
+        config = tile.config
+
+        if source == "Clock":
+            return time.strftime(config.get("live_format") or "%H:%M:%S")
+        if source == "CPU":
+            value = self.sampler.cpu_percent(now)
+            return "CPU\nn/a" if value is None else f"CPU\n{value:.0f}%"
+        if source == "Memory":
+            value = self.sampler.memory_percent(now)
+            return "RAM\nn/a" if value is None else f"RAM\n{value:.0f}%"
+        if source == "Counter":
+            return str(config.get("live_counter", 0))
+        if source == "File":
+            return self._read_file(tile)
+        if source == "Command":
+            command = config.get("live_command")
+            if not command:
+                return "No command"
+            tile.pending = True
+            threading.Thread(target=self._run_command, args=(tile.key, command), daemon=True).start()
+            return None
+        return None
+
+    @staticmethod
+    def _read_file(tile):
+        path = tile.config.get("live_file")
+        if not path:
+            return "No file"
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return "File missing"
+        # Skip the read entirely when the file has not changed
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == tile.file_stamp and tile.value is not None:
+            return tile.value
+        tile.file_stamp = stamp
+        try:
+            with open(path, 'r', errors='replace') as f:
+                return f.read(256).strip().splitlines()[0] if stat.st_size else ""
+        except (OSError, IndexError):
+            return ""
+
+    def _run_command(self, key, command):
+        """Worker thread - run a live command and queue its first output line"""
+        try:
+            result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=30)
+            output = (result.stdout or result.stderr).strip()
+            value = output.splitlines()[0][:40] if output else ""
+        except subprocess.TimeoutExpired:
+            value = "Timeout"
+        except Exception as e:
+            value = f"Error: {e}"[:40]
+        with self._results_lock:
+            self._results[key] = value
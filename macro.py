@@ -0,0 +1,539 @@
+"""
+Macros for Mango Stream Deck
+Keyboard and mouse input is recorded straight to a compact binary file -
+12 bytes per event - and replayed from that file in chunks, so a long macro
+never sits in memory as Python objects. Replay runs on its own thread
+against absolute deadlines: each event is placed relative to the start of
+the macro, not the previous event, so sleep overshoot never adds up, and
+the playback speed and longest idle gap are applied on the way
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+
+from input_injection import WINDOWS_KEY_NAMES, X_KEY_NAMES
+from perf import metrics
+
+MACRO_FOLDER = "macros"
+MACRO_EXTENSION = ".mmacro"
+
+# File header: magic, format version, event count, duration in microseconds
+HEADER = struct.Struct("<4sB3xIQ")
+MAGIC = b"MMAC"
+VERSION = 1
+UNFINISHED = 0xFFFFFFFF  # Event count of a file whose recording never finished
+
+# One event: microseconds since the previous event, kind, key/button code, x, y
+EVENT = struct.Struct("<IBxHhh")
+KEY_DOWN, KEY_UP, MOUSE_MOVE, BUTTON_DOWN, BUTTON_UP, SCROLL = range(1, 7)
+MAX_DELTA = 0xFFFFFFFF
+
+WRITE_CHUNK = 64 * 1024  # Bytes buffered before a write while recording
+READ_EVENTS = 4096  # Events read from disk at a time during replay
+
+DEFAULT_SPEED = 1.0
+DEFAULT_MAX_GAP = 0.0  # Seconds; 0 keeps idle gaps as recorded
+SPIN = 0.0015  # Seconds before a deadline spent spinning instead of sleeping
+RESYNC = 0.05  # Seconds late after which the rest of the macro shifts back instead of rushing
+
+# Key codes in the file index this list. Append only - recorded files depend on the order
+NAMED_KEYS = [
+    "enter", "esc", "tab", "backspace", "delete", "insert", "home", "end", "pageup", "pagedown",
+    "up", "down", "left", "right", "ctrl", "ctrlright", "shift", "shiftright", "alt", "altright",
+    "win", "capslock", "numlock", "scrolllock", "printscreen", "pause", "menu",
+    "volumeup", "volumedown", "volumemute", "playpause", "nexttrack", "prevtrack",
+] + [f"f{n}" for n in range(1, 25)]
+MACRO_KEYS = [chr(code) for code in range(0x20, 0x7f)] + NAMED_KEYS
+KEY_CODES = {name: code for code, name in enumerate(MACRO_KEYS)}
+
+
+class RecordingUnavailable(Exception):
+    """Macros cannot be recorded here; the message says why"""
+
+
+# ----------------------------------------------------------------------
+# File format
+# ----------------------------------------------------------------------
+
+class MacroWriter:
+    """Appends events to a macro file as they arrive; memory use stays at one write buffer"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, UNFINISHED, 0))
+        self.buffer = bytearray()
+        self.count = 0
+        self.first_us = None
+        self.last_us = None
+
+    def add(self, timestamp, kind, code=0, x=0, y=0):
+        """Append one event; timestamp is in seconds on any clock that only moves forward"""
+        now_us = round(timestamp * 1_000_000)
+        if self.last_us is None:
+            self.first_us = self.last_us = now_us
+        delta = min(MAX_DELTA, max(0, now_us - self.last_us))
+        self.last_us = max(self.last_us, now_us)
+        self.buffer += EVENT.pack(delta, kind, code, x, y)
+        self.count += 1
+        if len(self.buffer) >= WRITE_CHUNK:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def mark(self):
+        """Position to cut the recording back to with truncate()"""
+        return self.count, self.last_us
+
+    def truncate(self, mark):
+        count, last_us = mark
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.truncate(HEADER.size + count * EVENT.size)
+        self.file.seek(0, os.SEEK_END)
+        self.count, self.last_us = count, last_us
+
+    @property
+    def duration(self):
+        return 0.0 if self.last_us is None else (self.last_us - self.first_us) / 1_000_000
+
+    def close(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.count, round(self.duration * 1_000_000)))
+        self.file.close()
+
+
+def read_header(path):
+    """(event count, duration in seconds) of a macro file; raises ValueError if it is not one"""
+    with open(path, "rb") as f:
+        data = f.read(HEADER.size)
+        if len(data) < HEADER.size:
+            raise ValueError(f"not a macro file: {path}")
+        magic, version, count, duration_us = HEADER.unpack(data)
+        if magic != MAGIC or version > VERSION:
+            raise ValueError(f"not a macro file: {path}")
+        if count == UNFINISHED:
+            # Recording was cut off - the events that reached the disk still play
+            count = (os.fstat(f.fileno()).st_size - HEADER.size) // EVENT.size
+    return count, duration_us / 1_000_000
+
+
+def iter_events(path):
+    """(delta microseconds, kind, code, x, y) of every event, read from disk a chunk at a time"""
+    read_header(path)
+    with open(path, "rb") as f:
+        f.seek(HEADER.size)
+        while True:
+            data = f.read(READ_EVENTS * EVENT.size)
+            if not data:
+                return
+            data = data[:len(data) - len(data) % EVENT.size]
+            yield from EVENT.iter_unpack(data)
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+
+class MacroRecording:
+    """
+    Writes what a recorder backend captures to a macro file.
+
+    Releases whose press happened before recording started are dropped, and
+    so is the click that stops the recording when it ends the file.
+    """
+
+    def __init__(self, path, backend):
+        self.writer = MacroWriter(path)
+        self.backend = backend
+        self.held = set()
+        self.dropped = 0  # Keys the file format has no code for
+        self.settled = self.writer.mark()  # Just after the last event that was not a mouse move
+        self.click_mark = None  # Where the file ends without the last click and the moves leading to it
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.backend.start(self.event)
+
+    def event(self, timestamp, kind, code=0, x=0, y=0):
+        """Recorder thread - one input event; key codes are names, converted here"""
+        if kind in (KEY_DOWN, KEY_UP):
+            if code not in KEY_CODES:
+                self.dropped += 1
+                return
+            code = KEY_CODES[code]
+        with self._lock:
+            if kind in (KEY_UP, BUTTON_UP):
+                pressed = (kind - 1, code)  # KEY_UP -> KEY_DOWN, BUTTON_UP -> BUTTON_DOWN
+                if pressed not in self.held:
+                    return
+                self.held.discard(pressed)
+            elif kind in (KEY_DOWN, BUTTON_DOWN):
+                self.held.add((kind, code))
+            if kind == BUTTON_DOWN:
+                self.click_mark = self.settled
+            elif kind in (KEY_DOWN, KEY_UP, SCROLL):
+                self.click_mark = None
+            self.writer.add(timestamp, kind, code, x, y)
+            if kind != MOUSE_MOVE:
+                self.settled = self.writer.mark()
+
+    def stop(self):
+        """Stop and finish the file -> (events, duration in seconds)"""
+        self.backend.stop()
+        with self._lock:
+            if self.click_mark is not None:
+                self.writer.truncate(self.click_mark)
+            self.writer.close()
+            return self.writer.count, self.writer.duration
+
+
+class RecorderBackend:
+    """Captures global input; on_event(timestamp, kind, code, x, y) is called on a recorder thread"""
+
+    def start(self, on_event):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class X11Recorder(RecorderBackend):
+    """Every key and mouse event the X server handles, through the RECORD extension"""
+
+    def __init__(self):
+        if not os.environ.get("DISPLAY"):
+            raise RecordingUnavailable("Macro recording needs an X11 display.")
+        try:
+            from Xlib import X, XK, display
+            from Xlib.ext import record
+            from Xlib.protocol import rq
+        except ImportError:
+            raise RecordingUnavailable(
+                "python-xlib module required for macro recording.\nInstall with: pip install python-xlib"
+            ) from None
+        self.X, self.record, self.rq = X, record, rq
+        try:
+            self.display = display.Display()
+            self.record_display = display.Display()
+        except Exception as e:
+            raise RecordingUnavailable(f"Could not connect to the X display: {e}") from None
+        if not self.display.has_extension("RECORD"):
+            self.display.close()
+            self.record_display.close()
+            raise RecordingUnavailable("The X server does not support the RECORD extension.")
+        XK.load_keysym_group("xf86")
+        self.key_names = {}
+        for name in NAMED_KEYS:
+            keysym = XK.string_to_keysym(X_KEY_NAMES.get(name, name.upper()))
+            if keysym:
+                self.key_names.setdefault(keysym, name)
+        self.context = None
+        self.thread = None
+
+    def start(self, on_event):
+        X = self.X
+        self.on_event = on_event
+        self.context = self.record_display.record_create_context(0, [self.record.AllClients], [{
+            "core_requests": (0, 0), "core_replies": (0, 0),
+            "ext_requests": (0, 0, 0, 0), "ext_replies": (0, 0, 0, 0),
+            "delivered_events": (0, 0), "device_events": (X.KeyPress, X.MotionNotify),
+            "errors": (0, 0), "client_started": False, "client_died": False,
+        }])
+        self.thread = threading.Thread(target=self._run, name="macro-recorder", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self.record_display.record_enable_context(self.context, self._reply)
+        finally:
+            self.record_display.record_free_context(self.context)
+            self.record_display.close()
+
+    def _key_name(self, keycode):
+        keysym = self.display.keycode_to_keysym(keycode, 0)
+        if 0x20 <= keysym <= 0x7e:
+            return chr(keysym)
+        return self.key_names.get(keysym)
+
+    def _reply(self, reply):
+        if reply.category != self.record.FromServer or reply.client_swapped or not reply.data:
+            return
+        X = self.X
+        data = reply.data
+        while data:
+            event, data = self.rq.EventField(None).parse_binary_value(data, self.record_display.display, None, None)
+            timestamp = event.time / 1000
+            if event.type in (X.KeyPress, X.KeyRelease):
+                kind = KEY_DOWN if event.type == X.KeyPress else KEY_UP
+                self.on_event(timestamp, kind, self._key_name(event.detail))
+            elif event.type == X.MotionNotify:
+                self.on_event(timestamp, MOUSE_MOVE, 0, event.root_x, event.root_y)
+            elif event.detail in (4, 5):
+                # Wheel steps arrive as clicks of buttons 4 and 5
+                if event.type == X.ButtonPress:
+                    self.on_event(timestamp, SCROLL, 0, 1 if event.detail == 4 else -1, 0)
+            elif event.detail <= 3:
+                kind = BUTTON_DOWN if event.type == X.ButtonPress else BUTTON_UP
+                self.on_event(timestamp, kind, event.detail, event.root_x, event.root_y)
+
+    def stop(self):
+        if self.context is not None:
+            self.display.record_disable_context(self.context)
+            self.display.flush()
+            self.thread.join(1.0)
+            self.context = None
+        self.display.close()
+
+
+class WindowsRecorder(RecorderBackend):
+    """Low-level keyboard and mouse hooks on a thread running its own message loop"""
+
+    WH_KEYBOARD_LL = 13
+    WH_MOUSE_LL = 14
+    WM_QUIT = 0x0012
+    LLKHF_INJECTED = 0x10
+    LLMHF_INJECTED = 0x01
+    MOUSE_MESSAGES = {
+        0x0201: (BUTTON_DOWN, 1), 0x0202: (BUTTON_UP, 1),
+        0x0204: (BUTTON_DOWN, 3), 0x0205: (BUTTON_UP, 3),
+        0x0207: (BUTTON_DOWN, 2), 0x0208: (BUTTON_UP, 2),
+    }
+    WM_MOUSEMOVE = 0x0200
+    WM_MOUSEWHEEL = 0x020A
+    KEY_DOWN_MESSAGES = (0x0100, 0x0104)  # WM_KEYDOWN, WM_SYSKEYDOWN
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes, self.wintypes = ctypes, wintypes
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        self.kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+        class KBDLLHOOKSTRUCT(ctypes.Structure):
+            _fields_ = [("vkCode", wintypes.DWORD), ("scanCode", wintypes.DWORD), ("flags", wintypes.DWORD),
+                        ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+        class MSLLHOOKSTRUCT(ctypes.Structure):
+            _fields_ = [("pt", wintypes.POINT), ("mouseData", wintypes.DWORD), ("flags", wintypes.DWORD),
+                        ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+        self.KBDLLHOOKSTRUCT, self.MSLLHOOKSTRUCT = KBDLLHOOKSTRUCT, MSLLHOOKSTRUCT
+        self.hook_type = ctypes.WINFUNCTYPE(ctypes.c_ssize_t, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+        self.user32.SetWindowsHookExW.restype = wintypes.HHOOK
+        self.user32.SetWindowsHookExW.argtypes = [ctypes.c_int, self.hook_type, wintypes.HINSTANCE, wintypes.DWORD]
+        self.user32.CallNextHookEx.restype = ctypes.c_ssize_t
+        self.user32.CallNextHookEx.argtypes = [wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM]
+        self.thread = None
+        self.thread_id = None
+
+    def start(self, on_event):
+        self.on_event = on_event
+        started = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(started,), name="macro-recorder", daemon=True)
+        self.thread.start()
+        started.wait(1.0)
+
+    def _run(self, started):
+        ctypes, wintypes = self.ctypes, self.wintypes
+        self.thread_id = self.kernel32.GetCurrentThreadId()
+        # Hooks call back on the thread that set them, from inside its message loop
+        keyboard_proc, mouse_proc = self.hook_type(self._keyboard), self.hook_type(self._mouse)
+        module = self.kernel32.GetModuleHandleW(None)
+        hooks = [self.user32.SetWindowsHookExW(self.WH_KEYBOARD_LL, keyboard_proc, module, 0),
+                 self.user32.SetWindowsHookExW(self.WH_MOUSE_LL, mouse_proc, module, 0)]
+        started.set()
+        message = wintypes.MSG()
+        while self.user32.GetMessageW(ctypes.byref(message), None, 0, 0) > 0:
+            pass
+        for hook in hooks:
+            if hook:
+                self.user32.UnhookWindowsHookEx(hook)
+
+    def _keyboard(self, code, wparam, lparam):
+        if code >= 0:
+            info = self.ctypes.cast(lparam, self.ctypes.POINTER(self.KBDLLHOOKSTRUCT)).contents
+            # Keystrokes a macro or key is sending right now are not the user's
+            if not info.flags & self.LLKHF_INJECTED:
+                kind = KEY_DOWN if wparam in self.KEY_DOWN_MESSAGES else KEY_UP
+                self.on_event(info.time / 1000, kind, WINDOWS_KEY_NAMES.get(info.vkCode))
+        return self.user32.CallNextHookEx(None, code, wparam, lparam)
+
+    def _mouse(self, code, wparam, lparam):
+        if code >= 0:
+            info = self.ctypes.cast(lparam, self.ctypes.POINTER(self.MSLLHOOKSTRUCT)).contents
+            if not info.flags & self.LLMHF_INJECTED:
+                timestamp, x, y = info.time / 1000, info.pt.x, info.pt.y
+                if wparam == self.WM_MOUSEMOVE:
+                    self.on_event(timestamp, MOUSE_MOVE, 0, x, y)
+                elif wparam == self.WM_MOUSEWHEEL:
+                    delta = self.ctypes.c_short(info.mouseData >> 16).value
+                    # 120 per notch; touchpads send smaller steps, counted as one
+                    clicks = int(delta / 120) or (1 if delta > 0 else -1)
+                    self.on_event(timestamp, SCROLL, 0, clicks, 0)
+                elif wparam in self.MOUSE_MESSAGES:
+                    kind, button = self.MOUSE_MESSAGES[wparam]
+                    self.on_event(timestamp, kind, button, x, y)
+        return self.user32.CallNextHookEx(None, code, wparam, lparam)
+
+    def stop(self):
+        if self.thread_id is not None:
+            self.user32.PostThreadMessageW(self.thread_id, self.WM_QUIT, 0, 0)
+            self.thread.join(1.0)
+            self.thread_id = None
+
+
+class FakeRecorder(RecorderBackend):
+    """Events come from feed() instead of the system - for benchmarks"""
+
+    def start(self, on_event):
+        self.on_event = on_event
+
+    def feed(self, timestamp, kind, code=0, x=0, y=0):
+        self.on_event(timestamp, kind, code, x, y)
+
+
+def recorder_backend():
+    """The recorder for this platform; raises RecordingUnavailable"""
+    if sys.platform == "win32":
+        return WindowsRecorder()
+    if sys.platform.startswith("linux"):
+        return X11Recorder()
+    raise RecordingUnavailable("Macro recording is supported on Windows and Linux (X11).")
+
+
+def new_macro_path(key_id, folder=MACRO_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"key{key_id}_{time.strftime('%Y%m%d_%H%M%S')}{MACRO_EXTENSION}")
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+class MacroPlayer:
+    """
+    Replays one macro at a time on a thread of its own.
+
+    on_done(key, events, seconds, error) is called on the player thread when
+    a macro ends, is stopped or fails. Anything still held down is released.
+    """
+
+    def __init__(self, on_done):
+        self.on_done = on_done
+        self.key = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def playing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def play(self, key, path, backend, speed=DEFAULT_SPEED, max_gap=DEFAULT_MAX_GAP):
+        """Start replaying path through an input backend, stopping whatever plays now"""
+        self.stop()
+        self.key = key
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(key, path, backend, speed, max_gap, self._stop),
+            name="macro-player", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the macro playing now; returns once its held keys are released"""
+        if self.playing:
+            self._stop.set()
+            self._thread.join(1.0)
+        self.key = None
+
+    def _run(self, key, path, backend, speed, max_gap, stop):
+        start = time.perf_counter()
+        held = set()
+        count = 0
+        error = None
+        try:
+            count = self.replay(path, backend, speed, max_gap, stop, held)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            # Never leave a modifier or button stuck down
+            for kind, code in held:
+                try:
+                    if kind == KEY_DOWN:
+                        backend.key_up(MACRO_KEYS[code])
+                    else:
+                        backend.mouse_button(code, False)
+                except Exception:
+                    pass
+            try:
+                backend.flush()
+            except Exception:
+                pass
+        if error is None and stop.is_set():
+            error = "stopped"
+        elapsed = time.perf_counter() - start
+        metrics.record("macro_play", elapsed)
+        self.on_done(key, count, elapsed, error)
+
+    @staticmethod
+    def replay(path, backend, speed=DEFAULT_SPEED, max_gap=DEFAULT_MAX_GAP, stop=None, held=None):
+        """Send every event of a macro file at its scheduled time -> events sent"""
+        stop = stop or threading.Event()
+        held = set() if held is None else held
+        scale = 1.0 / (speed * 1_000_000)
+        gap_us = max_gap * 1_000_000 if max_gap > 0 else None
+        origin = time.perf_counter()
+        offset = 0.0  # Seconds into the macro, after scaling and gap compression
+        position = None
+        count = 0
+        for delta, kind, code, x, y in iter_events(path):
+            if gap_us is not None and delta > gap_us:
+                delta = gap_us
+            offset += delta * scale
+            deadline = origin + offset
+            # Sleep most of the way, then spin for the last moment - sleeps overshoot by up to a millisecond or more
+            remaining = deadline - time.perf_counter()
+            if remaining > SPIN and stop.wait(remaining - SPIN):
+                break
+            if stop.is_set():
+                break
+            while time.perf_counter() < deadline:
+                pass
+            late = time.perf_counter() - deadline
+            if late > RESYNC:
+                # Stalled (suspend, swapping) - keep the rest of the macro's spacing instead of rushing through it
+                origin += late
+                metrics.count("macro_resync")
+            metrics.record("macro_drift", late)
+
+            if kind == MOUSE_MOVE:
+                backend.mouse_move(x, y)
+                position = (x, y)
+            elif kind in (KEY_DOWN, KEY_UP):
+                name = MACRO_KEYS[code]
+                if kind == KEY_DOWN:
+                    backend.key_down(name)
+                    held.add((KEY_DOWN, code))
+                else:
+                    backend.key_up(name)
+                    held.discard((KEY_DOWN, code))
+            elif kind in (BUTTON_DOWN, BUTTON_UP):
+                if position != (x, y):
+                    backend.mouse_move(x, y)
+                    position = (x, y)
+                backend.mouse_button(code, kind == BUTTON_DOWN)
+                if kind == BUTTON_DOWN:
+                    held.add((BUTTON_DOWN, code))
+                else:
+                    held.discard((BUTTON_DOWN, code))
+            elif kind == SCROLL:
+                backend.scroll(x)
+            backend.flush()
+            count += 1
+        return count
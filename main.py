@@ -4,12 +4,58 @@ from PIL import Image, ImageTk
 import customtkinter as ctk
 import json
 import os
-import subprocess
-import shutil
 from pathlib import Path
 import pystray
 from pystray import MenuItem as item
 import threading
+from key_faces import KEY_WIDTH, KEY_HEIGHT, cover_crop, apply_opacity, draw_overlay_text
+from live_tiles import LiveTileScheduler
+from scheduler import ActionScheduler
+from script_pool import ScriptPool
+from command_runner import CommandRunner
+from http_pool import HttpPool
+from input_injection import Injector, INPUT_BACKENDS
+from input_focus import InputFocus, FOCUS_MODES, DEFAULT_FOCUS_MODE
+from macro import MacroPlayer
+from global_hotkeys import GlobalHotkeys
+from themes import THEME_PALETTES, key_palette
+from customize_dialog import CustomizeDialog, DEFAULT_KEY_CONFIG
+from batch_editor import BatchEditor
+import profile_archive
+from history import ConfigHistory
+from actions import action_target, compile_action, registry
+from command_index import CommandIndex, TITLE_FIELD
+from command_palette import CommandPalette, PALETTE_COMMANDS
+from perf_overlay import PerfOverlay
+import warm_start
+from icon_trash import IconTrash
+from perf import metrics
+from assets import assets
+from icon_ingest import IconIngestor
+from animation import AnimationClock, FrameCache, is_animated
+from layout import DeckLayout, LayoutJournal
+from key_drag import KeyDragController
+from canvas_deck import CanvasDeck
+from image_memory import (
+    ImageMemory, DEFAULT_BUDGET_MB, image_nbytes, process_rss, trim_process_memory, format_bytes
+)
+import gc
+import multiprocessing
+import sys
+import time
+
+
+APP_VERSION = "1.1.0"
+
+SELECTION_BORDER_COLOR = "#4CAF50"
+
+# Largest deck, and the largest one drawn with a widget per key under the "auto" renderer
+MAX_GRID_SIZE = 32
+WIDGET_GRID_LIMIT = 8
+GRID_RENDERERS = ["auto", "widgets", "canvas"]
+
+# How long a result (e.g. an HTTP status) stays drawn on a key
+KEY_STATUS_MS = 3000
 
 
 class StreamDeckApp:
@@ -19,18 +65,14 @@ class StreamDeckApp:
         self.root.geometry("900x700")
         
         # Set window icon
-        try:
-            if os.path.exists("icon.ico"):
-                self.root.iconbitmap("icon.ico")
-        except Exception as e:
-            print(f"Could not load icon: {e}")
+        assets.set_window_icon(self.root)
         
         # Set appearance mode
         ctk.set_appearance_mode("dark")  # "dark" or "light"
         ctk.set_default_color_theme("blue")
         
         # Configure window background
-        self.root.configure(bg="#1a1a1a")  # Dark background
+        self.root.configure(bg=THEME_PALETTES["dark"]["window_bg"])  # Dark background
         
         # Configure grid weight for responsive layout
         self.root.grid_rowconfigure(0, weight=1)
@@ -39,31 +81,122 @@ class StreamDeckApp:
         # Grid configuration (default 4 columns x 3 rows)
         self.grid_cols = 4
         self.grid_rows = 3
+        self.grid_renderer = "auto"  # One of GRID_RENDERERS
         
         # Button appearance settings
         self.corner_radius = 15  # Default corner radius
         self.current_theme = "dark"  # Track current theme
         
-        # Button configurations storage
+        # Button configurations storage, keyed by stable key ID
         self.button_configs = {}
+        self.layout = DeckLayout(self.grid_rows, self.grid_cols)  # Grid cell -> key ID
+        self.buttons = {}  # Key ID -> button widget (CanvasKey on the canvas deck)
+        self.canvas_deck = None  # Single-canvas renderer for large decks
         self.button_images = {}  # Store PhotoImage references
         self.loaded_image_paths = {}  # Track which images are loaded
+        self.button_faces = {}  # Cropped icon faces reused by live tiles
+        self.image_memory = ImageMemory()  # Rendered image bytes per key
         self.config_file = "button_config.json"
+        self.layout_journal = LayoutJournal("button_config.layout.jsonl")  # Moves since the last full save
+        self.warm_start_file = "warm_start.bin"  # Prepared deck state for fast startup
+        self.warm_start = None
+        self.warm_start_write = None  # Pending debounced snapshot write
+        self.action_plans = {}  # Key ID -> compiled action plan
+        self.command_index = CommandIndex(self.command_fields)  # Palette search over keys and commands
+        self.command_palette = None
+        self.perf_overlay = None  # Built on first toggle
+        self.key_drag = KeyDragController(self)  # Click on release, drag to move/swap
+        self.selection = set()  # Keys selected for batch editing
+        self.selection_anchor = None  # Key a shift-click range starts from
         
         # Icons folder for storing selected images
         self.icons_folder = "icons"
         if not os.path.exists(self.icons_folder):
             os.makedirs(self.icons_folder)
         
+        # Removed icons go to a recoverable trash; undo/redo covers every config edit
+        self.icon_trash = IconTrash(self.icons_folder)
+        self.icon_trash.purge()
+        self.history = ConfigHistory()
+        
+        # Shared scheduler for keys that show live values
+        self.live_scheduler = LiveTileScheduler(
+            self.root.after,
+            self.root.after_cancel,
+            self.render_live_tiles,
+            max_fps=10
+        )
+        
+        # Timed and recurring key actions, run from one sleeping timer thread
+        self.action_scheduler = ActionScheduler(self.dispatch_scheduled)
+        
+        # Warm Python interpreters for Script keys
+        self.script_pool = ScriptPool(self.key_output, self.script_finished)
+        
+        # Shell commands of Command keys, run off the Tk thread with their output kept per key
+        self.command_runner = CommandRunner(self.key_output, self.command_finished)
+        
+        # HTTP keys share keep-alive connections per host
+        self.http_pool = HttpPool(self.http_finished)
+        self.key_status_timers = {}  # Key ID -> after handle restoring its face
+        
+        # Keystrokes of Hotkey and Text keys, through the backend picked in settings
+        self.injector = Injector()
+        self.input_focus = InputFocus()  # Keeps the deck from taking keystrokes meant for other windows
+        
+        # Recorded macros replay on a timing thread of their own, streamed from their files
+        self.macro_player = MacroPlayer(self.macro_finished)
+        
+        # Chords that fire keys from any application, while the deck is in the tray too
+        self.tk_thread = threading.current_thread()
+        self.global_hotkeys = GlobalHotkeys(self.trigger_global)
+        
+        # Animated icons: decoded frames shared by all keys, advanced by one clock
+        self.frame_cache = FrameCache(
+            budget_bytes=64 * 1024 * 1024,
+            wrap=lambda frame: ctk.CTkImage(light_image=frame, size=(KEY_WIDTH, KEY_HEIGHT))
+        )
+        self.animation_clock = AnimationClock(
+            self.root.after,
+            self.root.after_cancel,
+            self.apply_animation_frames
+        )
+        
+        # Key customization dialog, reused across keys
+        self.customize_dialog = None
+        self.batch_editor = None
+        
+        # Background worker that normalizes imported icons
+        self.icon_ingestor = IconIngestor()
+        
         # System tray icon
         self.tray_icon = None
         self.is_quitting = False
+        self.import_job = None  # Running profile import - it replaces the config on disk
         
-        # Load saved configurations
-        self.load_config()
+        # Load saved configurations - from the warm start snapshot when nothing changed
+        with metrics.timed("startup_config"):
+            self.warm_start = warm_start.load(
+                self.warm_start_file, APP_VERSION, self.config_file, self.layout_journal.path
+            )
+            if self.warm_start is not None:
+                self.apply_config_data(self.warm_start.config)
+                self.action_plans = dict(self.warm_start.plans)
+            else:
+                self.load_config()
+        self.history.reset(*self.history_state())
         
         # Create main container
-        self.create_widgets()
+        with metrics.timed("startup_grid"):
+            self.create_widgets()
+        
+        warm = self.warm_start is not None
+        if warm:
+            # Keys off the grid render from their icons when shown
+            self.warm_start.close()
+            self.warm_start = None
+        else:
+            self.schedule_warm_start_write()
         
         # Setup system tray
         self.setup_tray_icon()
@@ -71,6 +204,25 @@ class StreamDeckApp:
         # Handle window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+        # After the protocol setup - Tk rewrites WM_PROTOCOLS there, which would undo no-activate
+        self.input_focus.attach(self.root)
+        
+        # Shrink oversized icons from older versions once the deck is up
+        # (already done on the run that built a valid warm start snapshot)
+        if not warm:
+            self.root.after(1000, self.normalize_stored_icons)
+        
+        # Index the keys for the command palette while idle, not on its first keystroke
+        self.root.after(2000, self.command_index.refresh)
+        
+        # Start the script workers early when the deck has Script keys
+        if any(config.get("action_type") == "Script" for config in self.button_configs.values()):
+            self.root.after(3000, self.script_pool.start)
+        
+        # Import and connect the input backend before the first Hotkey or Text press
+        if any(config.get("action_type") in ("Hotkey", "Text", "Macro") for config in self.button_configs.values()):
+            self.root.after(1500, self.injector.prewarm)
+        
     def create_widgets(self):
         # Main frame
         main_frame = ctk.CTkFrame(self.root, corner_radius=0, fg_color="transparent")
@@ -112,7 +264,7 @@ class StreamDeckApp:
         # Theme toggle button
         self.theme_btn = ctk.CTkButton(
             header_frame,
-            text="🌙 Dark Mode" if self.current_theme == "dark" else "☀️ Light Mode",
+            text=THEME_PALETTES[self.current_theme]["label"],
             width=120,
             text_color="#000000",
             command=self.toggle_theme,
@@ -136,6 +288,13 @@ class StreamDeckApp:
         # Button grid frame
         self.button_frame = ctk.CTkFrame(main_frame, corner_radius=10)
         self.button_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.key_drag.bind_background(self.button_frame)
+        self.root.bind("<Escape>", lambda e: self.set_selection(set()))
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Z>", lambda e: self.redo())
+        self.root.bind("<Control-k>", lambda e: self.open_command_palette())
+        self.root.bind("<Control-P>", lambda e: self.toggle_perf_overlay())
         
         # Status bar
         self.status_label = ctk.CTkLabel(
@@ -155,91 +314,228 @@ class StreamDeckApp:
         for widget in self.button_frame.winfo_children():
             widget.destroy()
         
-        self.buttons = []
-        for row in range(self.grid_rows):
-            for col in range(self.grid_cols):
-                btn_num = row * self.grid_cols + col + 1
-                
-                # Get saved config or use defaults
-                config = self.button_configs.get(btn_num, {
-                    "text": f"Button {btn_num}",
-                    "image_path": None,
-                    "app_path": None
-                })
-                
-                btn = ctk.CTkButton(
-                    self.button_frame,
-                    text=config["text"],
-                    width=150,
-                    height=100,
-                    command=lambda num=btn_num: self.button_clicked(num),
-                    fg_color="#2196F3",
-                    hover_color="#1976D2",
-                    text_color="white",
-                    font=("Arial", 12, "bold"),
-                    corner_radius=self.corner_radius,
-                    compound="top"  # Allow text over image
-                )
-                
-                # Right-click to customize - bind to button and all child widgets
-                def bind_right_click(widget, num):
-                    widget.bind("<Button-3>", lambda e, n=num: self.customize_button(n))
-                    for child in widget.winfo_children():
-                        bind_right_click(child, num)
-                
-                bind_right_click(btn, btn_num)
-                
+        self.live_scheduler.clear()
+        self.release_key_renders(detach=False)
+        self.buttons = {}
+        self.selection = set()
+        
+        # Decks too big for a widget per key are drawn on a single canvas
+        if self.wants_canvas_deck():
+            self.canvas_deck = CanvasDeck(self.button_frame, self, self.button_frame.cget("fg_color"))
+        else:
+            self.canvas_deck = None
+        self.sync_button_grid()
+    
+    def wants_canvas_deck(self):
+        if self.grid_renderer == "auto":
+            return max(self.grid_rows, self.grid_cols) > WIDGET_GRID_LIMIT
+        return self.grid_renderer == "canvas"
+    
+    def sync_button_grid(self):
+        """Place key widgets at their layout cells - only missing keys are created"""
+        if (self.canvas_deck is not None) != self.wants_canvas_deck():
+            # Crossed the widget grid limit - rebuild with the other renderer
+            self.create_button_grid()
+            return
+        
+        with metrics.timed("grid_sync"):
+            self.layout.resize(self.grid_rows, self.grid_cols)
+            if self.canvas_deck is not None:
+                self.canvas_deck.resize(self.grid_rows, self.grid_cols)
+            
+            for key_id, btn in list(self.buttons.items()):
+                if not self.layout.is_visible(key_id) and btn.winfo_manager():
+                    self.hide_key(key_id)
+            
+            for key_id in self.layout.visible_keys():
+                row, col = self.layout.position_of(key_id)
+                btn = self.buttons.get(key_id)
+                if btn is None:
+                    btn = self.create_key_button(key_id)
+                elif not btn.winfo_manager():
+                    self.show_key(key_id)
                 btn.grid(row=row, column=col, padx=5, pady=5, sticky=(tk.W, tk.E, tk.N, tk.S))
-                self.buttons.append(btn)
-                
-                # Apply saved configuration if exists
-                if btn_num in self.button_configs:
-                    self.update_button_display(btn_num)
-                
-                # Load image if configured
-                if config.get("image_path") and os.path.exists(config["image_path"]):
-                    self.set_button_image(btn_num, config["image_path"])
-                
-                # Make buttons expand with window
-                self.button_frame.grid_rowconfigure(row, weight=1)
-                self.button_frame.grid_columnconfigure(col, weight=1)
+            
+            # Make buttons expand with window - rows/columns left over from a bigger grid collapse
+            if self.canvas_deck is not None:
+                self.configure_grid_weights(1, 1)  # The canvas takes the space, scrollbars keep theirs
+            else:
+                self.configure_grid_weights(self.grid_rows, self.grid_cols)
+    
+    def configure_grid_weights(self, rows, cols):
+        used_cols, used_rows = self.button_frame.grid_size()
+        for row in range(max(used_rows, rows)):
+            self.button_frame.grid_rowconfigure(row, weight=1 if row < rows else 0)
+        for col in range(max(used_cols, cols)):
+            self.button_frame.grid_columnconfigure(col, weight=1 if col < cols else 0)
+    
+    def create_key_button(self, key_id):
+        """Create and render the widget of one key"""
+        # Get saved config or use defaults
+        config = self.button_configs.get(key_id, {
+            "text": f"Button {key_id}",
+            "image_path": None,
+            "app_path": None
+        })
+        
+        if self.canvas_deck is not None:
+            # Drawn by the canvas - its events are hit-tested there
+            btn = self.canvas_deck.create_key(key_id, text=config["text"], corner_radius=self.corner_radius)
+        else:
+            btn = ctk.CTkButton(
+                self.button_frame,
+                text=config["text"],
+                width=150,
+                height=100,
+                command=None,  # Fired on release by the drag controller, so a drag never clicks
+                fg_color="#2196F3",
+                hover_color="#1976D2",
+                text_color="white",
+                font=("Arial", 12, "bold"),
+                corner_radius=self.corner_radius,
+                compound="top"  # Allow text over image
+            )
+            self.bind_key_events(btn, key_id)
+        self.buttons[key_id] = btn
+        
+        # Apply saved configuration if exists
+        if key_id in self.button_configs:
+            self.update_button_display(key_id)
+        
+        # Load image if configured
+        if config.get("image_path") and os.path.exists(config["image_path"]):
+            self.set_button_image(key_id, config["image_path"])
+        
+        # Register live value refresh
+        self.live_scheduler.set_tile(key_id, config)
+        return btn
+    
+    def bind_key_events(self, widget, key_id):
+        """Right-click to customize, press/drag/release to click or move - on the key and all child widgets"""
+        widget.bind("<Button-3>", lambda e, n=key_id: self.customize_button(n))
+        for child in widget.winfo_children():
+            self.key_drag.bind(child, key_id)
+            self.bind_key_events(child, key_id)
+    
+    def move_key(self, key_id, row, col):
+        """Drop a key on a cell, swapping with the key there - only the layout changes"""
+        if self.editing_paused():
+            return
+        moved = self.layout.move(key_id, row, col)
+        if not moved:
+            return
+        for moved_id in moved:
+            moved_row, moved_col = self.layout.position_of(moved_id)
+            self.buttons[moved_id].grid(row=moved_row, column=moved_col)
+        
+        # Persist just the moved cells; the next full save folds them in
+        self.layout_journal.append(self.layout, moved)
+        self.record_history("Move key")
+        
+        if len(moved) == 2:
+            self.status_label.configure(text=f"Swapped keys {moved[0]} and {moved[1]}")
+        else:
+            self.status_label.configure(text=f"Moved key {key_id}")
+    
+    def set_selection(self, key_ids):
+        """Select exactly key_ids, redrawing only the keys whose state changed"""
+        key_ids = set(key_ids)
+        changed = self.selection ^ key_ids
+        self.selection = key_ids
+        for key_id in changed:
+            self.refresh_key_border(key_id)
+        if changed:
+            if len(key_ids) > 1:
+                self.status_label.configure(text=f"{len(key_ids)} keys selected - right-click one to edit them together")
+            else:
+                self.status_label.configure(text=f"{len(key_ids)} key selected" if key_ids else "Ready")
+    
+    def toggle_selection(self, key_id):
+        """Ctrl-click: add or remove one key"""
+        self.selection_anchor = key_id
+        self.set_selection(self.selection ^ {key_id})
+    
+    def extend_selection(self, key_id):
+        """Shift-click: select every key from the anchor to key_id in reading order"""
+        order = self.layout.visible_keys()
+        if self.selection_anchor not in order:
+            self.toggle_selection(key_id)
+            return
+        start, end = sorted((order.index(self.selection_anchor), order.index(key_id)))
+        self.set_selection(self.selection | set(order[start:end + 1]))
+    
+    def refresh_key_border(self, key_id):
+        """Outline selected keys"""
+        btn = self.buttons.get(key_id)
+        if btn is None:
+            return
+        if key_id in self.selection:
+            btn.configure(border_width=3, border_color=SELECTION_BORDER_COLOR)
+        else:
+            btn.configure(border_width=0)
+    
+    def key_in_view(self, key_id):
+        """Whether a key on the grid is on screen - the canvas deck only draws the scrolled-to part"""
+        return self.canvas_deck is None or self.canvas_deck.in_view(key_id)
+    
+    def key_entered_view(self, key_id):
+        """Canvas deck: render the icon of a key scrolled into view"""
+        image_path = self.button_configs.get(key_id, {}).get("image_path")
+        if image_path and os.path.exists(image_path):
+            self.set_button_image(key_id, image_path)
+    
+    def key_left_view(self, key_id):
+        """Canvas deck: free the shown image of a key scrolled out of view - its base face stays for scrolling back"""
+        btn = self.buttons.get(key_id)
+        if btn is not None:
+            btn.configure(image=None)
+        self.button_images.pop(key_id, None)
+        self.loaded_image_paths.pop(key_id, None)
+        self.animation_clock.remove(key_id)
+        self.image_memory.release("key_faces", key_id)
+    
+    def hide_key(self, key_id):
+        """Take a key off the grid, keeping its widget and still render for later"""
+        self.buttons[key_id].grid_remove()
+        self.live_scheduler.remove_tile(key_id)
+        if key_id in self.animation_clock.keys:
+            # Animated faces come back from the frame cache when shown
+            self.drop_key_render(key_id)
+    
+    def show_key(self, key_id):
+        """Put a hidden key back on the grid"""
+        config = self.button_configs.get(key_id)
+        if config is None:
+            return
+        if key_id not in self.button_images and config.get("image_path"):
+            # Its render was evicted while hidden
+            self.update_button_display(key_id)
+        self.live_scheduler.set_tile(key_id, config)
     
     def open_settings(self):
         """Open settings dialog for grid, theme, and appearance"""
+        if self.editing_paused():
+            return
         dialog = tk.Toplevel(self.root)
         dialog.title("Settings")
-        dialog.geometry("500x600")
+        dialog.geometry("500x960")
         dialog.transient(self.root)
         dialog.grab_set()
         
         # Set dialog icon
-        try:
-            if os.path.exists("icon.ico"):
-                dialog.iconbitmap("icon.ico")
-        except:
-            pass
+        assets.set_window_icon(dialog)
         
         # Configure dialog to use CTk appearance
-        if self.current_theme == "dark":
-            dialog.configure(bg="#2b2b2b")
-        else:
-            dialog.configure(bg="#ebebeb")
+        dialog.configure(bg=THEME_PALETTES[self.current_theme]["dialog_bg"])
         
         # Settings frame
         settings_frame = ctk.CTkFrame(dialog)
         settings_frame.pack(fill="both", expand=True, padx=20, pady=20)
         
-        # Logo at top
-        try:
-            if os.path.exists("logos/mango_256_transparent.png"):
-                logo_img = Image.open("logos/mango_256_transparent.png")
-                logo_img = logo_img.resize((60, 60), Image.Resampling.LANCZOS)
-                logo_photo = ctk.CTkImage(light_image=logo_img, dark_image=logo_img, size=(60, 60))
-                logo_label = ctk.CTkLabel(settings_frame, image=logo_photo, text="")
-                logo_label.image = logo_photo
-                logo_label.pack(pady=(10, 5))
-        except:
-            pass
+        # Logo at top - decoded and resized once per process
+        logo_photo = assets.logo(60)
+        if logo_photo is not None:
+            ctk.CTkLabel(settings_frame, image=logo_photo, text="").pack(pady=(10, 5))
         
         # Title
         ctk.CTkLabel(
@@ -265,7 +561,7 @@ class StreamDeckApp:
         cols_var = tk.StringVar(value=str(self.grid_cols))
         cols_entry = ctk.CTkEntry(cols_frame, width=100, textvariable=cols_var)
         cols_entry.pack(side=tk.LEFT, padx=5)
-        ctk.CTkLabel(cols_frame, text="(1-8)").pack(side=tk.LEFT, padx=5)
+        ctk.CTkLabel(cols_frame, text=f"(1-{MAX_GRID_SIZE})").pack(side=tk.LEFT, padx=5)
         
         # Rows
         rows_frame = ctk.CTkFrame(grid_section, fg_color="transparent")
@@ -274,7 +570,20 @@ class StreamDeckApp:
         rows_var = tk.StringVar(value=str(self.grid_rows))
         rows_entry = ctk.CTkEntry(rows_frame, width=100, textvariable=rows_var)
         rows_entry.pack(side=tk.LEFT, padx=5)
-        ctk.CTkLabel(rows_frame, text="(1-8)").pack(side=tk.LEFT, padx=5)
+        ctk.CTkLabel(rows_frame, text=f"(1-{MAX_GRID_SIZE})").pack(side=tk.LEFT, padx=5)
+        
+        # Renderer - auto draws decks above 8x8 on a single canvas
+        renderer_frame = ctk.CTkFrame(grid_section, fg_color="transparent")
+        renderer_frame.pack(pady=(5, 10))
+        ctk.CTkLabel(renderer_frame, text="Renderer:", width=100).pack(side=tk.LEFT, padx=5)
+        renderer_var = tk.StringVar(value=self.grid_renderer)
+        ctk.CTkOptionMenu(
+            renderer_frame,
+            values=GRID_RENDERERS,
+            variable=renderer_var,
+            width=100
+        ).pack(side=tk.LEFT, padx=5)
+        ctk.CTkLabel(renderer_frame, text=f"(canvas above {WIDGET_GRID_LIMIT}x{WIDGET_GRID_LIMIT})").pack(side=tk.LEFT, padx=5)
         
         # Appearance Settings Section
         appearance_section = ctk.CTkFrame(settings_frame)
@@ -295,6 +604,15 @@ class StreamDeckApp:
         radius_entry.pack(side=tk.LEFT, padx=5)
         ctk.CTkLabel(radius_frame, text="(0-50)").pack(side=tk.LEFT, padx=5)
         
+        # Image memory budget
+        memory_frame = ctk.CTkFrame(appearance_section, fg_color="transparent")
+        memory_frame.pack(pady=5)
+        ctk.CTkLabel(memory_frame, text="Image Memory (MB):", width=120).pack(side=tk.LEFT, padx=5)
+        memory_var = tk.StringVar(value=str(self.image_memory.budget_bytes // (1024 * 1024)))
+        memory_entry = ctk.CTkEntry(memory_frame, width=100, textvariable=memory_var)
+        memory_entry.pack(side=tk.LEFT, padx=5)
+        ctk.CTkLabel(memory_frame, text="(16-4096)").pack(side=tk.LEFT, padx=5)
+        
         # Theme selector
         theme_frame = ctk.CTkFrame(appearance_section, fg_color="transparent")
         theme_frame.pack(pady=10, padx=10)
@@ -309,40 +627,106 @@ class StreamDeckApp:
         )
         theme_menu.pack(side=tk.LEFT, padx=5)
         
+        # Performance overlay - toggles right away
+        overlay_var = tk.BooleanVar(value=self.perf_overlay is not None and self.perf_overlay.visible)
+        ctk.CTkSwitch(
+            appearance_section,
+            text="Performance overlay (Ctrl+Shift+P)",
+            variable=overlay_var,
+            command=self.toggle_perf_overlay
+        ).pack(pady=(0, 10))
+        
+        # Input Section - the backend Hotkey and Text keys type through
+        input_section = ctk.CTkFrame(settings_frame)
+        input_section.pack(fill="x", padx=10, pady=10)
+        
+        backend_frame = ctk.CTkFrame(input_section, fg_color="transparent")
+        backend_frame.pack(pady=10)
+        ctk.CTkLabel(backend_frame, text="Input Backend:", width=120).pack(side=tk.LEFT, padx=5)
+        backend_var = tk.StringVar(value=self.injector.name)
+        ctk.CTkOptionMenu(
+            backend_frame,
+            values=INPUT_BACKENDS,
+            variable=backend_var,
+            width=150
+        ).pack(side=tk.LEFT, padx=5)
+        in_use = self.injector.backend.name if self.injector.backend is not None else "not started"
+        ctk.CTkLabel(backend_frame, text=f"(in use: {in_use})").pack(side=tk.LEFT, padx=5)
+        
+        # Where keystrokes go when the deck itself was just clicked
+        focus_frame = ctk.CTkFrame(input_section, fg_color="transparent")
+        focus_frame.pack(pady=(0, 10))
+        ctk.CTkLabel(focus_frame, text="Key Focus:", width=120).pack(side=tk.LEFT, padx=5)
+        focus_var = tk.StringVar(value=self.input_focus.mode)
+        ctk.CTkOptionMenu(
+            focus_frame,
+            values=FOCUS_MODES,
+            variable=focus_var,
+            width=150
+        ).pack(side=tk.LEFT, padx=5)
+        
         def apply_settings():
             try:
                 new_cols = int(cols_var.get())
                 new_rows = int(rows_var.get())
                 new_radius = int(radius_var.get())
+                new_memory_mb = int(memory_var.get())
                 new_theme = theme_var.get()
+                new_renderer = renderer_var.get()
+                new_backend = backend_var.get()
+                new_focus = focus_var.get()
                 
-                if new_cols < 1 or new_cols > 8 or new_rows < 1 or new_rows > 8:
-                    messagebox.showerror("Invalid Grid Size", "Grid size must be between 1 and 8")
+                if new_cols < 1 or new_cols > MAX_GRID_SIZE or new_rows < 1 or new_rows > MAX_GRID_SIZE:
+                    messagebox.showerror("Invalid Grid Size", f"Grid size must be between 1 and {MAX_GRID_SIZE}")
+                    return
+                
+                if new_renderer == "widgets" and max(new_cols, new_rows) > WIDGET_GRID_LIMIT:
+                    messagebox.showerror(
+                        "Invalid Grid Size",
+                        f"The widgets renderer supports grids up to {WIDGET_GRID_LIMIT}x{WIDGET_GRID_LIMIT}.\n"
+                        "Use auto or canvas for bigger decks."
+                    )
                     return
                 
                 if new_radius < 0 or new_radius > 50:
                     messagebox.showerror("Invalid Radius", "Corner radius must be between 0 and 50")
                     return
                 
+                if new_memory_mb < 16 or new_memory_mb > 4096:
+                    messagebox.showerror("Invalid Memory Budget", "Image memory must be between 16 and 4096 MB")
+                    return
+                
                 # Apply theme if changed
                 if new_theme != self.current_theme:
-                    self.current_theme = new_theme
-                    ctk.set_appearance_mode(new_theme)
-                    self.root.configure(bg="#1a1a1a" if new_theme == "dark" else "#ebebeb")
-                    self.theme_btn.configure(
-                        text="🌙 Dark Mode" if new_theme == "dark" else "☀️ Light Mode"
-                    )
+                    self.apply_theme(new_theme)
                 
-                # Apply grid and radius
-                self.grid_cols = new_cols
-                self.grid_rows = new_rows
-                self.corner_radius = new_radius
+                # Apply radius to the existing keys
+                if new_radius != self.corner_radius:
+                    self.corner_radius = new_radius
+                    for btn in self.buttons.values():
+                        btn.configure(corner_radius=new_radius)
                 
-                # Recreate button grid
-                self.create_button_grid()
+                # A new input backend is set up in the background, not on the next press
+                if new_backend != self.injector.name:
+                    self.injector.set_backend(new_backend)
+                    self.injector.prewarm()
+                self.input_focus.set_mode(new_focus)
+                
+                # A smaller budget takes effect right away
+                self.image_memory.budget_bytes = new_memory_mb * 1024 * 1024
+                if self.image_memory.over_budget(self.frame_cache.nbytes):
+                    self.enforce_image_budget()
+                
+                # Resizing moves keys - existing keys keep their cells and renders
+                if new_cols != self.grid_cols or new_rows != self.grid_rows or new_renderer != self.grid_renderer:
+                    self.grid_cols = new_cols
+                    self.grid_rows = new_rows
+                    self.grid_renderer = new_renderer
+                    self.sync_button_grid()
                 
                 # Save settings
                 self.save_config()
+                self.record_history("Settings")
                 
                 self.status_label.configure(
                     text=f"Settings applied: {new_cols}x{new_rows} grid, radius: {new_radius}, theme: {new_theme}"
@@ -356,43 +740,74 @@ class StreamDeckApp:
         def reset_to_defaults():
             # Confirm reset
             if messagebox.askyesno("Reset to Defaults", 
-                                  "Are you sure you want to reset all settings and button configurations to default?\n\nThis will:\n• Reset grid to 4x3\n• Reset corner radius to 15\n• Reset theme to dark\n• Clear all button customizations\n• Delete all icons in the icons folder\n\nThis action cannot be undone!"):
-                # Clear icons folder
+                                  "Are you sure you want to reset all settings and button configurations to default?\n\nThis will:\n• Reset grid to 4x3\n• Reset corner radius to 15\n• Reset theme to dark\n• Clear all button customizations\n• Move all icons to the icons trash\n\nYou can undo this with Ctrl+Z."):
+                # Clear icons folder - icons stay recoverable in the trash
                 try:
                     if os.path.exists(self.icons_folder):
                         for file in os.listdir(self.icons_folder):
                             file_path = os.path.join(self.icons_folder, file)
-                            try:
-                                if os.path.isfile(file_path):
-                                    os.remove(file_path)
-                            except Exception as e:
-                                print(f"Error deleting {file_path}: {e}")
+                            if os.path.isfile(file_path):
+                                self.frame_cache.discard(file_path)
+                                self.icon_trash.discard(file_path)
                 except Exception as e:
                     print(f"Error clearing icons folder: {e}")
                 
                 # Reset to defaults
                 self.grid_cols = 4
                 self.grid_rows = 3
+                self.grid_renderer = "auto"
                 self.corner_radius = 15
                 self.current_theme = "dark"
                 self.button_configs = {}
-                self.button_images = {}
-                self.loaded_image_paths = {}
+                self.layout = DeckLayout(self.grid_rows, self.grid_cols)
+                self.image_memory.budget_bytes = DEFAULT_BUDGET_MB * 1024 * 1024
+                self.injector.set_backend("auto")
+                self.input_focus.set_mode(DEFAULT_FOCUS_MODE)
                 
                 # Apply theme
-                ctk.set_appearance_mode("dark")
-                self.root.configure(bg="#1a1a1a")
-                self.theme_btn.configure(text="🌙 Dark Mode")
+                self.apply_theme("dark")
                 
                 # Recreate button grid
                 self.create_button_grid()
                 
                 # Save config
                 self.save_config()
+                self.record_history("Reset to defaults")
                 
                 self.status_label.configure(text="Settings reset to defaults")
                 dialog.destroy()
         
+        # Profile Section
+        profile_section = ctk.CTkFrame(settings_frame)
+        profile_section.pack(fill="x", padx=10, pady=10)
+        
+        ctk.CTkLabel(
+            profile_section,
+            text="Profile",
+            font=("Arial", 14, "bold")
+        ).pack(pady=(10, 10))
+        
+        profile_btns = ctk.CTkFrame(profile_section, fg_color="transparent")
+        profile_btns.pack(pady=(0, 10))
+        ctk.CTkButton(
+            profile_btns,
+            text="Export Profile...",
+            command=lambda: self.export_profile(dialog),
+            width=140,
+            text_color="#000000",
+            fg_color="#1976D2",
+            hover_color="#1565C0"
+        ).pack(side=tk.LEFT, padx=10)
+        ctk.CTkButton(
+            profile_btns,
+            text="Import Profile...",
+            command=lambda: self.import_profile(dialog),
+            width=140,
+            text_color="#000000",
+            fg_color="#1976D2",
+            hover_color="#1565C0"
+        ).pack(side=tk.LEFT, padx=10)
+        
         # Buttons
         btn_frame = ctk.CTkFrame(settings_frame, fg_color="transparent")
         btn_frame.pack(pady=20)
@@ -427,6 +842,83 @@ class StreamDeckApp:
             hover_color="#da190b"
         ).pack(side=tk.LEFT, padx=10)
     
+    def export_profile(self, dialog):
+        """Save the whole profile with its icons as one archive, in the background"""
+        path = filedialog.asksaveasfilename(
+            parent=dialog,
+            title="Export Profile",
+            defaultextension=profile_archive.ARCHIVE_EXTENSION,
+            filetypes=[("Mango Stream Deck profile", "*" + profile_archive.ARCHIVE_EXTENSION)]
+        )
+        if not path:
+            return
+        # The worker gets its own copy - keys may be edited while it runs
+        snapshot = json.loads(json.dumps(self.config_data()))
+        job = profile_archive.run_in_background(profile_archive.export_profile, snapshot, path)
+        self.poll_profile_job(job, "Exporting profile", self.finish_profile_export)
+    
+    def import_profile(self, dialog):
+        """Replace the current profile with an archive, in the background"""
+        path = filedialog.askopenfilename(
+            parent=dialog,
+            title="Import Profile",
+            filetypes=[
+                ("Mango Stream Deck profile", "*" + profile_archive.ARCHIVE_EXTENSION),
+                ("All files", "*.*")
+            ]
+        )
+        if not path:
+            return
+        if not messagebox.askyesno("Import Profile", "Replace all keys and settings with the imported profile?", parent=dialog):
+            return
+        dialog.destroy()
+        
+        # Fold pending layout moves into the config before it is replaced
+        self.save_config()
+        # Anything edited from here on would be overwritten by the import
+        for editor in (self.customize_dialog, self.batch_editor):
+            if editor is not None:
+                editor.hide()
+        job = profile_archive.run_in_background(
+            profile_archive.import_profile, path, self.config_file, self.icons_folder
+        )
+        self.import_job = job
+        self.poll_profile_job(job, "Importing profile", self.finish_profile_import)
+    
+    def poll_profile_job(self, job, title, finish):
+        """Show a background profile job's progress until it is done"""
+        if not job.done.is_set():
+            self.status_label.configure(text=f"{title}: {job.stage}... {int(job.progress * 100)}%")
+            self.root.after(100, lambda: self.poll_profile_job(job, title, finish))
+            return
+        if job is self.import_job:
+            self.import_job = None
+        if job.error is not None:
+            messagebox.showerror("Profile Error", f"{title} failed: {job.error}")
+            self.status_label.configure(text=f"{title} failed")
+            return
+        finish(job.result)
+    
+    def editing_paused(self):
+        """True, with a note in the status bar, while an import is about to replace the keys"""
+        if self.import_job is None:
+            return False
+        self.status_label.configure(text="Importing profile - editing is paused until it is done")
+        return True
+    
+    def finish_profile_export(self, icon_count):
+        self.status_label.configure(text=f"Profile exported with {icon_count} icon(s)")
+    
+    def finish_profile_import(self, profile):
+        """Load the imported config that is now on disk"""
+        self.layout_journal.clear()
+        self.button_configs = {}
+        self.layout = DeckLayout(self.grid_rows, self.grid_cols)
+        self.load_config()
+        self.create_button_grid()
+        self.record_history("Import profile")
+        self.status_label.configure(text=f"Imported profile with {len(profile['buttons'])} configured key(s)")
+    
     def apply_grid(self):
         """Deprecated - now using settings dialog"""
         self.open_settings()
@@ -434,18 +926,24 @@ class StreamDeckApp:
     def toggle_theme(self):
         """Toggle between dark and light mode"""
         if self.current_theme == "dark":
-            ctk.set_appearance_mode("light")
-            self.current_theme = "light"
-            self.root.configure(bg="#ebebeb")  # Light background
-            self.theme_btn.configure(text="☀️ Light Mode")
+            self.apply_theme("light")
             self.status_label.configure(text="Switched to Light Mode")
         else:
-            ctk.set_appearance_mode("dark")
-            self.current_theme = "dark"
-            self.root.configure(bg="#1a1a1a")  # Dark background
-            self.theme_btn.configure(text="🌙 Dark Mode")
+            self.apply_theme("dark")
             self.status_label.configure(text="Switched to Dark Mode")
     
+    def apply_theme(self, theme):
+        """Switch theme on the existing widgets without rebuilding or re-rendering keys"""
+        palette = THEME_PALETTES[theme]
+        self.current_theme = theme
+        # Keys hold (light, dark) color pairs, CustomTkinter swaps them in one pass
+        ctk.set_appearance_mode(theme)
+        self.root.configure(bg=palette["window_bg"])
+        if hasattr(self, "theme_btn"):
+            self.theme_btn.configure(text=palette["label"])
+        if self.canvas_deck is not None:
+            self.canvas_deck.redraw()
+    
     def show_instructions(self):
         """Show instructions and help dialog"""
         dialog = tk.Toplevel(self.root)
@@ -455,33 +953,19 @@ class StreamDeckApp:
         dialog.grab_set()
         
         # Set dialog icon
-        try:
-            if os.path.exists("icon.ico"):
-                dialog.iconbitmap("icon.ico")
-        except:
-            pass
+        assets.set_window_icon(dialog)
         
         # Configure dialog theme
-        if self.current_theme == "dark":
-            dialog.configure(bg="#2b2b2b")
-        else:
-            dialog.configure(bg="#ebebeb")
+        dialog.configure(bg=THEME_PALETTES[self.current_theme]["dialog_bg"])
         
         # Scrollable content
         scrollable_frame = ctk.CTkScrollableFrame(dialog, width=660, height=750)
         scrollable_frame.pack(fill="both", expand=True, padx=15, pady=15)
         
-        # Logo at top
-        try:
-            if os.path.exists("logos/mango_256_transparent.png"):
-                logo_img = Image.open("logos/mango_256_transparent.png")
-                logo_img = logo_img.resize((80, 80), Image.Resampling.LANCZOS)
-                logo_photo = ctk.CTkImage(light_image=logo_img, dark_image=logo_img, size=(80, 80))
-                logo_label = ctk.CTkLabel(scrollable_frame, image=logo_photo, text="")
-                logo_label.image = logo_photo
-                logo_label.pack(pady=(10, 5))
-        except:
-            pass
+        # Logo at top - decoded and resized once per process
+        logo_photo = assets.logo(80)
+        if logo_photo is not None:
+            ctk.CTkLabel(scrollable_frame, image=logo_photo, text="").pack(pady=(10, 5))
         
         # Title
         ctk.CTkLabel(
@@ -498,7 +982,10 @@ class StreamDeckApp:
                     "• This is a customizable button grid controller",
                     "• Each button can perform different actions",
                     "• Right-click any button to customize it",
-                    "• Left-click to execute the button's action"
+                    "• Left-click to execute the button's action",
+                    "• Drag a button onto another to move or swap them",
+                    "• Ctrl/Shift-click or drag a box to select several, then right-click one to edit them all",
+                    "• Ctrl+K searches all keys by title or action and fires the one you pick"
                 ]
             },
             {
@@ -538,6 +1025,18 @@ class StreamDeckApp:
                     "  → Execute multiple actions in sequence"
                 ]
             },
+            {
+                "title": "📈 Live Data",
+                "content": [
+                    "Keys can show a value that refreshes on its own:",
+                    "• Clock - current time (strftime format, e.g. %H:%M)",
+                    "• CPU / Memory - system usage in percent",
+                    "• Counter - counts presses of the key",
+                    "• Command - first line of a command's output",
+                    "• File - first line of a text file",
+                    "Set 'Every (s)' to change how often it refreshes"
+                ]
+            },
             {
                 "title": "🎨 Customization Options",
                 "content": [
@@ -546,6 +1045,7 @@ class StreamDeckApp:
                     "Button Color: Choose from presets or custom hex",
                     "Color Opacity: 0-100% transparency",
                     "Icon: Any image file (auto-cropped to fit)",
+                    "Animated GIF/APNG/WebP icons play on the key",
                     "Icon Opacity: 0-100% transparency"
                 ]
             },
@@ -553,7 +1053,7 @@ class StreamDeckApp:
                 "title": "⚙️ Settings",
                 "content": [
                     "Click the '⚙️ Settings' button to:",
-                    "• Change grid size (1-8 rows/columns)",
+                    "• Change grid size (1-32 rows/columns)",
                     "• Adjust button corner radius (0-50)",
                     "• Switch between dark/light themes",
                     "",
@@ -597,7 +1097,7 @@ class StreamDeckApp:
         
         for section in sections:
             # Section frame
-            section_frame = ctk.CTkFrame(scrollable_frame, fg_color="#2b2b2b" if self.current_theme == "dark" else "#d0d0d0")
+            section_frame = ctk.CTkFrame(scrollable_frame, fg_color=THEME_PALETTES[self.current_theme]["section_bg"])
             section_frame.pack(fill="x", pady=(0, 15), padx=10)
             
             # Section title
@@ -640,981 +1140,279 @@ class StreamDeckApp:
             # Delay to ensure button has finished resizing
             self.root.after(100, lambda: self.set_button_image(button_number, config["image_path"]))
         
+    def action_plan(self, button_number):
+        """Compiled action of a key - built on first use and after each edit"""
+        plan = self.action_plans.get(button_number)
+        if plan is None:
+            plan = compile_action(self.button_configs.get(button_number, {}))
+            self.action_plans[button_number] = plan
+        return plan
+    
     def button_clicked(self, button_number):
         """Handle button click events"""
+        start = time.perf_counter()
         config = self.button_configs.get(button_number, {})
         button_name = config.get("text", f"Button {button_number}")
-        action_type = config.get("action_type", "Open")
+        plan = self.action_plan(button_number)
+        action_type = plan[0]
+        
+        # Counter tiles count their own presses
+        if config.get("live_source") == "Counter":
+            config["live_counter"] = config.get("live_counter", 0) + 1
+            self.live_scheduler.bump(button_number)
+        
+        # Keys scheduled to run after this one start their delay
+        self.action_scheduler.key_fired(button_number)
         
         try:
-            if action_type == "Open":
-                # Launch application
-                app_path = config.get("app_path")
-                if app_path and os.path.exists(app_path):
-                    subprocess.Popen([app_path], shell=True)
-                    self.status_label.configure(text=f"Launched: {button_name}")
-                    print(f"Launched application: {app_path}")
-                else:
-                    self.status_label.configure(text=f"{button_name} clicked!")
-                    
-            elif action_type == "Website":
-                # Open URL in browser
-                url = config.get("url", "")
-                if url and url != "https://":
-                    import webbrowser
-                    webbrowser.open(url)
-                    self.status_label.configure(text=f"Opened: {url}")
-                    print(f"Opened URL: {url}")
-                else:
-                    self.status_label.configure(text="No URL configured")
-                    
-            elif action_type == "Hotkey":
-                # Send hotkey combination
-                hotkey = config.get("hotkey", "")
-                if hotkey:
-                    try:
-                        import pyautogui
-                        # Parse hotkey (simple implementation)
-                        keys = [k.strip().lower() for k in hotkey.split("+")]
-                        if len(keys) > 1:
-                            # Press modifier keys
-                            modifiers = keys[:-1]
-                            main_key = keys[-1]
-                            pyautogui.hotkey(*keys)
-                        else:
-                            pyautogui.press(hotkey)
-                        self.status_label.configure(text=f"Pressed: {hotkey}")
-                        print(f"Pressed hotkey: {hotkey}")
-                    except ImportError:
-                        messagebox.showwarning("Module Required", "PyAutoGUI module required for hotkey functionality.\nInstall with: pip install pyautogui")
-                        self.status_label.configure(text="PyAutoGUI not installed")
-                    except Exception as e:
-                        self.status_label.configure(text=f"Hotkey error: {e}")
-                else:
-                    self.status_label.configure(text="No hotkey configured")
-                    
-            elif action_type == "Text":
-                # Type text
-                text = config.get("type_text", "")
-                if text:
-                    try:
-                        import pyautogui
-                        import time
-                        time.sleep(0.1)  # Small delay
-                        pyautogui.write(text, interval=0.05)
-                        self.status_label.configure(text=f"Typed: {text[:30]}...")
-                        print(f"Typed text: {text}")
-                    except ImportError:
-                        messagebox.showwarning("Module Required", "PyAutoGUI module required for text typing.\nInstall with: pip install pyautogui")
-                        self.status_label.configure(text="PyAutoGUI not installed")
-                    except Exception as e:
-                        self.status_label.configure(text=f"Type error: {e}")
-                else:
-                    self.status_label.configure(text="No text configured")
-                    
-            elif action_type == "Multi Action":
-                self.status_label.configure(text="Multi Action - Coming soon!")
-                
+            action = registry.get(action_type)
+            if action is not None:
+                action.execute(self, button_number, plan)
+            else:
+                self.status_label.configure(text=f"Action not available: {action_type}")
         except Exception as e:
             messagebox.showerror("Action Error", f"Could not execute action: {e}")
             self.status_label.configure(text=f"Error: {e}")
         
         print(f"Button {button_number} ({button_name}) - Action: {action_type}")
+        metrics.record("action", time.perf_counter() - start)
     
-    def customize_button(self, button_number):
-        """Open customization dialog for a button - Stream Deck style"""
-        dialog = tk.Toplevel(self.root)
-        dialog.title(f"Configure Key {button_number}")
-        dialog.geometry("600x700")
-        dialog.transient(self.root)
-        dialog.grab_set()
-        dialog.resizable(False, False)
-        
-        # Set dialog icon
+    def call_soon(self, callback, *args):
+        """Run callback on the Tk loop - for worker threads"""
         try:
-            if os.path.exists("icon.ico"):
-                dialog.iconbitmap("icon.ico")
-        except:
-            pass
-        
-        # Configure dark theme for dialog
-        if self.current_theme == "dark":
-            dialog.configure(bg="#2b2b2b")
+            self.root.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            pass  # Window already destroyed while quitting
+    
+    def set_status(self, text):
+        """Status bar text - from any thread"""
+        if threading.current_thread() is self.tk_thread:
+            self.status_label.configure(text=text)
         else:
-            dialog.configure(bg="#f0f0f0")
-        
-        # Get current config - make a copy to work with
-        config = self.button_configs.get(button_number, {
-            "text": f"Button {button_number}",
-            "image_path": None,
-            "app_path": None,
-            "color": "#2196F3",  # Default blue color
-            "text_size": 12,  # Default text size
-            "text_color": "white",  # Default text color
-            "color_opacity": 100,  # Default color opacity (0-100)
-            "image_opacity": 100  # Default image opacity (0-100)
-        }).copy()
-        
-        # Ensure all keys exist
-        if "color" not in config:
-            config["color"] = "#2196F3"
-        if "text_size" not in config:
-            config["text_size"] = 12
-        if "text_color" not in config:
-            config["text_color"] = "white"
-        if "color_opacity" not in config:
-            config["color_opacity"] = 100
-        if "image_opacity" not in config:
-            config["image_opacity"] = 100
-        
-        # If button doesn't exist in configs, add default
-        if button_number not in self.button_configs:
-            self.button_configs[button_number] = config.copy()
-        
-        # Create scrollable frame
-        scrollable_frame = ctk.CTkScrollableFrame(dialog, width=560, height=650)
-        scrollable_frame.pack(fill="both", expand=True, padx=15, pady=15)
-        
-        # Main container inside scrollable frame
-        main_container = ctk.CTkFrame(scrollable_frame, fg_color="transparent")
-        main_container.pack(fill="both", expand=True)
-        
-        # Header with logo
-        header_frame = ctk.CTkFrame(main_container, fg_color="transparent")
-        header_frame.pack(fill="x", pady=(0, 15))
-        
-        # Logo at top of customize dialog
+            self.call_soon(lambda: self.status_label.configure(text=text))
+    
+    def warn(self, title, message):
+        """Warning box - from any thread"""
+        if threading.current_thread() is self.tk_thread:
+            messagebox.showwarning(title, message)
+        else:
+            self.call_soon(messagebox.showwarning, title, message)
+    
+    def load_global_hotkeys(self):
+        """Listen for the keys' global hotkeys, with their plans compiled for the listener thread"""
+        self.global_hotkeys.load(self.button_configs)
+        for key_id in self.global_hotkeys.table.values():
+            self.action_plan(key_id)
+    
+    def trigger_global(self, key_id, chord, received):
+        """Global hotkey thread - run the key right here when its action allows, else on the Tk loop"""
+        config = self.button_configs.get(key_id)
+        plan = self.action_plans.get(key_id)
+        action = registry.types.get(plan[0]) if plan is not None else None
+        if action is not None and action.sends_input:
+            # Keys sent while Ctrl+Alt of the chord are still down would arrive combined with them
+            metrics.record("global_hotkey_release", self.global_hotkeys.wait_released(chord))
+        if config is None or action is None or not action.threaded or config.get("live_source") == "Counter":
+            self.call_soon(self.run_global, key_id, received)
+            return
+        self.action_scheduler.key_fired(key_id)
         try:
-            if os.path.exists("logos/mango_256_transparent.png"):
-                logo_img = Image.open("logos/mango_256_transparent.png")
-                logo_img = logo_img.resize((50, 50), Image.Resampling.LANCZOS)
-                logo_photo = ctk.CTkImage(light_image=logo_img, dark_image=logo_img, size=(50, 50))
-                logo_label = ctk.CTkLabel(header_frame, image=logo_photo, text="")
-                logo_label.image = logo_photo
-                logo_label.pack(pady=(0, 5))
-        except:
-            pass
-        
-        ctk.CTkLabel(
-            header_frame,
-            text=f"Key {button_number}",
-            font=("Arial", 20, "bold")
-        ).pack(anchor="w")
-        
-        # Preview Section
-        preview_frame = ctk.CTkFrame(main_container)
-        preview_frame.pack(fill="x", pady=(0, 15))
-        
-        ctk.CTkLabel(
-            preview_frame,
-            text="PREVIEW",
-            font=("Arial", 11, "bold"),
-            text_color="gray"
-        ).pack(anchor="w", padx=15, pady=(10, 5))
-        
-        # Button preview
-        preview_btn_frame = ctk.CTkFrame(preview_frame, fg_color="transparent")
-        preview_btn_frame.pack(pady=(0, 15), padx=15)
-        
-        preview_btn = ctk.CTkButton(
-            preview_btn_frame,
-            text=config["text"],
-            width=120,
-            height=80,
-            corner_radius=self.corner_radius,
-            fg_color=config["color"],
-            text_color=config["text_color"],
-            font=("Arial", config["text_size"], "bold"),
-            state="disabled"
-        )
-        preview_btn.pack()
-        
-        # Title Section
-        title_frame = ctk.CTkFrame(main_container)
-        title_frame.pack(fill="x", pady=(0, 15))
-        
-        ctk.CTkLabel(
-            title_frame,
-            text="TITLE",
-            font=("Arial", 11, "bold"),
-            text_color="gray"
-        ).pack(anchor="w", padx=15, pady=(10, 5))
-        
-        name_var = tk.StringVar(value=config["text"])
-        name_entry = ctk.CTkEntry(
-            title_frame,
-            textvariable=name_var,
-            placeholder_text="Enter button title...",
-            height=35,
-            font=("Arial", 12)
-        )
-        name_entry.pack(fill="x", padx=15, pady=(0, 15))
-        
-        def update_preview(*args):
-            preview_btn.configure(text=name_var.get())
-        
-        name_var.trace('w', update_preview)
-        
-        # Text Appearance Section
-        text_appearance_frame = ctk.CTkFrame(main_container)
-        text_appearance_frame.pack(fill="x", pady=(0, 15))
-        
-        ctk.CTkLabel(
-            text_appearance_frame,
-            text="TEXT APPEARANCE",
-            font=("Arial", 11, "bold"),
-            text_color="gray"
-        ).pack(anchor="w", padx=15, pady=(10, 5))
-        
-        text_app_content = ctk.CTkFrame(text_appearance_frame, fg_color="transparent")
-        text_app_content.pack(fill="x", padx=15, pady=(0, 15))
-        
-        # Text size
-        ctk.CTkLabel(text_app_content, text="Size:", width=50).pack(side="left", padx=(0, 5))
-        text_size_var = tk.StringVar(value=str(config["text_size"]))
-        text_size_entry = ctk.CTkEntry(
-            text_app_content,
-            textvariable=text_size_var,
-            width=50
-        )
-        text_size_entry.pack(side="left", padx=(0, 15))
-        
-        def update_text_size(*args):
-            try:
-                size = int(text_size_var.get())
-                if 6 <= size <= 72:
-                    config["text_size"] = size
-                    preview_btn.configure(font=("Arial", size, "bold"))
-            except:
-                pass
-        
-        text_size_var.trace('w', update_text_size)
-        
-        # Text color
-        ctk.CTkLabel(text_app_content, text="Color:", width=50).pack(side="left", padx=(0, 5))
-        
-        # Text color preview
-        text_color_preview = ctk.CTkButton(
-            text_app_content,
-            text="",
-            width=30,
-            height=25,
-            fg_color=config["text_color"],
-            hover_color=config["text_color"],
-            state="disabled"
-        )
-        text_color_preview.pack(side="left", padx=(0, 5))
-        
-        text_color_var = tk.StringVar(value=config["text_color"])
-        text_color_entry = ctk.CTkEntry(
-            text_app_content,
-            textvariable=text_color_var,
-            width=80
-        )
-        text_color_entry.pack(side="left", padx=(0, 10))
-        
-        def update_text_color(*args):
-            try:
-                color = text_color_var.get()
-                if color.startswith("#") and len(color) == 7:
-                    text_color_preview.configure(fg_color=color, hover_color=color)
-                    preview_btn.configure(text_color=color)
-                    config["text_color"] = color
-                elif color.lower() in ["white", "black", "gray"]:
-                    text_color_preview.configure(fg_color=color, hover_color=color)
-                    preview_btn.configure(text_color=color)
-                    config["text_color"] = color
-            except:
-                pass
-        
-        text_color_var.trace('w', update_text_color)
-        
-        # Preset text colors
-        preset_text_colors = ["white", "black", "#FFEB3B", "#00BCD4", "#FF5722"]
-        for color in preset_text_colors:
-            ctk.CTkButton(
-                text_app_content,
-                text="",
-                width=22,
-                height=22,
-                fg_color=color,
-                hover_color=color,
-                command=lambda c=color: text_color_var.set(c)
-            ).pack(side="left", padx=1)
-        
-        # Color Section
-        color_frame = ctk.CTkFrame(main_container)
-        color_frame.pack(fill="x", pady=(0, 15))
-        
-        ctk.CTkLabel(
-            color_frame,
-            text="COLOR",
-            font=("Arial", 11, "bold"),
-            text_color="gray"
-        ).pack(anchor="w", padx=15, pady=(10, 5))
-        
-        color_content = ctk.CTkFrame(color_frame, fg_color="transparent")
-        color_content.pack(fill="x", padx=15, pady=(0, 15))
-        
-        # Color preview box
-        color_preview = ctk.CTkButton(
-            color_content,
-            text="",
-            width=40,
-            height=30,
-            fg_color=config["color"],
-            hover_color=config["color"],
-            state="disabled"
-        )
-        color_preview.pack(side="left", padx=(0, 10))
-        
-        color_var = tk.StringVar(value=config["color"])
-        color_entry = ctk.CTkEntry(
-            color_content,
-            textvariable=color_var,
-            placeholder_text="#2196F3",
-            width=100
-        )
-        color_entry.pack(side="left", padx=(0, 10))
-        
-        def update_color(*args):
-            try:
-                new_color = color_var.get()
-                if new_color.startswith("#") and len(new_color) == 7:
-                    color_preview.configure(fg_color=new_color, hover_color=new_color)
-                    preview_btn.configure(fg_color=new_color)
-                    config["color"] = new_color
-            except:
-                pass
-        
-        color_var.trace('w', update_color)
-        
-        # Preset colors
-        preset_colors = ["#2196F3", "#4CAF50", "#F44336", "#FF9800", "#9C27B0", "#607D8B"]
-        for color in preset_colors:
-            ctk.CTkButton(
-                color_content,
-                text="",
-                width=25,
-                height=25,
-                fg_color=color,
-                hover_color=color,
-                command=lambda c=color: color_var.set(c)
-            ).pack(side="left", padx=2)
-        
-        # Color opacity
-        opacity_row = ctk.CTkFrame(color_frame, fg_color="transparent")
-        opacity_row.pack(fill="x", padx=15, pady=(5, 15))
-        
-        ctk.CTkLabel(opacity_row, text="Opacity:", width=60).pack(side="left")
-        
-        color_opacity_var = tk.IntVar(value=config["color_opacity"])
-        color_opacity_slider = ctk.CTkSlider(
-            opacity_row,
-            from_=0,
-            to=100,
-            variable=color_opacity_var,
-            width=200,
-            number_of_steps=100
-        )
-        color_opacity_slider.pack(side="left", fill="x", expand=True, padx=(0, 10))
-        
-        color_opacity_label = ctk.CTkLabel(opacity_row, text="100%", width=40)
-        color_opacity_label.pack(side="left")
-        
-        def update_color_opacity(*args):
-            opacity = color_opacity_var.get()
-            color_opacity_label.configure(text=f"{opacity}%")
-            config["color_opacity"] = opacity
-            
-            # Update preview with opacity effect
-            try:
-                base_color = config["color"]
-                opacity_val = opacity / 100.0
-                
-                if opacity_val < 1.0 and base_color.startswith("#"):
-                    # Convert hex to RGB
-                    hex_color = base_color.lstrip('#')
-                    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-                    
-                    # Blend with dialog background
-                    if dialog.cget('bg') == "#2b2b2b":
-                        bg_r, bg_g, bg_b = 43, 43, 43
-                    else:
-                        bg_r, bg_g, bg_b = 240, 240, 240
-                    
-                    # Apply opacity by blending
-                    final_r = int(r * opacity_val + bg_r * (1 - opacity_val))
-                    final_g = int(g * opacity_val + bg_g * (1 - opacity_val))
-                    final_b = int(b * opacity_val + bg_b * (1 - opacity_val))
-                    
-                    # Convert back to hex
-                    blended_color = f"#{final_r:02x}{final_g:02x}{final_b:02x}"
-                    preview_btn.configure(fg_color=blended_color)
+            action.execute(self, key_id, plan)
+        except Exception as e:
+            self.warn("Action Error", f"Could not execute action: {e}")
+            self.set_status(f"Error: {e}")
+        metrics.record("global_hotkey", time.perf_counter() - received)
+        button_name = config.get("text", f"Button {key_id}")
+        print(f"Button {key_id} ({button_name}) - Global hotkey: {plan[0]}")
+    
+    def run_global(self, key_id, received):
+        """A global hotkey whose action needs the Tk thread - same dispatch as a click"""
+        if key_id in self.button_configs:
+            self.button_clicked(key_id)
+            metrics.record("global_hotkey", time.perf_counter() - received)
+    
+    def dispatch_scheduled(self, key_ids):
+        """Scheduler thread - hand the keys that came due to the Tk loop in one batch"""
+        self.call_soon(self.run_scheduled, key_ids)
+    
+    def run_scheduled(self, key_ids):
+        """Run scheduled keys through the same dispatch as a click"""
+        for key_id in key_ids:
+            if key_id in self.button_configs:
+                self.button_clicked(key_id)
+    
+    def key_output(self, key_id, stream, line):
+        """Worker thread - newest output line of a running script or command"""
+        self.call_soon(self.show_key_output, key_id, stream, line)
+    
+    def show_key_output(self, key_id, stream, line):
+        name = self.button_configs.get(key_id, {}).get("text", f"Button {key_id}")
+        prefix = "⚠ " if stream == "stderr" else ""
+        self.status_label.configure(text=f"{prefix}{name}: {line[:80]}")
+    
+    def script_finished(self, key_id, error, seconds):
+        """Script worker thread - a script ended, error is None on success"""
+        name = self.button_configs.get(key_id, {}).get("text", f"Button {key_id}")
+        if error is None:
+            text = f"Script done: {name} ({seconds * 1000:.0f} ms)"
+        else:
+            text = f"Script failed: {name} - {error}"[:120]
+        self.set_status(text)
+    
+    def command_finished(self, key_id, exit_code, seconds, error):
+        """Command runner thread - a command ended; exit_code is None if it could not run"""
+        name = self.button_configs.get(key_id, {}).get("text", f"Button {key_id}")
+        if error is not None:
+            text = f"Command failed: {name} - {error}"[:120]
+        elif exit_code != 0:
+            text = f"Command failed: {name} (exit {exit_code}, {seconds * 1000:.0f} ms)"
+        else:
+            text = f"Command done: {name} ({seconds * 1000:.0f} ms)"
+        self.set_status(text)
+    
+    def macro_finished(self, key_id, events, seconds, error):
+        """Macro player thread - a macro ended, was stopped or failed"""
+        name = self.button_configs.get(key_id, {}).get("text", f"Button {key_id}")
+        if error is None:
+            text = f"Macro done: {name} ({events} events, {seconds:.1f} s)"
+        elif error == "stopped":
+            text = f"Macro stopped: {name} after {events} events"
+        else:
+            text = f"Macro failed: {name} - {error}"[:120]
+        self.set_status(text)
+    
+    def http_finished(self, key_id, status, reason, body, seconds, error):
+        """HTTP worker thread - a request got its response, or failed"""
+        self.call_soon(self.show_http_result, key_id, status, reason, body, seconds, error)
+    
+    def show_http_result(self, key_id, status, reason, body, seconds, error):
+        name = self.button_configs.get(key_id, {}).get("text", f"Button {key_id}")
+        if status is None:
+            self.status_label.configure(text=f"HTTP failed: {name} - {error}"[:120])
+            self.show_key_status(key_id, "ERR")
+            return
+        text = f"{name}: {status} {reason} ({seconds * 1000:.0f} ms)"
+        if body:
+            text += f" - {' '.join(body.split())}"
+        self.status_label.configure(text=text[:120])
+        self.show_key_status(key_id, str(status))
+        print(f"HTTP {status} {reason} for button {key_id}")
+    
+    def show_key_status(self, key_id, text):
+        """Draw a short result on a key for a few seconds"""
+        config = self.button_configs.get(key_id)
+        if config is None or not self.layout.is_visible(key_id):
+            return
+        handle = self.key_status_timers.pop(key_id, None)
+        if handle is not None:
+            self.root.after_cancel(handle)
+        image_path = config.get("image_path")
+        if not (image_path and os.path.exists(image_path)):
+            image_path = None
+        self.set_button_image(key_id, image_path, overlay_text=text)
+        self.key_status_timers[key_id] = self.root.after(KEY_STATUS_MS, self.clear_key_status, key_id)
+    
+    def clear_key_status(self, key_id):
+        self.key_status_timers.pop(key_id, None)
+        config = self.button_configs.get(key_id)
+        btn = self.buttons.get(key_id)
+        if config is None or btn is None:
+            return
+        tile = self.live_scheduler.tiles.get(key_id)
+        image_path = config.get("image_path")
+        if tile is not None:
+            # The live value comes back on the next frame
+            tile.value = None
+            self.live_scheduler.bump(key_id)
+        elif image_path and os.path.exists(image_path):
+            self.set_button_image(key_id, image_path)
+        else:
+            btn.configure(image=None)
+            self.drop_key_render(key_id)
+    
+    def command_fields(self, entry_id):
+        """Searchable text of a palette entry - a key's title and its action's target, or a command label"""
+        if entry_id in PALETTE_COMMANDS:
+            return {TITLE_FIELD: PALETTE_COMMANDS[entry_id][0]}
+        config = self.button_configs.get(entry_id)
+        if config is None:
+            return None
+        fields = {TITLE_FIELD: config.get(TITLE_FIELD)}
+        target = action_target(config.get("action_type", "Open"))
+        if target is not None:
+            fields[target[0]] = config.get(target[0])
+        return fields
+    
+    def toggle_perf_overlay(self):
+        """Ctrl+Shift+P: show or hide live performance numbers over the deck"""
+        if self.perf_overlay is None:
+            self.perf_overlay = PerfOverlay(self)
+        self.perf_overlay.toggle()
+    
+    def open_command_palette(self):
+        """Ctrl+K: find a key by title or action and fire it"""
+        if self.command_palette is None:
+            self.command_palette = CommandPalette(self)
+        self.command_palette.open()
+    
+    def customize_button(self, button_number):
+        """Open customization dialog for a button - Stream Deck style"""
+        if self.editing_paused():
+            return
+        # Right-clicking one of several selected keys edits them all
+        if button_number in self.selection and len(self.selection) > 1:
+            if self.batch_editor is None:
+                self.batch_editor = BatchEditor(self)
+            self.batch_editor.open(self.selection)
+            return
+        
+        # Built once on first use, then hidden and rebound to each key
+        if self.customize_dialog is None:
+            with metrics.timed("customize_build"):
+                self.customize_dialog = CustomizeDialog(self)
+        self.customize_dialog.open(button_number)
+    
+    def apply_batch(self, key_ids, changes):
+        """Apply the same config fields to many keys: one render pass, one config write"""
+        if self.editing_paused():
+            return
+        replaced_icons = set()
+        for key_id in key_ids:
+            config = self.button_configs.setdefault(key_id, dict(DEFAULT_KEY_CONFIG, text=f"Button {key_id}"))
+            if "image_path" in changes and config.get("image_path") != changes["image_path"]:
+                replaced_icons.add(config.get("image_path"))
+            config.update(changes)
+        
+        # Tk repaints once when the loop returns to idle
+        with metrics.timed("batch_render"):
+            for key_id in key_ids:
+                if self.layout.is_visible(key_id):
+                    self.update_button_display(key_id)
                 else:
-                    preview_btn.configure(fg_color=base_color)
-            except:
-                pass
-        
-        color_opacity_var.trace('w', update_color_opacity)
-        
-        # Icon Section
-        icon_frame = ctk.CTkFrame(main_container)
-        icon_frame.pack(fill="x", pady=(0, 15))
-        
-        ctk.CTkLabel(
-            icon_frame,
-            text="ICON",
-            font=("Arial", 11, "bold"),
-            text_color="gray"
-        ).pack(anchor="w", padx=15, pady=(10, 5))
-        
-        # Icon display and buttons
-        icon_content = ctk.CTkFrame(icon_frame, fg_color="transparent")
-        icon_content.pack(fill="x", padx=15, pady=(0, 15))
-        
-        # Icon preview box (same size as color preview)
-        icon_preview = ctk.CTkLabel(
-            icon_content,
-            text="",
-            width=40,
-            height=30,
-            fg_color="gray30",
-            corner_radius=5
-        )
-        icon_preview.pack(side="left", padx=(0, 10))
-        
-        icon_info = ctk.CTkLabel(
-            icon_content,
-            text=config["image_path"].split("/")[-1] if config["image_path"] else "No icon selected",
-            font=("Arial", 10),
-            wraplength=250,
-            anchor="w"
-        )
-        icon_info.pack(side="left", fill="x", expand=True)
-        
-        icon_btn_frame = ctk.CTkFrame(icon_content, fg_color="transparent")
-        icon_btn_frame.pack(side="right")
-        
-        def select_image():
-            filename = filedialog.askopenfilename(
-                title="Select Icon",
-                filetypes=[
-                    ("Image files", "*.png *.jpg *.jpeg *.gif *.bmp"),
-                    ("All files", "*.*")
-                ]
-            )
-            if filename:
-                # Copy image to icons folder
-                try:
-                    # Get original filename
-                    original_name = os.path.basename(filename)
-                    # Create unique filename to avoid conflicts
-                    base_name, ext = os.path.splitext(original_name)
-                    counter = 1
-                    new_filename = original_name
-                    dest_path = os.path.join(self.icons_folder, new_filename)
-                    
-                    # Check if file already exists and create unique name if needed
-                    while os.path.exists(dest_path) and os.path.abspath(filename) != os.path.abspath(dest_path):
-                        new_filename = f"{base_name}_{counter}{ext}"
-                        dest_path = os.path.join(self.icons_folder, new_filename)
-                        counter += 1
-                    
-                    # Copy file if it's not already in the icons folder
-                    if os.path.abspath(filename) != os.path.abspath(dest_path):
-                        shutil.copy2(filename, dest_path)
-                    
-                    # Update config with new path (old icon deletion happens on Save)
-                    config["image_path"] = dest_path
-                    icon_info.configure(text=new_filename)
-                    
-                    # Update icon preview box
-                    img = Image.open(dest_path)
-                    img.thumbnail((36, 26), Image.Resampling.LANCZOS)
-                    icon_thumb = ctk.CTkImage(light_image=img, dark_image=img, size=(36, 26))
-                    icon_preview.configure(image=icon_thumb, text="")
-                    
-                    # Update main preview with icon
-                    img = Image.open(dest_path)
-                    img = img.resize((100, 66), Image.Resampling.LANCZOS)
-                    preview_img = ctk.CTkImage(light_image=img, dark_image=img, size=(100, 66))
-                    preview_btn.configure(image=preview_img, fg_color="transparent")
-                    
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to copy icon: {e}")
-                    return
-        
-        def remove_image():
-            # Just clear the config, don't delete the file yet (deletion happens on Save)
-            config["image_path"] = None
-            icon_info.configure(text="No icon selected")
-            icon_preview.configure(image=None, text="", fg_color="gray30")
-            preview_btn.configure(image=None, fg_color=config["color"])
-        
-        ctk.CTkButton(
-            icon_btn_frame,
-            text="Browse...",
-            command=select_image,
-            width=80,
-            height=28,
-            fg_color="#555555",
-            hover_color="#666666"
-        ).pack(side="left", padx=2)
-        
-        ctk.CTkButton(
-            icon_btn_frame,
-            text="Clear",
-            command=remove_image,
-            width=60,
-            height=28,
-            fg_color="#555555",
-            hover_color="#666666"
-        ).pack(side="left", padx=2)
-        
-        # Image opacity
-        image_opacity_row = ctk.CTkFrame(icon_frame, fg_color="transparent")
-        image_opacity_row.pack(fill="x", padx=15, pady=(5, 15))
-        
-        ctk.CTkLabel(image_opacity_row, text="Opacity:", width=60).pack(side="left")
-        
-        image_opacity_var = tk.IntVar(value=config["image_opacity"])
-        image_opacity_slider = ctk.CTkSlider(
-            image_opacity_row,
-            from_=0,
-            to=100,
-            variable=image_opacity_var,
-            width=200,
-            number_of_steps=100
-        )
-        image_opacity_slider.pack(side="left", fill="x", expand=True, padx=(0, 10))
-        
-        image_opacity_label = ctk.CTkLabel(image_opacity_row, text="100%", width=40)
-        image_opacity_label.pack(side="left")
-        
-        def update_image_opacity(*args):
-            opacity = image_opacity_var.get()
-            image_opacity_label.configure(text=f"{opacity}%")
-            config["image_opacity"] = opacity
-            # Force reload image in preview if one is selected
-            if config.get("image_path") and os.path.exists(config["image_path"]):
-                try:
-                    img = Image.open(config["image_path"])
-                    img = img.resize((100, 66), Image.Resampling.LANCZOS)
-                    # Apply opacity
-                    if opacity < 100:
-                        if img.mode != 'RGBA':
-                            img = img.convert('RGBA')
-                        alpha = img.split()[3]
-                        alpha = alpha.point(lambda p: int(p * opacity / 100))
-                        img.putalpha(alpha)
-                    preview_img = ctk.CTkImage(light_image=img, dark_image=img, size=(100, 66))
-                    preview_btn.configure(image=preview_img, fg_color="transparent")
-                except:
-                    pass
-        
-        image_opacity_var.trace('w', update_image_opacity)
-        
-        # Load existing icon preview if available
-        if config["image_path"] and os.path.exists(config["image_path"]):
-            try:
-                img = Image.open(config["image_path"])
-                img.thumbnail((36, 26), Image.Resampling.LANCZOS)
-                icon_thumb = ctk.CTkImage(light_image=img, dark_image=img, size=(36, 26))
-                icon_preview.configure(image=icon_thumb, text="")
-            except:
-                pass
-        
-        # Action Section - Elgato Stream Deck Style
-        action_frame = ctk.CTkFrame(main_container)
-        action_frame.pack(fill="x", pady=(0, 15))
-        
-        ctk.CTkLabel(
-            action_frame,
-            text="ACTION",
-            font=("Arial", 11, "bold"),
-            text_color="gray"
-        ).pack(anchor="w", padx=15, pady=(10, 5))
-        
-        # Action type selector
-        action_type_frame = ctk.CTkFrame(action_frame, fg_color="transparent")
-        action_type_frame.pack(fill="x", padx=15, pady=(0, 10))
-        
-        # Get current action type from config
-        action_type = config.get("action_type", "Open")
-        
-        # Action type dropdown
-        action_type_var = tk.StringVar(value=action_type)
-        action_types = ["Open", "Website", "Hotkey", "Text", "Multi Action"]
-        
-        action_dropdown = ctk.CTkOptionMenu(
-            action_type_frame,
-            values=action_types,
-            variable=action_type_var,
-            width=200,
-            height=32,
-            fg_color="#3a3a3a",
-            button_color="#4a4a4a",
-            button_hover_color="#5a5a5a"
-        )
-        action_dropdown.pack(anchor="w")
-        
-        # Container for action-specific settings
-        action_settings_container = ctk.CTkFrame(action_frame, fg_color="transparent")
-        action_settings_container.pack(fill="x", padx=15, pady=(0, 15))
-        
-        # Variables to hold widgets that need updating
-        action_widgets = {}
-        
-        def update_action_settings(*args):
-            # Clear current settings
-            for widget in action_settings_container.winfo_children():
-                widget.destroy()
-            action_widgets.clear()
-            
-            selected_type = action_type_var.get()
-            config["action_type"] = selected_type
-            
-            if selected_type == "Open":
-                # Open Application settings
-                app_label_frame = ctk.CTkFrame(action_settings_container, fg_color="#2b2b2b", corner_radius=8)
-                app_label_frame.pack(fill="x", pady=(0, 10))
-                
-                ctk.CTkLabel(
-                    app_label_frame,
-                    text="Application",
-                    font=("Arial", 10),
-                    text_color="gray"
-                ).pack(anchor="w", padx=10, pady=(8, 2))
-                
-                app_path_display = ctk.CTkLabel(
-                    app_label_frame,
-                    text=config.get("app_path", "").split("\\")[-1] if config.get("app_path") else "No application selected",
-                    font=("Arial", 11),
-                    anchor="w"
-                )
-                app_path_display.pack(anchor="w", padx=10, pady=(0, 8))
-                action_widgets["app_display"] = app_path_display
-                
-                # Browse and clear buttons
-                btn_row = ctk.CTkFrame(action_settings_container, fg_color="transparent")
-                btn_row.pack(fill="x")
-                
-                def select_app():
-                    filename = filedialog.askopenfilename(
-                        title="Select Application",
-                        filetypes=[
-                            ("Executable files", "*.exe"),
-                            ("All files", "*.*")
-                        ]
-                    )
-                    if filename:
-                        config["app_path"] = filename
-                        action_widgets["app_display"].configure(text=filename.split("\\")[-1])
-                
-                def clear_app():
-                    config["app_path"] = None
-                    action_widgets["app_display"].configure(text="No application selected")
-                
-                ctk.CTkButton(
-                    btn_row,
-                    text="Browse...",
-                    command=select_app,
-                    width=100,
-                    height=32,
-                    fg_color="#3a3a3a",
-                    hover_color="#4a4a4a"
-                ).pack(side="left", padx=(0, 5))
-                
-                ctk.CTkButton(
-                    btn_row,
-                    text="Clear",
-                    command=clear_app,
-                    width=80,
-                    height=32,
-                    fg_color="#3a3a3a",
-                    hover_color="#4a4a4a"
-                ).pack(side="left")
-                
-            elif selected_type == "Website":
-                # Website URL settings
-                url_label_frame = ctk.CTkFrame(action_settings_container, fg_color="#2b2b2b", corner_radius=8)
-                url_label_frame.pack(fill="x", pady=(0, 10))
-                
-                ctk.CTkLabel(
-                    url_label_frame,
-                    text="URL",
-                    font=("Arial", 10),
-                    text_color="gray"
-                ).pack(anchor="w", padx=10, pady=(8, 2))
-                
-                url_var = tk.StringVar(value=config.get("url", "https://"))
-                url_entry = ctk.CTkEntry(
-                    url_label_frame,
-                    textvariable=url_var,
-                    placeholder_text="https://example.com",
-                    height=32
-                )
-                url_entry.pack(fill="x", padx=10, pady=(0, 8))
-                
-                def update_url(*args):
-                    config["url"] = url_var.get()
-                
-                url_var.trace('w', update_url)
-                
-            elif selected_type == "Hotkey":
-                # Hotkey settings
-                hotkey_label_frame = ctk.CTkFrame(action_settings_container, fg_color="#2b2b2b", corner_radius=8)
-                hotkey_label_frame.pack(fill="x", pady=(0, 10))
-                
-                ctk.CTkLabel(
-                    hotkey_label_frame,
-                    text="Hotkey Combination",
-                    font=("Arial", 10),
-                    text_color="gray"
-                ).pack(anchor="w", padx=10, pady=(8, 2))
-                
-                # Entry and Record button container
-                hotkey_input_frame = ctk.CTkFrame(hotkey_label_frame, fg_color="transparent")
-                hotkey_input_frame.pack(fill="x", padx=10, pady=(0, 8))
-                
-                hotkey_var = tk.StringVar(value=config.get("hotkey", ""))
-                hotkey_entry = ctk.CTkEntry(
-                    hotkey_input_frame,
-                    textvariable=hotkey_var,
-                    placeholder_text="Press 'Record' to capture keys",
-                    height=32
-                )
-                hotkey_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
-                
-                # Recording state
-                is_recording = {"value": False, "keys": set()}
-                
-                record_btn = ctk.CTkButton(
-                    hotkey_input_frame,
-                    text="🎙️ Record",
-                    width=100,
-                    height=32,
-                    fg_color="#3a3a3a",
-                    hover_color="#4a4a4a"
-                )
-                record_btn.pack(side="left")
-                
-                def on_key_press(event):
-                    if not is_recording["value"]:
-                        return
-                    
-                    # Map key names
-                    key = event.keysym
-                    
-                    # Normalize modifier keys
-                    if key in ["Control_L", "Control_R"]:
-                        key = "Ctrl"
-                    elif key in ["Alt_L", "Alt_R"]:
-                        key = "Alt"
-                    elif key in ["Shift_L", "Shift_R"]:
-                        key = "Shift"
-                    elif key in ["Win_L", "Win_R", "Super_L", "Super_R"]:
-                        key = "Win"
-                    
-                    # Add key to set
-                    is_recording["keys"].add(key)
-                    
-                    # Update display
-                    keys_list = sorted(is_recording["keys"], key=lambda x: (
-                        0 if x == "Ctrl" else 
-                        1 if x == "Alt" else 
-                        2 if x == "Shift" else 
-                        3 if x == "Win" else 4
-                    ))
-                    hotkey_str = "+".join(keys_list)
-                    hotkey_var.set(hotkey_str)
-                
-                def on_key_release(event):
-                    if not is_recording["value"]:
-                        return
-                    
-                    # Stop recording after all keys released
-                    # Small delay to ensure we captured the combo
-                    dialog.after(100, stop_recording)
-                
-                def start_recording():
-                    is_recording["value"] = True
-                    is_recording["keys"].clear()
-                    record_btn.configure(text="⏺️ Recording...", fg_color="#E53935")
-                    hotkey_entry.configure(placeholder_text="Press key combination now...")
-                    hotkey_var.set("")
-                    
-                    # Bind keyboard events to dialog
-                    dialog.bind("<KeyPress>", on_key_press)
-                    dialog.bind("<KeyRelease>", on_key_release)
-                    dialog.focus_set()
-                
-                def stop_recording():
-                    if not is_recording["value"]:
-                        return
-                    is_recording["value"] = False
-                    record_btn.configure(text="🎙️ Record", fg_color="#3a3a3a")
-                    hotkey_entry.configure(placeholder_text="Press 'Record' to capture keys")
-                    
-                    # Unbind events
-                    dialog.unbind("<KeyPress>")
-                    dialog.unbind("<KeyRelease>")
-                    
-                    # Update config
-                    config["hotkey"] = hotkey_var.get()
-                
-                record_btn.configure(command=start_recording)
-                
-                def update_hotkey(*args):
-                    if not is_recording["value"]:
-                        config["hotkey"] = hotkey_var.get()
-                
-                hotkey_var.trace('w', update_hotkey)
-                
-                ctk.CTkLabel(
-                    action_settings_container,
-                    text="💡 Click Record and press your key combination",
-                    font=("Arial", 9),
-                    text_color="gray"
-                ).pack(anchor="w", pady=(0, 5))
-                
-            elif selected_type == "Text":
-                # Text typing settings
-                text_label_frame = ctk.CTkFrame(action_settings_container, fg_color="#2b2b2b", corner_radius=8)
-                text_label_frame.pack(fill="x", pady=(0, 10))
-                
-                ctk.CTkLabel(
-                    text_label_frame,
-                    text="Text to Type",
-                    font=("Arial", 10),
-                    text_color="gray"
-                ).pack(anchor="w", padx=10, pady=(8, 2))
-                
-                text_var = tk.StringVar(value=config.get("type_text", ""))
-                text_entry = ctk.CTkEntry(
-                    text_label_frame,
-                    textvariable=text_var,
-                    placeholder_text="Enter text to type...",
-                    height=32
-                )
-                text_entry.pack(fill="x", padx=10, pady=(0, 8))
-                
-                def update_text(*args):
-                    config["type_text"] = text_var.get()
-                
-                text_var.trace('w', update_text)
-                
-            elif selected_type == "Multi Action":
-                # Multi action placeholder
-                multi_label_frame = ctk.CTkFrame(action_settings_container, fg_color="#2b2b2b", corner_radius=8)
-                multi_label_frame.pack(fill="x", pady=(0, 10))
-                
-                ctk.CTkLabel(
-                    multi_label_frame,
-                    text="⚡ Multi Action",
-                    font=("Arial", 11, "bold")
-                ).pack(anchor="w", padx=10, pady=(8, 2))
-                
-                ctk.CTkLabel(
-                    multi_label_frame,
-                    text="Execute multiple actions in sequence",
-                    font=("Arial", 9),
-                    text_color="gray"
-                ).pack(anchor="w", padx=10, pady=(0, 8))
-                
-                ctk.CTkLabel(
-                    action_settings_container,
-                    text="Coming soon: Add multiple actions to execute",
-                    font=("Arial", 9),
-                    text_color="gray"
-                ).pack(anchor="w", pady=(0, 5))
-        
-        # Initialize with current action type
-        action_type_var.trace('w', update_action_settings)
-        update_action_settings()
-        
-        # Bottom buttons
-        bottom_frame = ctk.CTkFrame(main_container, fg_color="transparent")
-        bottom_frame.pack(fill="x", pady=(10, 0))
-        
-        def save_changes():
-            # Check if image was removed and delete old icon if needed
-            old_config = self.button_configs.get(button_number, {})
-            old_path = old_config.get("image_path")
-            new_path = config.get("image_path")
-            
-            # If icon was removed or changed, delete the old one
-            if old_path and old_path != new_path and os.path.exists(old_path):
-                if os.path.dirname(os.path.abspath(old_path)) == os.path.abspath(self.icons_folder):
-                    # Check if any other button uses this icon
-                    is_used = any(
-                        btn_config.get("image_path") == old_path 
-                        for btn_num, btn_config in self.button_configs.items() 
-                        if btn_num != button_number
-                    )
-                    if not is_used:
-                        try:
-                            os.remove(old_path)
-                        except Exception as e:
-                            print(f"Error deleting old icon: {e}")
-            
-            # Update config with all current values
-            config["text"] = name_var.get()
-            # config already has image_path and app_path updated from their respective functions
-            
-            # Save to button_configs
-            self.button_configs[button_number] = config.copy()
-            
-            # Update button display
-            self.update_button_display(button_number)
-            
-            # Save to file
-            self.save_config()
-            
-            # Show confirmation
-            self.status_label.configure(text=f"Button {button_number} saved!")
-        
-        def save_and_close():
-            save_changes()
-            dialog.destroy()
-        
-        button_container = ctk.CTkFrame(bottom_frame, fg_color="transparent")
-        button_container.pack(side="right")
-        
-        ctk.CTkButton(
-            button_container,
-            text="Cancel",
-            command=dialog.destroy,
-            width=100,
-            height=35,
-            fg_color="#555555",
-            hover_color="#666666"
-        ).pack(side="left", padx=5)
-        
-        ctk.CTkButton(
-            button_container,
-            text="Save",
-            command=save_changes,
-            width=100,
-            height=35,
-            fg_color="#4CAF50",
-            hover_color="#45a049"
-        ).pack(side="left", padx=5)
+                    self.drop_key_render(key_id)
         
-        ctk.CTkButton(
-            button_container,
-            text="OK",
-            command=save_and_close,
-            width=100,
-            height=35,
-            fg_color="#0066FF",
-            hover_color="#0052CC"
-        ).pack(side="left", padx=5)
+        self.delete_unused_icons(replaced_icons)
+        self.save_config()
+        self.record_history(f"Edit {len(key_ids)} keys")
+        self.status_label.configure(text=f"Updated {len(key_ids)} keys")
+    
+    def delete_unused_icons(self, paths):
+        """Move stored icons that no key refers to anymore to the icons trash"""
+        in_use = {config.get("image_path") for config in self.button_configs.values()}
+        icons_dir = os.path.abspath(self.icons_folder)
+        for path in paths:
+            if not path or path in in_use or not os.path.exists(path):
+                continue
+            if os.path.dirname(os.path.abspath(path)) != icons_dir:
+                continue  # Never delete files outside the icons folder
+            self.frame_cache.discard(path)
+            self.icon_trash.discard(path)
     
     def update_button_display(self, button_number):
         """Update button appearance with new config"""
-        btn = self.buttons[button_number - 1]
+        btn = self.buttons.get(button_number)
+        if btn is None:
+            return  # Not created yet - rendered when the key is first shown
         config = self.button_configs[button_number]
         
         # Update text
@@ -1627,33 +1425,9 @@ class StreamDeckApp:
             text_color = config["text_color"]
             btn.configure(text_color=text_color)
         
-        # Update color with opacity
+        # Update color with opacity - a (light, dark) pair so theme switches need no recompute
         if "color" in config:
-            base_color = config["color"]
-            opacity = config.get("color_opacity", 100) / 100.0
-            
-            # Convert hex color to RGB with opacity
-            if opacity < 1.0 and base_color.startswith("#"):
-                try:
-                    # Convert hex to RGB
-                    hex_color = base_color.lstrip('#')
-                    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-                    
-                    # Blend with background (assuming dark background #2b2b2b)
-                    bg_r, bg_g, bg_b = 43, 43, 43 if self.current_theme == "dark" else 235, 235, 235
-                    
-                    # Apply opacity by blending
-                    final_r = int(r * opacity + bg_r * (1 - opacity))
-                    final_g = int(g * opacity + bg_g * (1 - opacity))
-                    final_b = int(b * opacity + bg_b * (1 - opacity))
-                    
-                    # Convert back to hex
-                    blended_color = f"#{final_r:02x}{final_g:02x}{final_b:02x}"
-                    btn.configure(fg_color=blended_color)
-                except:
-                    btn.configure(fg_color=base_color)
-            else:
-                btn.configure(fg_color=base_color)
+            btn.configure(fg_color=key_palette(config["color"], config.get("color_opacity", 100)))
         
         # Update image
         if config["image_path"] and os.path.exists(config["image_path"]):
@@ -1666,114 +1440,382 @@ class StreamDeckApp:
                 height=100
             )
             if "color" in config:
-                btn.configure(fg_color=config["color"], hover_color=config["color"])
+                btn.configure(
+                    fg_color=key_palette(config["color"], config.get("color_opacity", 100)),
+                    hover_color=config["color"]
+                )
             else:
                 btn.configure(fg_color="#2196F3", hover_color="#1976D2")
-            if button_number in self.button_images:
-                del self.button_images[button_number]
-            if button_number in self.loaded_image_paths:
-                del self.loaded_image_paths[button_number]
+            self.drop_key_render(button_number)
+        
+        # Refresh live value registration
+        self.live_scheduler.set_tile(button_number, config)
         
         self.status_label.configure(text=f"Button {button_number} updated!")
     
-    def set_button_image(self, button_number, image_path):
-        """Set background image for a button"""
+    def set_button_image(self, button_number, image_path, overlay_text=None):
+        """Set background image for a button, optionally with a live value drawn on top"""
         try:
             # Check if button still exists
-            if button_number > len(self.buttons):
+            btn = self.buttons.get(button_number)
+            if btn is None:
                 return
+            if not self.key_in_view(button_number):
+                return  # Rendered when scrolled into view
             
-            btn = self.buttons[button_number - 1]
             config = self.button_configs[button_number]
             
             # Check if this image is already loaded with same opacity
             current_opacity = config.get("image_opacity", 100)
-            cache_key = f"{image_path}_{current_opacity}"
+            base_key = f"{image_path}_{current_opacity}"
+            cache_key = base_key if overlay_text is None else f"{base_key}_{overlay_text}"
             if button_number in self.loaded_image_paths:
                 if self.loaded_image_paths[button_number] == cache_key:
+                    metrics.count("icon_cache_hit")
                     return  # Already loaded with same opacity, skip to prevent flickering
             
             # Force consistent button size
-            btn_width = 150
-            btn_height = 100
-            
-            # Open and resize image to fit button exactly
-            img = Image.open(image_path)
+            btn_width = KEY_WIDTH
+            btn_height = KEY_HEIGHT
             
-            # Calculate aspect ratio and resize to fill button completely
-            img_ratio = img.width / img.height
-            btn_ratio = btn_width / btn_height
+            # Faces prepared by the last run need no decode (and are never animated)
+            warm_face = None
+            if self.warm_start is not None and overlay_text is None and image_path:
+                warm_face = self.warm_start.face(button_number, base_key, image_path)
             
-            if img_ratio > btn_ratio:
-                # Image is wider, fit to height and crop width
-                new_height = btn_height
-                new_width = int(new_height * img_ratio)
+            if warm_face is None and overlay_text is None and image_path and is_animated(image_path):
+                # Animated icon - frames come pre-composited from the shared cache
+                face = self.frame_cache.get(image_path, current_opacity)
+                ctk_img = self.animation_clock.add(button_number, face)
+                self.image_memory.release("key_faces", button_number)
             else:
-                # Image is taller, fit to width and crop height
-                new_width = btn_width
-                new_height = int(new_width / img_ratio)
-            
-            # Resize image
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Crop to exact button size (center crop)
-            left = (new_width - btn_width) // 2
-            top = (new_height - btn_height) // 2
-            right = left + btn_width
-            bottom = top + btn_height
-            img = img.crop((left, top, right, bottom))
-            
-            # Apply opacity to image
-            opacity = config.get("image_opacity", 100) / 100.0
-            if opacity < 1.0:
-                # Convert to RGBA if needed and apply transparency
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
-                alpha = img.split()[3]
-                alpha = alpha.point(lambda p: int(p * opacity))
-                img.putalpha(alpha)
+                self.animation_clock.remove(button_number)
+                
+                # Reuse the cropped face when only the live value changed,
+                # or another key already shows the same icon at the same opacity
+                cached_face = self.button_faces.get(button_number)
+                if not (cached_face and cached_face[0] == base_key):
+                    cached_face = next((face for face in self.button_faces.values() if face[0] == base_key), None)
+                    if cached_face:
+                        self.button_faces[button_number] = cached_face
+                if cached_face and cached_face[0] == base_key:
+                    img = cached_face[1]
+                    metrics.count("icon_cache_hit")
+                elif warm_face is not None:
+                    img = warm_face
+                    metrics.count("icon_cache_hit")
+                    self.button_faces[button_number] = (base_key, img)
+                    self.image_memory.track("base_faces", button_number, image_nbytes(img, display_copy=False))
+                elif image_path:
+                    metrics.count("icon_cache_miss")
+                    with metrics.timed("key_render"):
+                        # Open and resize image to fill the button exactly (center crop)
+                        img = cover_crop(Image.open(image_path), btn_width, btn_height)
+                        
+                        # Apply opacity to image
+                        img = apply_opacity(img, current_opacity)
+                    self.button_faces[button_number] = (base_key, img)
+                    self.image_memory.track("base_faces", button_number, image_nbytes(img, display_copy=False))
+                else:
+                    img = None
+                
+                if overlay_text is not None:
+                    img = draw_overlay_text(
+                        img,
+                        overlay_text,
+                        color=config.get("text_color", "white"),
+                        size=max(12, config.get("text_size", 12) + 10)
+                    )
+                
+                # Convert to CTkImage with fixed size - one image serves both appearance modes,
+                # so theme switches reuse the same PhotoImage instead of resizing a copy
+                ctk_img = ctk.CTkImage(light_image=img, size=(btn_width, btn_height))
+                self.image_memory.track("key_faces", button_number, image_nbytes(img))
             
-            # Convert to CTkImage with fixed size
-            ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=(btn_width, btn_height))
+            # Image label is created on first use - child widgets need the right-click binding
+            needs_rebind = button_number not in self.button_images and self.canvas_deck is None
             
             # Store reference to prevent garbage collection
             self.button_images[button_number] = ctk_img
             self.loaded_image_paths[button_number] = cache_key
             
             # Update button with image - keep fixed size
-            btn.configure(
-                image=ctk_img,
-                width=btn_width,
-                height=btn_height,
-                fg_color="transparent",
-                hover_color="gray25",
-                text_color="white"
-            )
+            if image_path:
+                btn.configure(
+                    image=ctk_img,
+                    width=btn_width,
+                    height=btn_height,
+                    fg_color="transparent",
+                    hover_color="gray25",
+                    text_color="white"
+                )
+            else:
+                # Live value on a plain key - keep the key color
+                btn.configure(image=ctk_img, width=btn_width, height=btn_height)
             
-            # Rebind right-click to all child widgets (including image)
-            def bind_right_click(widget, num):
-                widget.bind("<Button-3>", lambda e, n=num: self.customize_button(n))
-                for child in widget.winfo_children():
-                    bind_right_click(child, num)
+            if needs_rebind:
+                # Rebind key events to all child widgets (including image)
+                # Wait a moment for image to be created, then bind
+                btn.after(10, lambda: self.bind_key_events(btn, button_number))
             
-            # Wait a moment for image to be created, then bind
-            btn.after(10, lambda: bind_right_click(btn, button_number))
+            if self.image_memory.over_budget(self.frame_cache.nbytes):
+                self.enforce_image_budget()
             
         except Exception as e:
             print(f"Error loading image: {e}")
     
+    def enforce_image_budget(self):
+        """Evict renders nobody can see until image memory fits the budget"""
+        # Keys that are off the grid
+        for button_number in list(self.button_images):
+            if not self.layout.is_visible(button_number):
+                btn = self.buttons.get(button_number)
+                if btn is not None:
+                    btn.configure(image=None)
+                self.drop_key_render(button_number)
+        
+        # Cropped base faces are only reused by live tiles
+        for button_number in self.image_memory.keys("base_faces"):
+            if button_number not in self.live_scheduler.tiles:
+                self.button_faces.pop(button_number, None)
+                self.image_memory.release("base_faces", button_number)
+        
+        # Whatever is left of the budget bounds the animation frame cache
+        remaining = self.image_memory.budget_bytes - self.image_memory.total()
+        self.frame_cache.budget_bytes = max(8 * 1024 * 1024, remaining)
+        self.frame_cache.trim()
+    
+    def drop_key_render(self, button_number):
+        """Forget every cached render of one key"""
+        self.button_images.pop(button_number, None)
+        self.loaded_image_paths.pop(button_number, None)
+        self.button_faces.pop(button_number, None)
+        self.animation_clock.remove(button_number)
+        self.image_memory.release_key(button_number)
+    
+    def release_key_renders(self, detach=True):
+        """Release all rendered key images, e.g. while hidden in the tray"""
+        if detach:
+            # Widgets hold their images - detach so the pixels can be freed
+            for button_number in list(self.button_images):
+                btn = self.buttons.get(button_number)
+                if btn is not None:
+                    btn.configure(image=None)
+        self.button_images.clear()
+        self.loaded_image_paths.clear()
+        self.button_faces.clear()
+        self.animation_clock.clear()
+        self.frame_cache.clear()
+        self.image_memory.release("key_faces")
+        self.image_memory.release("base_faces")
+    
+    def restore_key_renders(self):
+        """Render the icons of every key on the grid again"""
+        for button_number in self.layout.visible_keys():
+            config = self.button_configs.get(button_number, {})
+            if config.get("image_path") and os.path.exists(config["image_path"]):
+                self.set_button_image(button_number, config["image_path"])
+    
+    def memory_report(self):
+        """Bytes held per subsystem, largest first"""
+        usage = self.image_memory.by_subsystem()
+        usage["animation_frames"] = self.frame_cache.nbytes
+        usage["dialog_previews"] = self.customize_dialog.preview_nbytes() if self.customize_dialog else 0
+        usage["assets"] = assets.nbytes()
+        return sorted(usage.items(), key=lambda item: item[1], reverse=True)
+    
+    def print_memory_report(self, title):
+        rows = self.memory_report()
+        print(f"\n== Memory report: {title} ==")
+        for name, nbytes in rows:
+            print(f"  {name:<18} {format_bytes(nbytes):>12}")
+        print(f"  {'images total':<18} {format_bytes(sum(nbytes for _, nbytes in rows)):>12}")
+        print(f"  {'budget':<18} {format_bytes(self.image_memory.budget_bytes):>12}")
+        print(f"  {'process RSS':<18} {format_bytes(process_rss()):>12}")
+    
+    def run_memory_report(self):
+        """--memory-report: print usage with the deck visible and hidden in the tray, then quit"""
+        self.print_memory_report("deck visible")
+        self.hide_window()
+        
+        def report_hidden():
+            self.print_memory_report("minimized to tray")
+            self.quit_app()
+        
+        self.root.after(1000, report_hidden)
+    
+    def apply_animation_frames(self, changed):
+        """Show the next frame of every animated key that advanced this tick"""
+        for button_number, image in changed.items():
+            btn = self.buttons.get(button_number)
+            if btn is not None:
+                btn.configure(image=image)
+    
+    def render_live_tiles(self, changed):
+        """Render every changed live value in a single UI pass"""
+        for button_number, value in changed.items():
+            config = self.button_configs.get(button_number)
+            if config is None or not self.layout.is_visible(button_number):
+                continue
+            image_path = config.get("image_path")
+            if not (image_path and os.path.exists(image_path)):
+                image_path = None
+            self.set_button_image(button_number, image_path, overlay_text=value)
+    
+    def normalize_stored_icons(self):
+        """Queue stored icons that are larger than a key needs for background ingest"""
+        icons_dir = os.path.abspath(self.icons_folder)
+        paths = {
+            config.get("image_path") for config in self.button_configs.values()
+            if config.get("image_path") and os.path.exists(config["image_path"])
+            and os.path.dirname(os.path.abspath(config["image_path"])) == icons_dir
+        }
+        jobs = [self.icon_ingestor.submit(path, self.icons_folder, only_if_needed=True) for path in sorted(paths)]
+        if jobs:
+            self.root.after(200, lambda: self.finish_icon_normalization(jobs))
+    
+    def finish_icon_normalization(self, jobs):
+        """Point keys at their normalized icons once every job is done"""
+        if not all(job.done.is_set() for job in jobs):
+            self.root.after(200, lambda: self.finish_icon_normalization(jobs))
+            return
+        
+        replaced = {job.source: job.result for job in jobs if job.error is None and job.result != job.source}
+        if not replaced:
+            return
+        
+        for button_number, config in self.button_configs.items():
+            if config.get("image_path") in replaced:
+                config["image_path"] = replaced[config["image_path"]]
+                if self.layout.is_visible(button_number):
+                    self.update_button_display(button_number)
+                else:
+                    # Re-rendered from the new icon when shown again
+                    self.drop_key_render(button_number)
+        self.save_config()
+        self.record_history("Optimize icons")
+        
+        # Originals are no longer referenced by any key
+        self.delete_unused_icons(replaced)
+        
+        self.status_label.configure(text=f"Optimized {len(replaced)} icon(s)")
+    
+    def history_state(self):
+        """(settings, layout, buttons) tracked by the undo history"""
+        settings = {
+            "grid_cols": self.grid_cols,
+            "grid_rows": self.grid_rows,
+            "grid_renderer": self.grid_renderer,
+            "corner_radius": self.corner_radius,
+            "image_memory_budget_mb": self.image_memory.budget_bytes // (1024 * 1024)
+        }
+        return settings, self.layout.to_dict(), self.button_configs
+    
+    def record_history(self, label):
+        """Snapshot the config after an edit so it can be undone"""
+        previous = self.history.current
+        if self.history.commit(label, *self.history_state()):
+            # Edited keys recompile their action on the next press
+            for key_id in self.history.current.changed_keys(previous):
+                self.action_plans.pop(key_id, None)
+                self.command_index.invalidate(key_id)
+                self.action_scheduler.set_schedule(key_id, self.button_configs.get(key_id), self.button_configs)
+            self.load_global_hotkeys()
+    
+    def undo(self):
+        if self.editing_paused():
+            return
+        previous = self.history.current
+        step = self.history.undo()
+        if step is None:
+            self.status_label.configure(text="Nothing to undo")
+            return
+        label, snapshot = step
+        self.restore_snapshot(snapshot, previous)
+        self.status_label.configure(text=f"Undid: {label}")
+    
+    def redo(self):
+        if self.editing_paused():
+            return
+        previous = self.history.current
+        step = self.history.redo()
+        if step is None:
+            self.status_label.configure(text="Nothing to redo")
+            return
+        label, snapshot = step
+        self.restore_snapshot(snapshot, previous)
+        self.status_label.configure(text=f"Redid: {label}")
+    
+    def restore_snapshot(self, snapshot, previous):
+        """Make the deck match a history snapshot, touching only what differs from previous"""
+        changed = snapshot.changed_keys(previous)
+        self.button_configs = {key_id: snapshot.button_config(key_id) for key_id in snapshot.buttons}
+        for key_id in changed:
+            self.action_plans.pop(key_id, None)
+            self.command_index.invalidate(key_id)
+            self.action_scheduler.set_schedule(key_id, self.button_configs.get(key_id), self.button_configs)
+        
+        self.load_global_hotkeys()
+        
+        # Icons removed by the undone edit come back from the trash
+        for key_id in changed:
+            self.icon_trash.restore(self.button_configs.get(key_id, {}).get("image_path"))
+        
+        settings = snapshot.settings
+        if settings["corner_radius"] != self.corner_radius:
+            self.corner_radius = settings["corner_radius"]
+            for btn in self.buttons.values():
+                btn.configure(corner_radius=self.corner_radius)
+        self.image_memory.budget_bytes = settings["image_memory_budget_mb"] * 1024 * 1024
+        
+        # Keys that lost their config start over from the default look
+        for key_id in changed:
+            if key_id not in self.button_configs and key_id in self.buttons:
+                self.drop_key_render(key_id)
+                self.live_scheduler.remove_tile(key_id)
+                self.buttons.pop(key_id).destroy()
+        
+        if snapshot.layout is not previous.layout or settings is not previous.settings:
+            self.grid_cols = settings["grid_cols"]
+            self.grid_rows = settings["grid_rows"]
+            self.grid_renderer = settings["grid_renderer"]
+            self.layout = DeckLayout.from_dict(dict(snapshot.layout), self.grid_rows, self.grid_cols)
+        self.sync_button_grid()
+        
+        for key_id in changed:
+            if key_id in self.button_configs and key_id in self.buttons:
+                if self.layout.is_visible(key_id):
+                    self.update_button_display(key_id)
+                else:
+                    self.drop_key_render(key_id)
+        
+        self.save_config()
+    
+    def config_data(self):
+        """Everything save_config writes"""
+        return {
+            "grid_cols": self.grid_cols,
+            "grid_rows": self.grid_rows,
+            "grid_renderer": self.grid_renderer,
+            "corner_radius": self.corner_radius,
+            "theme": self.current_theme,
+            "input_backend": self.injector.name,
+            "input_focus": self.input_focus.mode,
+            "image_memory_budget_mb": self.image_memory.budget_bytes // (1024 * 1024),
+            "layout": self.layout.to_dict(),
+            "buttons": self.button_configs
+        }
+    
     def save_config(self):
         """Save button configurations to file"""
+        if self.import_job is not None:
+            return  # The import is writing the config - it would replace this one anyway
         try:
-            config_data = {
-                "grid_cols": self.grid_cols,
-                "grid_rows": self.grid_rows,
-                "corner_radius": self.corner_radius,
-                "theme": self.current_theme,
-                "buttons": self.button_configs
-            }
             with open(self.config_file, 'w') as f:
-                json.dump(config_data, f, indent=2)
+                json.dump(self.config_data(), f, indent=2)
+            # The layout is now in the config itself
+            self.layout_journal.clear()
+            self.schedule_warm_start_write()
         except Exception as e:
             print(f"Error saving config: {e}")
     
@@ -1782,47 +1824,88 @@ class StreamDeckApp:
         try:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r') as f:
-                    loaded = json.load(f)
-                    
-                    # Check if it's the new format with grid size
-                    if isinstance(loaded, dict) and "buttons" in loaded:
-                        self.grid_cols = loaded.get("grid_cols", 4)
-                        self.grid_rows = loaded.get("grid_rows", 3)
-                        self.corner_radius = loaded.get("corner_radius", 15)
-                        self.current_theme = loaded.get("theme", "dark")
-                        # Apply loaded theme
-                        ctk.set_appearance_mode(self.current_theme)
-                        self.root.configure(bg="#1a1a1a" if self.current_theme == "dark" else "#ebebeb")
-                        self.button_configs = {int(k): v for k, v in loaded["buttons"].items()}
-                    else:
-                        # Old format - just button configs
-                        self.button_configs = {int(k): v for k, v in loaded.items()}
+                    self.apply_config_data(json.load(f))
         except Exception as e:
             print(f"Error loading config: {e}")
     
+    def apply_config_data(self, loaded):
+        """Take over settings, layout and key configs from a loaded config"""
+        # Check if it's the new format with grid size
+        if isinstance(loaded, dict) and "buttons" in loaded:
+            self.grid_cols = loaded.get("grid_cols", 4)
+            self.grid_rows = loaded.get("grid_rows", 3)
+            self.grid_renderer = loaded.get("grid_renderer", "auto")
+            self.corner_radius = loaded.get("corner_radius", 15)
+            budget_mb = loaded.get("image_memory_budget_mb", DEFAULT_BUDGET_MB)
+            self.image_memory.budget_bytes = budget_mb * 1024 * 1024
+            # Apply loaded theme
+            self.apply_theme(loaded.get("theme", "dark"))
+            self.injector.set_backend(loaded.get("input_backend", "auto"))
+            self.input_focus.set_mode(loaded.get("input_focus", DEFAULT_FOCUS_MODE))
+            self.button_configs = {int(k): v for k, v in loaded["buttons"].items()}
+            if "layout" in loaded:
+                self.layout = DeckLayout.from_dict(loaded["layout"], self.grid_rows, self.grid_cols)
+            else:
+                # Saved before key IDs - keys sit where their number put them
+                self.layout = DeckLayout.from_numbering(self.button_configs, self.grid_rows, self.grid_cols)
+        else:
+            # Old format - just button configs
+            self.button_configs = {int(k): v for k, v in loaded.items()}
+            self.layout = DeckLayout.from_numbering(self.button_configs, self.grid_rows, self.grid_cols)
+        self.layout.reserve_ids(self.button_configs)
+        # Moves made since the last full save
+        self.layout_journal.replay(self.layout)
+        self.action_plans = {}
+        self.command_index.reset(list(self.button_configs) + list(PALETTE_COMMANDS))
+        self.action_scheduler.load(self.button_configs)
+        self.load_global_hotkeys()
+    
+    def schedule_warm_start_write(self, delay=3000):
+        """Rebuild the warm start snapshot once edits have settled"""
+        if self.warm_start_write is not None:
+            self.root.after_cancel(self.warm_start_write)
+        self.warm_start_write = self.root.after(delay, self.write_warm_start)
+    
+    def write_warm_start(self):
+        """Snapshot the config on disk with compiled plans and the rendered key faces"""
+        self.warm_start_write = None
+        faces = {}
+        for key_id in self.layout.visible_keys():
+            config = self.button_configs.get(key_id, {})
+            image_path = config.get("image_path")
+            if not image_path or key_id in self.animation_clock.keys:
+                continue
+            base_key = f"{image_path}_{config.get('image_opacity', 100)}"
+            face = self.button_faces.get(key_id)
+            if face is not None and face[0] == base_key:
+                faces[key_id] = (base_key, image_path, face[1])
+            elif self.key_in_view(key_id) and os.path.exists(image_path) and not is_animated(image_path):
+                # Released while hidden or evicted - render it for the snapshot
+                img = apply_opacity(cover_crop(Image.open(image_path), KEY_WIDTH, KEY_HEIGHT),
+                                    config.get("image_opacity", 100))
+                faces[key_id] = (base_key, image_path, img)
+        # Plugins stay unimported until one of their keys is pressed
+        plans = {
+            key_id: self.action_plan(key_id) for key_id, config in self.button_configs.items()
+            if registry.is_loaded(config.get("action_type", "Open"))
+        }
+        warm_start.write(
+            self.warm_start_file, APP_VERSION, self.config_file, self.layout_journal.path,
+            self.config_data(), plans, faces
+        )
+    
     def setup_tray_icon(self):
         """Setup system tray icon"""
         try:
             # Load icon image - use .ico file for Windows taskbar
-            icon_image = None
-            
-            # Try to use the .ico file first (best for Windows)
-            if os.path.exists("icon.ico"):
-                icon_image = Image.open("icon.ico")
-            elif os.path.exists("logos/mango_32_transparent.png"):
-                icon_image = Image.open("logos/mango_32_transparent.png")
-            elif os.path.exists("logos/mango_256_transparent.png"):
-                icon_image = Image.open("logos/mango_256_transparent.png")
-                icon_image = icon_image.resize((32, 32), Image.Resampling.LANCZOS)
-            else:
-                # Create a simple colored icon if no logo found
-                icon_image = Image.new('RGB', (32, 32), color='#FF9800')
+            icon_image = assets.tray_image()
             
             # Create menu
             menu = (
-                item('Show', self.show_window, default=True),
-                item('Hide', self.hide_window),
-                item('Quit', self.quit_app)
+                # Menu items run on the tray thread - the window work belongs on the Tk loop
+                item('Show', lambda *a: self.call_soon(self.show_window), default=True),
+                item('Hide', lambda *a: self.call_soon(self.hide_window)),
+                item('Quit', lambda *a: self.call_soon(self.quit_app))
             )
             
             # Create tray icon
@@ -1846,20 +1929,48 @@ class StreamDeckApp:
     def hide_window(self, icon=None, item=None):
         """Hide window to system tray"""
         self.root.withdraw()
+        self.live_scheduler.pause()
+        self.animation_clock.pause()
+        # The action scheduler and global hotkeys keep running - only drawing stops in the tray
+        
+        # Nothing is visible - give image memory back while idling in the tray
+        self.release_key_renders()
+        gc.collect()
+        trim_process_memory()
         if self.status_label.winfo_exists():
             self.status_label.configure(text="Minimized to system tray")
     
     def show_window(self, icon=None, item=None):
         """Show window from system tray"""
         self.root.deiconify()
+        self.input_focus.window_shown()
+        self.restore_key_renders()
+        self.live_scheduler.resume()
+        self.animation_clock.resume()
         self.root.lift()
-        self.root.focus_force()
+        if self.input_focus.takes_focus:
+            self.root.focus_force()
         if self.status_label.winfo_exists():
             self.status_label.configure(text="Restored from system tray")
     
-    def quit_app(self, icon=None, item=None):
+    def quit_app(self):
         """Completely quit the application"""
         self.is_quitting = True
+        self.action_scheduler.stop()
+        self.global_hotkeys.stop()
+        self.script_pool.stop()
+        self.command_runner.stop()
+        self.http_pool.close()
+        self.macro_player.stop()
+        self.injector.close()
+        self.input_focus.close()
+        
+        # Next launch starts from the prepared snapshot
+        if self.warm_start_write is not None:
+            self.root.after_cancel(self.warm_start_write)
+        if self.import_job is None:
+            self.save_config()
+            self.write_warm_start()
         
         # Stop tray icon
         if self.tray_icon:
@@ -1871,10 +1982,14 @@ class StreamDeckApp:
 
 
 def main():
+    # Script workers are started by re-running this executable when frozen
+    multiprocessing.freeze_support()
     ctk.set_appearance_mode("dark")
     ctk.set_default_color_theme("blue")
     root = ctk.CTk()
     app = StreamDeckApp(root)
+    if "--memory-report" in sys.argv:
+        root.after(1500, app.run_memory_report)
     root.mainloop()
 
 
@@ -0,0 +1,61 @@
+"""
+Performance Metrics for Mango Stream Deck
+Process-wide timing samples recorded by the deck's hot paths
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PerfMetrics:
+    """Keeps the most recent timing samples for each named operation, and running counters"""
+
+    def __init__(self, history=100):
+        self.history = history
+        self.samples = {}
+        self.counters = {}
+
+    def record(self, name, seconds):
+        """Record one duration (in seconds) for an operation"""
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.history)
+        samples.append(seconds)
+
+    @contextmanager
+    def timed(self, name):
+        """Time the body of a with-block as one sample of name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, name, n=1):
+        """Add n to a running counter, e.g. cache hits"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def recent(self, name, n):
+        """Up to the n most recent samples of name, oldest first"""
+        samples = self.samples.get(name)
+        return list(samples)[-n:] if samples else []
+
+    def last(self, name):
+        samples = self.samples.get(name)
+        return samples[-1] if samples else None
+
+    def mean(self, name):
+        samples = self.samples.get(name)
+        return sum(samples) / len(samples) if samples else None
+
+    def summary(self):
+        """Return {name: (count, last_ms, mean_ms)} for every operation"""
+        return {
+            name: (len(samples), samples[-1] * 1000, sum(samples) / len(samples) * 1000)
+            for name, samples in self.samples.items() if samples
+        }
+
+
+# Shared instance used across the app
+metrics = PerfMetrics()
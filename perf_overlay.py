@@ -0,0 +1,138 @@
+"""
+Performance Overlay for Mango Stream Deck
+A small panel over the deck with live numbers from the shared metrics: event
+loop lag, pending timers, action latencies, icon cache hit rate, image memory,
+scheduled action drift and the last grid/render passes. It runs no timers
+while hidden.
+"""
+
+import time
+import tkinter as tk
+
+from perf import metrics
+from image_memory import format_bytes
+
+# Panel redraw rate, and how often the event loop is probed for lag while shown
+REFRESH_MS = 500
+LAG_PROBE_MS = 100
+LAG_WINDOW = 20  # Probes the max lag is taken over
+
+ACTION_HISTORY = 5
+
+# (label, metric) of the passes whose last duration is shown
+RENDER_PASSES = [
+    ("grid sync", "grid_sync"),
+    ("canvas draw", "canvas_refresh"),
+    ("batch render", "batch_render"),
+    ("key render", "key_render"),
+    ("startup grid", "startup_grid"),
+]
+
+
+class PerfOverlay:
+    """Toggleable stats panel placed over the bottom-right corner of the deck window"""
+
+    def __init__(self, app):
+        self.app = app
+        self.panel = tk.Label(
+            app.root,
+            justify="left",
+            anchor="nw",
+            font=("Courier", 9),
+            bg="#000000",
+            fg="#7CFC00",
+            padx=8,
+            pady=6
+        )
+        self.visible = False
+        self._refresh = None
+        self._probe = None
+        self._probe_due = None  # perf_counter time the pending probe should fire at
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self):
+        if self.visible:
+            return
+        self.visible = True
+        self.panel.place(relx=1.0, rely=1.0, x=-15, y=-45, anchor="se")
+        self.panel.lift()
+        self.probe()
+        self.refresh()
+
+    def hide(self):
+        self.visible = False
+        self.panel.place_forget()
+        for handle in (self._refresh, self._probe):
+            if handle is not None:
+                self.app.root.after_cancel(handle)
+        self._refresh = self._probe = None
+        self._probe_due = None
+
+    def probe(self):
+        """Time how late a timer fires - how long other work held the event loop"""
+        now = time.perf_counter()
+        if self._probe_due is not None:
+            metrics.record("loop_lag", max(0.0, now - self._probe_due))
+        self._probe_due = now + LAG_PROBE_MS / 1000
+        self._probe = self.app.root.after(LAG_PROBE_MS, self.probe)
+
+    def refresh(self):
+        self.panel.configure(text="\n".join(self.lines()))
+        self._refresh = self.app.root.after(REFRESH_MS, self.refresh)
+
+    def lines(self):
+        app = self.app
+        lines = ["PERFORMANCE  (Ctrl+Shift+P)"]
+
+        lag = metrics.recent("loop_lag", LAG_WINDOW)
+        if lag:
+            lines.append(f"loop lag      {lag[-1] * 1000:6.1f} ms  max {max(lag) * 1000:.1f} ms")
+        pending = len(app.root.tk.splitlist(app.root.tk.call("after", "info")))
+        lines.append(f"after queue   {pending:6d}")
+
+        actions = metrics.recent("action", ACTION_HISTORY)
+        if actions:
+            lines.append("actions (ms)  " + " ".join(f"{seconds * 1000:.1f}" for seconds in reversed(actions)))
+        else:
+            lines.append("actions (ms)  -")
+
+        hits = metrics.counters.get("icon_cache_hit", 0) + app.frame_cache.hits
+        misses = metrics.counters.get("icon_cache_miss", 0) + app.frame_cache.misses
+        if hits + misses:
+            lines.append(f"icon cache    {hits / (hits + misses):6.1%}  {hits} hit / {misses} decoded")
+
+        used = app.image_memory.total() + app.frame_cache.nbytes
+        lines.append(f"image memory  {format_bytes(used)} of {format_bytes(app.image_memory.budget_bytes)}")
+
+        if len(app.action_scheduler):
+            drift = metrics.recent("schedule_drift", LAG_WINDOW)
+            text = f"schedules     {len(app.action_scheduler):6d}  missed {metrics.counters.get('schedule_missed', 0)}"
+            if drift:
+                text += f"  drift {max(drift) * 1000:.1f} ms"
+            lines.append(text)
+
+        drift = metrics.recent("macro_drift", LAG_WINDOW)
+        if drift:
+            state = "playing" if app.macro_player.playing else "last run"
+            lines.append(f"macro drift   {max(drift) * 1000:6.2f} ms  ({state}, resynced {metrics.counters.get('macro_resync', 0)}x)")
+
+        if app.global_hotkeys.table:
+            latency = metrics.recent("global_hotkey", ACTION_HISTORY)
+            text = f"global keys   {len(app.global_hotkeys.table):6d}"
+            if latency:
+                text += f"  chord to action {latency[-1] * 1000:.2f} ms  max {max(latency) * 1000:.2f} ms"
+            lines.append(text)
+            release = metrics.last("global_hotkey_release")
+            if release is not None:
+                lines.append(f"  key release wait {release * 1000:.1f} ms")
+
+        for label, name in RENDER_PASSES:
+            seconds = metrics.last(name)
+            if seconds is not None:
+                lines.append(f"{label:<13} {seconds * 1000:6.1f} ms")
+        return lines
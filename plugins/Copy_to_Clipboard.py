@@ -0,0 +1,21 @@
+"""
+Copy to Clipboard - example action plugin for Mango Stream Deck
+Puts a fixed text on the clipboard. The file name is the action's name
+("_" reads as a space); the module is imported the first time a key using
+the action is pressed or edited
+"""
+
+from actions import ActionType
+
+
+def copy_text(app, key_id, plan):
+    text = plan[1]
+    if not text:
+        app.set_status("No text configured")
+        return
+    app.root.clipboard_clear()
+    app.root.clipboard_append(text)
+    app.set_status(f"Copied: {text[:30]}")
+
+
+ACTION = ActionType("Copy to Clipboard", copy_text, [("clipboard_text", "Text to Copy", "")])
@@ -0,0 +1,221 @@
+"""
+Profile Archives for Mango Stream Deck
+Exports a whole deck profile (config plus the icons it uses) as one zip
+archive and imports it again; icons are streamed in chunks and stored once
+per content hash on both sides
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+
+from icon_trash import name_taken
+
+ARCHIVE_EXTENSION = ".mangodeck"
+PROFILE_FILE = "profile.json"
+ARCHIVE_ICONS_DIR = "icons/"
+FORMAT_VERSION = 1
+
+# Icons are copied and hashed in chunks so memory stays flat for large sets
+CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_icons(icons_folder):
+    """Content hash -> path of every icon already stored"""
+    index = {}
+    if not os.path.isdir(icons_folder):
+        return index
+    for name in sorted(os.listdir(icons_folder)):
+        path = os.path.join(icons_folder, name)
+        if os.path.isfile(path) and not name.endswith(".part"):
+            try:
+                index.setdefault(file_digest(path), path)
+            except OSError:
+                pass
+    return index
+
+
+def rewrite_icon_paths(buttons, mapping):
+    """Copy of the button configs with image paths mapped (unmapped icons are dropped)"""
+    rewritten = {}
+    for key_id, config in buttons.items():
+        config = dict(config)
+        if config.get("image_path"):
+            config["image_path"] = mapping.get(config["image_path"])
+        rewritten[key_id] = config
+    return rewritten
+
+
+def export_profile(config_data, archive_path, progress=None):
+    """
+    Write config_data and every icon it references to archive_path.
+
+    Returns the number of distinct icons stored.
+    """
+    report = progress or (lambda fraction, stage: None)
+    buttons = config_data.get("buttons", {})
+    paths = sorted({
+        config["image_path"] for config in buttons.values()
+        if config.get("image_path") and os.path.exists(config["image_path"])
+    })
+
+    # Same content under different names is stored once
+    archive_names = {}
+    for index, path in enumerate(paths):
+        report(0.3 * index / max(1, len(paths)), "Hashing icons")
+        extension = os.path.splitext(path)[1].lower()
+        archive_names[path] = f"{ARCHIVE_ICONS_DIR}{file_digest(path)}{extension}"
+
+    profile = dict(config_data, format_version=FORMAT_VERSION)
+    profile["buttons"] = rewrite_icon_paths(buttons, archive_names)
+
+    # Build next to the target and rename, so a failed export leaves no broken archive
+    temp_path = archive_path + ".part"
+    try:
+        with zipfile.ZipFile(temp_path, 'w') as archive:
+            archive.writestr(PROFILE_FILE, json.dumps(profile, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+            sources = {name: path for path, name in archive_names.items()}
+            for index, (name, path) in enumerate(sorted(sources.items())):
+                report(0.3 + 0.7 * index / max(1, len(sources)), "Writing icons")
+                # Icons are already compressed - store them as they are
+                with open(path, 'rb') as src, archive.open(name, 'w') as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(temp_path, archive_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    report(1.0, "Done")
+    return len(set(archive_names.values()))
+
+
+def read_profile(archive):
+    """Parsed and checked profile.json of an open archive"""
+    try:
+        profile = json.loads(archive.read(PROFILE_FILE))
+    except KeyError:
+        raise ValueError("Not a Mango Stream Deck profile (profile.json missing)")
+    if not isinstance(profile, dict) or not isinstance(profile.get("buttons"), dict):
+        raise ValueError("Profile has no button configuration")
+    if profile.get("format_version", 1) > FORMAT_VERSION:
+        raise ValueError("Profile was exported by a newer version of Mango Stream Deck")
+    return profile
+
+
+def unique_icon_path(icons_folder, stem, extension):
+    filename = f"{stem}{extension}"
+    counter = 1
+    while name_taken(icons_folder, filename):
+        filename = f"{stem}_{counter}{extension}"
+        counter += 1
+    return os.path.join(icons_folder, filename)
+
+
+def import_profile(archive_path, config_path, icons_folder, progress=None):
+    """
+    Replace the profile at config_path with the one in archive_path.
+
+    Icons are staged first and the config is swapped in with one rename, so a
+    failed import leaves the current profile untouched. Icons already stored
+    with the same content are reused. Returns the imported config data.
+    """
+    report = progress or (lambda fraction, stage: None)
+    os.makedirs(icons_folder, exist_ok=True)
+
+    with zipfile.ZipFile(archive_path) as archive:
+        report(0.0, "Reading profile")
+        profile = read_profile(archive)
+        members = set(archive.namelist())
+        names = sorted({
+            config["image_path"] for config in profile["buttons"].values()
+            if config.get("image_path") in members and config["image_path"].startswith(ARCHIVE_ICONS_DIR)
+        })
+
+        report(0.05, "Indexing icons")
+        existing = index_icons(icons_folder)
+
+        staging = tempfile.mkdtemp(prefix=".import-", dir=icons_folder)
+        config_temp = config_path + ".import"
+        try:
+            placed = {}  # archive name -> path in the icons folder
+            staged = []  # (staged file, final path)
+            for index, name in enumerate(names):
+                report(0.1 + 0.8 * index / max(1, len(names)), "Importing icons")
+                extension = os.path.splitext(name)[1].lower()
+                temp_path = os.path.join(staging, f"{index}{extension}")
+                digest = hashlib.sha256()
+                with archive.open(name) as src, open(temp_path, 'wb') as dst:
+                    for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                        dst.write(chunk)
+                digest = digest.hexdigest()
+
+                if digest in existing:
+                    placed[name] = existing[digest]
+                    os.remove(temp_path)
+                else:
+                    final_path = unique_icon_path(icons_folder, digest[:16], extension)
+                    staged.append((temp_path, final_path))
+                    placed[name] = existing[digest] = final_path
+
+            report(0.9, "Saving")
+            profile["buttons"] = rewrite_icon_paths(profile["buttons"], placed)
+            profile.pop("format_version", None)
+            with open(config_temp, 'w') as f:
+                json.dump(profile, f, indent=2)
+
+            # Commit - new icons first, then the config in a single rename
+            for temp_path, final_path in staged:
+                os.replace(temp_path, final_path)
+            os.replace(config_temp, config_path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+            if os.path.exists(config_temp):
+                os.remove(config_temp)
+
+    report(1.0, "Done")
+    return profile
+
+
+class ProfileJob:
+    """Progress and outcome of an export or import, polled from the UI thread"""
+
+    def __init__(self):
+        self.progress = 0.0
+        self.stage = "Starting"
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def _report(self, fraction, stage):
+        self.progress = fraction
+        self.stage = stage
+
+
+def run_in_background(func, *args):
+    """Run func(*args, progress=...) on a worker thread and return its ProfileJob"""
+    job = ProfileJob()
+
+    def run():
+        try:
+            job.result = func(*args, progress=job._report)
+        except Exception as e:
+            job.error = e
+        finally:
+            job.done.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    return job
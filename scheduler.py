@@ -0,0 +1,388 @@
+"""
+Action Scheduler for Mango Stream Deck
+Runs keys at a time of day, every N seconds, on a cron expression, or N
+seconds after another key fires. One thread sleeps on a heap of deadlines
+until the earliest one is due, so thousands of schedules cost nothing
+between runs; it keeps running while the deck is hidden in the tray
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+
+from perf import metrics
+
+
+# Schedule types offered in the customize dialog
+SCHEDULE_TYPES = ["None", "At", "Every", "Cron", "After"]
+
+# Caption and placeholder of the schedule value entry for each type
+SCHEDULE_VALUE_HINTS = {
+    "At": ("Time:", "HH:MM or YYYY-MM-DD HH:MM"),
+    "Every": ("Seconds:", "60"),
+    "Cron": ("Cron:", "*/15 9-17 * * 1-5"),
+    "After": ("Key:", "key number"),
+}
+
+MIN_INTERVAL = 1.0  # Seconds - shortest "Every" period
+MIN_DELAY = 0.1  # Seconds - shortest "After" delay, so two keys following each other cannot spin
+
+# Longest single sleep - a wall clock change or resume from suspend is noticed within this
+MAX_SLEEP = 60.0
+
+# Missed runs counted one by one before the rest of a long gap is skipped
+MAX_COUNTED_MISSES = 1000
+
+# (name, low, high) of the five cron fields
+CRON_FIELDS = [
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 6),
+]
+
+
+def parse_cron_field(text, low, high, name):
+    """Values a cron field allows: *, */n, a, a-b, a-b/n and comma lists of them"""
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise ValueError(f"bad step in cron {name} field: {text}")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            if not (start_text.isdigit() and end_text.isdigit()):
+                raise ValueError(f"bad range in cron {name} field: {text}")
+            start, end = int(start_text), int(end_text)
+        elif part.isdigit():
+            start = int(part)
+            end = high if step > 1 else start
+        else:
+            raise ValueError(f"bad cron {name} field: {text}")
+        # Sunday may be written as 7, alone or as the end of a range
+        if name == "weekday" and end == 7:
+            if start == 7:
+                start = end = 0
+            else:
+                end = 6
+                values.add(0)
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron {name} field out of range {low}-{high}: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Standard five-field cron expression in local time"""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("cron needs 5 fields: minute hour day month weekday")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            parse_cron_field(text, low, high, name) for text, (name, low, high) in zip(fields, CRON_FIELDS)
+        )
+        # Like cron, a restricted day and weekday match when either one does
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+        if self.next_after(time.time()) is None:
+            raise ValueError(f"cron expression never runs: {expression}")
+
+    def day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays  # cron counts from Sunday
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, timestamp):
+        """First matching minute after timestamp, or None if none within about 5 years"""
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + 5
+        # Jump a whole month, day or hour at a time while a coarser field does not match
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        return None
+
+
+class AtSchedule:
+    """A time every day ("HH:MM") or once ("YYYY-MM-DD HH:MM")"""
+
+    def __init__(self, text):
+        text = text.strip()
+        try:
+            if " " in text:
+                self.once = datetime.strptime(text, "%Y-%m-%d %H:%M").timestamp()
+                self.time = None
+            else:
+                self.once = None
+                self.time = datetime.strptime(text, "%H:%M").time()
+        except ValueError:
+            raise ValueError(f"time must be HH:MM or YYYY-MM-DD HH:MM: {text}") from None
+
+    def next_after(self, timestamp):
+        if self.once is not None:
+            return self.once if self.once > timestamp else None
+        moment = datetime.combine(datetime.fromtimestamp(timestamp).date(), self.time)
+        if moment.timestamp() <= timestamp:
+            moment += timedelta(days=1)
+        return moment.timestamp()
+
+
+class IntervalSchedule:
+    """Every N seconds at a fixed rate - a late run does not push the later ones back"""
+
+    def __init__(self, seconds):
+        self.interval = seconds
+
+    def next_after(self, timestamp):
+        return timestamp + self.interval
+
+
+def after_source(config):
+    """Key an After schedule follows, or None"""
+    value = str(config.get("schedule_value") or "").strip()
+    if config.get("schedule_type") == "After" and value.isdigit():
+        return int(value)
+    return None
+
+
+def parse_schedule(config, key=None, button_configs=None):
+    """
+    Schedule of a key config as (kind, schedule, source key, delay), or None.
+
+    With key and the other key configs, an After schedule that would start
+    key again - directly or through other After keys - is refused.
+    Raises ValueError with a readable message for an invalid schedule.
+    """
+    kind = config.get("schedule_type", "None")
+    if kind in (None, "", "None"):
+        return None
+    value = str(config.get("schedule_value") or "").strip()
+    if kind == "At":
+        return kind, AtSchedule(value), None, 0.0
+    if kind == "Every":
+        try:
+            seconds = float(value)
+        except ValueError:
+            raise ValueError(f"interval must be a number of seconds: {value}") from None
+        if seconds < MIN_INTERVAL:
+            raise ValueError(f"interval must be at least {MIN_INTERVAL:g} seconds")
+        return kind, IntervalSchedule(seconds), None, 0.0
+    if kind == "Cron":
+        return kind, CronSchedule(value), None, 0.0
+    if kind == "After":
+        if not value.isdigit():
+            raise ValueError(f"After needs the number of the key to follow: {value}")
+        try:
+            delay = float(config.get("schedule_delay") or 0)
+        except (TypeError, ValueError):
+            raise ValueError("delay must be a number of seconds") from None
+        source = int(value)
+        if source == key:
+            raise ValueError("a key cannot run after itself")
+        # Follow the chain of keys source runs after; getting back to key would fire them forever
+        seen, target = set(), source
+        while key is not None and target is not None and target not in seen:
+            seen.add(target)
+            target = after_source((button_configs or {}).get(target) or {})
+            if target == key:
+                raise ValueError(f"key {source} already runs after this key - they would keep starting each other")
+        return kind, None, source, max(MIN_DELAY, delay)
+    raise ValueError(f"unknown schedule type: {kind}")
+
+
+class ScheduledKey:
+    """Schedule state of one key"""
+
+    __slots__ = ("key", "kind", "schedule", "source", "delay", "due", "seq")
+
+    def __init__(self, key, kind, schedule, source, delay):
+        self.key = key
+        self.kind = kind
+        self.schedule = schedule
+        self.source = source
+        self.delay = delay
+        self.due = None  # Wall clock time of the next run, None while not armed
+        self.seq = 0  # Matches the live heap entry; older entries are skipped
+
+
+class ActionScheduler:
+    """
+    Timer-heap scheduler for key actions.
+
+    dispatch(key_ids) is called on the scheduler thread with every key that
+    came due in one wake-up; the app hands them to the Tk loop in one batch.
+    The thread starts with the first schedule and sleeps until the earliest
+    deadline - it never polls.
+    """
+
+    def __init__(self, dispatch):
+        self._dispatch = dispatch
+        self.keys = {}  # Key ID -> ScheduledKey
+        self.followers = {}  # Source key ID -> set of key IDs running after it
+        self._heap = []  # (due, seq, key ID), lazily cancelled
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.runs = 0
+        self.missed = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set_schedule(self, key, config, button_configs=None):
+        """Register, update or remove the schedule of a key; button_configs lets After loops be refused"""
+        try:
+            parsed = parse_schedule(config, key, button_configs) if config else None
+        except ValueError as e:
+            print(f"Ignoring schedule of key {key}: {e}")
+            parsed = None
+        with self._cond:
+            self._remove(key)
+            if parsed is None:
+                return
+            entry = self.keys[key] = ScheduledKey(key, *parsed)
+            if entry.kind == "After":
+                self.followers.setdefault(entry.source, set()).add(key)
+            else:
+                self._arm(entry, entry.schedule.next_after(time.time()))
+        self._ensure_thread()
+
+    def load(self, button_configs):
+        """Replace every schedule with the ones in button_configs"""
+        with self._cond:
+            self.keys.clear()
+            self.followers.clear()
+            self._heap = []
+            self._cond.notify()
+        for key, config in button_configs.items():
+            if config.get("schedule_type", "None") not in (None, "", "None"):
+                self.set_schedule(key, config, button_configs)
+
+    def remove(self, key):
+        with self._cond:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self.keys.pop(key, None)
+        if entry is not None and entry.kind == "After":
+            followers = self.followers.get(entry.source)
+            if followers is not None:
+                followers.discard(key)
+                if not followers:
+                    del self.followers[entry.source]
+
+    def key_fired(self, key):
+        """Arm the keys scheduled to run after key - a repeat press restarts their delay"""
+        if key not in self.followers:
+            return
+        now = time.time()
+        with self._cond:
+            for follower in self.followers.get(key, ()):
+                entry = self.keys[follower]
+                self._arm(entry, now + entry.delay)
+
+    def next_run(self, key):
+        """Wall clock time a key runs next, or None"""
+        entry = self.keys.get(key)
+        return entry.due if entry is not None else None
+
+    def _arm(self, entry, due):
+        """Point entry at a new deadline (lock held); wake the thread if it is now the earliest"""
+        entry.due = due
+        if due is None:
+            return
+        self._seq += 1
+        entry.seq = self._seq
+        earliest = not self._heap or due < self._heap[0][0]
+        heapq.heappush(self._heap, (due, self._seq, entry.key))
+        # Re-armed keys leave stale entries behind - rebuild once they dominate
+        if len(self._heap) > 2 * len(self.keys) + 64:
+            self._heap = [(e.due, e.seq, e.key) for e in self.keys.values() if e.due is not None]
+            heapq.heapify(self._heap)
+        if earliest:
+            self._cond.notify()
+
+    def _ensure_thread(self):
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name="action-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _run(self):
+        """Scheduler thread - sleep until the earliest deadline, then dispatch everything due"""
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    now = time.time()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = MAX_SLEEP if not self._heap else min(MAX_SLEEP, self._heap[0][0] - now)
+                    self._cond.wait(timeout)
+                due_keys = self._pop_due(now)
+            if due_keys:
+                self.runs += len(due_keys)
+                self._dispatch(due_keys)
+
+    def _pop_due(self, now):
+        """Keys whose deadline passed, re-armed for their next run (lock held)"""
+        due_keys = []
+        # Re-arming may rebuild the heap - always go through self._heap
+        while self._heap and self._heap[0][0] <= now:
+            due, seq, key = heapq.heappop(self._heap)
+            entry = self.keys.get(key)
+            if entry is None or entry.seq != seq:
+                continue
+            metrics.record("schedule_drift", now - due)
+            due_keys.append(key)
+            if entry.kind == "After":
+                entry.due = None
+                continue
+            next_due, missed = self._next_due(entry.schedule, due, now)
+            if missed:
+                # Runs that fell into a suspend or a long stall are skipped, not replayed
+                self.missed += missed
+                metrics.count("schedule_missed", missed)
+            self._arm(entry, next_due)
+        return due_keys
+
+    @staticmethod
+    def _next_due(schedule, due, now):
+        """(next deadline after now, runs skipped between due and now)"""
+        if isinstance(schedule, IntervalSchedule):
+            missed = int((now - due) // schedule.interval)
+            return due + (missed + 1) * schedule.interval, missed
+        next_due = schedule.next_after(due)
+        missed = 0
+        while next_due is not None and next_due <= now:
+            missed += 1
+            if missed >= MAX_COUNTED_MISSES:
+                return schedule.next_after(now), missed
+            next_due = schedule.next_after(next_due)
+        return next_due, missed
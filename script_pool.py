@@ -0,0 +1,263 @@
+"""
+Script Pool for Mango Stream Deck
+Python scripts run by Script keys go to a few interpreters started ahead of
+time, with common modules already imported, instead of a new interpreter per
+press. Output streams back line by line; a worker that overruns its timeout
+is killed, and workers are replaced after a number of runs or once they have
+grown past a memory limit
+"""
+
+import io
+import multiprocessing
+import os
+import queue
+import runpy
+import sys
+import threading
+import time
+import traceback
+
+from image_memory import process_rss
+from perf import metrics
+
+# Imported once by every worker so scripts start with them warm
+PRELOAD_MODULES = ("json", "os", "re", "time", "datetime", "pathlib", "subprocess", "urllib.request")
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 30.0  # Seconds
+MAX_RUNS = 100  # Runs before a worker is replaced
+MAX_WORKER_MB = 256  # Resident size a worker is replaced above
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+class PipeWriter(io.TextIOBase):
+    """sys.stdout/stderr stand-in that sends each finished line to the app"""
+
+    def __init__(self, conn, lock, stream):
+        self.conn = conn
+        self.lock = lock
+        self.stream = stream
+        self.pending = ""
+
+    def write(self, text):
+        self.pending += text
+        if "\n" in self.pending:
+            *lines, self.pending = self.pending.split("\n")
+            with self.lock:
+                for line in lines:
+                    self.conn.send(("out", self.stream, line))
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            with self.lock:
+                self.conn.send(("out", self.stream, self.pending))
+            self.pending = ""
+
+
+def worker_main(conn, preload):
+    """Worker process - import the common modules, then run scripts until told to stop"""
+    for name in preload:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+    lock = threading.Lock()
+    stdout, stderr = PipeWriter(conn, lock, "stdout"), PipeWriter(conn, lock, "stderr")
+    sys.stdout, sys.stderr = stdout, stderr
+    sys.stdin = open(os.devnull)
+    conn.send(("ready",))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        code, path = job
+        cwd = os.getcwd()
+        error = None
+        try:
+            if path:
+                runpy.run_path(path, run_name="__main__")
+            else:
+                exec(compile(code, "<script>", "exec"), {"__name__": "__main__"})
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                error = f"exit code {e.code}"
+        except BaseException as e:
+            # Leave this function's own frame out of the traceback
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            # Scripts share the interpreter - put back what they commonly change
+            os.chdir(cwd)
+            sys.stdout, sys.stderr = stdout, stderr
+        stdout.flush()
+        stderr.flush()
+        conn.send(("done", error, process_rss()))
+
+
+# ----------------------------------------------------------------------
+# App side
+# ----------------------------------------------------------------------
+
+class ScriptJob:
+    __slots__ = ("key", "code", "path", "timeout", "queued")
+
+    def __init__(self, key, code, path, timeout):
+        self.key = key
+        self.code = code
+        self.path = path
+        self.timeout = timeout
+        self.queued = time.perf_counter()
+
+
+class ScriptWorker:
+    """One worker process and the thread that feeds it jobs from the pool's queue"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.process = None
+        self.conn = None
+        self.runs = 0
+        self.thread = threading.Thread(target=self._serve, name="script-worker", daemon=True)
+
+    def start_process(self):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, self.pool.preload), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        # Wait for the imports, so the first press does not pay for them
+        try:
+            if self.conn.poll(60):
+                self.conn.recv()
+        except (EOFError, OSError):
+            pass
+
+    def stop_process(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(0.5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+        self.process = None
+
+    def _serve(self):
+        self.start_process()
+        while True:
+            job = self.pool.jobs.get()
+            if job is None:
+                self.stop_process()
+                return
+            if self.process is None or not self.process.is_alive():
+                self.stop_process()
+                self.start_process()
+            self._run(job)
+
+    def _run(self, job):
+        pool = self.pool
+        start = time.perf_counter()
+        metrics.record("script_wait", start - job.queued)
+        deadline = time.monotonic() + job.timeout
+        error = "worker exited"
+        rss = None
+        done = False
+        try:
+            self.conn.send((job.code, job.path))
+            while not done:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.conn.poll(remaining):
+                    error = f"timed out after {job.timeout:g} s"
+                    metrics.count("script_timeout")
+                    break
+                # Take every message already waiting - only the newest line per stream is shown
+                latest = {}
+                while True:
+                    message = self.conn.recv()
+                    if message[0] == "out":
+                        latest[message[1]] = message[2]
+                        print(f"[script {job.key}] {message[2]}")
+                    elif message[0] == "done":
+                        error, rss = message[1], message[2]
+                        done = True
+                    if done or not self.conn.poll(0):
+                        break
+                for stream, line in latest.items():
+                    pool.on_output(job.key, stream, line)
+        except (EOFError, OSError):
+            pass
+        elapsed = time.perf_counter() - start
+        metrics.record("script_run", elapsed)
+
+        pool.on_done(job.key, error, elapsed)
+
+        # Stuck, crashed or worn out - start the replacement now, not on the next press
+        self.runs += 1
+        if not done:
+            self.process.kill()
+        elif self.runs >= pool.max_runs or (rss is not None and rss > pool.max_worker_bytes):
+            metrics.count("script_recycled")
+        else:
+            return
+        self.stop_process()
+        self.start_process()
+
+
+class ScriptPool:
+    """
+    Pool of warm Python worker processes for Script keys.
+
+    on_output(key, stream, line) and on_done(key, error, seconds) are called
+    on worker threads; error is None when the script finished cleanly.
+    Workers start with start() or the first run() and are replaced as they
+    stop, so a running pool always has warm interpreters ready.
+    """
+
+    def __init__(self, on_output, on_done, workers=DEFAULT_WORKERS, preload=PRELOAD_MODULES,
+                 max_runs=MAX_RUNS, max_worker_mb=MAX_WORKER_MB):
+        self.on_output = on_output
+        self.on_done = on_done
+        self.size = workers
+        self.preload = preload
+        self.max_runs = max_runs
+        self.max_worker_bytes = max_worker_mb * 1024 * 1024
+        self.jobs = queue.Queue()
+        self.workers = []
+
+    @property
+    def running(self):
+        return bool(self.workers)
+
+    def start(self):
+        """Start the worker processes in the background"""
+        if self.workers:
+            return
+        self.workers = [ScriptWorker(self) for _ in range(self.size)]
+        for worker in self.workers:
+            worker.thread.start()
+
+    def run(self, key, code="", path=None, timeout=DEFAULT_TIMEOUT):
+        """Queue a script - inline code, or the file at path - for the next free worker"""
+        self.start()
+        self.jobs.put(ScriptJob(key, code, path, timeout))
+
+    def pending(self):
+        return self.jobs.qsize()
+
+    def stop(self):
+        """Stop every worker once it finishes its current script"""
+        for _ in self.workers:
+            self.jobs.put(None)
+        self.workers = []
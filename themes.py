@@ -0,0 +1,58 @@
+"""
+Theme Palettes for Mango Stream Deck
+Precomputed per-theme colors so switching themes never re-renders keys
+"""
+
+from functools import lru_cache
+
+
+THEME_PALETTES = {
+    "dark": {
+        "window_bg": "#1a1a1a",
+        "dialog_bg": "#2b2b2b",
+        "section_bg": "#2b2b2b",
+        "key_blend_bg": (43, 43, 43),
+        "label": "🌙 Dark Mode",
+    },
+    "light": {
+        "window_bg": "#ebebeb",
+        "dialog_bg": "#ebebeb",
+        "section_bg": "#d0d0d0",
+        "key_blend_bg": (235, 235, 235),
+        "label": "☀️ Light Mode",
+    },
+}
+
+
+@lru_cache(maxsize=1024)
+def blend_color(base_color, opacity, background):
+    """Blend a #rrggbb color over an (r, g, b) background at opacity (0-100)"""
+    if opacity >= 100 or not base_color.startswith("#") or len(base_color) != 7:
+        return base_color
+    try:
+        hex_color = base_color.lstrip('#')
+        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return base_color
+
+    alpha = opacity / 100.0
+    bg_r, bg_g, bg_b = background
+    final_r = int(r * alpha + bg_r * (1 - alpha))
+    final_g = int(g * alpha + bg_g * (1 - alpha))
+    final_b = int(b * alpha + bg_b * (1 - alpha))
+    return f"#{final_r:02x}{final_g:02x}{final_b:02x}"
+
+
+@lru_cache(maxsize=1024)
+def key_palette(base_color, opacity):
+    """
+    Return a key's fill as a CustomTkinter (light, dark) color pair.
+
+    CustomTkinter picks the matching entry on appearance changes, so a theme
+    switch only swaps colors on the existing widgets.
+    """
+    light = blend_color(base_color, opacity, THEME_PALETTES["light"]["key_blend_bg"])
+    dark = blend_color(base_color, opacity, THEME_PALETTES["dark"]["key_blend_bg"])
+    if light == dark:
+        return base_color
+    return (light, dark)
@@ -0,0 +1,154 @@
+"""
+Warm Start for Mango Stream Deck
+A binary snapshot of the prepared deck: the normalized config, compiled
+action plans and an atlas of rendered key faces. It is only used while the
+config, layout journal and app version match what it was built from, and is
+memory-mapped so only the faces actually shown are read.
+
+File layout:
+    MAGIC | header length (8 bytes, little endian) | marshal header | face atlas
+"""
+
+import hashlib
+import marshal
+import mmap
+import os
+import sys
+
+from PIL import Image
+
+MAGIC = b"MSDWARM1"
+PREFIX_SIZE = len(MAGIC) + 8
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def file_hash(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def snapshot_key(app_version, config_path, journal_path):
+    """What a snapshot must have been built from to be reused"""
+    return {
+        "app_version": app_version,
+        # marshal's format follows the Python version
+        "python": tuple(sys.version_info[:2]),
+        "config": file_signature(config_path),
+        "journal": file_signature(journal_path),
+    }
+
+
+class WarmStart:
+    """An opened snapshot; faces are copied out of the mapping on request"""
+
+    def __init__(self, header, mapping, file):
+        self.config = header["config"]
+        self.plans = header["plans"]
+        self._faces = header["faces"]  # key ID -> (base key, icon signature, offset, mode, width, height)
+        self._data_start = header["data_start"]
+        self._mapping = mapping
+        self._file = file
+
+    def face(self, key_id, base_key, image_path):
+        """Rendered base face of a key, or None if missing or its icon changed"""
+        entry = self._faces.get(key_id)
+        if entry is None or self._mapping is None:
+            return None
+        face_key, icon_signature, offset, mode, width, height = entry
+        if face_key != base_key or file_signature(image_path) != icon_signature:
+            return None
+        start = self._data_start + offset
+        size = width * height * len(mode)
+        return Image.frombytes(mode, (width, height), self._mapping[start:start + size])
+
+    def close(self):
+        if self._mapping is not None:
+            self._mapping.close()
+            self._file.close()
+            self._mapping = None
+
+
+def load(path, app_version, config_path, journal_path):
+    """Open a snapshot that still matches the config, or return None"""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return None
+    try:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        f.close()
+        return None
+
+    try:
+        if mapping[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a warm start snapshot")
+        header_size = int.from_bytes(mapping[len(MAGIC):PREFIX_SIZE], "little")
+        header = marshal.loads(mapping[PREFIX_SIZE:PREFIX_SIZE + header_size])
+
+        key = snapshot_key(app_version, config_path, journal_path)
+        stored = header["key"]
+        if (stored["app_version"], stored["python"], stored["journal"]) != (
+            key["app_version"], key["python"], key["journal"]
+        ):
+            raise ValueError("built by another version or layout")
+        if stored["config"] != key["config"] and header["config_hash"] != file_hash(config_path):
+            raise ValueError("config changed")
+    except (ValueError, EOFError, TypeError, KeyError):
+        mapping.close()
+        f.close()
+        return None
+
+    header["data_start"] = PREFIX_SIZE + header_size
+    return WarmStart(header, mapping, f)
+
+
+def write(path, app_version, config_path, journal_path, config, plans, faces):
+    """
+    Write a snapshot for the config currently on disk.
+
+    faces maps key ID -> (base key, icon path, PIL image).
+    """
+    atlas = []
+    face_index = {}
+    offset = 0
+    for key_id, (base_key, image_path, img) in faces.items():
+        data = img.tobytes()
+        face_index[key_id] = (base_key, file_signature(image_path), offset, img.mode, img.width, img.height)
+        atlas.append(data)
+        offset += len(data)
+
+    temp_path = path + ".part"
+    try:
+        header = marshal.dumps({
+            "key": snapshot_key(app_version, config_path, journal_path),
+            "config_hash": file_hash(config_path),
+            "config": config,
+            "plans": plans,
+            "faces": face_index,
+        })
+        with open(temp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for data in atlas:
+                f.write(data)
+        os.replace(temp_path, path)
+    except (ValueError, TypeError) as e:
+        # A plugin's config or plan holding something marshal cannot store - start cold next time
+        print(f"Skipping warm start snapshot: {e}")
+    except OSError as e:
+        print(f"Error writing warm start snapshot: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)